@@ -1,5 +1,6 @@
 """ Execute operations on a cluster with the LoadLeveler scheduler """
 
+import ast
 import os
 import time
 import logging.handlers
@@ -478,8 +479,8 @@ class LoadLevelerComHandler(threading.Thread):
             :is_ready;*nr_subflows*;*subflow_ids*:
                 Asks the listener which of the *nr_subflows* subflows 
                 (identified by their subflow_id) have already finished executing. 
-                *subflow_ids* must be a string representation of a set. The
-                listener sends the set of finished ids back. 
+                *subflow_ids* must be a string representation of a list. The
+                listener sends the list of finished ids back. 
                 
             :execute_subflows;*path*;*nr_subflows*;*subflow_ids*;*runs*:
                 Asks the listener to execute *nr_subflows* subflows.
@@ -538,21 +539,23 @@ class LoadLevelerComHandler(threading.Thread):
         elif message.startswith('execute_subflows'):
             text = message.split(';')
             path, runs = text[1], text[-1]
-            nr_subflows, subflow_ids = [eval(s) for s in text[2:-1]]
+            nr_subflows, subflow_ids = [ast.literal_eval(s)
+                                        for s in text[2:-1]]
             assert(nr_subflows == len(subflow_ids)), "incorrect number of subflows"
             # check if we can submit new jobs
             self.control_subflow_submission(path, runs, subflow_ids)
             self.data[conn][1] = str("OK") + self.end_token
         elif message.startswith('is_ready'):
             text = message.split(';')
-            nr_requested, requested_subflows = [eval(s) for s in text[1:]]
+            nr_requested, requested_subflows = [ast.literal_eval(s)
+                                                for s in text[1:]]
             assert(nr_requested == len(requested_subflows)), "incorrect number"\
                                                                   " of subflows"
             # check which subflows have already finished and tell to client
-            finished = requested_subflows & self.subflow_ids_finished
+            finished = set(requested_subflows) & self.subflow_ids_finished
             # .. todo: maybe reduced self.subflow_ids_finished since they are
             # unique and will never be requested again
-            self.data[conn][1] = str(finished) + self.end_token
+            self.data[conn][1] = str(sorted(finished)) + self.end_token
         # to be able to communicate with the backend in case something went 
         # wrong give the user the possibility to get and set attributes
         elif message.startswith('get_'):
@@ -6,13 +6,15 @@ multicore system without additional settings even on virtual machines.
 
 import os
 import time
+import heapq
+import Queue
 import multiprocessing
 import logging
 import logging.handlers
 import threading
+import traceback
 import socket
 import select
-import cPickle
 import warnings
 
 import pySPACE
@@ -26,12 +28,47 @@ class MulticoreBackend(Backend):
     multicore system without additional settings even on virtual machines.
     Each process corresponds to one combination of input data set and
     parameter choice.
-    
+
+    The processes are streamed to the worker pool as soon as they are created.
+    At most *max_in_flight* processes are submitted to the pool at once and
+    from the up to *lookahead* created processes, the one with the highest
+    :meth:`~pySPACE.missions.operations.base.Process.estimated_cost`
+    is submitted first.
+    The configuration and the logging setup are sent only once to every
+    worker and not with every process.
+    The wall and CPU time of every process and the current throughput
+    are logged.
+
+    Subflows of nodes (e.g. of a parameter optimization) are sent by the
+    :class:`~pySPACE.environments.chains.node_chain.SubflowHandler`
+    over the :class:`SubflowChannel` of the worker
+    to the :class:`LocalComHandler`, which executes them in its own pool,
+    since the workers of this backend are daemonic and cannot start a pool
+    of their own.
+
+    **Parameters**
+
+        :pool_size:
+            Number of worker processes.
+
+            (*optional, default: number of CPUs*)
+
+        :max_in_flight:
+            Number of processes, which are submitted to the pool at once.
+
+            (*optional, default: 2*pool_size*)
+
+        :lookahead:
+            Number of created processes, among which the most expensive
+            is submitted next.
+
+            (*optional, default: 10*pool_size*)
+
     :Author: Anett Seeland (anett.seeland@dfki.de)
     :LastChange: 2012/09/24
     
     """
-    def __init__(self, pool_size = None):
+    def __init__(self, pool_size=None, max_in_flight=None, lookahead=None):
         super(MulticoreBackend, self).__init__()
         
         # Set the number of processes in the pool
@@ -40,25 +77,49 @@ class MulticoreBackend(Backend):
             pool_size = MulticoreBackend.detect_CPUs()
             
         self.pool_size = pool_size
+        self.max_in_flight = max_in_flight if max_in_flight is not None \
+            else 2 * pool_size
+        self.lookahead = lookahead if lookahead is not None \
+            else 10 * pool_size
         
         self.state = "idling"
         
-        # queue for execution
-        self.result_handlers = multiprocessing.Queue(pool_size+2)   
+        # notified by the callback of every finished process
+        self.finished = threading.Condition()
+        self.reset_queue()
         
         self.pool = None
-        self.current_process = 0
         
         self._log("Created MulticoreBackend with pool size %s" % pool_size)
     
     def reset_queue(self):
-        """ Resets the execution queue"""
-        self.result_handlers = multiprocessing.Queue(self.pool_size+2)
+        """ Resets the counters of the submitted and finished processes """
+        self.current_process = 0
+        self.in_flight = 0
+        self.failed_processes = 0
+        # summed wall and CPU time of the finished processes
+        self.process_wall_time = 0.0
+        self.process_cpu_time = 0.0
+        self.start_time = None
         
     def stage_in(self, operation):
         """ Stage the current operation """
         super(MulticoreBackend, self).stage_in(operation)
-        self.pool = multiprocessing.Pool(processes = self.pool_size)
+        # The handler that is used remotely for logging
+        handler_class = logging.handlers.SocketHandler
+        handler_args = {"host" : self.host, "port" : self.port}
+        backend_com = (self.SERVER_IP, self.SERVER_PORT)
+        # queues to exchange subflow jobs between the workers and the
+        # LocalComHandler: one for the requests and one reply queue per worker
+        self.subflow_requests = multiprocessing.Queue()
+        self.subflow_replies = [multiprocessing.Queue()
+                                for i in range(self.pool_size)]
+        # the workers get everything to prepare the processes only once
+        self.pool = multiprocessing.Pool(
+            processes=self.pool_size, initializer=_initialize_worker,
+            initargs=(pySPACE.configuration, handler_class, handler_args,
+                      backend_com, self.subflow_requests, self.subflow_replies,
+                      multiprocessing.Value("i", 0)))
         
         # Set up progress bar
         widgets = ['Operation progress: ', Percentage(), ' ', Bar(), ' ', ETA()]
@@ -76,38 +137,69 @@ class MulticoreBackend(Backend):
         self._log("Operation - executing")
         self.state = "executing" 
         
-        # The handler that is used remotely for logging
-        handler_class = logging.handlers.SocketHandler
-        handler_args = {"host" : self.host, "port" : self.port}
-        backend_com = (self.SERVER_IP, self.SERVER_PORT)
-        
         # A socket communication thread to handle e.g. subflows
-        self.listener = LocalComHandler(self.sock)
+        self.listener = LocalComHandler(self.sock, self.subflow_requests,
+                                        self.subflow_replies)
         self.listener.start()
         
-        try:
-            process = self.current_operation.processes.get()
-        except KeyboardInterrupt:
-            process = False
-        # Until not all Processes have been created prepare all processes
-        # from the queue for remote execution and execute them
-        while process != False:
-            process.prepare(pySPACE.configuration, handler_class, handler_args,
-                            backend_com)
-            # since preparing the process might be quite faster than executing
-            # it we need another queue where processes get out when they have
-            # finished execution
-            self.result_handlers.put(1)
-            # Execute all functions in the process pool but return immediately
-            self.pool.apply_async(process, callback=self.dequeue_process)
-            process = self.current_operation.processes.get()
-            time.sleep(0.1)
+        self.start_time = time.time()
+        # heap of the created but not yet submitted processes,
+        # ordered by decreasing cost and then by creation
+        waiting = []
+        created = 0
+        creation_finished = False
+        while True:
+            # wait until the pool can take another process
+            self.finished.acquire()
+            while self.in_flight >= self.max_in_flight:
+                self.finished.wait()
+            self.finished.release()
+            # Take the created processes, but block only if there is
+            # no other process to submit
+            while not creation_finished and len(waiting) < self.lookahead:
+                try:
+                    process = self.current_operation.processes.get(
+                        block=len(waiting) == 0)
+                except Queue.Empty:
+                    break
+                except KeyboardInterrupt:
+                    self._log(traceback.format_exc(), level=logging.ERROR)
+                    process = False
+                if process == False:
+                    creation_finished = True
+                else:
+                    heapq.heappush(waiting,
+                                   (-process.estimated_cost(), created, process))
+                    created += 1
+            if len(waiting) == 0:
+                break
+            process = heapq.heappop(waiting)[2]
+            self.finished.acquire()
+            self.in_flight += 1
+            self.finished.release()
+            # Execute the process in the pool but return immediately
+            self.pool.apply_async(_execute_process, args=(process,),
+                                  callback=self.dequeue_process)
 
     def dequeue_process(self, result):
         """ Callback function for finished processes """
+        wall_time, cpu_time, success = result
+        self.finished.acquire()
+        self.in_flight -= 1
         self.current_process += 1
-        self.result_handlers.get()
+        if not success:
+            self.failed_processes += 1
+        self.process_wall_time += wall_time
+        self.process_cpu_time += cpu_time
+        self.finished.notify()
+        self.finished.release()
         self.progress_bar.update(self.current_process)
+        elapsed = time.time() - self.start_time
+        self._log("Process %d of %d finished after %.2fs (CPU time %.2fs), "
+                  "throughput %.2f processes/s"
+                  % (self.current_process,
+                     self.current_operation.number_processes, wall_time,
+                     cpu_time, self.current_process / max(elapsed, 1e-6)))
     
     def check_status(self):
         """ Return a description of the current state of the operations execution
@@ -138,11 +230,15 @@ class MulticoreBackend(Backend):
             self.current_operation.create_process.join()
         self.pool.join() # Wait for worker processes to exit
         self._log("Worker processes have exited gracefully")
-        self.result_handlers.close()
+        elapsed = time.time() - self.start_time
+        self._log("Executed %d processes (%d failed) in %.2fs: %.2f processes/s,"
+                  " summed process time %.2fs, summed CPU time %.2fs"
+                  % (self.current_process, self.failed_processes, elapsed,
+                     self.current_process / max(elapsed, 1e-6),
+                     self.process_wall_time, self.process_cpu_time))
         # inform listener that its time to die
-        self.listener.operation_finished = True   
-        time.sleep(1)
-        self.listener.join()     
+        self.listener.stop()
+        self.listener.join()
         # Change the state to finished
         self.state = "retrieved"
     
@@ -173,7 +269,7 @@ class MulticoreBackend(Backend):
         self.sock.close()
         
         self.current_operation = None
-        self.current_process = 0
+        self.reset_queue()
         
     @classmethod
     def detect_CPUs(cls):
@@ -205,19 +301,38 @@ class LocalComHandler(threading.Thread):
     which handles incoming connections (e.g. from nodes that want to
     compute subflows).
     
+    Subflow jobs of the workers are not sent over the socket but
+    received from the queue *subflow_requests* by a second thread
+    (see :class:`SubflowChannel`). They are executed in a pool of
+    worker processes and the results are put into the reply queue
+    of the requesting worker.
+
     **Parameters**
     
         :sock:
             The socket object to which messages are send.
+
+        :subflow_requests:
+            Queue of the subflow jobs of the workers
+
+            (*optional, default: None*)
+
+        :subflow_replies:
+            List of the reply queues of the workers
+
+            (*optional, default: None*)
     """
-    def __init__(self, sock):
+    def __init__(self, sock, subflow_requests=None, subflow_replies=None):
         threading.Thread.__init__(self)
         self.sock = sock
         self.subflow_pool = None
-        self.results = {}
-        # variables for monitoring
-        self.subflow_ids_running = set()
-        self.subflow_ids_finished = set()
+        self.subflow_requests = subflow_requests
+        self.subflow_replies = subflow_replies
+        self.subflow_thread = None
+        if subflow_requests is not None:
+            self.subflow_thread = threading.Thread(
+                target=self.handle_subflow_requests)
+            self.subflow_thread.daemon = True
         # flag from backend to stop run-method
         self.operation_finished = False
         # initialize select concept (multiplexing of socket connections)
@@ -230,13 +345,21 @@ class LocalComHandler(threading.Thread):
         self.data = {}
         # end flag of messages
         self.end_token = "!END!"
+        # pipe to wake up the select call, when the operation is finished
+        self.wakeup_pipe = os.pipe()
+        self.readers.append(self.wakeup_pipe[0])
         
     def run(self):
         """ Accept, read and write on connections until the operation is finished """ 
+        if self.subflow_thread is not None:
+            self.subflow_thread.start()
         while not (self.operation_finished):
             # multiplexing on potentially requests (in self.readers/writers)
             readable, writable, others = select.select(self.readers, 
-                                                          self.writers, [], 1.0)
+                                                          self.writers, [])
+            if self.wakeup_pipe[0] in readable:
+                os.read(self.wakeup_pipe[0], 1)
+                readable.remove(self.wakeup_pipe[0])
             if self.sock in readable:
                 conn, _ = self.sock.accept()
                 self.readers.append(conn)
@@ -273,9 +396,19 @@ class LocalComHandler(threading.Thread):
                     # If writbuf is empty, remove socket from potentially writers
                     if not self.data[writer][1]:
                         self.writers.remove(writer)
+        for fd in self.wakeup_pipe:
+            os.close(fd)
+        if self.subflow_thread is not None:
+            self.subflow_requests.put(None)
+            self.subflow_thread.join()
         if not self.subflow_pool is None:
             self.subflow_pool.close()
             self.subflow_pool.join()
+
+    def stop(self):
+        """ Let the thread finish without waiting for a timeout """
+        self.operation_finished = True
+        os.write(self.wakeup_pipe[1], "x")
     
     def close_sock(self, conn):
         """ Close connection and remove it from lists of potentially readers/writers """
@@ -294,85 +427,143 @@ class LocalComHandler(threading.Thread):
             :name:
                 Sends back the name of the backend, i.e. 'mcore'.
             
-            :subflow_poolsize;*poolsize*:
-                Create a multiprocessing Pool object with *poolsize* worker
-                threads for executing subflows.
-            
-            :is_ready;*nr_subflows*;*subflow_ids*:
-                Asks the listener which of the *nr_subflows* subflows 
-                (identified by their subflow_id) have already finished executing. 
-                *subflow_ids* must be a string representation of a set. The
-                listener sends the set of finished ids back. 
-            
-            :execute_subflows;*path*;*nr_subflows*;*subflow_obj*;*runs*:
-                Asks the listener to execute *nr_subflows* subflows via a
-                multiprocessing Pool. *path* is the absolute path where the 
-                training data is stored, e.g. the *temp_dir* of a node. 
-                *subflow_obj* are pickled strings of the subflows. *runs* is a 
-                list containing the run numbers the flow should be executed 
-                with: the *run_number* determines the random seed, e.g., for a 
-                splitter node.
-            
-            :send_results;*subflow_ids*:
-                Sends back a list of results (PerformanceResultSummary) of *subflow_ids*.
-            
+        Subflows are not exchanged over the socket,
+        but with the :class:`SubflowChannel` of the workers.
         """
         end_ind = self.data[conn][0].find(self.end_token)
         message = self.data[conn][0][:end_ind]
         if message == 'name':
             self.data[conn][1] = 'mcore' + self.end_token
-        elif message.startswith('subflow_poolsize'):
-            if self.subflow_pool == None:
-                text = message.split(';')
-                self.subflow_pool = multiprocessing.Pool(processes=int(text[1]))  
-        elif message.startswith('execute_subflows'):
-            text = message.split(';')
-            if len(text) > 5: # splitted within pickled object :-(
-                subflow_str = eval(";".join(text[3:-1]))
-            else:
-                subflow_str = eval(text[3])
-            path, runs, nr_subflows = text[1], eval(text[-1]), eval(text[2])
-            subflows = [cPickle.loads(s) for s in subflow_str]
-            subflow_ids = [s.id for s in subflows]
-            assert(nr_subflows == len(subflows)), "incorrect number of subflows"
-            # load training data and submit calculation to the pool
-            training_data_path = os.path.join(path,'subflow_data.pickle')
-            train_instances = cPickle.load(open(training_data_path, 'rb'))            
-            for subflow in subflows:
-                self.subflow_pool.apply_async(func=subflow, 
-                                        kwds={"train_instances":train_instances,
-                                              "runs": runs}, 
-                                        callback=self.subflow_finished)
-            # minitor running jobs
-            self.subflow_ids_running.update(subflow_ids)
-        elif message.startswith('is_ready'):
-            text = message.split(';')
-            nr_requested, requested_subflows = [eval(s) for s in text[1:]]
-            assert(nr_requested == len(requested_subflows)), "incorrect number"\
-                                                                  " of subflows"
-            # check which subflows have already finished and tell to client
-            finished = requested_subflows & self.subflow_ids_finished
-            # .. todo: maybe reduced self.subflow_ids_finished since they are
-            # unique and will never be requested again
-            self.data[conn][1] = str(finished) + self.end_token
-        elif message.startswith('send_results'):
-            text = message.split(';')
-            subflow_ids = eval(text[1])
-            requested_results = [cPickle.dumps(self.results[i], 
-                                               cPickle.HIGHEST_PROTOCOL) \
-                                     for i in subflow_ids]
-            # delete requested results to free memory
-            for key in subflow_ids:
-                del self.results[key]
-            self.data[conn][1] = str(requested_results) + self.end_token
         else:
             warnings.warn("Got unknown message: %s" % message)
         self.data[conn][0] = self.data[conn][0][end_ind+len(self.end_token):]
         
-    def subflow_finished(self, result):
-        """ Callback method for pool execution of subflows """
-        # result is a tuple of flow_id and PerformanceResultSummary
-        flow_id, result_collection = result
-        self.results[flow_id]= result_collection
-        self.subflow_ids_running.remove(flow_id)
-        self.subflow_ids_finished.add(flow_id)
+    def handle_subflow_requests(self):
+        """ Execute the subflow jobs of the workers until None is received
+
+        A request is a tuple of the index of the reply queue, the size of
+        the subflow pool, a function and a list of argument tuples.
+        For every argument tuple, a tuple of its position, the success and
+        the result (or the traceback) is put into the reply queue.
+        """
+        while True:
+            request = self.subflow_requests.get()
+            if request is None:
+                break
+            index, pool_size, function, args_list = request
+            if self.subflow_pool is None:
+                self.subflow_pool = multiprocessing.Pool(processes=pool_size)
+            reply = self.subflow_replies[index].put
+            for position, args in enumerate(args_list):
+                self.subflow_pool.apply_async(
+                    _call_safely, args=(function, args),
+                    callback=lambda result, position=position, reply=reply:
+                        reply((position,) + result))
+
+
+class SubflowChannel(object):
+    """ Exchange of subflow jobs between a worker and the LocalComHandler
+
+    The jobs are put into the request queue, which is read by the
+    :class:`LocalComHandler` in the main process, and the results are
+    received with blocking reads from the reply queue of this worker.
+    Hence, no socket connection and no polling is needed.
+
+    **Parameters**
+
+        :requests:
+            Queue of the requests of all workers
+
+        :replies:
+            Reply queue of this worker
+
+        :index:
+            Index of the reply queue of this worker
+    """
+    def __init__(self, requests, replies, index):
+        self.requests = requests
+        self.replies = replies
+        self.index = index
+
+    def map(self, function, args_list, pool_size):
+        """ Compute function(*args) for every tuple in *args_list*
+
+        The function is executed in the subflow pool of the LocalComHandler,
+        which is created with *pool_size* processes, if not yet existing.
+        Blocks until all results are received and returns them in the order
+        of *args_list*. If a job failed, an Exception with the traceback
+        is raised.
+        """
+        self.requests.put((self.index, pool_size, function, list(args_list)))
+        results = [None] * len(args_list)
+        errors = []
+        # all replies have to be received, even if a job failed
+        for i in range(len(args_list)):
+            position, success, result = self.replies.get()
+            if success:
+                results[position] = result
+            else:
+                errors.append(result)
+        if errors:
+            raise Exception("Subflow execution failed:\n%s" % errors[0])
+        return results
+
+
+def _call_safely(function, args):
+    """ Return success and result of function(*args) or the traceback """
+    try:
+        return True, function(*args)
+    except Exception:
+        return False, traceback.format_exc()
+
+
+# configuration and logging setup of the current worker process
+_worker_setup = None
+# SubflowChannel of the current worker process
+_subflow_channel = None
+
+def _initialize_worker(configuration, handler_class, handler_args, backend_com,
+                       subflow_requests=None, subflow_replies=None,
+                       worker_counter=None):
+    """ Store what is needed to prepare the processes in the worker
+
+    Every worker gets its own reply queue for subflow jobs. Workers,
+    which replace crashed workers, get none.
+    """
+    global _worker_setup, _subflow_channel
+    _worker_setup = (configuration, handler_class, handler_args, backend_com)
+    if subflow_requests is not None:
+        with worker_counter.get_lock():
+            index = worker_counter.value
+            worker_counter.value += 1
+        if index < len(subflow_replies):
+            _subflow_channel = SubflowChannel(subflow_requests,
+                                              subflow_replies[index], index)
+
+def subflow_channel():
+    """ SubflowChannel of the current worker or None outside of workers """
+    return _subflow_channel
+
+def _execute_process(process):
+    """ Execute the process in a worker and return wall time, CPU time and success
+
+    Exceptions (also of the preparation) are logged, so that the backend
+    keeps on executing the other processes of the operation and always
+    gets a result for the process.
+    """
+    start_wall_time = time.time()
+    start_cpu_time = sum(os.times()[:4])
+    success = True
+    try:
+        process.prepare(*_worker_setup)
+        process()
+    except Exception:
+        process._log(traceback.format_exc(), level=logging.ERROR)
+        try:
+            process.post_benchmarking()
+        except Exception:
+            # the process might not even be prepared
+            pass
+        success = False
+    return (time.time() - start_wall_time,
+            sum(os.times()[:4]) - start_cpu_time, success)
@@ -73,17 +73,22 @@ if __name__ == '__main__':
         sys.path.append(pyspace_path)
 
 import cPickle
+import ast
 import gc
+import itertools
 import logging
 import multiprocessing
+import multiprocessing.pool
 import shutil
 import socket
+import tempfile
 import time
 import uuid
 import yaml
 import pySPACE
 from pySPACE.tools.filesystem import create_directory
 from pySPACE.tools.socket_utils import talk, inform
+from pySPACE.environments.backends.multicore import subflow_channel
 
 import warnings
 import traceback
@@ -179,6 +184,8 @@ class NodeChain(object):
         self.id = str(uuid.uuid4())
         self.handler = None
         self.store_intermediate_results = True
+        #: number of windows, which are processed at once by batch nodes
+        self.batch_size = 1
 
     def train(self, data_iterators=None):
         """  Train NodeChain with data from iterator or source node
@@ -315,15 +322,34 @@ class NodeChain(object):
             return self._execute_seq(iterable, nodenr)
         res = []
         empty_iterator = True
-        for x in iterable:
-            empty_iterator = False
-            res.append(self._execute_seq(x, nodenr))
+        if getattr(self, "batch_size", 1) > 1:
+            iterator = iter(iterable)
+            while True:
+                batch = list(itertools.islice(iterator, self.batch_size))
+                if len(batch) == 0:
+                    break
+                empty_iterator = False
+                res.extend(self._execute_seq_batch(batch, nodenr))
+        else:
+            for x in iterable:
+                empty_iterator = False
+                res.append(self._execute_seq(x, nodenr))
         if empty_iterator:
             errstr = ("The execute data iterator is empty.")
             raise NodeChainException(errstr)
         return res
 
+    def set_batch_size(self, batch_size):
+        """ Set the number of windows which are processed at once
 
+        The windows are stacked and given to the *_execute_batch* method
+        of all nodes which implement it.
+        All other nodes ignore this setting and process the data
+        window by window.
+        """
+        self.batch_size = int(batch_size)
+        for node in self.flow:
+            node.set_permanent_attributes(batch_size=self.batch_size)
 
     def save(self, filename, protocol = -1):
         """ Save a pickled representation to *filename*
@@ -594,6 +620,22 @@ class NodeChain(object):
                 self._propagate_exception(e, node_index)
         return x
 
+    def _execute_seq_batch(self, data_list, nodenr = None):
+        """ Executes the list of data objects through the nodes 0..'node_nr'
+
+        Same as :func:`_execute_seq` but the whole list is given to each
+        node at once, to use vectorized batch execution where possible.
+        """
+        flow = self.flow
+        if nodenr is None:
+            nodenr = len(flow)-1
+        for node_index in range(nodenr+1):
+            try:
+                data_list = flow[node_index].execute_batch(data_list)
+            except Exception, e:
+                self._propagate_exception(e, node_index)
+        return data_list
+
     def copy(self, protocol=None):
         """Return a deep copy of the flow.
 
@@ -790,7 +832,8 @@ class BenchmarkNodeChain(NodeChain):
         return self[-1].use_next_split()
 
     def benchmark(self, input_collection, run=0,
-                  persistency_directory=None, store_node_chain=False):
+                  persistency_directory=None, store_node_chain=False,
+                  split_processes=1):
         """ Perform the benchmarking of this data flow with the given collection
 
         Benchmarking is accomplished by iterating through all splits of the
@@ -816,7 +859,40 @@ class BenchmarkNodeChain(NodeChain):
                 only the subflow starting at the i1-th node and ending at the
                 (i2-1)-th node is stored. This may be useful when the stored
                 flow should be used in an ensemble.
+
+            :split_processes:
+                Number of processes, which process the splits in parallel
+                (see :func:`_benchmark_parallel_splits`).
+
+                (*optional, default: 1*)
         """
+        self._start_benchmark(input_collection, run, persistency_directory)
+
+        if split_processes > 1 and any(node.is_split_node() for node in self):
+            self._benchmark_parallel_splits(
+                int(split_processes), persistency_directory, store_node_chain)
+            self._finish_benchmark(input_collection)
+            return self[-1].get_result_dataset()
+
+        split_counter = 0
+
+        # For every split of the dataset
+        while True: # As long as more splits are available
+            self._benchmark_split(persistency_directory, store_node_chain,
+                                  split_counter)
+
+            # If no more splits are available
+            if not self.use_next_split():
+                break
+
+            split_counter += 1
+
+        self._finish_benchmark(input_collection)
+        # Return the result collection of this flow
+        return self[-1].get_result_dataset()
+
+    def _start_benchmark(self, input_collection, run, persistency_directory):
+        """ Give the input, the run number and the temp dir to the nodes """
         # Inform the first node of this flow about the input collection
         if hasattr(input_collection,'__iter__'):
             # assume a generator is given
@@ -830,28 +906,110 @@ class BenchmarkNodeChain(NodeChain):
         if persistency_directory != None:
             self[-1].set_temp_dir(persistency_directory+os.sep+"temp_dir")
 
+    def _benchmark_split(self, persistency_directory, store_node_chain,
+                         split_counter):
+        """ Compute and store the results for the current split """
+        # Compute the results for the current split
+        # by calling the method on its last node
+        self[-1].process_current_split()
+        self._store_split(persistency_directory, store_node_chain,
+                          split_counter)
+
+    def _store_split(self, persistency_directory, store_node_chain,
+                     split_counter):
+        """ Store the node chain and the nodes after processing a split """
+        if persistency_directory != None:
+            if store_node_chain:
+                self.store_node_chain(persistency_directory + os.sep + \
+                            "node_chain_sp%s.pickle" % split_counter, store_node_chain)
+
+            # Store nodes that should be persistent
+            self.store_persistent_nodes(persistency_directory)
+
+    def _benchmark_parallel_splits(self, processes, persistency_directory,
+                                   store_node_chain):
+        """ Process the splits in parallel and give the results to the sink
+
+        The data of the split node is created first,
+        such that the forked processes share it (copy on write).
+        Each of the *processes* gets a copy of the untrained node chain
+        and processes every *processes*-th split
+        (see :func:`_record_splits`).
+        The nodes are trained, executed and stored in these processes.
+        Only the data, which the sink node requests for each split,
+        is sent back. Finally, the sink node of this node chain processes
+        the recorded data of all splits in their original order,
+        which gives the same result collection as the sequential processing.
+        Only time measurements of the sink do not include the processing
+        of the preceding nodes.
+        The processes are started with a :class:`SplitPool`, so this
+        works in daemonic processes as well, e.g., in the workers of the
+        backend pool.
+
+        .. note:: The nodes of this node chain (except the sink) are not
+                  trained afterwards.
+        """
+        global _parallel_node_chain
+        # request the data of the split node in this process
+        split_node = [node for node in self if node.is_split_node()][0]
+        split_node.request_data_for_testing()
+        _parallel_node_chain = self
+        pool = SplitPool(processes)
+        try:
+            recorded_splits = pool.map(
+                _record_splits,
+                [(index, processes, persistency_directory, store_node_chain)
+                 for index in range(processes)])
+        finally:
+            pool.close()
+            pool.join()
+            _parallel_node_chain = None
+        recorded_splits = sorted(itertools.chain(*recorded_splits))
+        sink = self[-1]
+        input_node = sink.input_node
+        sink.register_input_node(
+            RecordedSplitData(input_node,
+                              [requests for split, requests in recorded_splits]))
+        try:
+            while True:
+                sink.process_current_split()
+                if not sink.use_next_split():
+                    break
+        finally:
+            sink.register_input_node(input_node)
+
+    def _record_splits(self, process_index, processes, persistency_directory,
+                       store_node_chain):
+        """ Process every *processes*-th split starting at *process_index*
+
+        Returns a list of the numbers of the processed splits and the
+        data requested by the sink node in these splits
+        (see :class:`SplitDataRecorder`).
+        The other splits are skipped by switching to the next split
+        without requesting any data.
+        """
+        recorded_splits = []
+        sink = self[-1]
+        input_node = sink.input_node
         split_counter = 0
-
-        # For every split of the dataset
-        while True: # As long as more splits are available
-            # Compute the results for the current split
-            # by calling the method on its last node
-            self[-1].process_current_split()
-
-            if persistency_directory != None:
-                if store_node_chain:
-                    self.store_node_chain(persistency_directory + os.sep + \
-                                "node_chain_sp%s.pickle" % split_counter, store_node_chain)
-
-                # Store nodes that should be persistent
-                self.store_persistent_nodes(persistency_directory)
-
-            # If no more splits are available
+        while True:
+            if split_counter % processes == process_index:
+                recorder = SplitDataRecorder(input_node)
+                sink.register_input_node(recorder)
+                try:
+                    sink.process_current_split()
+                finally:
+                    sink.register_input_node(input_node)
+                self._store_split(persistency_directory, store_node_chain,
+                                  split_counter)
+                recorded_splits.append((split_counter, recorder.requests))
             if not self.use_next_split():
                 break
-
             split_counter += 1
+        return recorded_splits
 
+    def _finish_benchmark(self, input_collection):
+        """ Free the input collection after the last split """
         # print "Input benchmark"
         # print gc.get_referrers(self[0].collection)
 
@@ -866,8 +1024,99 @@ class BenchmarkNodeChain(NodeChain):
         else:
             self[0].set_input_dataset(None)
         gc.collect()
-        # Return the result collection of this flow
-        return self[-1].get_result_dataset()
+
+    @staticmethod
+    def share_prefixes(node_chains, node_chain_specs):
+        """ Let node chains with identical leading nodes use the same nodes
+
+        The node specifications are inserted into a trie.
+        Nodes with equal specification and equal predecessors
+        are replaced by the node of the first node chain,
+        such that they are trained and executed only once.
+        At each branching point of the trie, the shared node caches its
+        output and the following nodes get it with a
+        :class:`SharedNodeOutput`, which synchronizes the splits.
+        The sink nodes are never shared.
+
+        The node chains have to be processed with :func:`benchmark_shared`.
+
+        **Parameters**
+
+            :node_chains: list of unused BenchmarkNodeChain objects
+
+            :node_chain_specs:
+                list of the respective node chain specifications
+                (lists of dictionaries)
+        """
+        # trie entry: [node, children (dictionary of entries), order]
+        root = [None, {}, []]
+        for chain_index, (node_chain, node_chain_spec) in \
+                enumerate(zip(node_chains, node_chain_specs)):
+            entry = root
+            for index, node_spec in enumerate(node_chain_spec):
+                key = yaml.dump(node_spec)
+                if index == len(node_chain_spec) - 1:
+                    key += "%d" % chain_index
+                if key in entry[1]:
+                    node_chain.flow[index] = entry[1][key][0]
+                else:
+                    entry[1][key] = [node_chain.flow[index], {}, []]
+                    entry[2].append(key)
+                entry = entry[1][key]
+        # register the (possibly shared) predecessors again and cache,
+        # where the output is used several times
+        for node_chain in node_chains:
+            for index in range(1, len(node_chain)):
+                node_chain[index].register_input_node(node_chain[index - 1])
+                if node_chain[index].is_trainable() or \
+                        node_chain[index].is_split_node():
+                    node_chain[index - 1].set_permanent_attributes(
+                        caching=True)
+        entries = [root[1][key] for key in root[2]]
+        while entries:
+            node, children, order = entries.pop()
+            if len(children) > 1:
+                node.set_permanent_attributes(caching=True)
+                split_state = {"consumers": len(children), "calls": 0,
+                               "has_more_splits": None}
+                for key in order:
+                    children[key][0].register_input_node(
+                        SharedNodeOutput(node, split_state))
+            entries.extend(children[key] for key in order)
+
+    @staticmethod
+    def benchmark_shared(node_chains, input_collection, run=0,
+                         persistency_directories=None,
+                         store_node_chain=False):
+        """ Benchmark node chains which share nodes (see :func:`share_prefixes`)
+
+        In contrast to :func:`benchmark` all node chains are processed
+        split by split, since the shared nodes can only provide
+        the data of one split at a time.
+        The result collections are returned in the order of the node chains.
+        """
+        if persistency_directories is None:
+            persistency_directories = [None] * len(node_chains)
+        for node_chain, persistency_directory in zip(node_chains,
+                                                     persistency_directories):
+            node_chain._start_benchmark(input_collection, run,
+                                        persistency_directory)
+        split_counter = 0
+        while True:
+            for node_chain, persistency_directory in \
+                    zip(node_chains, persistency_directories):
+                node_chain._benchmark_split(persistency_directory,
+                                            store_node_chain, split_counter)
+            # every node chain has to go to the next split
+            has_more_splits = [node_chain.use_next_split()
+                               for node_chain in node_chains]
+            if not has_more_splits[0]:
+                break
+            split_counter += 1
+        for node_chain in node_chains:
+            node_chain._finish_benchmark(input_collection)
+        return [node_chain[-1].get_result_dataset()
+                for node_chain in node_chains]
 
     def __call__(self, iterable=None, train_instances=None, runs=[]):
         """ Call *execute* or *benchmark* and return (id, PerformanceResultSummary)
@@ -958,6 +1207,141 @@ class BenchmarkNodeChain(NodeChain):
             node.store_state(result_dir, index)
 
 
+class SharedNodeOutput(object):
+    """ Input of a node chain, given by a node of another node chain
+
+    All methods and attributes are taken from the shared *node*,
+    except for :func:`use_next_split`.
+    This method is called by each of the successors of the node,
+    but the node may only change to the next split once.
+    Therefore, all successors use the same *split_state* dictionary
+    with the number of *consumers*, the number of *calls* in the current
+    split and the answer of the node (*has_more_splits*).
+
+    For details see :func:`BenchmarkNodeChain.share_prefixes`.
+    """
+    def __init__(self, node, split_state):
+        self.node = node
+        self.split_state = split_state
+
+    def use_next_split(self):
+        """ Switch the shared node to the next split with the first call """
+        if self.split_state["calls"] == 0:
+            self.split_state["has_more_splits"] = self.node.use_next_split()
+        self.split_state["calls"] = \
+            (self.split_state["calls"] + 1) % self.split_state["consumers"]
+        return self.split_state["has_more_splits"]
+
+    def __getattr__(self, name):
+        # no forwarding of the own attributes, e.g., when unpickling
+        if name in ["node", "split_state"]:
+            raise AttributeError(name)
+        return getattr(self.node, name)
+
+
+class SplitDataRecorder(object):
+    """ Input of a sink node, which records the requested data of a split
+
+    The data for training and testing is requested from the *node*
+    and kept in the dictionary *requests*, which maps the request
+    ('train', *use_test_data*) or ('test',) to the list of
+    (data, label) tuples.
+    All other methods and attributes are taken from the *node*.
+
+    For details see :func:`BenchmarkNodeChain._benchmark_parallel_splits`.
+    """
+    def __init__(self, node):
+        self.node = node
+        self.requests = dict()
+
+    def request_data_for_training(self, use_test_data):
+        key = ("train", use_test_data)
+        if key not in self.requests:
+            self.requests[key] = \
+                list(self.node.request_data_for_training(use_test_data))
+        return iter(self.requests[key])
+
+    def request_data_for_testing(self):
+        key = ("test",)
+        if key not in self.requests:
+            self.requests[key] = list(self.node.request_data_for_testing())
+        return iter(self.requests[key])
+
+    def __getattr__(self, name):
+        # no forwarding of the own attributes, e.g., when unpickling
+        if name in ["node", "requests"]:
+            raise AttributeError(name)
+        return getattr(self.node, name)
+
+
+class RecordedSplitData(object):
+    """ Input of a sink node, which replays the data recorded for each split
+
+    *splits* is the list of the *requests* of a :class:`SplitDataRecorder`
+    for every split. :func:`use_next_split` switches to the next entry.
+    All other methods and attributes are taken from the *node*.
+    """
+    def __init__(self, node, splits):
+        self.node = node
+        self.splits = splits
+        self.split = 0
+
+    def request_data_for_training(self, use_test_data):
+        return iter(self.splits[self.split][("train", use_test_data)])
+
+    def request_data_for_testing(self):
+        return iter(self.splits[self.split][("test",)])
+
+    def use_next_split(self):
+        self.split += 1
+        return self.split < len(self.splits)
+
+    def __getattr__(self, name):
+        # no forwarding of the own attributes, e.g., when unpickling
+        if name in ["node", "splits", "split"]:
+            raise AttributeError(name)
+        return getattr(self.node, name)
+
+
+#: node chain of :func:`BenchmarkNodeChain._benchmark_parallel_splits`,
+#: which is inherited by the forked processes
+_parallel_node_chain = None
+
+
+def _record_splits(args):
+    """ Call :func:`BenchmarkNodeChain._record_splits` in a forked process """
+    return _parallel_node_chain._record_splits(*args)
+
+
+class _SplitProcess(multiprocessing.Process):
+    """ Process, which can also be started by a daemonic process
+
+    Daemonic processes, e.g., the workers of the backend pool, are not
+    allowed to have children, since they would be orphaned when the
+    daemonic process is terminated. The processes of the :class:`SplitPool`
+    are joined before the benchmark of the splits returns,
+    so the restriction is lifted while the process is started.
+    """
+    def start(self):
+        """ Start the process even if the current process is daemonic """
+        current_process = multiprocessing.current_process()
+        daemonic = current_process._daemonic
+        current_process._daemonic = False
+        try:
+            super(_SplitProcess, self).start()
+        finally:
+            current_process._daemonic = daemonic
+
+
+class SplitPool(multiprocessing.pool.Pool):
+    """ Pool for the parallel processing of splits in any process
+
+    In contrast to :class:`multiprocessing.Pool` it can be used in daemonic
+    processes (see :class:`_SplitProcess`).
+    """
+    Process = _SplitProcess
+
+
 class NodeChainFactory(object):
     """ Provide static methods to create and instantiate data flows
 
@@ -1056,6 +1440,82 @@ class NodeChainFactory(object):
         return instance
 
 
+# pickled meta data of the shared training data,
+# cached in the worker processes of the subflow pool
+_shared_train_meta = {}
+
+
+def _share_train_instances(train_instances, directory):
+    """ Store *train_instances* in *directory* for the subflow workers
+
+    The arrays of all instances are written one after the other into one file,
+    which the workers map into memory (copy on write), so that they share
+    the data via the page cache of the operating system.
+    Only the types, attributes, positions and labels of the
+    instances are pickled.
+    If the instances are no arrays of one common dtype,
+    they are pickled completely.
+    """
+    arrays = [data.view(numpy.ndarray) if isinstance(data, numpy.ndarray)
+              else None for data, label in train_instances]
+    if len(arrays) > 0 and all(array is not None for array in arrays) \
+            and len(set(array.dtype for array in arrays)) == 1 \
+            and not arrays[0].dtype.hasobject:
+        sizes = numpy.array([array.size for array in arrays], dtype=numpy.int64)
+        offsets = numpy.zeros(len(sizes), dtype=numpy.int64)
+        offsets[1:] = numpy.cumsum(sizes)[:-1]
+        shared = numpy.lib.format.open_memmap(
+            os.path.join(directory, "subflow_data.npy"), mode="w+",
+            dtype=arrays[0].dtype, shape=(int(sizes.sum()),))
+        meta = []
+        for (data, label), array, offset in zip(train_instances, arrays,
+                                                offsets):
+            shared[offset:offset + array.size] = array.ravel()
+            meta.append((type(data), dict(getattr(data, "__dict__", {})),
+                         offset, array.shape, label))
+        shared.flush()
+        del shared
+    else:
+        meta = train_instances
+    meta_file = open(os.path.join(directory, "subflow_data.pickle"), "wb")
+    cPickle.dump(meta, meta_file, cPickle.HIGHEST_PROTOCOL)
+    meta_file.close()
+
+
+def _load_shared_train_instances(directory):
+    """ Create the training instances stored by :func:`_share_train_instances`
+
+    Every call creates new objects, so that subflows can not influence each
+    other by changing the training data.
+    """
+    if not directory in _shared_train_meta:
+        # only the data of the current subflow execution is needed
+        _shared_train_meta.clear()
+        meta_file = open(os.path.join(directory, "subflow_data.pickle"), "rb")
+        _shared_train_meta[directory] = meta_file.read()
+        meta_file.close()
+    meta = cPickle.loads(_shared_train_meta[directory])
+    array_file = os.path.join(directory, "subflow_data.npy")
+    if not os.path.exists(array_file):
+        return meta
+    shared = numpy.load(array_file, mmap_mode="c")
+    train_instances = []
+    for data_type, attributes, offset, shape, label in meta:
+        size = int(numpy.prod(shape))
+        data = shared[offset:offset + size].view(numpy.ndarray).reshape(shape)
+        data = data.view(data_type)
+        if data_type is not numpy.ndarray:
+            data.__dict__.update(attributes)
+        train_instances.append((data, label))
+    return train_instances
+
+
+def _execute_subflow(subflow, directory, runs):
+    """ Execute *subflow* in a worker process with the shared training data """
+    return subflow(train_instances=_load_shared_train_instances(directory),
+                   runs=runs)
+
+
 class SubflowHandler(object):
     """ Interface for nodes to generate and execute subflows (subnode-chains)
 
@@ -1086,6 +1546,21 @@ class SubflowHandler(object):
                     Subflows are executed in a Pool using *pool_size* cpus. This
                     may be also needed when no backend is used.
 
+            The pool of worker processes is kept between calls of
+            :func:`execute_subflows` until :func:`close_subflow_pool`
+            is called. The training instances are passed to the workers
+            only once per set of training instances
+            as memory-mapped file.
+            With the
+            :class:`~pySPACE.environments.backends.multicore.MulticoreBackend`
+            the node runs in a daemonic worker of the backend, which can not
+            start further processes. There, 'local' and 'backend'
+            execute the subflows in the subflow pool of the backend.
+            The jobs are exchanged with the
+            :class:`~pySPACE.environments.backends.multicore.SubflowChannel`
+            of the worker and the training instances are shared as
+            memory-mapped file, too.
+
             (*optional, default: 'serial'*)
 
         :pool_size:
@@ -1128,6 +1603,11 @@ class SubflowHandler(object):
         self.backend_name = None
         # to indicate the end of a message received over a socket
         self.end_token = '!END!'
+        # persistent pool for local subflow execution
+        self.subflow_pool = None
+        # the shared training instances and their directory
+        self.shared_train_instances = None
+        self.shared_data_dir = None
 
         if processing_modality not in ["serial", "local", "backend"]:
             import warnings
@@ -1194,6 +1674,17 @@ class SubflowHandler(object):
         """
         if run_numbers == None:
             run_numbers = [self.run_number]
+        # workers of the MulticoreBackend execute the subflows in the
+        # subflow pool of the backend
+        channel = subflow_channel()
+        if self.modality in ['backend', 'local'] and channel is not None:
+            self._share_train_instances(train_instances)
+            self._log("Executing subflows in the pool of the backend.")
+            results = channel.map(
+                _execute_subflow,
+                [(subflow, self.shared_data_dir, run_numbers)
+                 for subflow in subflows], self.pool_size)
+            return [result[1] for result in results]
         # in case of serial backend, modality is mapped to serial
         # in the other case communication must be set up and
         # jobs need to be submitted to backend
@@ -1213,7 +1704,7 @@ class SubflowHandler(object):
                 "has to be specified! Assuming serial backend.")
                 self.backend_name = 'serial'
             self._log("Preparing subflows for backend execution.")
-            if self.backend_name in ['loadl','mcore'] :
+            if self.backend_name == 'loadl':
                 # we have to pickle training instances and store it on disk
                 store_path = os.path.join(self.temp_dir,
                                                     "sp%d" % self.current_split)
@@ -1224,61 +1715,45 @@ class SubflowHandler(object):
                                               protocol=cPickle.HIGHEST_PROTOCOL)
                 subflows_to_compute = [subflows[ind].id for ind in \
                                                            range(len(subflows))]
-                if self.backend_name == 'loadl':
-                    # send batch_size to backend if not already done
-                    if not self.already_send:
-                        client_socket = inform("subflow_batchsize;%d%s" % \
-                                            (self.batch_size, self.end_token),
-                                            client_socket, self.backend_com)
-                        self.already_send = True
-                    for subflow in subflows:
-                        cPickle.dump(subflow, open(os.path.join(store_path,
-                                                         subflow.id+".pickle"),"wb"),
-                                     protocol=cPickle.HIGHEST_PROTOCOL)
-                    send_flows = subflows_to_compute
-                else: # backend_name == local
-                    # send pool_size to backend if not already done
-                    if not self.already_send:
-                        client_socket = inform("subflow_poolsize;%d%s" % \
-                                            (self.pool_size, self.end_token),
-                                            client_socket, self.backend_com)
-                        self.already_send = True
-                    # send flow objects via socket
-                    send_flows = [cPickle.dumps(subflow, cPickle.HIGHEST_PROTOCOL) \
-                                  for subflow in subflows]
+                # send batch_size to backend if not already done
+                if not self.already_send:
+                    client_socket = inform("subflow_batchsize;%d%s" % \
+                                        (self.batch_size, self.end_token),
+                                        client_socket, self.backend_com)
+                    self.already_send = True
+                for subflow in subflows:
+                    cPickle.dump(subflow, open(os.path.join(store_path,
+                                                     subflow.id+".pickle"),"wb"),
+                                 protocol=cPickle.HIGHEST_PROTOCOL)
                 # inform backend
                 client_socket,msg  = talk('execute_subflows;%s;%d;%s;%s%s' % \
-                                   (store_path, len(subflows), str(send_flows),
+                                   (store_path, len(subflows),
+                                    str(subflows_to_compute),
                                     str(run_numbers), self.end_token),
                                                client_socket, self.backend_com)
-                time.sleep(10)
 
                 not_finished_subflows = set(subflows_to_compute)
+                # the waiting time between requests grows up to 10 seconds
+                poll_interval = 0.5
                 while len(not_finished_subflows) != 0:
+                    time.sleep(poll_interval)
+                    poll_interval = min(2 * poll_interval, 10)
                     # ask backend for finished jobs
                     client_socket, msg = talk('is_ready;%d;%s%s' % \
-                            (len(not_finished_subflows), str(not_finished_subflows),
+                            (len(not_finished_subflows),
+                             str(sorted(not_finished_subflows)),
                              self.end_token), client_socket, self.backend_com)
-                    # parse message
-                    finished_subflows = eval(msg) #should be a set
+                    # parse message (a list of the finished ids)
+                    finished_subflows = set(ast.literal_eval(msg))
                     # set difference
                     not_finished_subflows -= finished_subflows
-                    time.sleep(10)
-
-                if self.backend_name == 'loadl':
-                    # read results and delete store_dir
-                    result_pattern = os.path.join(store_path, '%s_result.pickle')
-                    result_collections = [cPickle.load(open(result_pattern % \
-                        subflows[ind].id,'rb')) for ind in range(len(subflows))]
-                    # ..todo:: check if errors have occurred and if so do not delete!
-                    shutil.rmtree(store_path)
-                else: # backend_name == mcore
-                    # ask backend to send results
-                    client_socket, msg = talk("send_results;%s!END!" % \
-                            subflows_to_compute, client_socket, self.backend_com)
-                    # should be a list of collections
-                    results = eval(msg)
-                    result_collections = [cPickle.loads(result) for result in results]
+
+                # read results and delete store_dir
+                result_pattern = os.path.join(store_path, '%s_result.pickle')
+                result_collections = [cPickle.load(open(result_pattern % \
+                    subflows[ind].id,'rb')) for ind in range(len(subflows))]
+                # ..todo:: check if errors have occurred and if so do not delete!
+                shutil.rmtree(store_path)
                 self._log("Finished subflow execution.")
                 client_socket.shutdown(socket.SHUT_RDWR)
                 client_socket.close()
@@ -1286,11 +1761,25 @@ class SubflowHandler(object):
             elif self.backend_name == 'serial':
                 # do the same as modality=='serial'
                 self.modality = 'serial'
+            elif self.backend_name == 'mcore':
+                # e.g. a worker replacing a crashed worker has no channel
+                import warnings
+                warnings.warn("No subflow channel to the mcore backend,"\
+                              " serial-modality is used!")
+                self.modality = 'serial'
             else: # e.g. mpi backend    :
                 import warnings
                 warnings.warn("Subflow Handling with %s backend not supported,"\
                               " serial-modality is used!" % self.backend_name)
                 self.modality = 'serial'
+        if self.modality == 'local' and \
+                multiprocessing.current_process().daemon:
+            # daemonic processes, e.g. workers of a backend pool,
+            # are not allowed to have children
+            self._log("Subflows are executed serially, since no processes "
+                      "can be started in a daemonic process.",
+                      level=logging.WARNING)
+            self.modality = 'serial'
         if self.modality == 'serial':
             # serial execution
             # .. note:: the here executed flows can not store anything.
@@ -1300,15 +1789,58 @@ class SubflowHandler(object):
             result_collections = [result[1] for result in results]
             return result_collections
         else: # modality local, e.g. usage without backend in application case
-            self._log("Subflow Handler starts processes in pool.")
-            pool = multiprocessing.Pool(processes=self.pool_size)
-            results = [pool.apply_async(func=subflow,
-                                        kwds={"train_instances": train_instances,
-                                              "runs": run_numbers}) \
+            if self.subflow_pool is None:
+                self._log("Subflow Handler starts processes in pool.")
+                self.subflow_pool = \
+                    multiprocessing.Pool(processes=self.pool_size)
+            self._share_train_instances(train_instances)
+            # only the subflow and the location of the data are sent
+            results = [self.subflow_pool.apply_async(
+                           func=_execute_subflow,
+                           args=(subflow, self.shared_data_dir, run_numbers))
                        for subflow in subflows]
-            pool.close()
             self._log("Waiting for parallel processes to finish.")
-            pool.join()
             result_collections = [result.get()[1] for result in results]
-            del pool
             return result_collections
+
+    def _share_train_instances(self, train_instances):
+        """ Store the training instances for the pool, if not yet done
+
+        The instances are identified by the object *train_instances*.
+        A reference to it is kept, so that its id can not be reused,
+        and the instances must not be changed in place between the calls.
+        """
+        if self.shared_train_instances is train_instances:
+            return
+        self._remove_shared_train_instances()
+        temp_dir = getattr(self, "temp_dir", None)
+        if temp_dir is not None:
+            create_directory(temp_dir)
+        self.shared_data_dir = tempfile.mkdtemp(prefix="subflow_data_",
+                                                dir=temp_dir)
+        _share_train_instances(train_instances, self.shared_data_dir)
+        self.shared_train_instances = train_instances
+
+    def _remove_shared_train_instances(self):
+        """ Delete the stored training instances of the pool """
+        if self.shared_data_dir is not None:
+            shutil.rmtree(self.shared_data_dir, ignore_errors=True)
+        self.shared_data_dir = None
+        self.shared_train_instances = None
+
+    def close_subflow_pool(self, terminate=False):
+        """ Terminate the worker processes and delete the shared data
+
+        Should be called, when no further subflows are executed,
+        e.g., at the end of the training of a node.
+        With *terminate* the workers are stopped without waiting for
+        running subflows, e.g., after an error.
+        """
+        if self.subflow_pool is not None:
+            if terminate:
+                self.subflow_pool.terminate()
+            else:
+                self.subflow_pool.close()
+            self.subflow_pool.join()
+            self.subflow_pool = None
+        self._remove_shared_train_instances()
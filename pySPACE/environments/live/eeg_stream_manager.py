@@ -146,9 +146,12 @@ class LiveEegStreamManager(object):
         self.remote.start()
         self.logger.info("started raw-data-recording")
 
-    def request_window_stream(self, window_spec, nullmarker_stride_ms = 1000, no_overlap = False):
+    def request_window_stream(self, window_spec, nullmarker_stride_ms = 1000, no_overlap = False,
+                              pipeline = 0):
         # function to connect a client to a running
         # remote streaming server or local process
+        # with pipeline > 0 the data is received and decoded in a thread
+        # with this number of outstanding requests
         if self.ip is None:
             self.ip = "127.0.0.1" # for the local mode
 
@@ -157,8 +160,13 @@ class LiveEegStreamManager(object):
             raise Exception, "Port for stream reception is not set!"
 
         # connect and start client
-        eeg_client = eeg_stream.EEGClient(host=self.ip,
-                                               port=self.port)
+        if pipeline > 0:
+            eeg_client = eeg_stream.EEGClientAsync(host=self.ip,
+                                                   port=self.port,
+                                                   pipeline=pipeline)
+        else:
+            eeg_client = eeg_stream.EEGClient(host=self.ip,
+                                              port=self.port)
         eeg_client.connect()
         self.logger.info( "Started EEG-Client")
         self.eeg_client.append(eeg_client)
@@ -24,9 +24,9 @@ The (Node Class) - (Configuration File) - (Node Name) Mapping
 A complete list of all nodes and their mapping can be found at:
 :ref:`node_list`.
 
-The `__init__` of this package imports all existing nodes and maps their names,
-given by the dict _NODE_MAPPING of each imported file,
-to their class name.
+The `__init__` of this package maps the names of all existing nodes,
+given by the dict _NODE_MAPPING of each module,
+to their class.
 These are the optional names.
 The standard name of a node is the class name, which has to end with **Node**.
 Furthermore you can use the class name without this ending as alternative name.
@@ -40,12 +40,23 @@ Especially when comparing different algorithms it is useful to use
 their short names as parameters to avoid long names in the folder names
 and the final comparison graphics.
 
-The advantage is, that most import statements are done at the beginning
-and that the user just needs to know the methods name
+The advantage is, that the user just needs to know the methods name
 and not the corresponding class and module name.
-The disadvantage is, that maybe not used packages are imported or
-that import errors occur, because certain packages are not installed.
-The import errors are mainly prevented by throwing exceptions.
+To keep the start up fast, the node modules are not imported
+at the beginning.
+Instead, an index of the node names in each module is built by parsing
+the source files (see :mod:`pySPACE.tools.node_index`).
+This index is cached and only modules with changed sources are parsed again.
+The mappings are :class:`~pySPACE.tools.node_index.LazyNodeMapping` objects,
+which import the module of a node, when the node is requested the first time.
+So only the packages of the used nodes are imported and
+missing packages of other nodes do not cause import errors.
+Modules, which define their mapping at import time,
+like the :mod:`~pySPACE.missions.nodes.scikits_nodes`,
+are imported, when an unknown name is requested or when iterating
+over all nodes.
+The time needed for the import of the node modules
+is given by :func:`import_time_report`.
 
 .. image:: ../../graphics/node.png
    :width: 500
@@ -61,94 +72,97 @@ The import errors are mainly prevented by throwing exceptions.
 .. todo:: Find out, why the import of the base node is called four times.
 """
 
-import sys
-import os
-import re
 import inspect
-import pySPACE
+import os
 
-# The pattern which python modules have to match
-module_pattern = re.compile("[a-zA-Z0-9_][a-zA-Z0-9_]*.py$")
+from pySPACE.tools.node_index import build_node_index, NodeModuleLoader, \
+    LazyNodeMapping
 
 # The root of the search (should be the nodes directory)
-root = os.sep.join(__file__.split(os.sep)[:-1])
-
-# The global dict of nodes
-try:
-    NODE_MAPPING = pySPACE.configuration.NODE_MAPPING
-    DEFAULT_NODE_MAPPING = pySPACE.configuration.DEFAULT_NODE_MAPPING
-except:
-    NODE_MAPPING = {}
-    DEFAULT_NODE_MAPPING = {}
-
-# search all modules in the directory subtree rooted here
-for dir_path, dir_names, file_names in os.walk(root, topdown=True):
-    # Compute the package path for the current directory
-    dir_path = dir_path[dir_path.rfind("pySPACE"):]
-    package_path = dir_path.replace(os.sep, ".")
-
-    if package_path == "pySPACE.missions.nodes":
-        if "Noop" in NODE_MAPPING.keys():  # do not visit the base module twice
-            continue
-        else: # templates are no real nodes, other components get extra treatment
-            for file_name in ["templates.py",
-                              "templates.pyc"]:
-                try:
-                    file_names.remove(file_name)
-                except:
-                    pass
-    # Check all files if they are Python modules
-    filtered_file_names = []
-    for file_name in file_names:
-        if module_pattern.match(file_name):
-            filtered_file_names.append(file_name)
-    for file_name in filtered_file_names:
-        # Import the module
-        module_name = file_name.split(".")[0]
-        module_path = package_path + '.' + module_name
-        module = __import__(module_path, {}, {}, ["dummy"])
-        module_nodes = inspect.getmembers(module, \
-            lambda x: inspect.isclass(x) and x.__name__.endswith("Node") \
-                and x.__module__==module.__name__)
-        # If this module exports nodes
-        if hasattr(module, "_NODE_MAPPING"):
-            if module_path == "pySPACE.missions.nodes.external":
-                # Replace wrong value with new fitting one
-                for key, value in module._NODE_MAPPING.iteritems():
-                    assert(key not in NODE_MAPPING.keys()), \
-                        "Node with name %s has already been defined!" % key
-                    for new_key, new_value in module_nodes:
-                        if new_value.__name__ == value.__name__:
-                            NODE_MAPPING[key] = new_value
-                            break
-            else:
-                # Add them to the global dict of nodes
-                for key, value in module._NODE_MAPPING.iteritems():
-                    assert(key not in NODE_MAPPING.keys()), \
-                        "Node with name %s has already been defined!" % key
-                    NODE_MAPPING[key] = value
-        for key, value in module_nodes:
-            # Nodes added the step before are allowed,
-            # but no other double entries
-            if key in NODE_MAPPING.keys():
-                assert(str(value)==str(NODE_MAPPING[key])), \
-                    "Node (%s) with name %s has already been defined as %s!" % (str(value),key,str(NODE_MAPPING[key]))
-            if key[:-4] in NODE_MAPPING.keys():
-                assert(str(value)==str(NODE_MAPPING[str(key[:-4])])), \
-                    "Node (%s) with name %s has already been defined as %s!" % (str(value),key[:-4],str(NODE_MAPPING[key[:-4]]))
-            DEFAULT_NODE_MAPPING[key] = value
-            NODE_MAPPING[key] = value
-            NODE_MAPPING[key[:-4]] = value
-            # import each node to shorten import path
-            exec "from %s import %s" % (module_path,key)
-# If sklearn is available, add wrapper-nodes for sklearn estimators.
-try:
-    import scikit_nodes
-except ImportError:
-    pass
+root = os.path.dirname(os.path.abspath(__file__))
+
+# templates are no real nodes
+_SKIP_MODULES = ["pySPACE.missions.nodes",
+                 "pySPACE.missions.nodes.templates"]
+
+
+def _register_module(module):
+    """ Add the nodes of an imported module to the global dicts of nodes """
+    module_path = module.__name__
+    module_nodes = inspect.getmembers(module, \
+        lambda x: inspect.isclass(x) and x.__name__.endswith("Node") \
+            and x.__module__==module.__name__)
+    # If this module exports nodes
+    if hasattr(module, "_NODE_MAPPING"):
+        if module_path == "pySPACE.missions.nodes.external":
+            # Replace wrong value with new fitting one
+            for key, value in module._NODE_MAPPING.iteritems():
+                assert(key not in NODE_MAPPING.classes), \
+                    "Node with name %s has already been defined!" % key
+                for new_key, new_value in module_nodes:
+                    if new_value.__name__ == value.__name__:
+                        NODE_MAPPING[key] = new_value
+                        break
+        else:
+            # Add them to the global dict of nodes
+            for key, value in module._NODE_MAPPING.iteritems():
+                assert(key not in NODE_MAPPING.classes), \
+                    "Node with name %s has already been defined!" % key
+                NODE_MAPPING[key] = value
+    for key, value in module_nodes:
+        # Nodes added the step before are allowed,
+        # but no other double entries
+        if key in NODE_MAPPING.classes:
+            assert(str(value)==str(NODE_MAPPING[key])), \
+                "Node (%s) with name %s has already been defined as %s!" % (str(value),key,str(NODE_MAPPING[key]))
+        if key[:-4] in NODE_MAPPING.classes:
+            assert(str(value)==str(NODE_MAPPING[str(key[:-4])])), \
+                "Node (%s) with name %s has already been defined as %s!" % (str(value),key[:-4],str(NODE_MAPPING[key[:-4]]))
+        DEFAULT_NODE_MAPPING[key] = value
+        NODE_MAPPING[key] = value
+        NODE_MAPPING[key[:-4]] = value
+
+
+def import_time_report(import_all=False):
+    """ Table of the import times of the node modules, slowest first
+
+    **Parameters**
+
+        :import_all:
+            import all node modules before creating the report,
+            to find the modules which slow down the start up
+
+            (*optional, default: False*)
+    """
+    if import_all:
+        for module_path in sorted(_NODE_INDEX.keys()):
+            try:
+                _loader.import_module(module_path)
+            except ImportError:
+                _loader.import_times[module_path] = float("nan")
+        _loader.import_dynamic_modules()
+    return _loader.import_time_report()
+
+
+# The index of all node modules
+_NODE_INDEX = build_node_index(root, _SKIP_MODULES)
+
+_loader = NodeModuleLoader(
+    sorted(module_path for module_path, entry in _NODE_INDEX.iteritems()
+           if entry["dynamic"]),
+    _register_module)
+
+# The global dicts of nodes
+NODE_MAPPING = LazyNodeMapping(_loader)
+DEFAULT_NODE_MAPPING = LazyNodeMapping(_loader)
+
+for module_path, entry in sorted(_NODE_INDEX.iteritems()):
+    for class_name in entry["classes"]:
+        DEFAULT_NODE_MAPPING.add_lazy(class_name, module_path, class_name)
+        NODE_MAPPING.add_lazy(class_name, module_path, class_name)
+        NODE_MAPPING.add_lazy(class_name[:-4], module_path, class_name)
+    for key, class_name in entry["mapping"].iteritems():
+        NODE_MAPPING.add_lazy(key, module_path, class_name)
 
 # Clean up...
-del(sys, os, re, module_pattern, root, dir_path, dir_names, file_names,
-    package_path, module_name, module_path, module, key, value, file_name)
-
-
+del(module_path, entry, class_name)
@@ -107,6 +107,104 @@ class IsNotTrainableException(TrainingException):
     pass
 
 
+class SampleBuffer(object):
+    """ Growing matrix of training samples and their labels
+
+    Trainable nodes which need all training examples at the end of the
+    training can append them one by one to this buffer instead of
+    stacking them with *numpy.vstack* or collecting lists of lists.
+    The samples are the rows of one contiguous array, which doubles its
+    capacity when it is full. Hence, appending n samples takes amortized
+    O(n) time and the collected samples are handed over as a view
+    without copying them.
+
+    **Parameters**
+        :dtype: Type of the stored samples. Use *numpy.float32* to halve
+            the memory for large amounts of training data.
+
+            (*optional, default: numpy.float64*)
+
+        :label_dtype: Type of the stored labels.
+
+            (*optional, default: numpy.float64*)
+
+        :initial_capacity: Number of samples for which memory is allocated
+            with the first sample.
+
+            (*optional, default: 16*)
+    """
+    def __init__(self, dtype=numpy.float64, label_dtype=numpy.float64,
+                 initial_capacity=16):
+        self.dtype = dtype
+        self.label_dtype = label_dtype
+        self.initial_capacity = max(1, int(initial_capacity))
+        self._samples = None
+        self._labels = None
+        self.num_samples = 0
+
+    def __len__(self):
+        return self.num_samples
+
+    def _reserve(self, num_samples, dim):
+        """ Make sure that the buffer can hold *num_samples* samples """
+        if self._samples is None:
+            capacity = max(self.initial_capacity, num_samples)
+            self._samples = numpy.empty((capacity, dim), dtype=self.dtype)
+            self._labels = numpy.empty(capacity, dtype=self.label_dtype)
+        elif self._samples.shape[1] != dim:
+            raise InconsistentDimException(
+                "Sample with %d instead of %d features."
+                % (dim, self._samples.shape[1]))
+        elif num_samples > self._samples.shape[0]:
+            capacity = max(2 * self._samples.shape[0], num_samples)
+            samples = numpy.empty((capacity, dim), dtype=self.dtype)
+            samples[:self.num_samples] = self.samples
+            labels = numpy.empty(capacity, dtype=self.label_dtype)
+            labels[:self.num_samples] = self.labels
+            self._samples = samples
+            self._labels = labels
+
+    def append(self, sample, label=0):
+        """ Add one *sample* (e.g. a FeatureVector) as a new row """
+        sample = numpy.asarray(sample).ravel()
+        self._reserve(self.num_samples + 1, sample.shape[0])
+        self._samples[self.num_samples] = sample
+        self._labels[self.num_samples] = label
+        self.num_samples += 1
+
+    def extend(self, samples, labels=0):
+        """ Add the rows of the 2d array *samples* """
+        samples = numpy.atleast_2d(numpy.asarray(samples))
+        self._reserve(self.num_samples + samples.shape[0], samples.shape[1])
+        end = self.num_samples + samples.shape[0]
+        self._samples[self.num_samples:end] = samples
+        self._labels[self.num_samples:end] = labels
+        self.num_samples = end
+
+    @property
+    def samples(self):
+        """ Contiguous matrix (samples x features) of the collected samples
+        """
+        if self._samples is None:
+            return numpy.zeros((0, 0), dtype=self.dtype)
+        return self._samples[:self.num_samples]
+
+    @property
+    def labels(self):
+        """ Array of the labels of the collected samples """
+        if self._labels is None:
+            return numpy.zeros(0, dtype=self.label_dtype)
+        return self._labels[:self.num_samples]
+
+    def __getstate__(self):
+        """ Only the collected samples are pickled, not the free capacity """
+        state = self.__dict__.copy()
+        if self._samples is not None:
+            state["_samples"] = self.samples.copy()
+            state["_labels"] = self.labels.copy()
+        return state
+
+
 class NodeMetaclass(type):
     """ General meta class for future features """
     def __new__(cls, classname, bases, members):
@@ -263,6 +361,43 @@ class BaseNode(object):
 
             (*optional, default: True*)
 
+        :batch_size:
+            Number of windows which are stacked and processed at once,
+            if the node implements the vectorized
+            :func:`_execute_batch` method.
+            Nodes without this method, retraining nodes and
+            buffering nodes always process the data window by window.
+            Normally this parameter is set for all nodes at once
+            by the :class:`~pySPACE.environments.chains.node_chain.NodeChain`
+            (e.g., with the *batch_size* parameter of the
+            :mod:`~pySPACE.missions.operations.node_chain` operation).
+
+            (*optional, default: 1*)
+
+        :cache_memory_limit:
+            If the outputs of the node are cached (this is decided
+            by the node chain, e.g., if the next node is trainable),
+            this is the maximal amount of memory in megabytes,
+            which is used for the cached data arrays of the training and
+            of the testing data. Further data is spilled to a temporary
+            file, which is memory-mapped when the data is requested again
+            (see :class:`~pySPACE.tools.memoize_generator.SpillCache`).
+            If None, the complete output is kept in memory.
+
+            (*optional, default: None*)
+
+        :share_split_outputs:
+            During a cross-validation, the output of a node for a window
+            is the same in every split, if the node is not trained
+            and all nodes between the splitter and this node are not trained.
+            Such nodes compute the output of each window only once per run
+            (once for training and once for testing), keep it
+            and reuse it in all further splits.
+            Set this parameter to False for nodes, which depend on the
+            split anyway, e.g., because they keep a state between windows.
+
+            (*optional, default: True*)
+
     **Implementing your own Node**
 
     For finding out, how to implement your own node, have a look at the
@@ -365,9 +500,17 @@ class BaseNode(object):
 
         #: Do we have to remember the outputs of this node for later reuse?
         self.caching = False
+        #: memory budget of the cache in megabytes (None means unbounded)
+        self.cache_memory_limit = kwargs.get('cache_memory_limit', None)
 
         self.load_path=kwargs.get('load_path', None)
         self.keep_in_history=kwargs.get('keep_in_history', False)
+        #: number of windows processed at once with *_execute_batch*
+        self.batch_size = int(kwargs.get('batch_size', 1))
+        #: reuse the outputs of split independent windows in all splits
+        self.share_split_outputs = kwargs.get('share_split_outputs', True)
+        #: outputs of the windows, which are shared by all splits of a run
+        self.split_output_cache = None
 
         self.node_specs = {}
         self.node_name = str(type(self)).split(".")[-1].split("'")[0]
@@ -413,6 +556,35 @@ class BaseNode(object):
         """
         return x
 
+    def _execute_batch(self, x, data_list):
+        """ Vectorized processing of several windows at once (*optional*)
+
+        Nodes which can process a stack of windows in one step
+        (e.g., with one matrix multiplication) may overwrite this method
+        in addition to :func:`_execute`.
+        It is only used, if the
+        node parameter *batch_size* is larger than one.
+
+        **Parameters**
+
+            :x:
+                3-D array of shape (number of windows, rows, columns)
+                with the stacked data arrays of all windows.
+                It is already checked and casted to the node dtype.
+
+            :data_list:
+                The original data objects in the same order.
+                They contain the meta data of each window
+                (e.g., channel names, start and end time or the tag)
+                which is needed to create the result objects.
+
+        The method has to return a sequence of data objects,
+        one for each window and in the same order.
+        Key, tag, specs and history are inherited automatically.
+        """
+        raise NotImplementedError("The node %s does not implement batch "
+                                  "execution." % self.__class__.__name__)
+
     def _check_train_args(self, x, *args, **kwargs):
         """ Checks if the arguments are correct for training
 
@@ -443,6 +615,21 @@ class BaseNode(object):
         """
         return False
 
+    def is_batch_executable(self):
+        """ Returns whether this node implements :func:`_execute_batch`
+
+        The batch method is only accepted, if it is not older than the
+        *_execute* method of the node, i.e., a subclass which overwrites
+        *_execute* but not *_execute_batch* is executed window by window.
+        """
+        def defining_class(name):
+            for cls in type(self).__mro__:
+                if name in cls.__dict__:
+                    return cls
+        batch_class = defining_class("_execute_batch")
+        return batch_class is not BaseNode and \
+            issubclass(batch_class, defining_class("_execute"))
+
     ###### Reimplementation of some MDP methods that have some flaws, ######
     ###### when used with the different concepts, used here.          ######
     ### check functions
@@ -671,8 +858,11 @@ class BaseNode(object):
         # node and the node in the node list that precedes this node are
         # different objects
         input_node = self.permanent_state.pop("input_node")
+        # The outputs that are shared by the splits survive the reset
+        split_output_cache = self.__dict__.get("split_output_cache")
         self.__dict__ = copy.deepcopy(tmp)
         self.input_node = input_node
+        self.split_output_cache = split_output_cache
         self.permanent_state = tmp
         self.permanent_state["input_node"] = input_node
 
@@ -720,6 +910,8 @@ class BaseNode(object):
         can be overwritten.
         """
         self.set_permanent_attributes(run_number=run_number)
+        # the splits of a new run have to be computed from scratch
+        self.split_output_cache = None
         if not self.is_source_node():
             self.input_node.set_run_number(run_number)
 
@@ -759,6 +951,10 @@ class BaseNode(object):
         """
         assert(self.input_node != None)
 
+        if self.caching:
+            self._log("Cache statistics: %s" % self.get_cache_statistics(),
+                      level=logging.DEBUG)
+
         has_more_splits = self.input_node.use_next_split()
 
         self.perform_final_split_action()
@@ -862,6 +1058,8 @@ class BaseNode(object):
         assert(not self.is_trainable() or
                self.get_remaining_train_phase() == 0), "Node not trained!"
         self._log("Processing data.", level = logging.DEBUG)
+        if self._use_batch_execution():
+            return self._batch_generator(self.input_node.process())
         data_generator = \
                 itertools.imap(lambda (data, label):
                       (self._trace(self.execute(self._trace(data, "entry")),
@@ -869,6 +1067,36 @@ class BaseNode(object):
                         self.input_node.process())
         return data_generator
 
+    def _use_batch_execution(self, in_training=False):
+        """ Check if the data should be given in batches to *_execute_batch*
+
+        Buffering and retraining require the processing of single samples.
+        """
+        if getattr(self, "batch_size", 1) <= 1 \
+                or not self.is_batch_executable() or self.buffering:
+            return False
+        if not in_training and self.is_retrainable() \
+                and hasattr(self, "_inc_train"):
+            return False
+        return True
+
+    def _batch_generator(self, data_generator, in_training=False):
+        """ Yield the processed (data, label) tuples batch by batch
+
+        Successive tuples from *data_generator* are collected in lists of
+        length *batch_size* which are given to :func:`execute_batch`.
+        """
+        while True:
+            batch = list(itertools.islice(data_generator, self.batch_size))
+            if len(batch) == 0:
+                break
+            data_list, label_list = zip(*batch)
+            self._trace(None, "batch entry")
+            result_list = self.execute_batch(data_list, in_training)
+            self._trace(None, "batch exit")
+            for result, label in zip(result_list, label_list):
+                yield (result, label)
+
     def request_data_for_training(self, use_test_data):
         """ Returns data for training of subsequent nodes of the node chain
 
@@ -885,18 +1113,27 @@ class BaseNode(object):
             self._log("Producing data for training.", level = logging.DEBUG)
             # Train this node
             self.train_sweep(use_test_data)
+            indices = self.request_indices_for_training(use_test_data)
             # Compute a generator the yields the train data and
             # encapsulate it in an object that memoizes its outputs and
             # provides a "fresh" method that returns a new generator that'll
             # yield the same sequence
             # This line crashes without the NodeMetaclass bug fix
-            train_data_generator = \
+            if indices is not None:
+                train_data_generator = \
+                    (self.get_indexed_window(index, in_training=True)
+                     for index in indices)
+            elif self._use_batch_execution(in_training=True):
+                train_data_generator = self._batch_generator(
+                    self.input_node.request_data_for_training(use_test_data),
+                    in_training=True)
+            else:
+                train_data_generator = \
                  itertools.imap(lambda (data, label) :
                                             (self.execute(data,in_training=True), label),
                                 self.input_node.request_data_for_training(
                                                                 use_test_data))
-            self.data_for_training = MemoizeGenerator(train_data_generator,
-                                                      caching=self.caching)
+            self.data_for_training = self._memoize(train_data_generator)
 
         self._log("Data for training finished", level = logging.DEBUG)
         # Return a fresh copy of the generator
@@ -922,17 +1159,134 @@ class BaseNode(object):
             # provides a "fresh" method that returns a new generator that'll
             # yield the same sequence
             self._log("Producing data for testing.", level = logging.DEBUG)
-            test_data_generator = \
+            indices = self.request_indices_for_testing()
+            if indices is not None:
+                test_data_generator = \
+                    (self.get_indexed_window(index, in_training=False)
+                     for index in indices)
+            elif self._use_batch_execution():
+                test_data_generator = self._batch_generator(
+                    self.input_node.request_data_for_testing())
+            else:
+                test_data_generator = \
                 itertools.imap(lambda (data, label):
                                                 self.test_retrain(data, label),
                                self.input_node.request_data_for_testing())
-            self.data_for_testing = MemoizeGenerator(test_data_generator,
-                                                     caching=self.caching)
+            self.data_for_testing = self._memoize(test_data_generator)
         self._log("Data for testing finished", level = logging.DEBUG)
         # Return a fresh copy of the generator
         return self.data_for_testing.fresh()
 
 
+    def has_split_independent_output(self):
+        """ Returns whether the output of a window is the same in every split
+
+        This is the case for nodes, which are not trained and
+        process the data window by window with the standard methods
+        for requesting the data (see *share_split_outputs*).
+        """
+        def defining_class(name):
+            for cls in type(self).__mro__:
+                if name in cls.__dict__:
+                    return cls
+        if not getattr(self, "share_split_outputs", True) \
+                or (self.is_trainable() and not self.zero_training) \
+                or self.is_retrainable() or self.buffering \
+                or self.is_source_node() or self.is_sink_node() \
+                or self.is_split_node():
+            return False
+        return all(defining_class(name) is BaseNode for name in
+                   ["request_data_for_training", "request_data_for_testing",
+                    "test_retrain"])
+
+    def request_indices_for_training(self, use_test_data):
+        """ Returns the indices of the training windows of the current split
+
+        The indices refer to the windows of the splitter node, which
+        can be obtained with :func:`get_indexed_window`.
+        If the output of this node or of a preceding node depends on the
+        split, None is returned and the windows have to be requested
+        with :func:`request_data_for_training`.
+        """
+        if not self.has_split_independent_output():
+            return None
+        return self.input_node.request_indices_for_training(use_test_data)
+
+    def request_indices_for_testing(self):
+        """ Returns the indices of the testing windows of the current split
+
+        For details see :func:`request_indices_for_training`.
+        """
+        if not self.has_split_independent_output():
+            return None
+        return self.input_node.request_indices_for_testing()
+
+    def request_training_folds(self):
+        """ Returns the folds of a cross-validation and the current test fold
+
+        The result is a tuple of a list of folds (lists of window indices
+        as in :func:`request_indices_for_training`) and the index of the
+        fold, which is used for testing in the current split.
+        The training windows of the split are the windows of all other
+        folds. Nodes, which can add up their training statistics,
+        compute the statistics of each fold only once per run
+        (e.g., :class:`~pySPACE.missions.nodes.spatial_filtering.spatial_filtering.SpatialFilteringNode`).
+        If there are no such folds or the output of this node or of a
+        preceding node depends on the split, None is returned.
+        """
+        if not self.has_split_independent_output():
+            return None
+        return self.input_node.request_training_folds()
+
+    def get_indexed_window(self, index, in_training, cache=True):
+        """ Returns the processed (data, label) tuple of the window *index*
+
+        The result is computed from the window of the input node
+        and kept in the *split_output_cache* for the following splits,
+        if *cache* is True. The input node is called without caching,
+        since only the output of the last split independent node
+        is needed again.
+        """
+        key = (index, in_training)
+        if getattr(self, "split_output_cache", None) is None:
+            self.split_output_cache = dict()
+        elif key in self.split_output_cache:
+            return self.split_output_cache[key]
+        data, label = self.input_node.get_indexed_window(index, in_training,
+                                                         cache=False)
+        result = (self.execute(data, in_training=in_training), label)
+        if cache:
+            self.split_output_cache[key] = result
+        return result
+
+    def _memoize(self, generator):
+        """ Encapsulate the *generator* in a MemoizeGenerator
+
+        The cache is bounded by the *cache_memory_limit* of the node.
+        """
+        memory_limit = getattr(self, "cache_memory_limit", None)
+        if memory_limit is not None:
+            memory_limit = int(float(memory_limit) * 1024 ** 2)
+        return MemoizeGenerator(generator, caching=self.caching,
+                                memory_limit=memory_limit,
+                                temp_dir=getattr(self, "temp_dir", None))
+
+    def get_cache_statistics(self):
+        """ Return the statistics of the training and testing data caches
+
+        The result is a dictionary with the keys 'train' and 'test'
+        (if the respective data has been requested) and
+        the dictionaries of
+        :func:`~pySPACE.tools.memoize_generator.MemoizeGenerator.get_statistics`
+        as values.
+        """
+        statistics = {}
+        if self.data_for_training is not None:
+            statistics["train"] = self.data_for_training.get_statistics()
+        if self.data_for_testing is not None:
+            statistics["test"] = self.data_for_testing.get_statistics()
+        return statistics
+
     def test_retrain(self,data,label):
         """ Wrapper method for offline incremental retraining
 
@@ -1109,6 +1463,7 @@ class BaseNode(object):
         odict = self.__dict__.copy() # copy the dict since we change it
         odict['data_for_training'] = None
         odict['data_for_testing'] = None
+        odict['split_output_cache'] = None
         odict['root_logger'] = None
         del odict['permanent_state']
         # Remove other non-pickable stuff
@@ -1372,6 +1727,13 @@ class BaseNode(object):
         # Do the actual computation
         result = self._execute(self._refcast(x), *args, **kwargs)
 
+        return self._finish_execution(result, x)
+
+    def _finish_execution(self, result, x):
+        """ Pass meta data from *x* to *result* and check the output dimension
+
+        Common part of :func:`execute` and :func:`execute_batch`.
+        """
         # Make sure key, tag, specs and history are passed
         if x.has_meta():
             result.inherit_meta_from(x)
@@ -1402,6 +1764,44 @@ class BaseNode(object):
 
         return result
 
+    def execute_batch(self, data_list, in_training=False):
+        """ Process several data objects at once with :func:`_execute_batch`
+
+        The arrays of all objects in *data_list* are stacked to one
+        3-D array. If batch execution is not possible (see *batch_size*
+        parameter) or the objects have different shapes,
+        the objects are given to :func:`execute` one after the other.
+
+        Returns a list of the processed data objects.
+        """
+        data_list = list(data_list)
+        if len(data_list) == 0:
+            return []
+        shape = data_list[0].shape
+        if not self._use_batch_execution(in_training) or \
+                not all(x.shape == shape for x in data_list[1:]):
+            return [self.execute(x, in_training=in_training)
+                    for x in data_list]
+        self._training_execution_phase = in_training
+
+        if self.load_path is not None:
+            self.replace_keywords_in_load_path()
+
+        # The check of the first object sets dtype and input_dim.
+        # For the other objects only the (vectorized) check
+        # for finite numbers remains, since the shapes are equal.
+        self._check_input(data_list[0])
+        batch = numpy.array([x.view(numpy.ndarray) for x in data_list])
+        if not numpy.isfinite(batch).all():
+            error_str = "Class %s: Not finite number in data batch!" \
+                            % self.__class__.__name__
+            raise NodeException(error_str)
+
+        result_list = self._execute_batch(self._refcast(batch), data_list)
+
+        return [self._finish_execution(result, x)
+                for result, x in zip(result_list, data_list)]
+
     def train(self, x, *args, **kwargs):
         """Update the internal structures according to the input data `x`.
 
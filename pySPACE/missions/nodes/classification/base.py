@@ -8,6 +8,7 @@ import cPickle
 import warnings
 import logging
 import timeit
+from collections import OrderedDict
 # base class
 from pySPACE.missions.nodes.base_node import BaseNode
 # representation of the linear classification vector
@@ -154,6 +155,17 @@ class RegularizedClassifierBase(BaseNode):
             Accept more than two classes.
             
             (*optional, default: False*)
+
+        :kernel_cache_size:
+            Memory budget in MB for kernel matrices of nonlinear kernels
+            (see :func:`get_kernel_matrix`).
+            If the full matrix does not fit into this budget,
+            only the most recently used rows are kept in a
+            :class:`KernelRowCache` and the others are recomputed on demand.
+            The same budget restricts the block size
+            of :func:`kernel_matrix`.
+
+            (*optional, default: 200*)
     
     .. note:: Not all parameter effects are implemented for all inheriting nodes.
               Kernels are available for LibSVMClassifierNode and
@@ -173,7 +185,7 @@ class RegularizedClassifierBase(BaseNode):
                  complexities_path = None, 
                  keep_vectors=False, max_steps=1,forget_oldest=False,
                  keep_label=None, use_list=False,
-                 multinomial=False,
+                 multinomial=False, kernel_cache_size=200,
                  **kwargs):
 
         super(RegularizedClassifierBase, self).__init__(**kwargs)
@@ -206,6 +218,7 @@ class RegularizedClassifierBase(BaseNode):
                                       retraining_needed=False,
                                       use_list=use_list,
                                       multinomial=multinomial,
+                                      kernel_cache_size=kernel_cache_size,
                                       classifier_information={}
                                       )
 
@@ -253,6 +266,10 @@ class RegularizedClassifierBase(BaseNode):
         else:
             if 'model' in odict: 
                 del odict['model']
+        # kernel row caches are recomputed when retraining
+        for key, value in odict.items():
+            if isinstance(value, KernelRowCache):
+                odict[key] = None
         return odict
 
     def store_state(self, result_dir, index=None): 
@@ -364,7 +381,8 @@ class RegularizedClassifierBase(BaseNode):
         """
         data_array = sample.view(numpy.ndarray)
         if self.use_list:
-            self.samples.append(map(float, list(data_array[0, :])))
+            self.samples.append(numpy.asarray(data_array[0, :],
+                                              dtype=numpy.float64).tolist())
         else:
             self.samples.append(data_array[0, :])
 
@@ -381,22 +399,26 @@ class RegularizedClassifierBase(BaseNode):
                 self.w = numpy.zeros(x.shape[1])
             else:
                 prediction_value = float(numpy.dot(self.w.T, data[0, :]))+self.b
-            # one-class multinomial handling of REST class
-            if "REST" in self.classes and self.multinomial:
-                if "REST" == self.classes[0]:
-                    label = self.classes[1]
-                elif "REST" == self.classes[1]:
-                    label = self.classes[0]
-                    prediction_value *= -1
-            # Look up class label
-            # prediction_value --> {-1,1} --> {0,1} --> Labels
-            elif prediction_value > 0:
+            return self._prediction_vector(prediction_value)
+
+    def _prediction_vector(self, prediction_value):
+        """ Map the prediction value <w,data>+b to the PredictionVector """
+        # one-class multinomial handling of REST class
+        if "REST" in self.classes and self.multinomial:
+            if "REST" == self.classes[0]:
                 label = self.classes[1]
-            else:
+            elif "REST" == self.classes[1]:
                 label = self.classes[0]
-            
-            return PredictionVector(label=label, prediction=prediction_value,
-                                    predictor=self)
+                prediction_value *= -1
+        # Look up class label
+        # prediction_value --> {-1,1} --> {0,1} --> Labels
+        elif prediction_value > 0:
+            label = self.classes[1]
+        else:
+            label = self.classes[0]
+        
+        return PredictionVector(label=label, prediction=prediction_value,
+                                predictor=self)
 
     def print_variables(self):
         """ Debug function for printing the classifier and the slack variables
@@ -455,6 +477,96 @@ class RegularizedClassifierBase(BaseNode):
             function = eval(self.kernel_type)
             return float(function(u, v))
 
+    def kernel_matrix(self, A, B=None):
+        """ Return the kernel matrix K[i, j] = k(A[i], B[j])
+
+        The matrix is computed with vectorized numpy operations for the
+        predefined kernels of :func:`kernel_func`.
+        If the result exceeds the *kernel_cache_size*, the rows are
+        computed block by block to restrict the size of temporary arrays.
+        User defined (*lambda*) kernels are evaluated pair by pair.
+
+        **Parameters**
+
+            :A: 2d array with one sample per row
+
+            :B:
+                2d array with one sample per row.
+                If None, the Gram matrix of *A* is computed.
+
+                (*optional, default: None*)
+        """
+        if not self.kernel_type == "LINEAR" and self.gamma is None:
+            self.calculate_gamma()
+        A = numpy.atleast_2d(numpy.asarray(A, dtype=numpy.float64))
+        symmetric = B is None
+        if symmetric:
+            B = A
+        else:
+            B = numpy.atleast_2d(numpy.asarray(B, dtype=numpy.float64))
+        if self.kernel_type.startswith("lambda "):
+            K = numpy.empty((A.shape[0], B.shape[0]))
+            for i in range(A.shape[0]):
+                for j in range(B.shape[0]):
+                    K[i, j] = self.kernel_func(A[i], B[j])
+            return K
+        if self.kernel_type == "RBF":
+            B_norms = numpy.sum(B**2, axis=1)
+        # several temporary arrays of the block size are needed
+        block_size = max(1, int(self.kernel_cache_size * 2**20
+                                / (4 * 8 * max(1, B.shape[0]))))
+        K = numpy.empty((A.shape[0], B.shape[0]))
+        for start in range(0, A.shape[0], block_size):
+            block = slice(start, start + block_size)
+            K_block = K[block]
+            numpy.dot(A[block], B.T, out=K_block)
+            if self.kernel_type == "LINEAR":
+                pass
+            elif self.kernel_type == "POLY":
+                K_block *= self.gamma
+                K_block += self.offset
+                K_block **= self.exponent
+            elif self.kernel_type == "RBF":
+                # |u-v|^2 = |u|^2 - 2u'v + |v|^2
+                K_block *= -2
+                K_block += numpy.sum(A[block]**2, axis=1)[:, None]
+                K_block += B_norms
+                # rounding errors may result in small negative distances
+                numpy.maximum(K_block, 0, out=K_block)
+                K_block *= -self.gamma
+                numpy.exp(K_block, out=K_block)
+            elif self.kernel_type == "SIGMOID":
+                K_block *= self.gamma
+                K_block += self.offset
+                numpy.tanh(K_block, out=K_block)
+            else:
+                raise NotImplementedError("Kernel type %s is not available."
+                                          % self.kernel_type)
+        if symmetric and self.kernel_type == "RBF":
+            # exact diagonal
+            K.flat[::K.shape[0] + 1] = 1.0
+        return K
+
+    def get_kernel_matrix(self, compute_rows, num_samples):
+        """ Return a (virtual) quadratic matrix of kernel values
+
+        *compute_rows* is a function which gets an array of row indices and
+        returns the corresponding rows of the matrix as 2d array
+        (e.g., using :func:`kernel_matrix`).
+        If the full matrix fits into the memory budget *kernel_cache_size*,
+        it is computed completely as array.
+        Otherwise a :class:`KernelRowCache` is returned,
+        which computes the rows on demand.
+        In both cases, the rows are accessed with *M[i]*.
+        """
+        budget = self.kernel_cache_size * 2**20
+        if num_samples**2 * 8 <= budget:
+            return compute_rows(numpy.arange(num_samples))
+        self._log("Kernel matrix of %d samples does not fit into %s MB. "
+                  % (num_samples, self.kernel_cache_size)
+                  + "Using a row cache.", level=logging.INFO)
+        return KernelRowCache(compute_rows, num_samples, budget)
+
     def calculate_gamma(self):
         """ Calculate default gamma 
         
@@ -466,16 +578,6 @@ class RegularizedClassifierBase(BaseNode):
                 and self.gamma is None:
             self.gamma = 1.0/self.dim
         elif self.kernel_type == 'RBF' and self.gamma is None:
-            a = self.labels.count(self.classes.index(self.classes[0]))
-            b = self.labels.count(self.classes.index(self.classes[1]))
-            if a > b:
-                relevant = 1
-            else:
-                relevant = 0
-            relevant_samples=[]
-            for i, label in enumerate(self.labels):
-                if label == relevant:
-                    relevant_samples.append(self.samples[i])
             variance = numpy.median(numpy.var(numpy.array(self.samples),
                                               axis=0))
             self.gamma = 0.5/(variance*self.dim)
@@ -485,6 +587,51 @@ class RegularizedClassifierBase(BaseNode):
             self.gamma = 0.001
 
 
+class KernelRowCache(object):
+    """ Least recently used cache of the rows of a large kernel matrix
+
+    The rows are accessed like in an array with *M[i]* and are computed
+    with *compute_rows*, if they are not in the cache.
+    If the cache is full, the least recently used row is dropped.
+
+    **Parameters**
+
+        :compute_rows:
+            Function which gets an array of row indices and returns
+            the rows as 2d array.
+
+        :num_samples: Number of rows and columns of the matrix.
+
+        :memory_limit:
+            Number of bytes which are used for cached rows.
+            At least two rows are cached.
+
+    .. note:: The returned rows must not be changed.
+    """
+    def __init__(self, compute_rows, num_samples, memory_limit):
+        self.compute_rows = compute_rows
+        self.num_samples = num_samples
+        self.max_rows = max(2, int(memory_limit / (8 * max(1, num_samples))))
+        self.rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.num_samples
+
+    def __getitem__(self, index):
+        try:
+            row = self.rows.pop(index)
+            self.hits += 1
+        except KeyError:
+            row = self.compute_rows(numpy.array([index]))[0]
+            self.misses += 1
+            if len(self.rows) >= self.max_rows:
+                self.rows.popitem(last=False)
+        self.rows[index] = row
+        return row
+
+
 class TimeoutException(Exception):
     """ Break up for to long simplex iterations """ 
     pass
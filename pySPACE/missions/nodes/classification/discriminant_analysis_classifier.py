@@ -1,9 +1,8 @@
 """ Discriminant analysis type classifiers """
 import numpy
-from copy import deepcopy
 import warnings
 
-from pySPACE.missions.nodes.base_node import BaseNode
+from pySPACE.missions.nodes.base_node import BaseNode, SampleBuffer
 from pySPACE.resources.data_types.prediction_vector import PredictionVector
 
 class DiscriminantAnalysisClassifierBase(BaseNode):
@@ -46,6 +45,8 @@ class DiscriminantAnalysisClassifierBase(BaseNode):
         
         self.set_permanent_attributes(classes=class_labels,
                                       prior_probability = prior_probability,
+                                      # training data and labels
+                                      sample_buffer=SampleBuffer(),
                                       x=None, # training data
                                       y=None) # training labels
         
@@ -61,7 +62,8 @@ class DiscriminantAnalysisClassifierBase(BaseNode):
         """ Train node on given example *data* for class *label*.
         
             In this method, all data items and labels are buffered 
-            in a matrix for batch training. 
+            in a :class:`~pySPACE.missions.nodes.base_node.SampleBuffer`
+            for batch training.
         """
         # construct list of all labels
         if label not in self.classes:
@@ -80,13 +82,13 @@ class DiscriminantAnalysisClassifierBase(BaseNode):
             label_index = -1
         else:
             return
-        
-        if self.x is None: # initialize data variables
-            self.x = deepcopy(data)
-            self.y = numpy.array(label_index)
-        else: # stack data
-            self.x = numpy.vstack((self.x, data))
-            self.y = numpy.vstack((self.y, label_index))
+        self.sample_buffer.append(data, label_index)
+
+    def _get_training_data(self):
+        """ Matrix (samples x features) and column of labels of the buffer
+        """
+        return (self.sample_buffer.samples,
+                self.sample_buffer.labels.reshape(-1, 1))
 
 class LinearDiscriminantAnalysisClassifierNode(DiscriminantAnalysisClassifierBase):
     """ Classify by linear discriminant analysis
@@ -131,6 +133,7 @@ class LinearDiscriminantAnalysisClassifierNode(DiscriminantAnalysisClassifierBas
     def _stop_training(self, debug=False):
         """ Perform the actual model building """
         # this calculations strongly follow [2]
+        self.x, self.y = self._get_training_data()
         self.x = self.x.T # samples x channels
         self.y = self.y.T
         # stack a row of ones to the data; (samples + 1) x channels
@@ -220,6 +223,7 @@ class QuadraticDiscriminantAnalysisClassifierNode(DiscriminantAnalysisClassifier
     def _stop_training(self, debug=False):
         """ Perform the actual model building """
         # this calculations strongly follow [1]
+        self.x, self.y = self._get_training_data()
         # stack a row of ones to the data; (samples + 1) x channels
         self.x = numpy.vstack((numpy.ones_like(self.x[:,0]),self.x.T))
         self.y = self.y.T
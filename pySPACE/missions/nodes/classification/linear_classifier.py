@@ -2,9 +2,8 @@
 
 
 import numpy
-from copy import deepcopy
 
-from pySPACE.missions.nodes.base_node import BaseNode
+from pySPACE.missions.nodes.base_node import BaseNode, SampleBuffer
 # the output is a prediction vector
 from pySPACE.resources.data_types.prediction_vector import PredictionVector
 
@@ -31,7 +30,8 @@ class NaiveBayesClassifierNode(BaseNode):
     
     def _stop_training(self, debug=False):
 
-        for d in self.data:
+        for buffer in self.data:
+            d = buffer.samples
             self.mu.append( d.mean(axis=0) )
             self.var.append( d.var(axis=0) )
             self.ap.append(len(d) )
@@ -57,10 +57,11 @@ class NaiveBayesClassifierNode(BaseNode):
         # Remember the labels
         if class_label not in self.class_labels: 
             self.class_labels.append(class_label)
-            self.data.append( numpy.array(data) ) 
-        else:
-            index = self.class_labels.index(class_label)
-            self.data[index] = numpy.vstack((self.data[index],data))
+        index = self.class_labels.index(class_label)
+        # one buffer of samples per class
+        while len(self.data) <= index:
+            self.data.append(SampleBuffer())
+        self.data[index].append(data)
 
 
 class FDAClassifierNode(BaseNode):
@@ -192,6 +193,7 @@ class BayesianLinearDiscriminantAnalysisClassifierNode(BaseNode):
                                                 (**kwargs)
         
         self.set_permanent_attributes(class_labels=class_labels,
+                                      sample_buffer=SampleBuffer(),
                                       x=None,
                                       y=None)
         
@@ -207,7 +209,8 @@ class BayesianLinearDiscriminantAnalysisClassifierNode(BaseNode):
         """ Train node on given example *data* for class *label*.
         
             In this method, all data items and labels are buffered 
-            for batch training in a matrices. 
+            for batch training in a
+            :class:`~pySPACE.missions.nodes.base_node.SampleBuffer`.
         """
             
         # construct list of all labels
@@ -224,20 +227,13 @@ class BayesianLinearDiscriminantAnalysisClassifierNode(BaseNode):
             label_index=-1
         else:
             return
-            
-        if self.x is None:
-            self.x = deepcopy(data)
-            self.y = numpy.array(label_index)
-        else:
-            self.x = numpy.vstack((self.x, data))
-            self.y = numpy.vstack((self.y, label_index))
+        self.sample_buffer.append(data, label_index)
 
-                
     def _stop_training(self, debug=False):
         """ Perform the actual model building by performing bayesian regression"""
         
-        self.x = self.x.transpose()
-        self.y = self.y.transpose()
+        self.x = self.sample_buffer.samples.transpose()
+        self.y = self.sample_buffer.labels.reshape(1, -1)
         
         # compute regression targets from class labels (to do lda via regression)
         n_posexamples = numpy.float((self.y == 1).sum());
@@ -189,29 +189,45 @@ class SorSvmNode(RegularizedClassifierBase):
                                         )
 
     def _execute(self, x):
-        """ Executes the classifier on the given data vector in the linear case
+        """ Executes the classifier on the given data vector
 
-        prediction value = <w,data>+b
+        prediction value = <w,data>+b in the linear case and
+        the weighted sum of kernel values of the support vectors
+        plus b in the kernel case
         """
         if self.kernel_type == 'LINEAR':
             return super(SorSvmNode, self)._execute(x)
-            # else:
         data = x.view(numpy.ndarray)
-        data = data[0,:]
-        prediction=self.b
-        for i in range(self.num_samples):
-            dual = self.dual_solution[i]
-            if not dual==0:
-                prediction += dual*self.kernel_func(data,self.samples[i])*self.bi[i]
-            # Look up class label
-        # prediction --> {-1,1} --> {0,1} --> Labels
-        if prediction >0:
-            label = self.classes[1]
+        prediction = self.kernel_predictions(data[:1, :])[0]
+        return self._prediction_vector(prediction)
+
+    def _execute_batch(self, x, data_list):
+        """ Classify all stacked feature vectors with one matrix product """
+        data = x[:, 0, :]
+        if self.kernel_type == 'LINEAR':
+            if self.w is None:
+                self.w = numpy.zeros(x.shape[2])
+                predictions = numpy.zeros(len(data))
+            else:
+                predictions = dot(data, numpy.ravel(self.w)) + self.b
         else:
-            label = self.classes[0]
-        return PredictionVector(label=label, prediction=prediction,
-                                predictor=self)
+            predictions = self.kernel_predictions(data)
+        return [self._prediction_vector(float(prediction))
+                for prediction in predictions]
+
+    def kernel_predictions(self, data):
+        """ Prediction values of the kernel classifier for each row of *data*
 
+        Only the support vectors (non-zero dual weights) are evaluated.
+        """
+        support = numpy.flatnonzero(self.dual_solution)
+        if len(support) == 0:
+            return numpy.zeros(len(data)) + self.b
+        coefficients = self.dual_solution[support] * \
+            numpy.asarray(self.bi)[support]
+        support_vectors = numpy.array([self.samples[i] for i in support])
+        return dot(self.kernel_matrix(data, support_vectors),
+                   coefficients) + self.b
 
     def _stop_training(self, debug=False):
         """ Train the SVM with the SOR algorithm on the collected training data """
@@ -237,16 +253,10 @@ class SorSvmNode(RegularizedClassifierBase):
             self.w = numpy.zeros(self.dim,dtype=numpy.float)
             self.b = 0.0
         else: # kernel case
-            ## iterative calculation of M
-            self.M = numpy.zeros((self.num_samples,self.num_samples))
-            for i in range(self.num_samples):
-                bi=self.bi[i]
-                si=self.samples[i]
-                for j in range(self.num_samples):
-                    if i>j:
-                        self.M[i][j] = self.M[j][i]
-                    else:
-                        self.M[i][j] = bi*self.bi[j]*(self.kernel_func(si,self.samples[j])+self.offset_factor)
+            ## vectorized calculation of M (or its rows on demand)
+            self.A = numpy.array(self.samples)
+            self.M = self.get_kernel_matrix(self.kernel_rows,
+                                            self.num_samples)
 
         ## SOR Algorithm ##
         self.iteration_loop(self.M)
@@ -256,6 +266,15 @@ class SorSvmNode(RegularizedClassifierBase):
         if self.calc_looCV:
             self.looCV()
 
+    def kernel_rows(self, indices):
+        """ Rows of the matrix M[i][j] = b_i b_j (k(x_i,x_j)+offset_factor) """
+        bi = numpy.asarray(self.bi, dtype=numpy.float64)
+        rows = self.kernel_matrix(self.A[indices], self.A)
+        rows += self.offset_factor
+        rows *= bi[indices, None]
+        rows *= bi
+        return rows
+
     def looCV(self):
         """ Calculate leave one out metrics """
         # remember original solution
@@ -588,7 +588,8 @@ class LiblinearClassifierNode(LibSVMClassifierNode):
         
         # Collect the data
         data_array=data.view(numpy.ndarray)
-        self.samples.append(map(float, list(data_array[0,:])))
+        self.samples.append(
+            numpy.asarray(data_array[0, :], dtype=numpy.float64).tolist())
         # LIBLINEAR does not accept numpy arrays so we have to change it to list
         #self.samples.append(data_array[0,:])
         if self.svm_type == 'C-SVC':
@@ -8,7 +8,6 @@ import logging
 from collections import defaultdict
 
 from pySPACE.missions.nodes.base_node import BaseNode
-from pySPACE.tools.memoize_generator import MemoizeGenerator
 
 class InstanceSelectionNode(BaseNode):
     """Retain only a certain percentage of the instances
@@ -119,8 +118,7 @@ class InstanceSelectionNode(BaseNode):
             train_data_generator = \
                      ((self.execute(data), label) for (data, label) in retained_instances) 
                      
-            self.data_for_training = MemoizeGenerator(train_data_generator,
-                                                      caching=self.caching) 
+            self.data_for_training = self._memoize(train_data_generator) 
         
         self._log("Data for training finished", level = logging.DEBUG)
         # Return a fresh copy of the generator  
@@ -176,8 +174,7 @@ class InstanceSelectionNode(BaseNode):
             test_data_generator = \
                     ((self.execute(data), label) for (data, label) in retained_instances) 
                     
-            self.data_for_testing = MemoizeGenerator(test_data_generator,
-                                                     caching=self.caching)
+            self.data_for_testing = self._memoize(test_data_generator)
         
         self._log("Data for testing finished", level = logging.DEBUG)
         # Return a fresh copy of the generator
@@ -240,8 +237,7 @@ class ReduceOverrepresentedClassNode(BaseNode):
             train_data_generator = \
                     ((self.execute(data), label) for (data, label) in retained_instances) 
                     
-            self.data_for_training = MemoizeGenerator(train_data_generator,
-                                                     caching=self.caching)
+            self.data_for_training = self._memoize(train_data_generator)
         
         self._log("Data for training finished", level = logging.DEBUG)
         # Return a fresh copy of the generator  
@@ -278,8 +274,7 @@ class ReduceOverrepresentedClassNode(BaseNode):
             test_data_generator = \
                     ((self.execute(data), label) for (data, label) in retained_instances) 
                     
-            self.data_for_testing = MemoizeGenerator(test_data_generator,
-                                                     caching=self.caching)
+            self.data_for_testing = self._memoize(test_data_generator)
         
         self._log("Data for testing finished", level = logging.DEBUG)
         # Return a fresh copy of the generator
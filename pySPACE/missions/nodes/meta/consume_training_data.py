@@ -10,7 +10,6 @@ from collections import defaultdict
 from itertools import repeat
 
 from pySPACE.missions.nodes.base_node import BaseNode
-from pySPACE.tools.memoize_generator import MemoizeGenerator
 
 class ConsumeTrainingDataNode(BaseNode):
     """ Split training data for internal usage and usage of successor nodes
@@ -155,8 +154,7 @@ class ConsumeTrainingDataNode(BaseNode):
                      itertools.imap(lambda (data, label) : (self.execute(data), label),
                                     self.external_training_set) 
                      
-            self.data_for_training = MemoizeGenerator(train_data_generator,
-                                                      caching=self.caching) 
+            self.data_for_training = self._memoize(train_data_generator) 
         
         self._log("Data for training finished", level = logging.DEBUG)
         # Return a fresh copy of the generator  
@@ -275,41 +275,49 @@ class ParameterOptimizationBase(BaseNode):
         if not self.validation_parameter_settings=={}:
             self.flow_template = [NodeChainFactory.instantiate(template=node,
                              parametrization=self.validation_parameter_settings) for node in original_flow_template]
-        if self.nom_rng is None:
-            self.prepare_optimization()
-            self.best_parametrization, self.best_performance = \
-                                                 self.get_best_parametrization()
-            self.performance_dict[self.p2key(self.best_parametrization)] = \
-                              (self.best_performance, self.best_parametrization)
-        else:
-            nom_grid = self.search_grid(self.nom_rng)
-            iterations = 0
-            search_history = []
-            # copy flow_template since we have to instantiate for every nom_par
-            flow_template = copy.copy(self.flow_template)
-            for nom_par in nom_grid:
-                # for getting the best parameterization,
-                # the class attribute flow_template must be overwritten
-                self.flow_template = [NodeChainFactory.instantiate(template=node,
-                             parametrization=nom_par) for node in flow_template]
+        # the pool of the subflows is also terminated when the search fails
+        search_finished = False
+        try:
+            if self.nom_rng is None:
                 self.prepare_optimization()
-                parametrization, performance = self.get_best_parametrization()
-                self.performance_dict[self.p2key(nom_par)] = (performance, 
-                                                                parametrization)
-                iterations += self.iterations
-                search_history.append((nom_par,self.search_history))
-                # reinitialize optimization parameters
-                self.re_init()
-            # reconstructing the overwritten flow for further usage
-            self.flow_template = flow_template
-            self.iterations = iterations
-            self.search_history = sorted(search_history, 
-                                     key=lambda t: t[1][-1]["best_performance"])
-            best_key = max(sorted(self.performance_dict.items()),
-                                                          key=lambda t: t[1])[0]
-            self.best_performance, self.best_parametrization = \
-                                                 self.performance_dict[best_key]
-            self.best_parametrization.update(dict(best_key))
+                self.best_parametrization, self.best_performance = \
+                                                     self.get_best_parametrization()
+                self.performance_dict[self.p2key(self.best_parametrization)] = \
+                                  (self.best_performance, self.best_parametrization)
+            else:
+                nom_grid = self.search_grid(self.nom_rng)
+                iterations = 0
+                search_history = []
+                # copy flow_template since we have to instantiate for every nom_par
+                flow_template = copy.copy(self.flow_template)
+                for nom_par in nom_grid:
+                    # for getting the best parameterization,
+                    # the class attribute flow_template must be overwritten
+                    self.flow_template = [NodeChainFactory.instantiate(template=node,
+                                 parametrization=nom_par) for node in flow_template]
+                    self.prepare_optimization()
+                    parametrization, performance = self.get_best_parametrization()
+                    self.performance_dict[self.p2key(nom_par)] = (performance, 
+                                                                    parametrization)
+                    iterations += self.iterations
+                    search_history.append((nom_par,self.search_history))
+                    # reinitialize optimization parameters
+                    self.re_init()
+                # reconstructing the overwritten flow for further usage
+                self.flow_template = flow_template
+                self.iterations = iterations
+                self.search_history = sorted(search_history, 
+                                         key=lambda t: t[1][-1]["best_performance"])
+                best_key = max(sorted(self.performance_dict.items()),
+                                                              key=lambda t: t[1])[0]
+                self.best_performance, self.best_parametrization = \
+                                                     self.performance_dict[best_key]
+                self.best_parametrization.update(dict(best_key))
+            search_finished = True
+        finally:
+            # no further subflows are executed
+            if isinstance(self, SubflowHandler):
+                self.close_subflow_pool(terminate=not search_finished)
         # when best parameter dict is calculated, this has to be logged
         # or saved and the chosen parameter is used for training on the
         # whole data set, independent of the chosen algorithm
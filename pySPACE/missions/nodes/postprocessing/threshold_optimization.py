@@ -1,8 +1,6 @@
 """ Optimize classification thresholds """
 
 import logging
-from operator import itemgetter
-from bisect import insort
 
 import scipy
 import numpy
@@ -13,6 +11,102 @@ from pySPACE.missions.nodes.base_node import BaseNode
 from pySPACE.resources.data_types.prediction_vector import PredictionVector
 from pySPACE.resources.dataset_defs.metric import BinaryClassificationDataset as ClassificationCollection
 
+class SortedInstances(object):
+    """ Prediction scores, predicted and actual labels sorted by score
+
+    The instances are kept in arrays with free capacity, of which only the
+    first *num_instances* entries are used. Instances with the same score
+    are ordered by predicted and actual label.
+    A single instance is inserted at the position found by binary search
+    by moving the following entries within the arrays, so the arrays are
+    neither reallocated nor copied. The capacity is doubled when it is
+    exhausted. The properties return views on the used entries.
+    """
+    def __init__(self, initial_capacity=16):
+        self.initial_capacity = max(1, int(initial_capacity))
+        self._scores = numpy.zeros(0)
+        self._prediction_labels = numpy.zeros(0, dtype=int)
+        self._labels = numpy.zeros(0, dtype=int)
+        self.num_instances = 0
+
+    def __len__(self):
+        return self.num_instances
+
+    def __getstate__(self):
+        """ Only the used entries are pickled, not the free capacity """
+        state = self.__dict__.copy()
+        state["_scores"] = self.scores.copy()
+        state["_prediction_labels"] = self.prediction_labels.copy()
+        state["_labels"] = self.labels.copy()
+        return state
+
+    @property
+    def scores(self):
+        """ Ascending prediction scores """
+        return self._scores[:self.num_instances]
+
+    @property
+    def prediction_labels(self):
+        """ Predicted labels (0 or 1) in the order of the scores """
+        return self._prediction_labels[:self.num_instances]
+
+    @property
+    def labels(self):
+        """ Actual labels (0 or 1) in the order of the scores """
+        return self._labels[:self.num_instances]
+
+    def _reserve(self, num_instances):
+        """ Make sure that the arrays can hold *num_instances* instances """
+        if num_instances <= len(self._scores):
+            return
+        capacity = max(2 * len(self._scores), self.initial_capacity,
+                       num_instances)
+        for name in ["_scores", "_prediction_labels", "_labels"]:
+            old = getattr(self, name)
+            new = numpy.empty(capacity, dtype=old.dtype)
+            new[:self.num_instances] = old[:self.num_instances]
+            setattr(self, name, new)
+
+    def insert(self, score, prediction_label, label):
+        """ Insert one instance at its position in the sorted order """
+        self._reserve(self.num_instances + 1)
+        end = self.num_instances
+        scores = self.scores
+        first = numpy.searchsorted(scores, score, side="left")
+        last = numpy.searchsorted(scores, score, side="right")
+        keys = 2 * self._prediction_labels[first:last] + \
+            self._labels[first:last]
+        index = first + numpy.searchsorted(keys, 2 * prediction_label + label,
+                                           side="right")
+        for array, value in [(self._scores, score),
+                             (self._prediction_labels, prediction_label),
+                             (self._labels, label)]:
+            array[index + 1:end + 1] = array[index:end]
+            array[index] = value
+        self.num_instances += 1
+
+    def extend(self, instances):
+        """ Sort a list of (score, predicted label, actual label) tuples in
+
+        The new instances are sorted together with the old ones, which is
+        faster than inserting them one after another.
+        """
+        if len(instances) == 0:
+            return
+        new_instances = numpy.array(instances, dtype=float)
+        scores = numpy.concatenate((self.scores, new_instances[:, 0]))
+        prediction_labels = numpy.concatenate(
+            (self.prediction_labels, new_instances[:, 1].astype(int)))
+        labels = numpy.concatenate((self.labels,
+                                    new_instances[:, 2].astype(int)))
+        order = numpy.lexsort((labels, prediction_labels, scores))
+        self._reserve(len(scores))
+        self._scores[:len(scores)] = scores[order]
+        self._prediction_labels[:len(scores)] = prediction_labels[order]
+        self._labels[:len(scores)] = labels[order]
+        self.num_instances = len(scores)
+
+
 class ThresholdOptimizationNode(BaseNode):
     """ Optimize the classification threshold for a specified metric
     
@@ -159,7 +253,9 @@ class ThresholdOptimizationNode(BaseNode):
                                       recalibrate=recalibrate,
                                       orientation_up = True,
                                       threshold = 0,
-                                      instances = [], # list sorted by prediction score
+                                      instances = [], # new, not yet sorted instances
+                                      # instances sorted by prediction score
+                                      sorted_instances = SortedInstances(),
                                       example=None, # classification vector input example
                                       classifier_information={},  # information from the example+own classification information
                                       inverse_metric=inverse_metric)
@@ -200,10 +296,10 @@ class ThresholdOptimizationNode(BaseNode):
             raise Exception("The ThresholdOptimizationNode can only handle a "
                             "string or a list with a string as its only element "
                             "as input. Got: %s with type: %s"%(str(data.label),type(data.label)))
-        # Insert new (score, predicted_label, actual_label) tuple into list of
-        # instances that is sorted by ascending prediction score
-        insort(self.instances, (data.prediction, prediction_label, 
-                                self.classes.index(class_label)))
+        # Collect the new (score, predicted_label, actual_label) tuple,
+        # it is sorted into the instances when the threshold is calculated
+        self.instances.append((data.prediction, prediction_label,
+                               self.classes.index(class_label)))
         
         # copying of important classifier parameters to give it to the sink node
         if self.example is None:
@@ -217,68 +313,123 @@ class ThresholdOptimizationNode(BaseNode):
         """ Call the optimization algorithm """
         self.calculate_threshold()
         
+    def sort_instances(self):
+        """ Sort the new instances into the :class:`SortedInstances`
+
+        A single new instance, as in the incremental training, is inserted
+        at the position found by binary search, whereas larger batches are
+        sorted together with the old instances.
+        """
+        if len(self.instances) == 1 and len(self.sorted_instances) > 0:
+            self.sorted_instances.insert(*self.instances[0])
+        else:
+            self.sorted_instances.extend(self.instances)
+        self.instances = []
+
+    @staticmethod
+    def confusion_sweep(labels, orientation_up=True):
+        """ Confusion counts for thresholds at each of the sorted instances
+
+        *labels* are the actual labels (0 or 1) sorted by ascending
+        prediction score. The i-th entry of the returned arrays
+        TP, FP, TN, FN corresponds to the threshold at the i-th instance,
+        i.e. this instance and all instances with lower score are
+        classified as the first class if *orientation_up* is True and as
+        the second class otherwise.
+        """
+        labels = numpy.asarray(labels)
+        negatives = numpy.cumsum(labels == 0)
+        positives = numpy.arange(1, len(labels) + 1) - negatives
+        num_negatives = negatives[-1] if len(labels) else 0
+        num_positives = len(labels) - num_negatives
+        if orientation_up:
+            TN = negatives
+            FN = positives
+            FP = num_negatives - TN
+            TP = num_positives - FN
+        else:
+            FP = negatives
+            TP = positives
+            TN = num_negatives - FP
+            FN = num_positives - TP
+        return TP, FP, TN, FN
+
+    def metric_values(self, TP, FP, TN, FN):
+        """ Evaluate the metric for arrays of confusion counts
+
+        The balanced accuracy and metric expressions which can be evaluated
+        elementwise are computed on the whole arrays. All other metrics
+        are evaluated for each threshold with the metric function.
+        """
+        if self.metric == "Balanced_accuracy":
+            TP, FP, TN, FN = [numpy.asarray(x, dtype=float)
+                              for x in (TP, FP, TN, FN)]
+            FN = numpy.where(TP + FN == 0, 1, FN)
+            FP = numpy.where(TN + FP == 0, 1, FP)
+            return 0.5*TP/(TP+FN) + 0.5*TN/(TN+FP)
+        if '{TP}' in self.metric or '{FP}' in self.metric or \
+                '{TN}' in self.metric or '{FN}' in self.metric:
+            counts = dict(TP=numpy.asarray(TP, dtype=float),
+                          FP=numpy.asarray(FP, dtype=float),
+                          TN=numpy.asarray(TN, dtype=float),
+                          FN=numpy.asarray(FN, dtype=float))
+            try:
+                # divisions by zero are left to the metric function
+                with numpy.errstate(all="raise"):
+                    values = eval(self.metric.format(TP="TP", FP="FP",
+                                                     TN="TN", FN="FN"),
+                                  globals(), counts)
+                values = numpy.asarray(values, dtype=float)
+                if values.shape == counts["TP"].shape:
+                    return values
+            except Exception:
+                # e.g., conditional expressions are not elementwise
+                pass
+        if self.metric_fct is None:
+            self.metric_fct = self._get_metric_fct()
+        return numpy.array([self.metric_fct(int(tp), int(fp), int(tn), int(fn))
+                            for tp, fp, tn, fn in zip(TP, FP, TN, FN)],
+                           dtype=float)
+
     def calculate_threshold(self):
         """ Optimize the threshold for the given scores, labels and metric. 
         
-        .. note:: 
-            This method requires O(n) time (n being the number of training 
-            instances). There should be an asymptotically more efficient
-            implementation that is better suited for fast incremental learning.
+        The instances are kept sorted by prediction score, such that the
+        confusion counts of all thresholds are cumulative sums over the
+        labels and the metric is evaluated on whole arrays.
+        A new instance of the incremental training is inserted by binary
+        search, without reallocating the arrays
+        (see :class:`SortedInstances`).
+
+        .. note::
+            Evaluating the metric for all thresholds still takes O(n) time
+            (n being the number of training instances), but in vectorized
+            operations on views of the sorted arrays
+            and not in Python loops.
         """
         # Create metric function lazily since it cannot be pickled
         if not hasattr(self,"metric_fct") or self.metric_fct is None:
             self.metric_fct = self._get_metric_fct()
-        # Split 3-tuples in instance heap into the three components
-        # predictions, predicted labels, and actual label
-        predictions = map(itemgetter(0), self.instances)
-        prediction_labels = map(itemgetter(1), self.instances)
-        labels = map(itemgetter(2), self.instances)
-        
-        if prediction_labels[0] == 0:
+        self.sort_instances()
+        predictions = self.sorted_instances.scores
+
+        # Determine orientation of hyperplane
+        if self.sorted_instances.prediction_labels[0] == 0:
             self.orientation_up = True
         else:
             self.orientation_up = False
-        # Determine orientation of hyperplane
-        if self.orientation_up:
-            TP = labels.count(1)
-            FP = labels.count(0)
-            TN = 0
-            FN = 0
-        else:
-            TP = 0
-            FP = 0
-            TN = labels.count(0)
-            FN = labels.count(1)
+        # Determine the threshold for which the given metric is maximized
+        metric_values = self.metric_values(
+            *self.confusion_sweep(self.sorted_instances.labels,
+                                  self.orientation_up))
 
         if self.store:
-            self.predictions_train = [[], []]
-        
-        # Determine the threshold for which the given metric is maximized
-        metric_values = []
-        for label, prediction_value, in zip (labels, predictions):
-            if label == 0 and self.orientation_up:
-                TN += 1
-                FP -= 1
-            elif label == 0 and not self.orientation_up:
-                TN -= 1
-                FP += 1
-            elif label == 1 and self.orientation_up:
-                FN += 1
-                TP -= 1
-            elif label == 1 and not self.orientation_up:
-                FN -= 1
-                TP += 1    
-            assert (TP >= 0 and FP >= 0 and TN >= 0 and FN >=0), \
-                    "TP: %s FP: %s TN: %s FN: %s" % (TP, FP, TN, FN)
-            metric_values.append(self.metric_fct(TP, FP, TN, FN))
-
-            if self.store:
-                self.predictions_train[0].append(prediction_value)
-                self.predictions_train[1].append(metric_values[-1])
+            self.predictions_train = [predictions.tolist(),
+                                      metric_values.tolist()]
         # Fit a polynomial of degree 2 to the threshold that maximizes the 
         # metric and its two neighbors. The peak of this polynomial is then 
         # used as threshold of classification
-        max_index = metric_values.index(max(metric_values))
+        max_index = numpy.argmax(metric_values)
         if max_index in [0, len(metric_values)-1]: # pathologic cases
             self.threshold = predictions[max_index]
         else:
@@ -293,7 +444,8 @@ class ThresholdOptimizationNode(BaseNode):
             # We remove all old training data since we expect that the distributions
             # have shifted and thus, the old data does not help to model the
             # new distributions
-            self.set_permanent_attributes(instances = []) 
+            self.set_permanent_attributes(
+                instances=[], sorted_instances=SortedInstances())
     
     def _inc_train(self, data, class_label):
         """ Provide training data for retraining """
@@ -365,11 +517,7 @@ class ThresholdOptimizationNode(BaseNode):
         """
         if self.store:
             try:
-                # Create metric function lazily since it cannot be pickled
-                metric_fct = self._get_metric_fct()
-                
                 # Determine curve on test data
-                # TODO: Code duplication (mostly already in train)
                 predictions_test = []
                 labels_test = []
                 for data, label in self.input_node.request_data_for_testing():
@@ -380,38 +528,10 @@ class ThresholdOptimizationNode(BaseNode):
                 labels_test = numpy.array(labels_test)[sort_index]
                 predictions_test = numpy.array(predictions_test)[sort_index]
                 
-                # Determine orientation of hyperplane
-                if self.orientation_up:
-                    TP = list(labels_test).count(1)
-                    FP = list(labels_test).count(0)
-                    TN = 0
-                    FN = 0
-                else:
-                    TP = 0
-                    FP = 0
-                    TN = list(labels_test).count(0)
-                    FN = list(labels_test).count(1)
-                
-                self.predictions_test = [[], []]
-                for label, prediction_value, in zip (labels_test, predictions_test):
-                    if label == 0 and self.orientation_up:
-                        TN += 1
-                        FP -= 1
-                    elif label == 0 and not self.orientation_up:
-                        TN -= 1
-                        FP += 1
-                    elif label == 1 and self.orientation_up:
-                        FN += 1
-                        TP -= 1
-                    elif label == 1 and not self.orientation_up:
-                        FN -= 1
-                        TP += 1    
-                    assert (TP >= 0 and FP >= 0 and TN >= 0 and FN >=0), \
-                        "TP: %s FP: %s TN: %s FN: %s" % (TP, FP, TN, FN)
-                    metric_value = metric_fct(TP, FP, TN, FN)
-                    
-                    self.predictions_test[0].append(prediction_value)
-                    self.predictions_test[1].append(metric_value)
+                metric_values = self.metric_values(
+                    *self.confusion_sweep(labels_test, self.orientation_up))
+                self.predictions_test = [predictions_test.tolist(),
+                                         metric_values.tolist()]
                     
                 ### Plot ##
                 import pylab
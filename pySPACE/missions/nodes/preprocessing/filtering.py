@@ -308,6 +308,19 @@ class FIRFilterNode(BaseNode):
             different executions of the filter.
             (*optional, default: False*)
 
+        :comp_type:
+            Type of computation.
+            With 'normal' the filter is applied once, as described for
+            *time_shift*.
+            With 'filtfilt' the filter is applied forward and backward
+            (see scipy.signal.filtfilt), which results in a zero phase
+            filter with squared magnitude response.
+            Here, *time_shift* is ignored.
+            In both cases, all selected channels are filtered with one call
+            along the time axis.
+
+            (*optional, default: 'normal'*)
+
 
     **Exemplary Call**
 
@@ -350,8 +363,6 @@ class FIRFilterNode(BaseNode):
         self.comp_hw = kwargs.pop('comp_hw', None)
 
         self.filter_kernel = None
-        self.filtered_data = None
-        self.shrinked_data = None
         self.data_buffer = None
 
         # the internal filter state
@@ -370,23 +381,30 @@ class FIRFilterNode(BaseNode):
                         if self.selected_channels != None else data.channel_names
         self.selected_channel_indices = [data.channel_names.index(channel_name) \
                                  for channel_name in self.selected_channel_names]
+        self.all_channels_selected = \
+            self.selected_channel_indices == range(data.shape[1])
 
-        # buffer for all filter results
         if self.time_shift == "middle":
-            self.filtered_data = numpy.zeros((data.shape[0]+ \
-                 (len(self.filter_kernel)-1)/2,data.shape[1]), dtype=numpy.float)
-            self.shrinked_data = numpy.zeros(data.shape, dtype=numpy.float)
-            self.data_buffer = numpy.zeros((data.shape[0]+ \
-                 (len(self.filter_kernel)-1)/2,data.shape[1]), dtype=numpy.float)
+            self.time_offset = (len(self.filter_kernel)-1)/2
         elif self.time_shift == "end":
-            self.filtered_data = numpy.zeros((data.shape[0]+ \
-                 (len(self.filter_kernel)-1),data.shape[1]), dtype=numpy.float)
-            self.shrinked_data = numpy.zeros(data.shape, dtype=numpy.float)
-            self.data_buffer = numpy.zeros((data.shape[0]+ \
-                 (len(self.filter_kernel)-1),data.shape[1]), dtype=numpy.float)
+            self.time_offset = len(self.filter_kernel)-1
+        else:
+            self.time_offset = 0
+        self._init_data_buffer(data.shape[0])
+
+    def _init_data_buffer(self, length):
+        """ Buffer for the selected channels with appended zeros
+
+        The appended zeros are needed for the time shift and
+        never overwritten, so the buffer is reused for all windows
+        of the same length.
+        """
+        if self.time_offset > 0:
+            self.data_buffer = numpy.zeros(
+                (length + self.time_offset, len(self.selected_channel_indices)),
+                dtype=numpy.float)
         else:
-            self.filtered_data = numpy.zeros(data.shape, dtype=numpy.float)
-            self.data_buffer = numpy.zeros(data.shape, dtype=numpy.float)
+            self.data_buffer = None
 
 
     def calc_filter_kernel(self, data):
@@ -445,12 +463,11 @@ class FIRFilterNode(BaseNode):
               "pass_band must be a tuple (band pass) or single value (low pass)")
 
 
-        # the optional blockwise filtering
+        # the optional blockwise filtering,
+        # the state of all channels is kept in one array
         if self.time_shift == "stream":
-            self.internal_state = dict()
-            for channel_index in xrange(data.shape[1]):
-                    self.internal_state[channel_index] = numpy.zeros(len(self.filter_kernel)-1)
-
+            self.internal_state = numpy.zeros((len(self.filter_kernel)-1,
+                                               data.shape[1]))
 
 
     def _execute(self, data):
@@ -459,75 +476,65 @@ class FIRFilterNode(BaseNode):
         # it not exists
         if self.filter_kernel is None:
             self.initialize_data_dependencies(data)
-            self.time_offset = 0
 
         assert(len(self.filter_kernel)>0), "Filter construction failed."
 
-        if numpy.dtype('float64') != data.dtype:
-            data = data.astype(numpy.float)
         data_array = data.view(numpy.ndarray)
-        if self.time_shift == "middle":
-            # append zeros to the selected channels and copy them to the data
-            # buffer (e.g. just copy the relevant data to data_buffer that
-            # contains zeros)
-            self.time_offset = (len(self.filter_kernel)-1)/2
-            for channel_index in self.selected_channel_indices:
-                self.data_buffer[0:data.shape[0],channel_index] = \
-                                                    data_array[:,channel_index]
-        elif self.time_shift == "end":
-            # append zeros to the selected channels and copy them to the data
-            # buffer (e.g. just copy the relevant data to data_buffer that
-            # contains zeros)
-            self.time_offset = (len(self.filter_kernel)-1)
-            for channel_index in self.selected_channel_indices:
-                self.data_buffer[0:data.shape[0],channel_index] = \
-                                                    data_array[:,channel_index]
-
+        if self.all_channels_selected:
+            selected_data = data_array
         else:
-            self.data_buffer = data_array
+            selected_data = data_array[:, self.selected_channel_indices]
+        if numpy.dtype('float64') != selected_data.dtype:
+            selected_data = selected_data.astype(numpy.float)
 
-        #Do the actual filtering
+        #Do the actual filtering on all selected channels at once
         if self.comp_type == 'normal':
-            # do sequential filtering
             if self.time_shift == "stream":
-                for channel_index in self.selected_channel_indices:
-                    (self.filtered_data[:,channel_index],
-                     self.internal_state[channel_index]) = \
-                        scipy.signal.lfilter(
-                            self.filter_kernel, 1,
-                            x = self.data_buffer[:,channel_index],
-                            zi = self.internal_state[channel_index])
+                if self.all_channels_selected:
+                    internal_state = self.internal_state
+                else:
+                    internal_state = \
+                        self.internal_state[:, self.selected_channel_indices]
+                filtered_data, internal_state = scipy.signal.lfilter(
+                    self.filter_kernel, 1, selected_data, axis=0,
+                    zi=internal_state)
+                if self.all_channels_selected:
+                    self.internal_state = internal_state
+                else:
+                    self.internal_state[:, self.selected_channel_indices] = \
+                        internal_state
+            elif self.time_offset > 0:
+                # copy the data to the buffer with the appended zeros
+                if self.data_buffer.shape[0] != \
+                        data.shape[0] + self.time_offset:
+                    self._init_data_buffer(data.shape[0])
+                self.data_buffer[:data.shape[0]] = selected_data
+                filtered_data = scipy.signal.lfilter(
+                    self.filter_kernel, 1, self.data_buffer, axis=0)
+                # cut away the irrelevant data
+                filtered_data = filtered_data[self.time_offset:
+                                              data.shape[0] + self.time_offset]
             else:
-                for channel_index in self.selected_channel_indices:
-                    self.filtered_data[:,channel_index] = \
-                        scipy.signal.lfilter(
-                             self.filter_kernel, 1,
-                             x = self.data_buffer[:,channel_index])
-
+                filtered_data = scipy.signal.lfilter(
+                    self.filter_kernel, 1, selected_data, axis=0)
+        elif self.comp_type == 'filtfilt':
+            filtered_data = scipy.signal.filtfilt(
+                self.filter_kernel, [1.0], selected_data, axis=0,
+                padlen=min(3 * len(self.filter_kernel), data.shape[0] - 1))
         else:
             raise ValueError("Computation type %s unknown" % self.comp_type)
 
-        if self.time_shift == "middle" \
-            or self.time_shift=="end":
-            # cut away the irrelevant data
-            # (e.g. just copy relevant data back)
-            for channel_index in self.selected_channel_indices:
-                self.shrinked_data[0:data.shape[0],channel_index] = \
-                 self.filtered_data[self.time_offset:
-                    self.filtered_data.shape[0]+self.time_offset,
-                    channel_index]
-            result_time_series = TimeSeries.replace_data(data,self.shrinked_data)
-        else:
-            result_time_series = TimeSeries.replace_data(data,self.filtered_data)
-
-        return result_time_series
+        if not self.all_channels_selected:
+            # not selected channels are set to zero
+            result_data = numpy.zeros(data.shape)
+            result_data[:, self.selected_channel_indices] = filtered_data
+            filtered_data = result_data
+        return TimeSeries.replace_data(data, filtered_data)
 
     def __setstate__(self, sdict):
         """ Restore object from its pickled state"""
         super(FIRFilterNode, self).__setstate__(sdict)
         self.filter_kernel = None
-        self.filtered_data = None
-        self.shrinked_data = None
         self.data_buffer = None
         self.internal_state = None
 
@@ -557,10 +564,32 @@ class IIRFilterNode(BaseNode):
             selected_channels
 
         :comp_type:
-            Type of computation, e.g. 'normal'
+            Type of computation:
+
+                :normal:  filtering of each window from its beginning on
+                :mirror:  the window is mirrored at the right border and
+                          filtered forward and backward
+                :filtfilt: zero phase filtering, i.e., the filter is applied
+                           forward and backward (see scipy.signal.filtfilt)
+                :stream:  all incoming time series objects are assumed to be
+                          adjacent blocks of one data stream and the
+                          filter state of all channels is preserved between
+                          the executions
+
+            In all cases, the selected channels are filtered
+            with one call along the time axis.
 
             (*optional, default: 'normal'*)
 
+        :sos:
+            Use the representation of the filter as cascade of
+            second-order sections instead of the transfer function
+            coefficients.
+            This is numerically more stable, especially for
+            high filter orders and narrow pass bands.
+
+            (*optional, default: False*)
+
     **Exemplary Call**
 
     .. code-block:: yaml
@@ -583,17 +612,24 @@ class IIRFilterNode(BaseNode):
                  ftype = 'ellip',
                  selected_channels = None,
                  comp_type = 'normal',
+                 sos = False,
                  **kwargs):
 
         super(IIRFilterNode, self).__init__(**kwargs)
 
+        if comp_type not in ['normal', 'mirror', 'filtfilt', 'stream']:
+            raise ValueError("Computation type %s unknown" % comp_type)
+
         self.set_permanent_attributes(pass_band = pass_band,
                                       pass_band_loss = pass_band_loss,
                                       stop_band_rifle = stop_band_rifle,
                                       ftype = ftype,
                                       selected_channels = selected_channels,
                                       comp_type = comp_type,
-                                      filter_kernel = None)
+                                      sos = sos,
+                                      filter_kernel = None,
+                                      internal_state = None,
+                                      mirror_buffer = None)
 
 
         self.comp_hw = kwargs.pop('comp_hw', None)
@@ -618,10 +654,35 @@ class IIRFilterNode(BaseNode):
             raise ValueError("No valid number of pass band arguments: pass_band"\
                      + " must be a tuple (band pass) or single value (low pass)")
 
-        b,a = scipy.signal.iirdesign(wp, ws, self.pass_band_loss,
-                                    self.stop_band_rifle, ftype=self.ftype)
-
-        self.filter_kernel=[b,a]
+        if self.sos:
+            self.filter_kernel = scipy.signal.iirdesign(
+                wp, ws, self.pass_band_loss, self.stop_band_rifle,
+                ftype=self.ftype, output="sos")
+        else:
+            b,a = scipy.signal.iirdesign(wp, ws, self.pass_band_loss,
+                                        self.stop_band_rifle, ftype=self.ftype)
+
+            self.filter_kernel=[b,a]
+
+    def _filter(self, data, zi=None):
+        """ Filter *data* along the time axis with the current filter kernel """
+        if self.sos:
+            if zi is None:
+                return scipy.signal.sosfilt(self.filter_kernel, data, axis=0)
+            return scipy.signal.sosfilt(self.filter_kernel, data, axis=0,
+                                        zi=zi)
+        if zi is None:
+            return scipy.signal.lfilter(self.filter_kernel[0],
+                                        self.filter_kernel[1], data, axis=0)
+        return scipy.signal.lfilter(self.filter_kernel[0],
+                                    self.filter_kernel[1], data, axis=0, zi=zi)
+
+    def _initial_state(self, channels):
+        """ Zero filter state for the given number of channels """
+        if self.sos:
+            return numpy.zeros((self.filter_kernel.shape[0], 2, channels))
+        order = max(len(self.filter_kernel[0]), len(self.filter_kernel[1])) - 1
+        return numpy.zeros((order, channels))
 
     def _execute(self, data):
         """ Apply filter to data and return the result
@@ -638,38 +699,60 @@ class IIRFilterNode(BaseNode):
                     [data.channel_names.index(channel_name) for channel_name in \
                                                      self.selected_channel_names]
 
-        if self.comp_type == 'normal': #normal filtering with scipy
-
-            filtered_data = numpy.zeros(data.shape)
-
-            for channel_index in self.selected_channel_indices:
-                filtered_data[:,channel_index] = \
-                                      scipy.signal.lfilter(self.filter_kernel[0],
-                                    self.filter_kernel[1], data[:,channel_index])
+        data_array = data.view(numpy.ndarray)
+        all_channels_selected = \
+            self.selected_channel_indices == range(data.shape[1])
+        if all_channels_selected:
+            selected_data = data_array
+        else:
+            selected_data = data_array[:, self.selected_channel_indices]
 
-            result_time_series = TimeSeries.replace_data(data, filtered_data)
+        if self.comp_type == 'normal': #normal filtering with scipy
+            filtered_data = self._filter(selected_data)
 
         elif self.comp_type == 'mirror':
             #filtering with scipy, mirror the data beforehand on the right border
-            data_mirrored = numpy.vstack((data,numpy.flipud(data)))
-            pre_filtered_data = numpy.zeros(data_mirrored.shape)
-            for channel_index in self.selected_channel_indices:
-                pre_filtered_data[:,channel_index] = \
-                                      scipy.signal.lfilter(self.filter_kernel[0],
-                           self.filter_kernel[1], data_mirrored[:,channel_index])
-
-                pre_filtered_data[:,channel_index] = \
-                                      scipy.signal.lfilter(self.filter_kernel[0],
-                                                           self.filter_kernel[1],
-                                numpy.flipud(pre_filtered_data[:,channel_index]))
-
-            result_time_series = \
-                     TimeSeries.replace_data(data, pre_filtered_data[:len(data)])
+            if self.mirror_buffer is None or \
+                    self.mirror_buffer.shape != (2 * data.shape[0],
+                                                 selected_data.shape[1]):
+                self.mirror_buffer = numpy.empty((2 * data.shape[0],
+                                                  selected_data.shape[1]))
+            self.mirror_buffer[:data.shape[0]] = selected_data
+            self.mirror_buffer[data.shape[0]:] = selected_data[::-1]
+            pre_filtered_data = self._filter(self.mirror_buffer)
+            filtered_data = \
+                self._filter(pre_filtered_data[::-1])[:data.shape[0]]
+
+        elif self.comp_type == 'filtfilt':
+            if self.sos:
+                filtered_data = scipy.signal.sosfiltfilt(
+                    self.filter_kernel, selected_data, axis=0,
+                    padlen=min(3 * (2 * len(self.filter_kernel) + 1),
+                               data.shape[0] - 1))
+            else:
+                filtered_data = scipy.signal.filtfilt(
+                    self.filter_kernel[0], self.filter_kernel[1],
+                    selected_data, axis=0,
+                    padlen=min(3 * max(len(self.filter_kernel[0]),
+                                       len(self.filter_kernel[1])),
+                               data.shape[0] - 1))
+
+        elif self.comp_type == 'stream':
+            if self.internal_state is None:
+                self.internal_state = \
+                    self._initial_state(len(self.selected_channel_indices))
+            filtered_data, self.internal_state = \
+                self._filter(selected_data, zi=self.internal_state)
 
         else:
             raise ValueError("Computation type unknown")
 
-        return result_time_series
+        if not all_channels_selected:
+            # not selected channels are set to zero
+            result_data = numpy.zeros(data.shape)
+            result_data[:, self.selected_channel_indices] = filtered_data
+            filtered_data = result_data
+        return TimeSeries.replace_data(data, filtered_data)
 
 class VarianceFilterNode(BaseNode):
     """ Take the variance as filtered data or standardize with moving variance and mean
@@ -748,7 +831,7 @@ class VarianceFilterNode(BaseNode):
             import pyublas
             var_tools = True
         except:
-            warnings.warn("Pyublas is not installed\nIf you are using the varianceFilterNode\nit is going to be very slow...")
+            warnings.warn("Pyublas is not installed\nThe varianceFilterNode is going to use the slower NumPy implementation.")
             var_tools = False
 
         if var_tools:
@@ -768,9 +851,9 @@ class VarianceFilterNode(BaseNode):
 
     def _execute(self, data):
         # Initialize the ringbuffers and variables one for each channel
-        if(self.ringbuffer == None):
+        if self.ringbuffer is None:
             self.width /= 1000.0
-            self.width = int(self.width * data.sampling_frequency)
+            self.width = max(1, int(self.width * data.sampling_frequency))
             self.nChannels = len(data.channel_names)
             self.ringbuffer = numpy.zeros((self.width,self.nChannels),dtype=numpy.double)
             self.variables = numpy.zeros((2,self.nChannels),dtype=numpy.double)
@@ -778,6 +861,9 @@ class VarianceFilterNode(BaseNode):
 
         # Convert the input data to double
         x = data.view(numpy.ndarray).astype(numpy.double)
+        if not self.var_tools:
+            filtered_data = self._sliding_window_filter(x)
+            return TimeSeries.replace_data(data, filtered_data)
         # Initialize the result data array
         filtered_data = numpy.zeros(x.shape)
         # Lists which are passed to the standardization
@@ -792,16 +878,14 @@ class VarianceFilterNode(BaseNode):
                 processing_ringbuffer = numpy.array(self.ringbuffer[:,channel_index],'d')
                 processing_variables = numpy.array(self.variables[:,channel_index],'d')
                 processing_index = int(self.index[channel_index])
-                if self.var_tools:
-                    # Perform the standardization
-                    # The module vt (variance_tools) is implemented in c using boost to wrap the code in python
-                    # The module is located in trunk/library/variance_tools and have to be compiled
-                    self.index[channel_index] = vt.standardization(processing_filtered_data, numpy.array(x[:,channel_index],'d'), processing_ringbuffer, processing_variables, self.width, processing_index)
-                else:
-                    self.index[channel_index] = self.standardisation(processing_filtered_data, numpy.array(x[:,channel_index],'d'), processing_ringbuffer, processing_variables, self.width, processing_index)
+                # Perform the standardization
+                # The module vt (variance_tools) is implemented in c using boost to wrap the code in python
+                # The module is located in trunk/library/variance_tools and have to be compiled
+                self.index[channel_index] = vt.standardization(processing_filtered_data, numpy.array(x[:,channel_index],'d'), processing_ringbuffer, processing_variables, self.width, processing_index)
                 # Copy the processing lists back to the local variables
                 filtered_data[:,channel_index] = processing_filtered_data
                 self.ringbuffer[:,channel_index] = processing_ringbuffer
+                self.variables[:,channel_index] = processing_variables
         else:
             for channel_index in range(self.nChannels):
                 # Copy the different data to the processing listst
@@ -809,13 +893,10 @@ class VarianceFilterNode(BaseNode):
                 processing_ringbuffer = numpy.array(self.ringbuffer[:,channel_index],'d')
                 processing_variables = numpy.array(self.variables[:,channel_index],'d')
                 processing_index = int(self.index[channel_index])
-                if self.var_tools:
-                    # Perform the filtering with the variance
-                    # The module vt (variance_tools) is implemented in c using boost to wrap the code in python
-                    # The module is located in trunk/library/variance_tools and have to be compiled
-                    self.index[channel_index] = vt.filter(processing_filtered_data, numpy.array(x[:,channel_index],'d'), processing_ringbuffer, processing_variables, self.width, processing_index)
-                else:
-                    self.index[channel_index] = self.variance(processing_filtered_data, numpy.array(x[:,channel_index],'d'), processing_ringbuffer, processing_variables, self.width, processing_index)
+                # Perform the filtering with the variance
+                # The module vt (variance_tools) is implemented in c using boost to wrap the code in python
+                # The module is located in trunk/library/variance_tools and have to be compiled
+                self.index[channel_index] = vt.filter(processing_filtered_data, numpy.array(x[:,channel_index],'d'), processing_ringbuffer, processing_variables, self.width, processing_index)
                 # Copy the processing lists back to the local variables
                 filtered_data[:,channel_index] = processing_filtered_data
                 self.ringbuffer[:,channel_index] = processing_ringbuffer
@@ -824,71 +905,50 @@ class VarianceFilterNode(BaseNode):
         result_time_series = TimeSeries.replace_data(data, filtered_data)
         return result_time_series
 
-    #Fallback functions if the c implementation of the variance filter and the standardisation could not be loaded
-    def variance(self, outData, inData, ringbuffer, variables, width, index):
-        #Some local variables for speed up
-        ww = width*width
-        wm1 = width-1.0
-        wp1 = width+1.0
-
-        ringbufferValue=0.0
-        variable1 = 0.0
-
-        for i in range(len(inData)):
-            #Speedup for array entries which are needed several times
-            ringbufferValue = ringbuffer[index];
-            inDataValue = inData[i]
-            variable1 = variables[1];
-
-            #Calculating the new variance
-            variables[0] = variables[0] + (inDataValue - ringbufferValue) * ( ((wm1) * inDataValue) + ((wp1) * ringbufferValue) - (2.0*variable1));
+    def _sliding_window_filter(self, x):
+        """ Variance or standardization of all channels with NumPy
 
-            #Calculating the new mean value
-            variables[1] = variable1 + (inDataValue-ringbufferValue);
-
-            #Store the actual sample in the ringbuffer
-            ringbuffer[index] = inDataValue;
-
-            #Increment the ringbuffer index
-            index = index + 1 if (index < wm1) else 0
-
-            #Calculate the standardization
-            outData[i] = variables[0]/(ww)
-
-        return index
-
-    def standardisation(self, outData, inData, ringbuffer, variables, width, index):
-        #Some local variables for speed up
-        ww = width*width
-        wm1 = width-1.0
-        wp1 = width+1.0
-
-        ringbufferValue=0.0
-        variable1 = 0.0
-
-        for i in range(len(inData)):
-            #Speedup for array entries which are needed several times
-            ringbufferValue = ringbuffer[index];
-            inDataValue = inData[i]
-            variable1 = variables[1]
-
-            #Calculating the new variance
-            variables[0] = variables[0] + (inDataValue - ringbufferValue) * ( ((wm1) * inDataValue) + ((wp1) * ringbufferValue) - (2.0*variable1));
-
-            #Calculating the new mean value
-            variables[1] = variable1 + (inDataValue-ringbufferValue);
-
-            #Store the actual sample in the ringbuffer
-            ringbuffer[index] = inDataValue;
-
-            #Increment the ringbuffer index
-            index = index + 1 if (index < wm1) else 0
-            print index
-            #Calculate the standardization
-
-            outData[i] = (inDataValue-(variables[1]/(width))) / math.sqrt(variables[0]/(ww)) if (math.sqrt(variables[0]/(ww)) != 0.0) else 0.0
-
-        return index
+        Fallback if the C implementation of the variance filter and the
+        standardization could not be loaded.
+        The sums of the samples and of their squares over the last
+        *width* samples are computed for the whole window at once with
+        cumulative sums.
+        The last *width* samples are stored in the ring buffer
+        to continue the computation with the next window.
+        """
+        width = self.width
+        # the last samples in chronological order, followed by the new data
+        history = numpy.roll(self.ringbuffer, -int(self.index[0]), axis=0)
+        extended = numpy.vstack((history, x))
+        # The variance does not depend on an offset, but the precision of
+        # the cumulative sums is better for centered data.
+        offset = extended.mean(axis=0)
+        centered = extended - offset
+        sums = numpy.zeros((extended.shape[0] + 1, extended.shape[1]))
+        numpy.cumsum(centered, axis=0, out=sums[1:])
+        square_sums = numpy.zeros(sums.shape)
+        numpy.cumsum(centered**2, axis=0, out=square_sums[1:])
+        # sums over the *width* samples ending with each sample of x
+        window_sums = sums[width + 1:] - sums[1:-width]
+        window_square_sums = square_sums[width + 1:] - square_sums[1:-width]
+        variance = numpy.maximum(
+            window_square_sums / width - (window_sums / width)**2, 0)
+
+        # store the state in the format of the C implementation
+        self.ringbuffer = extended[-width:].copy()
+        self.index[:] = 0
+        self.variables[0] = width**2 * variance[-1]
+        self.variables[1] = window_sums[-1] + width * offset
+
+        if not self.standardization:
+            return variance
+        standard_deviation = numpy.sqrt(variance)
+        mean = window_sums / width + offset
+        filtered_data = numpy.zeros(x.shape)
+        nonzero = standard_deviation != 0.0
+        filtered_data[nonzero] = \
+            (x[nonzero] - mean[nonzero]) / standard_deviation[nonzero]
+        return filtered_data
 
 
 class TkeoNode(BaseNode):
@@ -518,7 +518,24 @@ class PerformanceSinkNode(BaseNode):
         """
         trace = []
         long_trace = []
-        
+
+        if save_trace == "short":
+            # the codes of all samples at once
+            labels = [label for prediction_vector, label
+                      in classification_results]
+            predicted_labels = [prediction_vector.label for
+                                prediction_vector, label
+                                in classification_results]
+            if sec_class is None:
+                for label in labels:
+                    if not label == ir_class:
+                        sec_class = label
+                        break
+            trace = BinaryClassificationDataset.confusion_codes(
+                predicted_labels, labels, ir_class=ir_class,
+                sec_class=sec_class).tolist()
+            return trace, long_trace
+
         for prediction_vector,label in classification_results:
             if sec_class is None and not label == ir_class:
                 sec_class = label
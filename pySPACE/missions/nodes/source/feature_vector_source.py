@@ -6,7 +6,6 @@
 """
 
 from pySPACE.missions.nodes.base_node import BaseNode
-from pySPACE.tools.memoize_generator import MemoizeGenerator
 
 
 class FeatureVectorSourceNode(BaseNode):
@@ -80,16 +79,14 @@ class FeatureVectorSourceNode(BaseNode):
             # Check if there is training data for the current split and run
             if key in self.dataset.data.keys():
                 self._log("Accessing input dataset's training feature vector windows.")
-                self.data_for_training = MemoizeGenerator(self.dataset.get_data(*key).__iter__(),
-                                                          caching=self.caching)
+                self.data_for_training = self._memoize(self.dataset.get_data(*key).__iter__())
             else:
                 # Returns an iterator that iterates over an empty sequence
                 # (i.e. an iterator that is immediately exhausted), since
                 # this node does not provide any data that is explicitly
                 # dedicated for training
                 self._log("No training data available.") 
-                self.data_for_training = MemoizeGenerator((x for x in [].__iter__()),
-                                                          caching=self.caching)
+                self.data_for_training = self._memoize((x for x in [].__iter__()))
         else:
             # Return the test data as there is no additional data that
             # was dedicated for training
@@ -118,8 +115,7 @@ class FeatureVectorSourceNode(BaseNode):
             
             test_data_generator = self.dataset.get_data(*key).__iter__()
 
-            self.data_for_testing = MemoizeGenerator(test_data_generator,
-                                                     caching=self.caching)
+            self.data_for_testing = self._memoize(test_data_generator)
         
         # Return a fresh copy of the generator
         return self.data_for_testing.fresh()
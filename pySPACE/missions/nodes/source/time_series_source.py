@@ -85,16 +85,14 @@ class TimeSeriesSourceNode(BaseNode):
             if key in self.dataset.data.keys():
                 self._log("Accessing input dataset's training time series windows.")
                 self.data_for_training = \
-                    MemoizeGenerator(self.dataset.get_data(*key).__iter__(),
-                                     caching=self.caching)
+                    self._memoize(self.dataset.get_data(*key).__iter__())
             else:
                 # Returns an iterator that iterates over an empty sequence
                 # (i.e. an iterator that is immediately exhausted), since
                 # this node does not provide any data that is explicitly
                 # dedicated for training
                 self._log("No training data available.") 
-                self.data_for_training = MemoizeGenerator((x for x in [].__iter__()),
-                                                          caching=self.caching)
+                self.data_for_training = self._memoize((x for x in [].__iter__()))
         else:
             # Return the test data as there is no additional data that
             # was dedicated for training
@@ -123,8 +121,7 @@ class TimeSeriesSourceNode(BaseNode):
             
             test_data_generator = self.dataset.get_data(*key).__iter__()
 
-            self.data_for_testing = MemoizeGenerator(test_data_generator,
-                                                     caching=self.caching)
+            self.data_for_testing = self._memoize(test_data_generator)
         
         # Return a fresh copy of the generator
         return self.data_for_testing.fresh()
@@ -213,6 +210,16 @@ class Stream2TimeSeriesSourceNode(TimeSeriesSourceNode):
             
             (*optional, default: False*)
 
+        :bulk_windowing:
+            When True, all windows are cut at once from the complete
+            recording (:class:`~pySPACE.missions.support.windower.BulkMarkerWindower`)
+            instead of streaming the data through the ring buffer of the
+            :class:`~pySPACE.missions.support.windower.MarkerWindower`.
+            The windows are the same, but start and end markers
+            are not supported.
+
+            (*optional, default: False*)
+
     **Exemplary Call**
 
     .. code-block:: yaml
@@ -231,7 +238,8 @@ class Stream2TimeSeriesSourceNode(TimeSeriesSourceNode):
     def __init__(self, windower_spec_file=None, local_window_conf=False,
                  nullmarker_stride_ms=None, no_overlap=False,
                  continuous=False,
-                 data_consistency_check=False, **kwargs):
+                 data_consistency_check=False, bulk_windowing=False,
+                 **kwargs):
 
         super(Stream2TimeSeriesSourceNode, self).__init__(**kwargs)
 
@@ -251,6 +259,7 @@ class Stream2TimeSeriesSourceNode(TimeSeriesSourceNode):
             nullmarker_stride_ms=nullmarker_stride_ms,
             no_overlap=no_overlap,
             data_consistency_check=data_consistency_check,
+            bulk_windowing=bulk_windowing,
             dataset=None,
             continuous=continuous)
 
@@ -310,7 +319,8 @@ class Stream2TimeSeriesSourceNode(TimeSeriesSourceNode):
                 window_definition=self.window_definition,
                 nullmarker_stride_ms=self.nullmarker_stride_ms,
                 no_overlap=self.no_overlap,
-                data_consistency_check=self.data_consistency_check)
+                data_consistency_check=self.data_consistency_check,
+                bulk_windowing=self.bulk_windowing)
 
             if self.dataset.meta_data["runs"] > 1:
                 key = (self.run_number, self.current_split, "test")
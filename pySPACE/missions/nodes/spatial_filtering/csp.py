@@ -13,7 +13,8 @@ import numpy
 import scipy
 import logging
 
-from pySPACE.missions.nodes.spatial_filtering.spatial_filtering import SpatialFilteringNode
+from pySPACE.missions.nodes.spatial_filtering.spatial_filtering import \
+    SpatialFilteringNode, CovarianceAccumulator
 from pySPACE.resources.data_types.time_series import TimeSeries
 from pySPACE.resources.dataset_defs.stream import StreamDataset
 
@@ -69,6 +70,20 @@ class CSPNode(SpatialFilteringNode):
 
             (*optional, default: False*)
 
+        :shrinkage: Amount of shrinkage of the class covariance matrices
+            towards a multiple of the identity, between 0 and 1.
+            This regularizes the filters when there are only
+            few windows compared to the number of channels.
+
+            (*optional, default: 0.0*)
+
+        :forgetting_factor: Factor in (0, 1] with which the covariance
+            estimate of a class is weighted down, before a new window of this
+            class is added. Values smaller than 1 let the filters follow
+            changes of the data during incremental training (*retrain*).
+
+            (*optional, default: 1.0*)
+
     **Exemplary Call**
     
     .. code-block:: yaml
@@ -86,7 +101,8 @@ class CSPNode(SpatialFilteringNode):
     """
     def __init__(self, retained_channels=None, relevant_indices=None, 
                  spatio_temporal=False, load_path=None,
-                 visualize_pattern=False, **kwargs):
+                 visualize_pattern=False, shrinkage=0.0, forgetting_factor=1.0,
+                 **kwargs):
         # Must be set before constructor of superclass is set
         self.trainable = (load_path == None)
         
@@ -114,15 +130,12 @@ class CSPNode(SpatialFilteringNode):
             # observing the first data point
             number_of_channels = None,
 
-            # A mapping from class label to empirical covariance under this
-            # condition
-            # The covariance matrices cannot be created until the size of
-            # the data (i.e. the number of channels is known
-            covariances = dict(),
+            # Running class-wise sums from which the empirical covariance
+            # under each condition is computed
+            covariances = CovarianceAccumulator(forgetting_factor),
             
-            # Count the number of samples for each condition to
-            # normalize the covariance matrices later on
-            samples_per_condition = dict(), 
+            # Regularization of the class covariance matrices
+            shrinkage = shrinkage,
             
             # The relevant indices that are used during CSP training
             relevant_indices = relevant_indices,
@@ -162,7 +175,8 @@ class CSPNode(SpatialFilteringNode):
     def _train(self, data, label):
         """
         Add the given data point along with its class label 
-        to the training set, i.e. update the class' covariance matrix
+        to the training set, i.e. update the sums of the class' covariance
+        matrix
         """
         if self.spatio_temporal:
             data = data.reshape(1, data.shape[0] * data.shape[1])
@@ -173,12 +187,6 @@ class CSPNode(SpatialFilteringNode):
             self.number_of_channels = data.shape[1]
             self.channel_names = data.channel_names
 
-        # If we encounter this label for the first time
-        if label not in self.covariances.keys():
-            # Create the class covariance matrices lazily
-            self.covariances[label] = numpy.zeros((self.number_of_channels,
-                                                      self.number_of_channels)) 
-        
         # Just use the relevant indices for CSP training
         # (for instance the last values of the time window are the
         #  most interesting ones for LRP prediction)
@@ -186,39 +194,36 @@ class CSPNode(SpatialFilteringNode):
             data = data[self.relevant_indices,:]
 
         # Add the contribution of this data sample to the 
-        # respective covariance matrix:
+        # sums of the respective covariance matrix:
         # cov = const * sum X_i*X_i^t
-        X=data.view(numpy.ndarray)
-        self.covariances[label] += numpy.dot(X.T, X) 
-        
-        # Count the number of samples per class
-        self.samples_per_condition[label] = \
-                     self.samples_per_condition.get(label, 0) + 1
+        self.covariances.update(data.view(numpy.ndarray), label)
     
+    def _inc_train(self, data, class_label=None):
+        """ Update the class' covariance matrix and the filters """
+        self._train(data, class_label)
+        self._stop_training()
+
     def _stop_training(self, debug=False):
         """
         Finish the training, i.e. solve the generalized eigenvalue problem
         Sigma_1*x = lambda*Sigma_2*x where Sigma_1 and Sigma_2 are the class
         covariance matrices and lambda and x are a eigenvalue, eigenvector pair.
         """
-        sum_of_covariances = numpy.zeros((self.number_of_channels,
-                                             self.number_of_channels)) 
         # Normalize the empirical covariance matrices  (i.e. divide by the 
         # number of samples per class) and compute the sum of all (two)
         # covariance matrices
-        class_labels = self.covariances.keys()
-        class_labels.sort()
-        for label in class_labels:
-            self.covariances[label] /= self.samples_per_condition[label]
-            sum_of_covariances += self.covariances[label]
+        class_labels = self.covariances.labels
+        covariances = [self.covariances.covariance(label, center=False,
+                                                   shrinkage=self.shrinkage)
+                       for label in class_labels]
+        sum_of_covariances = sum(covariances)
         
         # Solve the generalized eigenvalue problem to obtain the CSPs
         # NOTE:  It doesn't matter which of the two covariance matrix
         #        is passed as first argument, we simply pick the first...
         # numpy does not support generalized eigenvalue decomposition
         (eigenvalues, unordered_filters) = \
-             scipy.linalg.eig(self.covariances[class_labels[0]],
-                                 sum_of_covariances)
+             scipy.linalg.eig(covariances[0], sum_of_covariances)
 
         # Sort filters according to eigenvalues
         preordered_filters = unordered_filters[:, numpy.argsort(-eigenvalues)]
@@ -233,7 +238,7 @@ class CSPNode(SpatialFilteringNode):
         """ Apply the learned spatial filters to the given data point. """
         # We must have computed the common spatial patterns, before
         # we can project the data onto the CSP subspace
-        assert(self.filters != None)
+        assert(self.filters is not None)
 
         # If retained_channels not specified, retain all
         if self.retained_channels in [None, 'None']:
@@ -3,14 +3,11 @@
 import os
 import cPickle
 
-try:
-    import mdp
-except:
-    pass
-
 import numpy
+import scipy.linalg
 
-from pySPACE.missions.nodes.spatial_filtering.spatial_filtering import SpatialFilteringNode
+from pySPACE.missions.nodes.spatial_filtering.spatial_filtering import \
+    SpatialFilteringNode, CovarianceAccumulator
 from pySPACE.resources.data_types.time_series import TimeSeries
 
 from pySPACE.tools.filesystem import  create_directory
@@ -18,10 +15,13 @@ from pySPACE.tools.filesystem import  create_directory
 import logging
 
 class FDAFilterNode(SpatialFilteringNode):
-    """ Reuse the  implementation of Fisher's Discriminant Analysis provided by mdp
+    """ Fisher's Discriminant Analysis as in the FDANode of mdp
     
     This node implements the supervised fisher's discriminant
     analysis algorithm for spatial filtering.
+    The filters are the generalized eigenvectors of the within-class
+    scatter matrix and the total covariance matrix, which are computed
+    from running sums of the training windows.
 
     **Parameters**
         :retained_channels: Determines how many of the FDA pseudo channels
@@ -35,6 +35,17 @@ class FDAFilterNode(SpatialFilteringNode):
 
             (*optional, default: None*)
 
+        :shrinkage: Amount of shrinkage of the within-class scatter matrix
+            towards a multiple of the identity, between 0 and 1.
+
+            (*optional, default: 0.0*)
+
+        :forgetting_factor: Factor in (0, 1] with which the sums of a class
+            are weighted down, before a new window of this class is added
+            (e.g. during incremental training with *retrain*).
+
+            (*optional, default: 1.0*)
+
     **Exemplary Call**
     
     .. code-block:: yaml
@@ -47,7 +58,8 @@ class FDAFilterNode(SpatialFilteringNode):
     :Author: Jan Hendrik Metzen (jhm@informatik.uni-bremen.de)
     :Created: 2010/02/17
     """
-    def __init__(self, retained_channels=None, load_path=None, **kwargs):
+    def __init__(self, retained_channels=None, load_path=None, shrinkage=0.0,
+                 forgetting_factor=1.0, **kwargs):
         
         # Must be set before constructor of superclass is set
         self.trainable = (load_path == None)        
@@ -65,11 +77,11 @@ class FDAFilterNode(SpatialFilteringNode):
             # The number of channels that will be retained
             retained_channels=retained_channels,
             
-            # Gather all data instances passed during training
-            data=None,
+            # Running class-wise sums of the data passed during training
+            covariances=CovarianceAccumulator(forgetting_factor),
             
-            # Remember the classes of the data 
-            labels=None,
+            # Regularization of the within-class scatter matrix
+            shrinkage=shrinkage,
                         
             # After training is finished, this node will contain
             # a projection matrix that is used to project
@@ -89,31 +101,30 @@ class FDAFilterNode(SpatialFilteringNode):
         return self.trainable
 
     def _train(self, data, label):
-        """ Remember *data* and *label* for later learning of filters."""
+        """ Add *data* to the sums of class *label* for learning of filters."""
         if self.channel_names is None:
             self.channel_names = data.channel_names
-        # Simply gather all data and do the actual training in _stop_training
-        if self.data == None:
-            self.data = data
-            self.labels = [label for i in range(data.shape[0])]
-            self.channel_names = data.channel_names
-        else:
-            self.data = numpy.vstack([self.data, data])
-            self.labels.extend([label for i in range(data.shape[0])])
+        self.covariances.update(data.view(numpy.ndarray), label)
+
+    def _inc_train(self, data, class_label=None):
+        """ Update the sums of the class and relearn the filters """
+        self._train(data, class_label)
+        self._stop_training()
 
     def _stop_training(self, debug=False):
-        # Uses collected data to learn a transformation matrix using LDA
-        fda_node = mdp.nodes.FDANode()
-        fda_node.train(self.data, numpy.array(self.labels))
-        fda_node.stop_training()
-        fda_node.train(self.data, numpy.array(self.labels))
-        fda_node.stop_training()
-        self.filters = fda_node.v
+        # Learn a transformation matrix using LDA
+        within_class_scatter = self.covariances.shrink(
+            sum(self.covariances.scatter(label)
+                for label in self.covariances.labels),
+            self.shrinkage)
+        # the eigenvalues are ordered in ascending order
+        self.filters = scipy.linalg.eigh(within_class_scatter,
+                                         self.covariances.covariance())[1]
 
     def _execute(self, data):
         """ Execute learned transformation on *data*."""
         # We must have computed the projection matrix
-        assert(self.filters != None)
+        assert(self.filters is not None)
         
         if self.retained_channels==None:
             self.retained_channels = data.shape[1]
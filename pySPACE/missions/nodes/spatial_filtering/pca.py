@@ -3,12 +3,10 @@
 import os
 import cPickle
 
-try:
-    from mdp.nodes import PCANode
-    from mdp.utils import mult
-except:
-    pass
-from pySPACE.missions.nodes.spatial_filtering.spatial_filtering import SpatialFilteringNode
+import scipy.linalg
+
+from pySPACE.missions.nodes.spatial_filtering.spatial_filtering import \
+    SpatialFilteringNode, CovarianceAccumulator
 
 from pySPACE.resources.data_types.time_series import TimeSeries
 
@@ -17,10 +15,12 @@ import logging
 import numpy
 
 class PCAWrapperNode(SpatialFilteringNode): #, PCANode):
-    """ Reuse the  implementation of the Principal Component Analysis of mdp
+    """ Principal Component Analysis as in the PCANode of mdp
     
     This node implements the unsupervised principal component
     analysis algorithm for spatial filtering.
+    The filters are the eigenvectors of the covariance matrix, which is
+    computed from running sums of the training windows.
 
     **Parameters**
         :retained_channels: Determines how many of the PCA pseudo channels
@@ -32,6 +32,12 @@ class PCAWrapperNode(SpatialFilteringNode): #, PCANode):
 
             (*optional, default: None*)
 
+        :forgetting_factor: Factor in (0, 1] with which the sums are
+            weighted down, before a new window is added
+            (e.g. during incremental training with *retrain*).
+
+            (*optional, default: 1.0*)
+
     **Exemplary Call**
     
     .. code-block:: yaml
@@ -41,7 +47,8 @@ class PCAWrapperNode(SpatialFilteringNode): #, PCANode):
             parameters:
                 retained_channels : 42
     """
-    def __init__(self, retained_channels=None, load_path=None, **kwargs):
+    def __init__(self, retained_channels=None, load_path=None,
+                 forgetting_factor=1.0, **kwargs):
         # Must be set before constructor of superclass is set
         self.trainable = (load_path == None)
         
@@ -58,7 +65,9 @@ class PCAWrapperNode(SpatialFilteringNode): #, PCANode):
                                 output_dim = retained_channels,
                                 channel_names = None,
                                 new_channels = None,
-                                wrapped_node=None
+                                # Running sums of the training data
+                                covariances = CovarianceAccumulator(
+                                                        forgetting_factor)
                                 )
         
     def is_trainable(self):
@@ -73,19 +82,20 @@ class PCAWrapperNode(SpatialFilteringNode): #, PCANode):
         """ Updates the estimated covariance matrix based on *data*. """
         # We simply ignore the class label since we 
         # are doing unsupervised learning
-        if self.wrapped_node is None:
-            self.wrapped_node = PCANode()
-        x=data.view(numpy.ndarray)
-        self.wrapped_node.train(x)
+        self.covariances.update(data.view(numpy.ndarray))
         if self.channel_names is None:
             self.channel_names = data.channel_names
+
+    def _inc_train(self, data, class_label=None):
+        """ Update the covariance matrix and the principal components """
+        self._train(data)
+        self._stop_training()
     
     def _stop_training(self, debug=False):
-        """ Stops training by forwarding to super class. """
-        self.wrapped_node.stop_training()
-        #super(PCAWrapperNode, self)._stop_training(debug)
-        self.v = self.wrapped_node.v
-        self.avg = self.wrapped_node.avg
+        """ Computes the eigenvectors of the covariance matrix """
+        # the eigenvalues are ordered in ascending order
+        self.v = scipy.linalg.eigh(self.covariances.covariance())[1][:, ::-1]
+        self.avg = self.covariances.mean().reshape(1, -1)
         self.filters = self.v
     
     def _execute(self, data, n = None):
@@ -111,7 +121,8 @@ class PCAWrapperNode(SpatialFilteringNode): #, PCANode):
         # 'Real' Processing
         #projected_data = super(PCANodeWrapper, self)._execute(data, n)
         x = data.view(numpy.ndarray)
-        projected_data = mult(x-self.avg, self.v[:, :self.retained_channels])
+        projected_data = numpy.dot(x-self.avg,
+                                   self.v[:, :self.retained_channels])
         
         if self.new_channels is None:
             self.new_channel_names = ["pca%03d" % i 
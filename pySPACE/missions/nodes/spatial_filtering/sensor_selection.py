@@ -574,13 +574,13 @@ class SensorSelectionSSNRNode(SensorSelectionBase):
         # Determine search heuristic
         if self.search_heuristic == "evolutionary_algorithm":
             heuristic_search = \
-                EvolutionaryAlgorithm(self.ssnr.X.shape[1], 
+                EvolutionaryAlgorithm(self.ssnr.num_channels, 
                                        self.num_selected_sensors,
                                        self.population_size, self.num_survivors,
                                        self.mutant_ratio, self.crossover_ratio)
         elif self.search_heuristic == "recursive_backward_elimination":
             heuristic_search = \
-                RecursiveBackwardElimination(total_elements=self.ssnr.X.shape[1], 
+                RecursiveBackwardElimination(total_elements=self.ssnr.num_channels, 
                                                num_selected_sensors=self.num_selected_sensors)
 
         # Search for a set of sensors that yield a maximal SSNR using
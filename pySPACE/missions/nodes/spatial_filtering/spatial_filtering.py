@@ -7,10 +7,166 @@ which tries to combine the sensor information to erase noise
 and compress the relevant information.
 """
 
+import copy
 import numpy
 from pySPACE.missions.nodes.base_node import BaseNode
 from pySPACE.resources.data_types.time_series import TimeSeries
 
+
+class CovarianceAccumulator(object):
+    """ Running class-wise sums for the estimation of covariance matrices
+
+    For each label only the number of windows, the number of samples,
+    the sum of the samples and the scatter matrix X.T*X are stored.
+    Hence the memory does not grow with the number of windows but only
+    quadratically with the number of channels.
+    Covariance matrices of single classes or of all classes are computed
+    from these sums when they are needed, so the accumulator can be updated
+    after the filters have been computed (incremental training).
+
+    Accumulators of disjoint parts of the data (e.g. the folds of a
+    cross-validation) can be added and subtracted. So the statistics of
+    a training set can be obtained from the statistics of the whole data
+    minus the statistics of the respective test fold.
+
+    **Parameters**
+        :forgetting_factor: Factor in (0, 1] with which the sums of a class
+            are weighted down before a new window of this class is added.
+            With a factor smaller than one, older windows are forgotten
+            exponentially, which adapts the covariance estimates to
+            nonstationary data. The default of 1 weights all windows equally.
+
+            (*optional, default: 1.0*)
+    """
+    def __init__(self, forgetting_factor=1.0):
+        if not 0 < forgetting_factor <= 1:
+            raise ValueError("The forgetting factor has to be in (0, 1], "
+                             "not %s." % forgetting_factor)
+        self.forgetting_factor = forgetting_factor
+        self.windows = dict()
+        self.samples = dict()
+        self.sums = dict()
+        self.scatters = dict()
+
+    def update(self, data, label=None):
+        """ Add the samples (rows) of the 2d array *data* to class *label* """
+        data = numpy.asarray(data, dtype=numpy.float64)
+        if label not in self.scatters:
+            self.windows[label] = 0.0
+            self.samples[label] = 0.0
+            self.sums[label] = numpy.zeros(data.shape[1])
+            self.scatters[label] = numpy.zeros((data.shape[1],
+                                                data.shape[1]))
+        elif self.forgetting_factor < 1:
+            self.windows[label] *= self.forgetting_factor
+            self.samples[label] *= self.forgetting_factor
+            self.sums[label] *= self.forgetting_factor
+            self.scatters[label] *= self.forgetting_factor
+        self.windows[label] += 1
+        self.samples[label] += data.shape[0]
+        self.sums[label] += data.sum(axis=0)
+        self.scatters[label] += numpy.dot(data.T, data)
+
+    @property
+    def labels(self):
+        """ Sorted list of the labels seen so far """
+        return sorted(self.scatters.keys())
+
+    def _get(self, statistic, label):
+        """ Sum of the *statistic* of the class or of all classes (None) """
+        if label is None:
+            return sum(statistic[key] for key in self.labels)
+        return statistic[label]
+
+    def num_windows(self, label=None):
+        """ (Effective) number of windows of the class or of all classes """
+        return self._get(self.windows, label)
+
+    def num_samples(self, label=None):
+        """ (Effective) number of samples of the class or of all classes """
+        return self._get(self.samples, label)
+
+    def mean(self, label=None):
+        """ Mean of the samples of the class or of all classes (None) """
+        return self._get(self.sums, label) / self.num_samples(label)
+
+    def scatter(self, label=None, center=True, shrinkage=0.0):
+        """ Scatter matrix of the class or of all classes (None)
+
+        With *center* the outer product of the mean is subtracted,
+        otherwise the plain sum X.T*X is returned.
+        """
+        scatter = self._get(self.scatters, label).copy()
+        if center:
+            sums = self._get(self.sums, label)
+            scatter -= numpy.outer(sums, sums) / self.num_samples(label)
+        return self.shrink(scatter, shrinkage)
+
+    def covariance(self, label=None, center=True, bias=False, shrinkage=0.0):
+        """ Covariance matrix of the class or of all classes (None)
+
+        The scatter matrix is divided by the number of samples
+        if *bias* is True or if the matrix is not centered
+        and by the number of samples minus one otherwise.
+        """
+        num_samples = self.num_samples(label)
+        if center and not bias:
+            num_samples -= 1
+        return self.scatter(label, center, shrinkage) / num_samples
+
+    @staticmethod
+    def shrink(matrix, shrinkage):
+        """ Shrink the *matrix* towards a multiple of the identity
+
+        The result is (1-shrinkage)*matrix + shrinkage*nu*I, where nu is
+        the mean eigenvalue of the matrix, such that the trace is kept.
+        """
+        if not shrinkage:
+            return matrix
+        nu = numpy.trace(matrix) / matrix.shape[0]
+        shrunk = (1 - shrinkage) * matrix
+        shrunk[numpy.diag_indices_from(shrunk)] += shrinkage * nu
+        return shrunk
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def __iadd__(self, other):
+        for label in other.labels:
+            if label not in self.scatters:
+                self.windows[label] = 0.0
+                self.samples[label] = 0.0
+                self.sums[label] = numpy.zeros(other.sums[label].shape)
+                self.scatters[label] = numpy.zeros(
+                    other.scatters[label].shape)
+            self.windows[label] += other.windows[label]
+            self.samples[label] += other.samples[label]
+            self.sums[label] += other.sums[label]
+            self.scatters[label] += other.scatters[label]
+        return self
+
+    def __isub__(self, other):
+        for label in other.labels:
+            self.windows[label] -= other.windows[label]
+            self.samples[label] -= other.samples[label]
+            self.sums[label] -= other.sums[label]
+            self.scatters[label] -= other.scatters[label]
+            if self.windows[label] <= 0:
+                del self.windows[label], self.samples[label], \
+                    self.sums[label], self.scatters[label]
+        return self
+
+    def __add__(self, other):
+        result = self.copy()
+        result += other
+        return result
+
+    def __sub__(self, other):
+        result = self.copy()
+        result -= other
+        return result
+
+
 class SpatialFilteringNode(BaseNode):
     """ Base class for spatial filters and simple channel reduction
     
@@ -82,6 +238,29 @@ class SpatialFilteringNode(BaseNode):
                               data.sampling_frequency, data.start_time,
                               data.end_time, data.name, data.marker_name)
 
+    def _execute_batch(self, x, data_list):
+        """ Project all stacked windows with one matrix multiplication """
+        data = data_list[0]
+        if self.retained_channels is None:
+            self.retained_channels = len(data.channel_names)
+        if self.channel_names is None:
+            self.channel_names = data.channel_names
+        if self.filters is None:
+            projected_data = x[:, :, :self.retained_channels]
+            filter_channel_names = data.channel_names[:self.retained_channels]
+        else:
+            projected_data = numpy.dot(x,
+                                    self.filters[:, :self.retained_channels])
+            if self.filter_channel_names is None:
+                filter_channel_names = None
+            else:
+                filter_channel_names = \
+                    self.filter_channel_names[:self.retained_channels]
+        return [TimeSeries(projected_data[i], filter_channel_names,
+                           data.sampling_frequency, data.start_time,
+                           data.end_time, data.name, data.marker_name)
+                for i, data in enumerate(data_list)]
+
     def get_sensor_ranking(self):
         """ Special Code for the spatial filter
         
@@ -101,3 +280,63 @@ class SpatialFilteringNode(BaseNode):
 
     def get_filters(self):
         return self.filters
+
+    def train_sweep(self, use_test_data):
+        """ Train with the covariance sums of the folds of a cross-validation
+
+        Nodes, which estimate their filters from the running sums in a
+        :class:`CovarianceAccumulator` called *covariances*, compute the
+        sums of each fold of a cross-validation only once per run
+        and add the sums of the training folds of the current split
+        (see :func:`~pySPACE.missions.nodes.base_node.BaseNode.request_training_folds`).
+        The sums of the folds are kept in the *split_output_cache*.
+        Without folds or with a forgetting factor smaller than one,
+        the windows are trained one after another.
+        """
+        covariances = getattr(self, "covariances", None)
+        folds = None
+        if isinstance(covariances, CovarianceAccumulator) \
+                and covariances.forgetting_factor == 1 \
+                and covariances.num_windows() == 0 \
+                and self.is_trainable() and not self.zero_training \
+                and self.get_remaining_train_phase() == 1:
+            folds = self.input_node.request_training_folds()
+        if folds is None:
+            return super(SpatialFilteringNode, self).train_sweep(use_test_data)
+        folds, test_fold = folds
+        if use_test_data:
+            test_fold = None
+        training_folds = [index for index in range(len(folds))
+                          if index != test_fold and len(folds[index]) > 0]
+        if not training_folds:
+            return super(SpatialFilteringNode, self).train_sweep(use_test_data)
+        self._log("Training with the covariance sums of %d folds."
+                  % len(training_folds))
+        if self.split_output_cache is None:
+            self.split_output_cache = dict()
+        for index in training_folds:
+            key = ("covariances", index)
+            if key not in self.split_output_cache:
+                self.split_output_cache[key] = \
+                    self._train_fold_covariances(folds[index])
+            self.covariances += self.split_output_cache[key]
+        # the other attributes, which the node sets in its training,
+        # are set by training the first window once more
+        self._train_fold_covariances(folds[training_folds[0]][:1])
+        self.stop_training()
+
+    def _train_fold_covariances(self, fold):
+        """ Train the windows of the *fold* into a separate accumulator """
+        covariances = self.covariances
+        self.covariances = CovarianceAccumulator()
+        try:
+            for index in fold:
+                data, label = self.input_node.get_indexed_window(
+                    index, in_training=True)
+                if self.is_supervised():
+                    self.train(data, label)
+                else:
+                    self.train(data)
+            return self.covariances
+        finally:
+            self.covariances = covariances
@@ -2,22 +2,11 @@
 
 import os
 import cPickle
-from copy import deepcopy, copy
 
 import numpy
 from pySPACE.resources.dataset_defs.metric import BinaryClassificationDataset
 
-
-try:
-    import scipy
-    if map(int, __import__("scipy").__version__.split('.')) < [0,8,0]:
-        from scipy.linalg.decomp import qr
-    else:
-        from scipy.linalg import qr
-except:
-    pass
-
-from pySPACE.missions.nodes.base_node import BaseNode
+from pySPACE.missions.nodes.base_node import BaseNode, TrainingException
 from pySPACE.missions.nodes.spatial_filtering.spatial_filtering import SpatialFilteringNode
 
 from pySPACE.resources.data_types.time_series import TimeSeries
@@ -127,9 +116,11 @@ class XDAWNNode(SpatialFilteringNode):
             erp_class_label = erp_class_label,
             # The channel names
             channel_names = None,
-            # Matrices for storing data and stimuli  
-            X = None,
-            D = None,
+            # Sufficient statistics of the data matrix X and
+            # the Toeplitz matrix D of the stacked training windows
+            XtX = None,
+            DtX = None,
+            num_erp_examples = 0,
             SNR = None,
             # The number of channels that will be retained
             retained_channels = retained_channels,
@@ -166,68 +157,29 @@ class XDAWNNode(SpatialFilteringNode):
             self._log("To many channels chosen for the retained channels! "
                       "Replaced by maximum number.", level=logging.CRITICAL)
                         
-        # Iteratively construct Toeplitz matrix D and data matrix X
-        if label == self.erp_class_label:
-            D = numpy.diag(numpy.ones(data.shape[0]))
-        else:
-            D = numpy.zeros((data.shape[0], data.shape[0]))
-            
-        if self.X is None:
-            self.X = deepcopy(data)
-            self.D = D
-        else:
-            self.X = numpy.vstack((self.X, data))
-            self.D = numpy.vstack((self.D, D))
-    
+        # Instead of stacking the windows into the data matrix X and the
+        # Toeplitz matrix D (identity for ERP windows, zero otherwise),
+        # only X.T*X and D.T*X (the sum of the ERP windows) are accumulated
+        self.XtX, self.DtX, self.num_erp_examples = _add_example(
+            self.XtX, self.DtX, self.num_erp_examples, data,
+            label == self.erp_class_label)
+
     def _stop_training(self, debug=False):
-        if map(int, __import__("scipy").__version__.split('.')) >= [0,9,0]:
-            # NOTE: mode='economy'required since otherwise the memory consumption is excessive
-            # QR decompositions of X
-            Qx, Rx = qr(self.X, overwrite_a=True, mode='economic')
-            # QR decompositions of D
-            Qd, Rd = qr(self.D, overwrite_a=True, mode='economic')
-        else:
-            # NOTE: econ=True required since otherwise the memory consumption is excessive
-            # QR decompositions of X
-            Qx, Rx = qr(self.X, overwrite_a=True, econ=True)
-            # QR decompositions of D
-            Qd, Rd = qr(self.D, overwrite_a=True, econ=True)
-            
-        #self.X = None # Free memory
-        #self.D = None # Free memory             
-
-        # Singular value decomposition of Qd.T Qx
-        # NOTE: full_matrices=True required since otherwise we do not get 
-        #       num_channels filters. 
-        self.Phi, self.Lambda, self.Psi = \
-                    numpy.linalg.svd(numpy.dot(Qd.T, Qx), full_matrices=True)
-        self.Psi = self.Psi.T
-       
-        SNR = numpy.zeros(self.X.shape[1])
-        # Construct the spatial filters
-        for i in range(self.Psi.shape[1]):
-            # Construct spatial filter with index i as Rx^-1*Psi_i
-            ui = numpy.dot(numpy.linalg.inv(Rx), self.Psi[:,i])
-            wi = numpy.dot(Rx.T, self.Psi[:,i]) 
-            if i < self.Phi.shape[1]:
-                ai = numpy.dot(numpy.dot(numpy.linalg.inv(Rd), self.Phi[:,i]), self.Lambda[i])
-            if i == 0:
-                self.filters = numpy.atleast_2d(ui).T
-                self.wi = numpy.atleast_2d(wi)
-                self.ai = numpy.atleast_2d(ai)
-            else:
-                self.filters = numpy.hstack((self.filters, numpy.atleast_2d(ui).T))
-                self.wi = numpy.vstack((self.wi, numpy.atleast_2d(wi)))
-                if i < self.Phi.shape[1]:
-                    self.ai = numpy.vstack((self.ai, numpy.atleast_2d(ai)))
-            a = numpy.dot(self.D, ai.T)
-            b = numpy.dot(self.X, ui)
-#            b.view(numpy.ndarray)
-#            bb = numpy.dot(b.T, b)
-#            aa = numpy.dot(a.T, a)
-            SNR[i] = numpy.dot(a.T, a)/numpy.dot(b.T, b)
-
-        self.SNR = SNR
+        Rx, Rd, self.Phi, self.Lambda, self.Psi = \
+            _xdawn_decomposition(self.XtX, self.DtX, self.num_erp_examples)
+
+        # Construct the spatial filters as Rx^-1*Psi_i
+        self.filters = numpy.linalg.solve(Rx, self.Psi)
+        self.wi = numpy.dot(self.Psi.T, Rx)
+        # ERP components Rd^-1*Phi_i*Lambda_i
+        self.ai = (self.Phi[:, :len(self.Lambda)] * self.Lambda).T / Rd
+
+        # ||D*a_i||^2 / ||X*u_i||^2 with D.T*D = num_erp_examples*I,
+        # where the last ERP component is used for the remaining filters
+        a = self.ai[numpy.minimum(numpy.arange(self.filters.shape[1]),
+                                  self.ai.shape[0] - 1)]
+        self.SNR = self.num_erp_examples * (a * a).sum(axis=1) / \
+            (self.filters * numpy.dot(self.XtX, self.filters)).sum(axis=0)
 
     def _execute(self, data):
         """ Apply the learned spatial filters to the given data point """
@@ -253,7 +205,31 @@ class XDAWNNode(SpatialFilteringNode):
                           data.sampling_frequency, data.start_time,
                           data.end_time, data.name, data.marker_name)
 
-    def store_state(self, result_dir, index=None): 
+    def _execute_batch(self, x, data_list):
+        """ Apply the learned spatial filters to all stacked windows """
+        if self.channel_names is None:
+            self.channel_names = data_list[0].channel_names
+
+        if self.retained_channels in [None, 'None']:
+                self.retained_channels = len(self.channel_names)
+
+        if len(self.channel_names)<self.retained_channels:
+            self.retained_channels = len(self.channel_names)
+            self._log("To many channels chosen for the retained channels! "
+                      "Replaced by maximum number.", level=logging.CRITICAL)
+        # One projection for all windows
+        projected_data = numpy.dot(x, self.filters[:, :self.retained_channels])
+
+        if self.xDAWN_channel_names is None:
+            self.xDAWN_channel_names = ["xDAWN%03d" % i
+                                    for i in range(self.retained_channels)]
+
+        return [TimeSeries(projected_data[i], self.xDAWN_channel_names,
+                           data.sampling_frequency, data.start_time,
+                           data.end_time, data.name, data.marker_name)
+                for i, data in enumerate(data_list)]
+
+    def store_state(self, result_dir, index=None):
         """ Stores this node in the given directory *result_dir* """
         if self.store:
             try:
@@ -435,14 +411,9 @@ class SparseXDAWNNode(XDAWNNode):
     def _stop_training(self, debug=False):
         if self.num_selected_electrodes is None:
             self.num_selected_electrodes = self.retained_channels
-        # Estimate of the signal for class 1 (the erp_class_label class)
-        A_1 = numpy.dot(numpy.dot(numpy.linalg.inv(numpy.dot(self.D.T, self.D)),
-                                self.D.T),
-                       self.X)
         # Estimate of Sigma 1 and Sigma X
-        Sigma_1 = numpy.dot(numpy.dot(numpy.dot(A_1.T, self.D.T),
-                                    self.D), A_1)
-        Sigma_X = numpy.dot(self.X.T, self.X)
+        Sigma_1, Sigma_X = _compute_Sigma(self.XtX, self.DtX,
+                                          self.num_erp_examples)
 
         # The objective function from the paper from Rivet et al.
         def objective_function(v_1, lambda_):
@@ -478,7 +449,7 @@ class SparseXDAWNNode(XDAWNNode):
         while True:
             rep += 1
             # Initialize electrode weight vector randomly
-            v_1 = numpy.random.random(self.X.shape[1])
+            v_1 = numpy.random.random(self.XtX.shape[0])
             v_1 /= numpy.linalg.norm(v_1, 2)
 
             # Set initial learning rate
@@ -492,7 +463,7 @@ class SparseXDAWNNode(XDAWNNode):
                 c = numpy.dot(Sigma_1, v_1)
                 d = numpy.dot(v_1.T, c)
                 
-                e = numpy.dot(numpy.diag(numpy.sign(v_1)), numpy.ones(self.X.shape[1])) \
+                e = numpy.dot(numpy.diag(numpy.sign(v_1)), numpy.ones(self.XtX.shape[0])) \
                                 / numpy.linalg.norm(v_1, 2)
                 f = numpy.dot(numpy.linalg.norm(v_1, 1) / (numpy.dot(v_1.T, v_1)**1.5), 
                              v_1)
@@ -573,15 +544,18 @@ class SSNR(object):
     Use as follows: add training examples one-by-one along with their labels
     using the method add_example. Once all training data has been added, metrics
     values can be computed using ssnr_as, ssnr_vs, and ssnr_vs_test
-    
+
+    Only the sufficient statistics X.T*X and D.T*X of the data matrix X
+    and the Toeplitz matrix D are stored.
     """
     
     def __init__(self, erp_class_label, retained_channels=None):
         self.retained_channels = retained_channels
         self.erp_class_label = erp_class_label
         
-        self.X = None # The data matrix (will be constructed iteratively)
-        self.D = None # The Toeplitz matrix (will be constructed iteratively)
+        self.XtX = None # X.T*X of the data matrix X (accumulated iteratively)
+        self.DtX = None # D.T*X of the Toeplitz matrix D (sum of ERP examples)
+        self.num_erp_examples = 0 # D.T*D is a multiple of the identity
                 
     def add_example(self, data, label):
         """ Add the example *data* for class *label*. """
@@ -590,19 +564,15 @@ class SSNR(object):
         else:
             self.retained_channels = min(self.retained_channels, data.shape[1])
         
-        # Iteratively construct Toeplitz matrix D and data matrix X
-        if label == self.erp_class_label:
-            D = numpy.diag(numpy.ones(data.shape[0]))
-        else:
-            D = numpy.zeros((data.shape[0], data.shape[0]))
-            
-        if self.X is None:
-            self.X = deepcopy(data) # TODO: Why deep copy? data is not used anymore afterwards!
-            self.D = D
-        else:
-            self.X = numpy.vstack((self.X, data))
-            self.D = numpy.vstack((self.D, D))
-                            
+        self.XtX, self.DtX, self.num_erp_examples = _add_example(
+            self.XtX, self.DtX, self.num_erp_examples, data,
+            label == self.erp_class_label)
+
+    @property
+    def num_channels(self):
+        """ Number of channels of the added examples """
+        return self.XtX.shape[0]
+
     def ssnr_as(self, selected_electrodes=None):
         """ SSNR for given electrode selection in actual sensor space. 
         
@@ -610,11 +580,12 @@ class SSNR(object):
         computed.
         """
         if selected_electrodes == None:
-            selected_electrodes = range(self.X.shape[1])
+            selected_electrodes = range(self.num_channels)
             
-        self.Sigma_1, self.Sigma_X = self._compute_Sigma(self.X, self.D)
+        self.Sigma_1, self.Sigma_X = _compute_Sigma(self.XtX, self.DtX,
+                                                    self.num_erp_examples)
         
-        filters = numpy.zeros(shape=(self.X.shape[1], self.X.shape[1]))
+        filters = numpy.zeros(shape=(self.num_channels, self.num_channels))
         for electrode_index in selected_electrodes:
             filters[electrode_index, electrode_index] = 1
 
@@ -628,105 +599,155 @@ class SSNR(object):
         computed.
         """
         if selected_electrodes == None:
-            selected_electrodes = range(self.X.shape[1])
+            selected_electrodes = range(self.num_channels)
             
-        self.Sigma_1, self.Sigma_X = self._compute_Sigma(self.X, self.D)
+        self.Sigma_1, self.Sigma_X = _compute_Sigma(self.XtX, self.DtX,
+                                                    self.num_erp_examples)
         
-        # Determine spatial filter using xDAWN that would be obtained if
-        # only the selected electrodes would be available
-        partial_filters = \
-            self._compute_xDAWN_filters(self.X[:, selected_electrodes], 
-                                        self.D)
-        # Expand partial filters to a filter for all electrodes (by setting
-        # weights of inactive electrodes to 0)
-        filters = numpy.zeros((self.X.shape[1], self.retained_channels))
-        # Iterate over electrodes with non-zero weights
-        for index, electrode_index in enumerate(selected_electrodes):
-            # Iterate over non-zero spatial filters
-            for j in range(min(filters.shape[1], partial_filters.shape[1])):
-                filters[electrode_index, j] = partial_filters[index, j]
+        filters = self._selection_filters(selected_electrodes)
 
         # Return the SSNR that these filters would obtain on training data            
         return self._ssnr(filters, self.Sigma_1, self.Sigma_X)
     
-    def ssnr_vs_test(self, X_test, D_test, selected_electrodes=None):
+    def ssnr_vs_test(self, test_ssnr, selected_electrodes=None):
         """ SSNR for given electrode selection in virtual sensor space. 
         
         Note that the training of the xDAWN spatial filter for mapping to 
         virtual sensor space and the computation of the SSNR in this virtual 
-        sensor space are done on different data sets. 
+        sensor space are done on different data sets. The test data is
+        given as an SSNR object *test_ssnr* to which the test examples
+        have been added.
         
         If no electrode selection is given, the SSNR of all electrodes is 
         computed.
         """
         if selected_electrodes == None:
-            selected_electrodes = range(self.X.shape[1])
+            selected_electrodes = range(self.num_channels)
                     
+        filters = self._selection_filters(selected_electrodes)
+
+        # Return the SSNR that these filters would obtain on test data
+        Sigma_1_test, Sigma_X_test = _compute_Sigma(
+            test_ssnr.XtX, test_ssnr.DtX, test_ssnr.num_erp_examples)
+        return self._ssnr(filters, Sigma_1_test, Sigma_X_test)
+
+    def _selection_filters(self, selected_electrodes):
+        """ xDAWN filters for all electrodes using only the selected ones """
         # Determine spatial filter using xDAWN that would be obtained if
         # only the selected electrodes would be available
-        partial_filters = \
-            self._compute_xDAWN_filters(self.X[:, selected_electrodes], 
-                                        self.D)
+        selected_electrodes = list(selected_electrodes)
+        partial_filters = self._compute_xDAWN_filters(
+            self.XtX[numpy.ix_(selected_electrodes, selected_electrodes)],
+            self.DtX[:, selected_electrodes], self.num_erp_examples)
         # Expand partial filters to a filter for all electrodes (by setting
         # weights of inactive electrodes to 0)
-        filters = numpy.zeros((self.X.shape[1], self.retained_channels))
-        # Iterate over electrodes with non-zero weights
-        for index, electrode_index in enumerate(selected_electrodes):
-            # Iterate over non-zero spatial filters
-            for j in range(min(filters.shape[1], partial_filters.shape[1])):
-                filters[electrode_index, j] = partial_filters[index, j]
+        filters = numpy.zeros((self.num_channels, self.retained_channels))
+        num_filters = min(filters.shape[1], partial_filters.shape[1])
+        filters[selected_electrodes, :num_filters] = \
+            partial_filters[:, :num_filters]
+        return filters
 
-        # Return the SSNR that these filters would obtain on test data
-        Sigma_1_test, Sigma_X_test = self._compute_Sigma(X_test, D_test)
-        return self._ssnr(filters, Sigma_1_test, Sigma_X_test)
-        
-    def _compute_Sigma(self, X, D):
-        # Estimate of the signal for class 1 (the erp_class_label class)
-        A_1 = numpy.dot(numpy.dot(numpy.linalg.inv(numpy.dot(D.T, D)), D.T), X)
-        # Estimate of Sigma 1 and Sigma X
-        Sigma_1 = numpy.dot(numpy.dot(numpy.dot(A_1.T, D.T), D), A_1)
-        Sigma_X = numpy.dot(X.T, X)
-        
-        return Sigma_1, Sigma_X        
-        
     def _ssnr(self, v, Sigma_1, Sigma_X):
         # Compute SSNR after filtering  with v.
         a = numpy.trace(numpy.dot(numpy.dot(v.T, Sigma_1), v))
         b = numpy.trace(numpy.dot(numpy.dot(v.T, Sigma_X), v))
         return a / b
     
-    def _compute_xDAWN_filters(self, X, D):
+    def _compute_xDAWN_filters(self, XtX, DtX, num_erp_examples):
         # Compute xDAWN spatial filters
-                      
-        # QR decompositions of X and D
-        if map(int, __import__("scipy").__version__.split('.')) >= [0,9,0]:
-            # NOTE: mode='economy'required since otherwise the memory 
-            # consumption is excessive
-            Qx, Rx = qr(X, overwrite_a=True, mode='economic')     
-            Qd, Rd = qr(D, overwrite_a=True, mode='economic')
-        else:
-            # NOTE: econ=True required since otherwise the memory consumption 
-            # is excessive 
-            Qx, Rx = qr(X, overwrite_a=True, econ=True)      
-            Qd, Rd = qr(D, overwrite_a=True, econ=True)       
-
-        # Singular value decomposition of Qd.T Qx
-        # NOTE: full_matrices=True required since otherwise we do not get 
-        #       num_channels filters. 
-        Phi, Lambda, Psi = numpy.linalg.svd(numpy.dot(Qd.T, Qx), 
-                                           full_matrices=True)
-        Psi = Psi.T
-
-        # Construct the spatial filters
-        for i in range(Psi.shape[1]):
-            # Construct spatial filter with index i as Rx^-1*Psi_i
-            ui = numpy.dot(numpy.linalg.inv(Rx), Psi[:,i])
-            if i == 0:
-                filters = numpy.atleast_2d(ui).T
-            else:
-                filters = numpy.hstack((filters, numpy.atleast_2d(ui).T))
-                
-        return filters
+        Rx, Rd, Phi, Lambda, Psi = \
+            _xdawn_decomposition(XtX, DtX, num_erp_examples)
+        # Construct the spatial filters as Rx^-1*Psi_i
+        return numpy.linalg.solve(Rx, Psi)
+
+
+def _cholesky_factor(XtX):
+    """ Upper triangular factor Rx with Rx.T*Rx = X.T*X
+
+    X.T*X is singular if the channels are linearly dependent,
+    e.g., after the common average reference. Then a small ridge,
+    relative to the mean variance of the channels, is added until the
+    factorization succeeds, which keeps Rx invertible like the
+    triangular factor of the QR decomposition of X.
+    """
+    try:
+        return numpy.linalg.cholesky(XtX).T
+    except numpy.linalg.LinAlgError:
+        pass
+    scale = max(numpy.trace(XtX) / XtX.shape[0], numpy.finfo(float).tiny)
+    ridge = 1e-10 * scale
+    while True:
+        try:
+            return numpy.linalg.cholesky(
+                XtX + ridge * numpy.eye(XtX.shape[0])).T
+        except numpy.linalg.LinAlgError:
+            ridge *= 10
+            if ridge > scale:
+                raise
+
+
+def _check_erp_examples(num_erp_examples):
+    """ xDAWN needs examples of the ERP class """
+    if num_erp_examples == 0:
+        raise TrainingException("xDAWN got no training examples of the "
+                                "ERP class (erp_class_label).")
+
+
+def _add_example(XtX, DtX, num_erp_examples, data, is_erp):
+    """ Add an example to the sufficient statistics of xDAWN
+
+    The data matrix X of xDAWN consists of the stacked examples
+    (time x channels) and the Toeplitz matrix D of stacked identities for
+    examples of the ERP class and zeros otherwise.
+    Only X.T*X, D.T*X (the sum of the ERP examples) and the number of
+    ERP examples (D.T*D is a multiple of the identity) are needed.
+
+    Returns the updated statistics.
+    """
+    data = data.view(numpy.ndarray)
+    if XtX is None:
+        XtX = numpy.zeros((data.shape[1], data.shape[1]))
+        DtX = numpy.zeros(data.shape)
+    XtX += numpy.dot(data.T, data)
+    if is_erp:
+        DtX += data
+        num_erp_examples += 1
+    return XtX, DtX, num_erp_examples
+
+
+def _compute_Sigma(XtX, DtX, num_erp_examples):
+    """ Estimates of Sigma 1 and Sigma X from the sufficient statistics """
+    _check_erp_examples(num_erp_examples)
+    # The estimate of the signal for class 1 (the erp_class_label class)
+    # is the average ERP: A_1 = (D.T*D)^-1 * D.T*X
+    A_1 = DtX / num_erp_examples
+    # Sigma_1 = A_1.T * D.T*D * A_1
+    Sigma_1 = num_erp_examples * numpy.dot(A_1.T, A_1)
+    Sigma_X = XtX
+    return Sigma_1, Sigma_X
+
+
+def _xdawn_decomposition(XtX, DtX, num_erp_examples):
+    """ Compute the decomposition of xDAWN from the sufficient statistics
+
+    xDAWN uses the QR decompositions X = Qx*Rx and D = Qd*Rd and the
+    singular value decomposition of Qd.T*Qx. Up to the signs of their rows,
+    Rx is the Cholesky factor of X.T*X and Rd = sqrt(num_erp_examples)*I.
+    Hence, Qd.T*Qx = Rd^-T * D.T*X * Rx^-1 can be computed
+    without the stacked matrices.
+
+    Returns Rx, Rd (as scalar) and Phi, Lambda and Psi of the singular
+    value decomposition Qd.T*Qx = Phi*diag(Lambda)*Psi.T.
+    """
+    _check_erp_examples(num_erp_examples)
+    Rx = _cholesky_factor(XtX)
+    Rd = numpy.sqrt(num_erp_examples)
+    # D.T*X * Rx^-1 without inversion
+    M = numpy.linalg.solve(Rx.T, DtX.T).T / Rd
+    # NOTE: full_matrices=True required since otherwise we do not get 
+    #       num_channels filters. 
+    Phi, Lambda, Psi = numpy.linalg.svd(M, full_matrices=True)
+    return Rx, Rd, Phi, Lambda, Psi.T
 
 
 _NODE_MAPPING = {"xDAWN": XDAWNNode,
@@ -1,5 +1,6 @@
 """ Create splits of the data into train and test data used for cross-validation """
 
+import itertools
 import random
 
 from pySPACE.missions.nodes.base_node import BaseNode
@@ -124,11 +125,9 @@ class CrossValidationSplitterNode(BaseNode):
         if self.split_indices == None:
             self._create_splits()
             
-        # All data can be used for training which is not explicitly
-        # specified for testing by the current cv-split
         self.data_for_training = MemoizeGenerator(
-                self.data[i] for i in range(len(self.data)) 
-                    if not i in self.split_indices[self.current_split])
+                self.data[i] for i in 
+                    self.request_indices_for_training(use_test_data))
         
         return self.data_for_training.fresh()
     
@@ -148,6 +147,49 @@ class CrossValidationSplitterNode(BaseNode):
         
         return self.data_for_testing.fresh()
 
+    def request_indices_for_training(self, use_test_data):
+        """ Returns the indices of the training data in the current split
+
+        The split independent nodes after the splitter use the indices
+        to reuse their outputs in the following splits
+        (see :func:`~pySPACE.missions.nodes.base_node.BaseNode.get_indexed_window`).
+        """
+        # Create cv-splits lazily when required
+        if self.split_indices == None:
+            self._create_splits()
+        # All data can be used for training which is not explicitly
+        # specified for testing by the current cv-split
+        test_indices = set(self.split_indices[self.current_split])
+        return [i for i in range(len(self.data)) if not i in test_indices]
+
+    def request_indices_for_testing(self):
+        """ Returns the indices of the test data in the current split """
+        # Create cv-splits lazily when required
+        if self.split_indices == None:
+            self._create_splits()
+        return list(self.split_indices[self.current_split])
+
+    def request_training_folds(self):
+        """ Returns the folds of the cross-validation and the current split
+
+        Windows, which are not used for testing in any split, are added as
+        an additional fold, which is never used for testing.
+        """
+        # Create cv-splits lazily when required
+        if self.split_indices == None:
+            self._create_splits()
+        folds = [list(fold) for fold in self.split_indices]
+        test_indices = set(itertools.chain(*folds))
+        remaining = [i for i in range(len(self.data))
+                     if not i in test_indices]
+        if remaining:
+            folds.append(remaining)
+        return folds, self.current_split
+
+    def get_indexed_window(self, index, in_training, cache=True):
+        """ Returns the (data, label) tuple with the given *index* """
+        return self.data[index]
+
     def _create_splits(self):
         """ Create the split of the data for n-fold  cross-validation """
         self._log("Creating %s splits for cross validation" % self.splits)
@@ -272,6 +272,14 @@ class Process(object):
         """ Return a representation of this class"""
         return self.__class__.__name__
 
+    def estimated_cost(self):
+        """ Relative estimate of the execution time of this process
+
+        Backends use it to start the most expensive processes first,
+        so that no single long process is left at the end of an operation.
+        """
+        return 1
+
     def pre_benchmarking(self):
         """
         Execute some code which is not specific for the respective operation
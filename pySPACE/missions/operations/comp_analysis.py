@@ -39,6 +39,7 @@ import matplotlib.font_manager
 from collections import defaultdict
 from pySPACE.tools.filesystem import create_directory
 from pySPACE.resources.dataset_defs.base import BaseDataset
+from pySPACE.tools.csv_analysis import ResultTable
 
 import pySPACE
 from pySPACE.missions.operations.base import Operation, Process
@@ -76,6 +77,8 @@ class CompAnalysisOperation(Operation):
         summary = BaseDataset.load(os.path.join(pySPACE.configuration.storage,
                                       input_path))
         data_dict = summary.data
+        if not isinstance(data_dict, ResultTable):
+            data_dict = ResultTable(data_dict)
         ## Done
         
         # Determine the parameters that should be analyzed
@@ -182,22 +185,15 @@ class CompAnalysisOperation(Operation):
             # We split the data based on the values of this parameter
             remaining_parameters = [parameter for parameter in parameters
                                         if parameter != proj_parameter]
+            groups = data_dict.group_indices([proj_parameter])
+            keys = [column_key for column_key in data_dict.keys()
+                    if column_key != proj_parameter]
             # For each value the respective projection parameter can take on
-            for value in set(data_dict[proj_parameter]):
+            for (value,), rows in groups.iteritems():
                 # Project the result dict onto the rows where the respective
                 # parameter takes on the given value
-                projected_dict = defaultdict(list)
-                entries_added = False
-                for i in range(len(data_dict[parameter])):
-                    if data_dict[proj_parameter][i] == value:
-                        entries_added = True
-                        for column_key in data_dict.keys():
-                            if column_key == proj_parameter: continue
-                            projected_dict[column_key].append(data_dict[column_key][i])
-                # If the projected_dict is empty we continue
-                if not entries_added:
-                    continue
-                
+                projected_dict = data_dict.select(rows, keys)
+
                 # Create result_dir and do the recursive call for the
                 # projected data
                 proj_result_dir = result_dir + os.sep + "%s#%s" % (proj_parameter,
@@ -155,6 +155,86 @@ should be deleted, set compression to ``delete``.
 
 (*optional, default: 8*)
 
+consolidation_threads
+---------------------
+
+Number of threads, which read the result files of the single processes
+and the files of the archived sub-folders in the consolidation.
+Since the consolidation of many small files is dominated
+by the latency of the file system (e.g., on network storage),
+more threads than cores can be used.
+
+(*optional, default: 8*)
+
+batch_size
+----------
+
+Number of windows which are stacked and processed at once by all
+nodes which implement a vectorized batch execution
+(*_execute_batch*, see :class:`~pySPACE.missions.nodes.base_node.BaseNode`).
+All other nodes process the data window by window.
+Larger values speed up the processing but need more memory.
+
+(*optional, default: 1*)
+
+split_processes
+---------------
+
+Number of processes, which are started by each process of the operation
+to process the splits of a split node (e.g., the folds of a
+cross-validation) in parallel.
+This is useful, if there are fewer processes than cores.
+The results are the same as with the sequential processing of the splits.
+This works also for processes, which are already run in daemonic processes
+(e.g., by the multicore backend).
+
+(*optional, default: 1*)
+
+result_cache
+------------
+
+Directory of a cache for the results of the single processes,
+which is shared between operations.
+Relative paths are interpreted relative to the *storage*
+and *True* is an abbreviation for the folder *result_cache* in the *storage*.
+
+Each process is identified by a key, which is computed from
+the node chain specification with the inserted parameters,
+the input dataset (path and hash of its meta data),
+the run, the split, the *storage_format* and *store_node_chain*.
+Processes with a complete entry in the cache are not executed again,
+but their results are copied into the result directory of the operation.
+All other processes store their result first in a new temporary directory
+next to the entry, which is renamed to the entry when the result is
+complete. Hence, concurrent operations never see or delete incomplete
+entries and an interrupted operation (e.g., due to a crashed cluster node)
+can be relaunched and only the missing processes are executed.
+Temporary directories of interrupted processes end with *.tmp*
+and can be deleted when no operation is running.
+
+.. note:: Files written by nodes directly into the *__RESULT_DIRECTORY__*
+          are not cached.
+
+(*optional, default: None*)
+
+share_prefixes
+--------------
+
+If *True*, the processes for the same input dataset, run and split
+are combined to one process.
+Their node chains are arranged in a trie, such that
+identical leading nodes (e.g., source, windowing, filtering, decimation
+and spatial filter) are trained and executed only once and only the
+differing remaining nodes are executed for every node chain.
+This is useful for parameter sweeps, where only the parameters
+of the last nodes (e.g., the complexity of a classifier) are changed.
+The results are stored as without this option.
+
+An integer value restricts the number of node chains per
+process, e.g., to keep enough processes for a parallel backend.
+
+(*optional, default: False*)
+
 
 Exemplary Call
 ++++++++++++++
@@ -223,6 +303,7 @@ import sys
 import time
 import yaml
 import shutil
+import tempfile
 import pwd
 import glob
 import logging
@@ -230,6 +311,9 @@ import warnings
 import copy
 import random
 import gc
+import hashlib
+import zipfile
+from multiprocessing.pool import ThreadPool
 
 # processing was renamed in Python 2.6 to multiprocessing
 if sys.version_info[0] == 2 and sys.version_info[1] < 6:
@@ -246,6 +330,9 @@ from pySPACE.environments.chains.node_chain import BenchmarkNodeChain, NodeChain
 
 from pySPACE.resources.dataset_defs.performance_result import PerformanceResultSummary
 
+# size in bytes of the already inspected input datasets
+_dataset_sizes = {}
+
 class NodeChainOperation(Operation):
     """ Load configuration file, create processes and consolidate results
 
@@ -271,6 +358,8 @@ class NodeChainOperation(Operation):
             self.compression = operation_spec["compression"]
         else:
             self.compression = 8
+        self.consolidation_threads = \
+            int(operation_spec.get("consolidation_threads", 8))
 
     @classmethod
     def create(cls, operation_spec, result_directory, debug=False, input_paths=[]):
@@ -392,6 +481,12 @@ class NodeChainOperation(Operation):
         store_node_chain = operation_spec["store_node_chain"] \
                          if "store_node_chain" in operation_spec else False
 
+        # Determine how many windows are processed at once by batch nodes
+        batch_size = operation_spec.get("batch_size", 1)
+
+        # Determine how many processes work on the splits of each process
+        split_processes = operation_spec.get("split_processes", 1)
+
         # Determine whether certain parameters should not be remembered
         hide_parameters = [] if "hide_parameters" not in operation_spec \
                                 else list(operation_spec["hide_parameters"])
@@ -400,6 +495,13 @@ class NodeChainOperation(Operation):
         hide_parameters.append("__RESULT_DIRECTORY__")
         hide_parameters.append("__OUTPUT_BUNDLE__")
 
+        # Determine where results are cached between operations
+        cache_directory = cls._get_cache_directory(operation_spec)
+
+        # Determine whether processes with the same input are combined
+        share_prefixes = operation_spec.get("share_prefixes", False)
+        shared_processes = {}
+
         # Create all combinations of collections, runs and splits
         collection_run_split_combinations = []
         for input_dataset_dir in input_collections:
@@ -483,6 +585,24 @@ class NodeChainOperation(Operation):
                                                                  input_dataset_dir,
                                                                  parameter_setting_cp,
                                                                  hide_parameters)
+                    # Reuse the result of an earlier operation if possible
+                    process_cache_dir = None
+                    if cache_directory is not None:
+                        cache_key = cls._get_cache_key(node_chain_spec,
+                                                       parameter_setting_cp,
+                                                       dataset_dir, run, split,
+                                                       storage_format,
+                                                       store_node_chain)
+                        process_cache_dir = os.path.join(cache_directory,
+                                                         cache_key)
+                        if cls._restore_cached_result(process_cache_dir,
+                                                      result_directory):
+                            logging.getLogger("%s" % cls.__name__).info(
+                                "Using cached result %s for %s (run %s, "
+                                "split %s)." % (cache_key,
+                                                result_dataset_directory,
+                                                run, split))
+                            continue
                     # Create the respective process and put it to the
                     # executing-queue of processes
                     process = NodeChainProcess(node_chain_spec= node_chain_spec,
@@ -491,16 +611,177 @@ class NodeChainOperation(Operation):
                                           run = run, split    = split,
                                           storage_format      = storage_format,
                                           result_dataset_directory = result_dataset_directory,
-                                          store_node_chain          = store_node_chain)
+                                          store_node_chain          = store_node_chain,
+                                          batch_size          = batch_size,
+                                          split_processes     = split_processes,
+                                          cache_directory     = process_cache_dir)
 
-                    processes.put(process)
+                    if not share_prefixes:
+                        processes.put(process)
+                        continue
+                    group = shared_processes.setdefault(
+                        (input_dataset_dir, run, split), [])
+                    group.append(process)
+                    if share_prefixes is not True \
+                            and len(group) >= share_prefixes:
+                        processes.put(SharedPrefixNodeChainProcess(group))
+                        shared_processes[(input_dataset_dir, run, split)] = []
+
+        for input_dataset_dir, run, split in collection_run_split_combinations:
+            group = shared_processes.get((input_dataset_dir, run, split), [])
+            if len(group) == 1:
+                processes.put(group[0])
+            elif len(group) > 1:
+                processes.put(SharedPrefixNodeChainProcess(group))
 
         # give executing process the sign that creation is now finished
         processes.put(False)
 
+    @staticmethod
+    def _get_cache_directory(operation_spec):
+        """ Absolute path of the *result_cache* or None if it is not used """
+        cache_directory = operation_spec.get("result_cache", None)
+        if cache_directory is None or cache_directory is False:
+            return None
+        elif cache_directory is True:
+            cache_directory = "result_cache"
+        if not os.path.isabs(cache_directory):
+            cache_directory = os.path.join(pySPACE.configuration.storage,
+                                           cache_directory)
+        create_directory(cache_directory)
+        return cache_directory
+
+    @staticmethod
+    def _get_cache_key(node_chain_spec, parameter_setting, dataset_dir, run,
+                       split, storage_format, store_node_chain):
+        """ Content based identifier of the result of a process
+
+        The key does not depend on the result directory of the operation.
+        The input dataset is identified by its path
+        (relative to the storage) and its meta data.
+        """
+        parameter_setting = dict((key, value) for key, value
+                                 in parameter_setting.iteritems()
+                                 if key != "__RESULT_DIRECTORY__")
+        node_chain_spec = NodeChainProcess.replace_parameters(
+            copy.deepcopy(node_chain_spec), parameter_setting)
+        storage = pySPACE.configuration.storage
+        rel_dataset_dir = dataset_dir
+        if dataset_dir.startswith(storage):
+            rel_dataset_dir = dataset_dir[len(storage):]
+        input_hash = hashlib.sha1()
+        for file_name in ["metadata.yaml", "collection.yaml"]:
+            meta_file = os.path.join(dataset_dir, file_name)
+            if os.path.isfile(meta_file):
+                input_hash.update(open(meta_file, "rb").read())
+        # yaml sorts the dictionary keys, which makes the string unique
+        description = yaml.dump({"node_chain": node_chain_spec,
+                                 "parameter_setting": parameter_setting,
+                                 "input_dataset": rel_dataset_dir.strip(os.sep),
+                                 "input_metadata": input_hash.hexdigest(),
+                                 "run": run, "split": split,
+                                 "storage_format": storage_format,
+                                 "store_node_chain": store_node_chain})
+        return hashlib.sha1(description).hexdigest()
+
+    @staticmethod
+    def _store_cache_manifest(process_cache_dir):
+        """ Mark the cached result as complete by listing its files
+
+        The results are expected in the subdirectory *result* of
+        *process_cache_dir*, which corresponds to the result directory
+        of the operation.
+        """
+        source_dir = os.path.join(process_cache_dir, "result")
+        manifest = {"directories": [], "files": {}}
+        for path, dir_names, file_names in os.walk(source_dir):
+            rel_path = os.path.relpath(path, source_dir)
+            for dir_name in dir_names:
+                manifest["directories"].append(os.path.join(rel_path,
+                                                            dir_name))
+            for file_name in file_names:
+                manifest["files"][os.path.join(rel_path, file_name)] = \
+                    os.path.getsize(os.path.join(path, file_name))
+        # the manifest is renamed at last so that it only exists,
+        # if it is complete
+        manifest_file = os.path.join(process_cache_dir, "manifest.yaml")
+        temp_file = open(manifest_file + ".tmp", "w")
+        yaml.safe_dump(manifest, temp_file)
+        temp_file.close()
+        os.rename(manifest_file + ".tmp", manifest_file)
+
+    @staticmethod
+    def _create_cache_attempt(process_cache_dir):
+        """ Create a new directory for an attempt to compute a cached result
+
+        The directory is created next to the entry *process_cache_dir*,
+        such that it can be renamed to the entry
+        (see :meth:`_commit_cache_attempt`).
+        Existing entries and the directories of other attempts are not
+        touched.
+        """
+        return tempfile.mkdtemp(
+            prefix=os.path.basename(process_cache_dir) + ".", suffix=".tmp",
+            dir=os.path.dirname(process_cache_dir))
+
+    @staticmethod
+    def _commit_cache_attempt(attempt_dir, process_cache_dir,
+                              result_directory):
+        """ Put the complete result of an attempt into the cache
+
+        The manifest is stored in *attempt_dir*, which is then renamed to
+        the entry *process_cache_dir*. Since renaming is atomic, other
+        processes find either no entry or a complete one.
+        If another attempt has already created the entry, the attempt is
+        discarded. Finally, the result is copied into the
+        *result_directory*.
+        """
+        NodeChainOperation._store_cache_manifest(attempt_dir)
+        try:
+            os.rename(attempt_dir, process_cache_dir)
+        except OSError:
+            # the entry exists already
+            if not NodeChainOperation._restore_cached_result(
+                    process_cache_dir, result_directory):
+                NodeChainOperation._restore_cached_result(attempt_dir,
+                                                          result_directory)
+            shutil.rmtree(attempt_dir)
+        else:
+            NodeChainOperation._restore_cached_result(process_cache_dir,
+                                                      result_directory)
+
+    @staticmethod
+    def _restore_cached_result(process_cache_dir, result_directory):
+        """ Copy a complete cached result into the *result_directory*
+
+        Returns False and copies nothing, if there is no complete and
+        valid entry in the cache.
+        """
+        manifest_file = os.path.join(process_cache_dir, "manifest.yaml")
+        if not os.path.isfile(manifest_file):
+            return False
+        source_dir = os.path.join(process_cache_dir, "result")
+        try:
+            manifest = yaml.safe_load(open(manifest_file))
+            for rel_path, size in manifest["files"].iteritems():
+                if os.path.getsize(os.path.join(source_dir, rel_path)) != size:
+                    return False
+        except Exception:
+            return False
+        for rel_path in manifest["directories"]:
+            create_directory(os.path.join(result_directory, rel_path))
+        for rel_path in manifest["files"]:
+            target = os.path.join(result_directory, rel_path)
+            create_directory(os.path.dirname(target))
+            shutil.copy2(os.path.join(source_dir, rel_path), target)
+        return True
+
     def consolidate(self):
         """ Consolidates the results obtained by the single processes into a consistent structure
         of collections that are stored on the file system.
+
+        Results restored from the *result_cache* have already been copied
+        to the result directory and are treated like the new ones.
         """
         # Consolidate the results
         directory_pattern = os.sep.join([self.result_directory, "{*",])
@@ -557,65 +838,103 @@ class NodeChainOperation(Operation):
         if len(pathlist)>0:
             # Do the consolidation the same way as for WekaClassificationOperation
             self._log("Consolidating results ...")
-            # We load and store the results once into a PerformanceResultSummary
-            # This does the necessary consolidation...
-            self._log("Reading intermediate results...")
-            result_collection = PerformanceResultSummary(dataset_dir=self.result_directory)
-            self._log("done")
-            self._log("Storing result collection")
-            result_collection.store(self.result_directory)
-            self._log("done")
-            PerformanceResultSummary.merge_traces(self.result_directory)
+            # The results are merged into one result collection,
+            # which is written row by row and not kept in memory
+            self._log("Merging intermediate results...")
+            start_time = time.time()
+            PerformanceResultSummary.merge_csv_files(
+                self.result_directory, pool_size=self.consolidation_threads,
+                log=self._log)
+            self._log("done in %.1fs" % (time.time() - start_time))
+            start_time = time.time()
+            PerformanceResultSummary.merge_traces(
+                self.result_directory, pool_size=self.consolidation_threads)
+            self._log("Merged traces in %.1fs" % (time.time() - start_time))
 
             if not(self.compression == False):
                 # Since we get one result summary,
                 # we don't need the numerous folders.
                 # So we zip them to make the whole folder more easy visible.
-                import zipfile
-                cwd=os.getcwd()
-                os.chdir(self.result_directory)
+                start_time = time.time()
+                pathlist = glob.glob(os.path.join(self.result_directory,"{*}"))
                 # If there are to many or to large folders, problems may occur.
-                # This case we want to log, try 64 bit mode, and then skip the zipping.
+                # This case we want to log and skip the deletion.
                 try:
-                    pathlist = glob.glob(os.path.join(self.result_directory,"{*}"))
-                    
-                    if not self.compression == "delete":                        
-                        save_file=zipfile.ZipFile(self.result_directory+'/result_folders.zip',mode="w",compression=self.compression)
-                        # we want to have the zipped file relative to the result directory
-                        for path in pathlist:
-                            for node in os.walk(path):
-                                rel_path=os.path.relpath(node[0],self.result_directory)
-                                save_file.write(rel_path)
-                                for data in node[2]:
-                                    save_file.write(os.path.join(rel_path,data))
-                        save_file.close()
+                    if not self.compression == "delete":
+                        self._archive_folders(pathlist)
                     # To still have an easy access to the history of the processing,
                     # we keep one folder.
                     pathlist.pop()
-                    for path in pathlist:
-                        shutil.rmtree(path)
-                except:
-                    self._log("Result files could not be compressed with 32 bit mode, switching to 64 bit mode.", level=logging.CRITICAL)
-                    # nearly total code copy, only difference with 64 bit mode
-                    try:
-                        pathlist = glob.glob(os.path.join(self.result_directory,"{*}"))
-                        save_file=zipfile.ZipFile(self.result_directory+'/result_folders.zip',mode="w",compression=self.compression, allowZip64=True)
-                        # we want to have the zipped file relative to the result directory
-                        for path in pathlist:
-                            for node in os.walk(path):
-                                rel_path=os.path.relpath(node[0],self.result_directory)
-                                save_file.write(rel_path)
-                                for data in node[2]:
-                                    save_file.write(os.path.join(rel_path,data))
-                        save_file.close()
-                        # To still have an easy access to the history of the processing,
-                        # we keep one folder.
-                        pathlist.pop()
-                        for path in pathlist:
-                            shutil.rmtree(path)
-                    except:
-                        self._log("64 bit mode also failed. Please check your files and your code or contact your local programmer!", level=logging.CRITICAL)
-                os.chdir(cwd)
+                    pool = ThreadPool(self.consolidation_threads)
+                    pool.map(shutil.rmtree, pathlist)
+                    pool.close()
+                    pool.join()
+                except Exception, e:
+                    self._log("Result folders could not be compressed: %s. "
+                              "Please check your files and your code or "
+                              "contact your local programmer!" % e,
+                              level=logging.CRITICAL)
+                else:
+                    self._log("Compressed result folders in %.1fs"
+                              % (time.time() - start_time))
+
+    def _archive_folders(self, pathlist):
+        """ Zip the folders in *pathlist* into *result_folders.zip*
+
+        The files are read by a pool of threads in chunks and written
+        by this thread, since a zip file can only be written sequentially.
+        At most 2**26 bytes of a chunk are held in memory. Files larger than
+        their share of these bytes are directly copied into the archive.
+        The paths in the archive are relative to the result directory.
+        """
+        entries = []
+        for path in pathlist:
+            for dir_path, dir_names, file_names in os.walk(path):
+                entries.append(dir_path)
+                entries.extend(os.path.join(dir_path, file_name)
+                               for file_name in file_names)
+        save_file = zipfile.ZipFile(
+            os.path.join(self.result_directory, "result_folders.zip"),
+            mode="w", compression=self.compression, allowZip64=True)
+
+        chunk_size = 16 * self.consolidation_threads
+        max_file_size = 2**26 // chunk_size
+
+        def read_entry(path):
+            """ Contents of small files, None for directories and large files """
+            if os.path.isdir(path):
+                return None
+            entry_file = open(path, "rb")
+            data = entry_file.read(max_file_size + 1)
+            entry_file.close()
+            if len(data) > max_file_size:
+                return None
+            return data
+
+        pool = ThreadPool(self.consolidation_threads)
+        start_time = time.time()
+        try:
+            for chunk_start in range(0, len(entries), chunk_size):
+                chunk = entries[chunk_start:chunk_start + chunk_size]
+                for path, data in zip(chunk, pool.map(read_entry, chunk)):
+                    rel_path = os.path.relpath(path, self.result_directory)
+                    if data is None:
+                        save_file.write(path, rel_path)
+                        continue
+                    stat = os.stat(path)
+                    zip_info = zipfile.ZipInfo(
+                        rel_path, time.localtime(stat.st_mtime)[0:6])
+                    zip_info.external_attr = (stat.st_mode & 0xFFFF) << 16L
+                    zip_info.compress_type = self.compression
+                    save_file.writestr(zip_info, data)
+                self._log("Archived %d of %d entries in %.1fs." % (
+                    min(chunk_start + chunk_size, len(entries)),
+                    len(entries), time.time() - start_time),
+                    level=logging.DEBUG)
+        finally:
+            pool.close()
+            pool.join()
+            save_file.close()
 
     @staticmethod
     def _get_result_dataset_dir(base_dir, input_dataset_dir,
@@ -708,11 +1027,25 @@ class NodeChainProcess(Process):
                         the node chain after the processing;
                         separately for each split in cross validation if
                         existing
+
+        :batch_size:          number of windows processed at once by
+                        nodes with batch execution
+
+        :split_processes:     number of processes, which process the
+                        splits in parallel
+
+        :cache_directory:     if given, the results are stored in the
+                        subfolder *result* of a new temporary directory next
+                        to this entry of the cache first, which is renamed
+                        to the entry, when it is complete, and the results
+                        are copied to the result directory
+                        (see :meth:`NodeChainOperation._commit_cache_attempt`)
     """
 
     def __init__(self, node_chain_spec, parameter_setting,
                  rel_dataset_dir, run, split, storage_format,
-                 result_dataset_directory, store_node_chain=False):
+                 result_dataset_directory, store_node_chain=False,
+                 batch_size=1, split_processes=1, cache_directory=None):
 
         super(NodeChainProcess, self).__init__()
 
@@ -723,10 +1056,23 @@ class NodeChainProcess(Process):
         self.run = run
         self.storage_format = storage_format
         self.result_dataset_directory = result_dataset_directory
-        self.persistency_dir = os.sep.join([result_dataset_directory,
+        self.cache_directory = cache_directory
+        if cache_directory is None:
+            self.attempt_directory = None
+            self.store_directory = result_dataset_directory
+        else:
+            # the entry in the cache may be used by other operations,
+            # so the results are written into a directory of this attempt
+            self.attempt_directory = \
+                NodeChainOperation._create_cache_attempt(cache_directory)
+            self.store_directory = os.path.join(
+                self.attempt_directory, "result",
+                os.path.basename(result_dataset_directory.rstrip(os.sep)))
+        self.persistency_dir = os.sep.join([self.store_directory,
                                             "persistency_run%s" % run])
         create_directory(self.persistency_dir)
         self.store_node_chain = store_node_chain
+        self.split_processes = split_processes
 
         # reduce_log_level for process creation
         try:
@@ -753,6 +1099,8 @@ class NodeChainProcess(Process):
             Flow_Class=BenchmarkNodeChain, flow_spec=self.node_chain_spec)
         for node in self.node_chain:
             node.current_split = split
+        if batch_size > 1:
+            self.node_chain.set_batch_size(batch_size)
         # Remove pseudo parameter "__PREPARE_OPERATION__"
         if "__PREPARE_OPERATION__" in self.parameter_setting:
             self.parameter_setting = copy.deepcopy(self.parameter_setting )
@@ -772,25 +1120,7 @@ class NodeChainProcess(Process):
         ############## Prepare benchmarking ##############
         super(NodeChainProcess, self).pre_benchmarking()
 
-        # Load the data and check that it can be processed
-        # Note: This can not be done in the objects constructor since in
-        # that case the whole input would need to be pickled
-        # when doing the remote call
-        abs_dataset_dir = os.sep.join([self.storage,
-                                          self.rel_dataset_dir])
-
-        input_collection = BaseDataset.load(abs_dataset_dir)
-
-        # We have to remember parameters used for generating this specific
-        # input dataset
-        if 'parameter_setting' in input_collection.meta_data.keys():
-            # but not __INPUT_DATASET__ and __RESULT_DIRECTORY__
-            for k, v in input_collection.meta_data['parameter_setting'].items():
-                if k not in ["__INPUT_DATASET__", "__RESULT_DIRECTORY__"]:
-                    self.parameter_setting[k] = v
-
-        NodeChainProcess._check_node_chain_dataset_consistency(self.node_chain,
-                                                       input_collection)
+        input_collection = self._load_input_collection()
 
         ############## Do the actual benchmarking ##############
 
@@ -806,7 +1136,8 @@ class NodeChainProcess(Process):
                 self.node_chain.benchmark(input_collection = input_collection,
                                          run = self.run,
                                          persistency_directory = self.persistency_dir,
-                                         store_node_chain = self.store_node_chain)
+                                         store_node_chain = self.store_node_chain,
+                                         split_processes = self.split_processes)
         except Exception, exception:
             # Send Exception to Logger
             import traceback
@@ -819,7 +1150,54 @@ class NodeChainProcess(Process):
                            self.rel_dataset_dir))
 
         ############## Postprocessing ##############
+        self._store_result(result_collection)
+
+        ############## Clean up after benchmarking ##############
+        super(NodeChainProcess, self).post_benchmarking()
+
+    def _load_input_collection(self):
+        """ Load the input dataset and check that it can be processed """
+        # Load the data and check that it can be processed
+        # Note: This can not be done in the objects constructor since in
+        # that case the whole input would need to be pickled
+        # when doing the remote call
+        abs_dataset_dir = os.sep.join([self.storage,
+                                          self.rel_dataset_dir])
+
+        input_collection = BaseDataset.load(abs_dataset_dir)
+        self._prepare_input_collection(input_collection)
+        return input_collection
+
+    def _prepare_input_collection(self, input_collection):
+        """ Take the parameters of the input and check the node chain """
+        # We have to remember parameters used for generating this specific
+        # input dataset
+        if 'parameter_setting' in input_collection.meta_data.keys():
+            # but not __INPUT_DATASET__ and __RESULT_DIRECTORY__
+            for k, v in input_collection.meta_data['parameter_setting'].items():
+                if k not in ["__INPUT_DATASET__", "__RESULT_DIRECTORY__"]:
+                    self.parameter_setting[k] = v
+
+        NodeChainProcess._check_node_chain_dataset_consistency(self.node_chain,
+                                                       input_collection)
 
+    def estimated_cost(self):
+        """ Size of the input dataset on disk times the number of nodes """
+        abs_dataset_dir = os.sep.join([self.storage, self.rel_dataset_dir])
+        if abs_dataset_dir not in _dataset_sizes:
+            size = 0
+            for directory, _, file_names in os.walk(abs_dataset_dir):
+                for file_name in file_names:
+                    try:
+                        size += os.path.getsize(
+                            os.path.join(directory, file_name))
+                    except OSError:
+                        pass
+            _dataset_sizes[abs_dataset_dir] = size
+        return _dataset_sizes[abs_dataset_dir] * len(self.node_chain)
+
+    def _store_result(self, result_collection):
+        """ Store the result collection and free the node chain """
         # Add input collection, node_chain file name, and run number
         # to the meta data
         meta_data = {"node_chain_spec": self.node_chain_spec,
@@ -829,9 +1207,13 @@ class NodeChainProcess(Process):
 
         # Store the result collection to the hard disk
         if self.storage_format:
-            result_collection.store(self.result_dataset_directory, s_format=self.storage_format)
+            result_collection.store(self.store_directory, s_format=self.storage_format)
         else:
-            result_collection.store(self.result_dataset_directory)
+            result_collection.store(self.store_directory)
+        if self.cache_directory is not None:
+            NodeChainOperation._commit_cache_attempt(
+                self.attempt_directory, self.cache_directory,
+                os.path.dirname(self.result_dataset_directory.rstrip(os.sep)))
         l=len(self.node_chain)
         for i in range(len(self.node_chain)):
             self.node_chain[l-i-1].reset()
@@ -839,9 +1221,6 @@ class NodeChainProcess(Process):
         del(self.node_chain)
         gc.collect()
 
-        ############## Clean up after benchmarking ##############
-        super(NodeChainProcess, self).post_benchmarking()
-
     @classmethod
     def replace_parameters(cls, node_chain_spec, parameter_setting):
         """ Replace parameters of parameter_setting in node_chain_spec """
@@ -928,3 +1307,77 @@ class NodeChainProcess(Process):
             assert(isinstance(dataset, FeatureVectorDataset)), \
              "Node chain with input node of type %s cannot process dataset of type %s" \
                         % (type(node_chain[0]), type(dataset))
+
+
+class SharedPrefixNodeChainProcess(Process):
+    """ Run several node chains on the same input, sharing identical leading nodes
+
+    The node chains of the given :class:`NodeChainProcess` objects
+    have to use the same input dataset, run and split.
+    Their identical leading nodes are only trained and executed once
+    (see :func:`~pySPACE.environments.chains.node_chain.BenchmarkNodeChain.share_prefixes`)
+    and the input dataset is loaded only once.
+    The results are stored by the single processes as usual.
+
+    **Parameters**
+        :processes:     list of NodeChainProcess objects,
+                        which are not executed separately
+    """
+    def __init__(self, processes):
+        super(SharedPrefixNodeChainProcess, self).__init__()
+        self.processes = processes
+
+    def estimated_cost(self):
+        """ The shared nodes are counted once per node chain as upper bound """
+        return sum(process.estimated_cost() for process in self.processes)
+
+    def __call__(self):
+        """ Executes the node chains of all processes on the respective modality """
+        first_process = self.processes[0]
+        # Restore configuration
+        pySPACE.configuration = self.configuration
+
+        pySPACE.configuration.min_log_level = first_process.min_log_level
+        pySPACE.configuration.logging_com = self.handler_args
+        pySPACE.configuration.backend_com = self.backend_com
+
+        ############## Prepare benchmarking ##############
+        super(SharedPrefixNodeChainProcess, self).pre_benchmarking()
+
+        input_collection = first_process._load_input_collection()
+        for process in self.processes[1:]:
+            process._prepare_input_collection(input_collection)
+
+        node_chains = [process.node_chain for process in self.processes]
+        BenchmarkNodeChain.share_prefixes(
+            node_chains, [process.node_chain_spec
+                          for process in self.processes])
+
+        ############## Do the actual benchmarking ##############
+        self._log("Start benchmarking run %s of %d node chains on dataset %s"
+                  % (first_process.run, len(node_chains),
+                     first_process.rel_dataset_dir))
+        try:
+            result_collections = BenchmarkNodeChain.benchmark_shared(
+                node_chains, input_collection=input_collection,
+                run=first_process.run,
+                persistency_directories=[process.persistency_dir
+                                         for process in self.processes],
+                store_node_chain=first_process.store_node_chain)
+        except Exception:
+            # Send Exception to Logger
+            import traceback
+            print traceback.format_exc()
+            self._log(traceback.format_exc(), level=logging.ERROR)
+            raise
+        self._log("Finished benchmarking run %s of %d node chains on dataset %s"
+                  % (first_process.run, len(node_chains),
+                     first_process.rel_dataset_dir))
+
+        ############## Postprocessing ##############
+        for process, result_collection in zip(self.processes,
+                                              result_collections):
+            process._store_result(result_collection)
+
+        ############## Clean up after benchmarking ##############
+        super(SharedPrefixNodeChainProcess, self).post_benchmarking()
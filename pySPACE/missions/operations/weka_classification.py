@@ -138,17 +138,10 @@ class WekaClassificationOperation(Operation):
         file system.
         """
         self._log("Consolidating results ...")
-        # We load and store the results once into a PerformanceResultSummary.
-        # From_multiple csv does the necessary consolidation
-        # and mixes and parses the table.
-        self._log("Reading intermediate results...")
-        result_collection = PerformanceResultSummary(dataset_dir=self.result_directory)
-        
-        self._log("done")
-        self._log("Storing result collection")
-        
-        result_collection.store(self.result_directory)
-        
+        # The results are merged into one result collection,
+        # which is written row by row and not kept in memory.
+        self._log("Merging intermediate results...")
+        PerformanceResultSummary.merge_csv_files(self.result_directory)
         self._log("done")
         
         
@@ -42,6 +42,8 @@ __version__ = "$Revision: 451 $"
 
 import sys
 import os
+import bisect
+import collections
 import numpy
 import math
 import yaml
@@ -417,18 +419,38 @@ class MarkerWindower(Windower):
             print
         
         # initialize the buffers
-        self.samplebuf = RingBuffer(self.buflen)
+        self.samplebuf = ContiguousRingBuffer(self.buflen,
+                                              data_client.stdblocksize)
         self.markerbuf = RingBuffer(self.buflen)
 
+        # Offsets (shifted by *marker_shift*) and ids of all non-null markers
+        # with non-negative offsets in ascending order,
+        # to find the markers of a window with a binary search
+        self.marker_index_offsets = list()
+        self.marker_index_ids = list()
+        # sum of all decrements of the marker offsets
+        self.marker_shift = 0
+
+        # Sizes of the ``current'' block and of all blocks read after it.
+        # Blocks may be shorter or longer than stdblocksize. Therefore, a
+        # block becomes the ``current'' block, when at least
+        # postbuflen*stdblocksize samples have been read after it.
+        # Initially, the ``current'' block is a virtual block before the
+        # first sample.
+        self.block_sizes = collections.deque([data_client.stdblocksize])
+        # sample position of the ``current'' block in the stream
+        self.cur_block_start = -data_client.stdblocksize
+
         # determine the offset of the first sample in the incoming block
-        self.incoming_block_offset = self.postbuflen*self.data_client.stdblocksize
+        self.incoming_block_offset = self.data_client.stdblocksize
     
         # the list of the markers in the current block that have not yet been
         # handled (by calling the next() method of the iterator protocol)
         self.cur_extract_windows = list()
         
-        # total number of blocks read
+        # total number of blocks and samples read
         self.nblocks_read_total = 0
+        self.nsamples_read_total = 0
         # additional parameters, e.g. security checks etc
         self.data_consistency_check = data_consistency_check
         self.no_overlap = no_overlap
@@ -498,42 +520,79 @@ class MarkerWindower(Windower):
     # = Handling of incoming blocks =
     # ===============================
     
-    def _decmarkeroffsets(self):
-        """Decrement all offsets for markers in buffer as new blocks come in."""
+    def _decmarkeroffsets(self, decrement=None):
+        """Decrement all offsets for markers in buffer as new blocks come in.
 
+        The *decrement* is the size of the block that stops being the
+        ``current'' block (default: stdblocksize).
+        """
+        if decrement is None:
+            decrement = self.data_client.stdblocksize
         markers = self.buffermarkers.keys()
         # decrement of marker offsets in buffer
         for marker in markers:
             # remove old markers that are out of scope
-            new_offsets = [x - self.data_client.stdblocksize
+            new_offsets = [x - decrement
                 for x in self.buffermarkers[marker] 
-                if x -self.data_client.stdblocksize >= (-1)*self.nmarkers_prescan
+                if x - decrement >= (-1)*self.nmarkers_prescan
                 ]
             if len(new_offsets) == 0:
                 del self.buffermarkers[marker]
             else:
                 self.buffermarkers[marker] = new_offsets
+        # only markers with non-negative offsets are kept in the marker index
+        self.marker_shift += decrement
+        del_index = bisect.bisect_left(self.marker_index_offsets,
+                                       self.marker_shift)
+        del self.marker_index_offsets[:del_index]
+        del self.marker_index_ids[:del_index]
 
                 
     def _addblock(self, ndsamples, ndmarkers):
         """Add incoming block to ring buffer."""
+        nsamples = ndsamples.shape[1]
         self.nblocks_read_total += 1 # increment total number of blocks
-        self._decmarkeroffsets()    # adjust marker offsets
+        self.nsamples_read_total += nsamples
+        self.incoming_block_offset = sum(self.block_sizes)
+        self.block_sizes.append(nsamples)
+        # keep the prebuffer samples in front of the ``current'' block
+        self.samplebuf.reserve(self.prebuflen * self.data_client.stdblocksize
+                               + sum(self.block_sizes))
         self.samplebuf.append(ndsamples)
         self.markerbuf.append(ndmarkers)
-        self._insertnullmarkers()   # insert null markers
+        self._insertnullmarkers(nsamples) # insert null markers
         self._scanmarkers(ndmarkers) # scan for new markers
 
-    def _insertnullmarkers(self, debug=False):
-        """Insert epsilon markers according to nullmarker stride."""
+    def _nextcurblock(self):
+        """Read blocks until the next block can become the ``current'' block
+
+        The offsets of the markers are adjusted to the new ``current''
+        block.
+        """
+        while len(self.block_sizes) < 2 or \
+                sum(self.block_sizes) - self.block_sizes[0] - \
+                self.block_sizes[1] < \
+                self.postbuflen * self.data_client.stdblocksize:
+            self._readnextblock()
+        decrement = self.block_sizes.popleft()
+        self.cur_block_start += decrement
+        self._decmarkeroffsets(decrement) # adjust marker offsets
+
+    def _insertnullmarkers(self, nsamples=None, debug=False):
+        """Insert epsilon markers according to nullmarker stride.
+
+        *nsamples* is the size of the incoming block (default: stdblocksize).
+        """
         
         if self.nullmarker_stride is None:
             return
+        if nsamples is None:
+            nsamples = self.data_client.stdblocksize
         
         if debug:
             print "next_nullmarker", self.next_nullmarker
         self.nullmarker_id = self.data_client.markerids["null"]
-        while self.next_nullmarker < self.data_client.stdblocksize:
+        while self.next_nullmarker < nsamples:
             if not self.buffermarkers.has_key(self.nullmarker_id):
                 self.buffermarkers[self.nullmarker_id] = list()
             self.buffermarkers[self.nullmarker_id].append(
@@ -543,7 +602,7 @@ class MarkerWindower(Windower):
                                self.incoming_block_offset + self.next_nullmarker
 
             self.next_nullmarker += self.nullmarker_stride
-        self.next_nullmarker -= self.data_client.stdblocksize
+        self.next_nullmarker -= nsamples
 
     def _scanmarkers(self, ndmarkers, debug=False):
         """Scan incoming block for markers.
@@ -551,13 +610,18 @@ class MarkerWindower(Windower):
         self.buffermarkers contains offsets of markers w.r.t. to ``current``
         block @ position 0
         """
-        for i, marker in enumerate(ndmarkers):
-            if marker != -1:
-                if self.buffermarkers.has_key(marker):
-                    self.buffermarkers[marker].append(
-                                                 self.incoming_block_offset + i)
-                else:
-                    self.buffermarkers[marker]= [self.incoming_block_offset + i]
+        for i in numpy.flatnonzero(numpy.asarray(ndmarkers) != -1):
+            i = int(i)
+            marker = ndmarkers[i]
+            if self.buffermarkers.has_key(marker):
+                self.buffermarkers[marker].append(
+                                             self.incoming_block_offset + i)
+            else:
+                self.buffermarkers[marker]= [self.incoming_block_offset + i]
+            if marker != self.nullmarker_id:
+                self.marker_index_offsets.append(
+                    self.incoming_block_offset + i + self.marker_shift)
+                self.marker_index_ids.append(marker)
         if debug:
             print " scanmarkers ", self.buffermarkers
 
@@ -575,18 +639,35 @@ class MarkerWindower(Windower):
             # fetch the next block from data_client
             if debug:
                 print "reading next block"
-            self._readnextblock()
+            self._nextcurblock()
+            if self.cur_block_start < \
+                    self.prebuflen * self.data_client.stdblocksize:
+                # no history for the blocks at the beginning of the stream
+                continue
             self._extract_windows_cur_block()
             if debug:
                 print "  buffermarkers", self.buffermarkers
-                print "  current block", self.samplebuf.get()[self.prebuflen][1,:]                           
+                cur_block_start = self._cur_block_buf_offset()
+                print "  current block", self.samplebuf.get()[1,
+                    cur_block_start:cur_block_start + self.block_sizes[0]]
                 # print "  current extracted windows ", self.cur_extract_windows
     
         (windef_name, current_window, class_, start_time, end_time, markers_cur_win) = \
             self.cur_extract_windows.pop(0)
 
+        current_window = self._create_time_series(
+            windef_name, current_window, class_, start_time, end_time,
+            markers_cur_win)
+        self.nwindow += 1                                                
+
+        # return (ndsamplewin, ndmarkerwin)
+        return (current_window, class_)
+
+    def _create_time_series(self, windef_name, window, class_, start_time,
+                            end_time, markers_cur_win):
+        """Wrap an extracted window (channels x time) into a TimeSeries."""
         # TODO: Replace this by a decorator or something similar
-        current_window = numpy.atleast_2d(current_window.transpose())
+        current_window = numpy.atleast_2d(window.transpose())
         current_window = TimeSeries(
                 input_array=current_window,
                 channel_names=self.data_client.channelNames,
@@ -601,10 +682,7 @@ class MarkerWindower(Windower):
         current_window.generate_meta()
         current_window.specs['sampling_frequency'] = self.data_client.dSamplingInterval
         current_window.specs['wdef_name'] = windef_name
-        self.nwindow += 1                                                
-
-        # return (ndsamplewin, ndmarkerwin)
-        return (current_window, class_)
+        return current_window
 
     def _readnextblock(self):
         """Read next block from EEG stream client."""
@@ -616,7 +694,9 @@ class MarkerWindower(Windower):
                 raise StopIteration
             for marker_id, offsets in self.buffermarkers.iteritems():
                 for offset in offsets:
-                    if offset < 0 and warnings:
+                    if offset + self.cur_block_start < \
+                            self.prebuflen * self.data_client.stdblocksize \
+                            and warnings:
                         print >>sys.stderr, "warning: markers ignored when "\
                         "initializing buffer"
         else:
@@ -655,7 +735,7 @@ class MarkerWindower(Windower):
                     continue
                 # check if startmarker id has been seen in current buffer scope
                 if self.buffermarkers.has_key(startid) and \
-                    self.buffermarkers[startid][0] < self.data_client.stdblocksize:
+                    self.buffermarkers[startid][0] < self.block_sizes[0]:
                     # if the startmarker is found we delete it from the window
                     # definition because from now on windows can be cut
                     wdef.startmarker = None
@@ -672,7 +752,7 @@ class MarkerWindower(Windower):
             # now prepare extraction windows for markers in the ``current'' block
             # check if includedefs and excludedefs are fulfilled
             for markeroffset in self.buffermarkers[markerid]:  
-                if self.min_markeroffset <= markeroffset < self.data_client.stdblocksize and \
+                if self.min_markeroffset <= markeroffset < self.block_sizes[0] and \
                    self._check_exclude_defs_ok(markeroffset, wdef.excludedefs) and \
                    self._check_include_defs_ok(markeroffset, wdef.includedefs):
                     try:
@@ -828,7 +908,7 @@ class MarkerWindower(Windower):
         """ Extracts a sample window from the ring buffer and consolidates it
         into a single numpy array object."""
         # calculate current position with respect to prebuffer start
-        cur_sample_buf_offset = self.prebuflen * self.data_client.stdblocksize \
+        cur_sample_buf_offset = self._cur_block_buf_offset() \
                                 + cur_sample_block_offset
         buf_extract_start = cur_sample_buf_offset + start_offset
         
@@ -846,37 +926,295 @@ class MarkerWindower(Windower):
                          " to extract window with start offset of %d samples" \
                                                                  % start_offset
         assert buf_extract_end >= 0
-        assert buf_extract_end <= self.buflen * self.data_client.stdblocksize
+        if buf_extract_end > self.samplebuf.nsamples:
+            raise MarkerWindowerException,"not enough future data available" \
+                         " to extract window with end offset of %d samples" \
+                                                                   % end_offset
         
-        end_time_samples = \
-            (self.nblocks_read_total * self.data_client.stdblocksize) - \
-            (self.buflen * self.data_client.stdblocksize - buf_extract_end)
+        end_time_samples = self.nsamples_read_total - \
+            (self.samplebuf.nsamples - buf_extract_end)
         end_time = self._samplestoms(end_time_samples)
         start_time_samples = end_time_samples - \
                                       (buf_extract_end - buf_extract_start) + 1
         start_time = self._samplestoms(start_time_samples)
         
-        # copy ring buffer into one long array and extract subwindow
-        ndsamplewin = numpy.hstack(self.samplebuf.get())[:,buf_extract_start:buf_extract_end]
-        markers_cur_window = self._extract_markers_cur_window(buf_extract_start, buf_extract_end)
+        # copy the subwindow out of the ring buffer
+        ndsamplewin = \
+            self.samplebuf.get()[:, buf_extract_start:buf_extract_end].copy()
+        # the markers are searched with positions relative to the sample
+        # prebuflen blocks before the ``current'' block
+        shift = self.prebuflen * self.data_client.stdblocksize - \
+            self._cur_block_buf_offset()
+        markers_cur_window = self._extract_markers_cur_window(
+            buf_extract_start + shift, buf_extract_end + shift)
 
         return (ndsamplewin, start_time, end_time, markers_cur_window)
     
+    def _cur_block_buf_offset(self):
+        """ Position of the ``current'' block in the sample buffer """
+        return self.samplebuf.nsamples - sum(self.block_sizes)
+
     def _extract_markers_cur_window(self, buf_extract_start, buf_extract_end):
         """ Filter out all markers that lie in the current window
             to store this information. The markers are stored with their clear name
             and temporal offset.
         """
         markers_cur_window = dict()
-        for marker_id in self.buffermarkers:
-            for offset in self.buffermarkers[marker_id]:
-                if offset >= 0 \
-                        and buf_extract_start <= offset < buf_extract_end \
-                        and marker_id != self.nullmarker_id:
-                    marker = self.data_client.markerNames[marker_id]
-                    if not markers_cur_window.has_key(marker):
-                        markers_cur_window[marker] = list()
-                    markers_cur_window[marker].append(self._samplestoms(offset-buf_extract_start))
+        # the marker index only contains markers with non-negative offsets
+        first = bisect.bisect_left(self.marker_index_offsets,
+                                   max(buf_extract_start, 0) + self.marker_shift)
+        last = bisect.bisect_left(self.marker_index_offsets,
+                                  buf_extract_end + self.marker_shift)
+        for i in xrange(first, last):
+            offset = self.marker_index_offsets[i] - self.marker_shift
+            marker = self.data_client.markerNames[self.marker_index_ids[i]]
+            if not markers_cur_window.has_key(marker):
+                markers_cur_window[marker] = list()
+            markers_cur_window[marker].append(self._samplestoms(offset-buf_extract_start))
+        return markers_cur_window
+
+
+class BulkMarkerWindower(MarkerWindower):
+    """Offline variant of the MarkerWindower, which cuts all windows at once
+
+    When the complete recording is available, the windows do not have to be
+    extracted block by block from a ring buffer. Instead, the window
+    definitions are resolved against the table of all marker positions,
+    the exclude and include definitions are checked with binary searches
+    on the sorted marker positions and the windows are sliced directly
+    from the samples. Windows, labels, times, markers and the order of
+    the windows are the same as with the :class:`MarkerWindower`.
+
+    Data clients with random access, which provide *nsamples*,
+    *get_samples* and *find_markers* (like the
+    :class:`~pySPACE.resources.dataset_defs.stream.EEGReader`),
+    are not streamed at all and the windows are taken from the
+    memory-mapped data. Other data clients are read completely into memory.
+
+    Window definitions with *startmarker* or *endmarker* depend on the
+    state of the stream and are not supported (see :func:`supports`).
+
+    **Parameters**
+
+        The same as for the :class:`MarkerWindower`.
+    """
+    def __init__(self, data_client, windowdefs=None, debug=False,
+            nullmarker_stride_ms=1000, no_overlap=False,
+            data_consistency_check=False):
+        if not self.supports(windowdefs):
+            raise NotImplementedError("Start and end markers are not "
+                                      "supported by the BulkMarkerWindower!")
+        # blocks of data clients without random access
+        self.blocks = list()
+        super(BulkMarkerWindower, self).__init__(
+            data_client, windowdefs=windowdefs, debug=debug,
+            nullmarker_stride_ms=nullmarker_stride_ms, no_overlap=no_overlap,
+            data_consistency_check=data_consistency_check)
+        # windows are determined with the first call of next
+        self.cur_extract_windows = None
+
+    @staticmethod
+    def supports(windowdefs):
+        """Check if the window definitions can be handled without stream"""
+        return all(wdef.startmarker is None and wdef.endmarker is None
+                   for wdef in windowdefs)
+
+    def _addblock(self, ndsamples, ndmarkers):
+        """Collect the incoming blocks instead of buffering them."""
+        self.blocks.append((ndsamples, ndmarkers))
+
+    def next(self, debug=False):
+        """Return next labeled window when used in iterator context."""
+        if self.cur_extract_windows is None:
+            self.cur_extract_windows = self._extract_all_windows()
+        if len(self.cur_extract_windows) == 0:
+            raise StopIteration
+        (windef_name, class_, position, start, end) = \
+            self.cur_extract_windows.popleft()
+        extractwindow = self.get_samples(start, end)
+        if self.data_consistency_check:
+            # test if extracted window has std zero
+            std = numpy.std(extractwindow, axis=1)
+            if sum(std < 10**-9): #can be considered as zero
+                # filter the channel names where std equals zero
+                zero_channels = [self.data_client.channelNames[index]
+                                 for (index,elem) in enumerate(std)
+                                 if elem < 10**-9]
+                print "Warning: Standard deviation of channel(s) " \
+                      " %s in time interval [%.1f,%.1f] is zero!" \
+                      % (str(zero_channels), self._samplestoms(start + 1),
+                         self._samplestoms(end))
+        current_window = self._create_time_series(
+            windef_name, extractwindow, class_, self._samplestoms(start + 1),
+            self._samplestoms(end), self._markers_of_window(position, start,
+                                                            end))
+        self.nwindow += 1
+        return (current_window, class_)
+
+    def _load_recording(self):
+        """Get the number of blocks and all markers of the recording
+
+        Additionally, *get_samples* is set to access the samples
+        (number_of_sensors x time) between two sample indices.
+        """
+        blocksize = self.data_client.stdblocksize
+        if all(hasattr(self.data_client, name) for name in
+               ["nsamples", "get_samples", "find_markers"]):
+            nblocks = int(math.ceil(float(self.data_client.nsamples) /
+                                    blocksize))
+            positions, ids = self.data_client.find_markers(0,
+                                                           nblocks * blocksize)
+            self.get_samples = self.data_client.get_samples
+        else:
+            while self.data_client.read(nblocks=self.buflen) == self.buflen:
+                pass
+            nblocks = len(self.blocks)
+            if nblocks == 0:
+                return 0, numpy.zeros(0, dtype=int), numpy.zeros(0)
+            samples = numpy.hstack([block[0] for block in self.blocks])
+            markers = numpy.hstack([block[1] for block in self.blocks])
+            self.blocks = list()
+            positions = numpy.flatnonzero(markers != -1)
+            ids = markers[positions]
+            self.get_samples = \
+                lambda start, end: samples[:, start:end].copy()
+        return nblocks, positions, ids
+
+    def _resolve_marker(self, markername, definition, warning):
+        """Map the marker name to its id or warn once and return None"""
+        try:
+            return self.data_client.markerids[markername]
+        except KeyError, e:
+            e=str(e)
+            if not self.keyerror.has_key(e):
+                self.keyerror[e]=definition
+                print
+                print warning, e, "not found in the ..."
+                print self.keyerror[e]
+            return None
+
+    def _marker_in_range(self, positions, window_markers, pre_ms, post_ms):
+        """Check for each window marker if one of *positions* is in its range
+
+        The range is defined like for the exclude and include definitions
+        and the window marker itself is not counted.
+        """
+        start = window_markers - self._mstosamples(pre_ms)
+        end = window_markers + self._mstosamples(post_ms)
+        if not self.no_overlap:
+            end += 1
+        count = numpy.searchsorted(positions, end) - \
+            numpy.searchsorted(positions, start)
+        own = numpy.searchsorted(positions, window_markers, side="right") - \
+            numpy.searchsorted(positions, window_markers)
+        count -= own * ((start <= window_markers) & (window_markers < end))
+        return count > 0
+
+    def _extract_all_windows(self):
+        """Determine all windows, which the MarkerWindower would extract
+
+        Returns a deque of tuples with the window definition name,
+        the class, the position of the window marker and the start and
+        (exclusive) end sample of the window.
+        """
+        blocksize = self.data_client.stdblocksize
+        nblocks, positions, ids = self._load_recording()
+        order = numpy.argsort(positions, kind="mergesort")
+        positions = numpy.asarray(positions, dtype=numpy.int64)[order]
+        ids = numpy.asarray(ids)[order]
+        null_positions = numpy.zeros(0, dtype=numpy.int64)
+        null_id = None
+        if self.nullmarker_stride is not None:
+            null_id = self.data_client.markerids["null"]
+            null_positions = numpy.arange(0, nblocks * blocksize,
+                                          self.nullmarker_stride)
+        # markers with the id of the null marker are not part of the
+        # markers of a window
+        self.window_marker_positions = positions[ids != null_id]
+        self.window_marker_ids = ids[ids != null_id]
+        marker_positions = dict()
+        def positions_of(marker_id):
+            if not marker_id in marker_positions:
+                found = positions[ids == marker_id]
+                if marker_id == null_id:
+                    found = numpy.sort(numpy.hstack((found, null_positions)),
+                                       kind="mergesort")
+                marker_positions[marker_id] = found
+            return marker_positions[marker_id]
+
+        if nblocks < self.buflen:
+            # the stream is too short to fill the ring buffer
+            return collections.deque()
+        # only these markers pass the ``current'' block of the ring buffer
+        first_sample = self.prebuflen * blocksize
+        end_sample = (nblocks - self.postbuflen) * blocksize
+        windows = list()
+        for index, wdef in enumerate(self.windowdefs):
+            markerid = self._resolve_marker(wdef.markername, wdef,
+                                            "windowdef warning: Marker ")
+            if markerid is None:
+                continue
+            found = positions_of(markerid)
+            found = found[(first_sample <= found) & (found < end_sample)]
+            valid = numpy.ones(len(found), dtype=bool)
+            for exc in wdef.excludedefs or []:
+                excmarkerid = self._resolve_marker(
+                    exc.markername, exc, "exclude warning: Marker ")
+                if excmarkerid is None:
+                    continue
+                valid &= ~self._marker_in_range(
+                    positions_of(excmarkerid), found, exc.preexcludems,
+                    exc.postexcludems)
+            for inc in wdef.includedefs or []:
+                incmarkerid = self._resolve_marker(
+                    inc.markername, inc, "include warning: Marker ")
+                if incmarkerid is None:
+                    valid[:] = False
+                    break
+                valid &= self._marker_in_range(
+                    positions_of(incmarkerid), found, inc.preincludems,
+                    inc.postincludems)
+            found = found[valid]
+            starts = found + self._mstosamples(wdef.startoffsetms)
+            ends = found + self._mstosamples(wdef.endoffsetms)
+            if not self.no_overlap:
+                ends += 1
+            if wdef.skipfirstms is not None:
+                valid = self._samplestoms(starts + 1) > wdef.skipfirstms
+                found, starts, ends = found[valid], starts[valid], ends[valid]
+            windows.extend((found[i] // blocksize, index, found[i],
+                            wdef.windef_name, wdef.classname, starts[i],
+                            ends[i]) for i in xrange(len(found)))
+        # the MarkerWindower handles the blocks one after the other
+        # and in each block the window definitions one after the other
+        windows.sort(key=lambda window: window[:3])
+        return collections.deque(
+            (windef_name, classname, int(position), int(start), int(end))
+            for (_, _, position, windef_name, classname, start, end)
+            in windows)
+
+    def _markers_of_window(self, position, start, end):
+        """Get the markers of the window like the MarkerWindower
+
+        The markers have to be after the beginning of the block of the
+        window marker and already be read into the ring buffer.
+        Offsets are calculated relative to the sample *prebuflen* blocks
+        before the start of the window, as in the MarkerWindower.
+        """
+        blocksize = self.data_client.stdblocksize
+        block_start = (position // blocksize) * blocksize
+        history = self.prebuflen * blocksize
+        buffer_end = block_start + (self.postbuflen + 1) * blocksize
+        first, last = numpy.searchsorted(
+            self.window_marker_positions,
+            [max(start + history, block_start), min(end + history, buffer_end)])
+        markers_cur_window = dict()
+        for i in xrange(first, last):
+            marker = self.data_client.markerNames[self.window_marker_ids[i]]
+            if not markers_cur_window.has_key(marker):
+                markers_cur_window[marker] = list()
+            markers_cur_window[marker].append(self._samplestoms(
+                self.window_marker_positions[i] - start - history))
         return markers_cur_window
 
 
@@ -1006,6 +1344,79 @@ class RingBufferFull(RingBuffer):
     def get(self):
         return self.data[self.cur:]+self.data[:self.cur]            
 
+class ContiguousRingBuffer(object):
+    """Ring buffer for blocks of samples in one preallocated 2d array
+
+    The samples are written twice into an array of double capacity
+    (mirrored layout). Therefore, the samples from the oldest to the newest
+    are always available as one contiguous slice of this array
+    and no blocks have to be concatenated.
+
+    The buffer contains the last *capacity* samples, independent of the
+    sizes of the appended blocks. The capacity can be increased with
+    :func:`reserve`.
+
+    **Parameters**
+
+        :size_max:
+            Maximal number of blocks in the buffer.
+
+        :blocksize:
+            Number of samples of one block.
+    """
+    def __init__(self, size_max, blocksize):
+        self.max = size_max
+        self.capacity = size_max * blocksize
+        self.data = None
+        # position of the next sample to be written
+        self.cur = 0
+        self.nsamples = 0
+        self.nblocks = 0
+
+    def reserve(self, capacity):
+        """ increase the capacity to keep at least *capacity* samples """
+        if capacity <= self.capacity:
+            return
+        if self.data is not None:
+            old = self.get().copy()
+            self.data = numpy.empty((old.shape[0], 2 * capacity),
+                                    dtype=old.dtype)
+            for start in [0, capacity]:
+                self.data[:, start:start + self.nsamples] = old
+            self.cur = self.nsamples % capacity
+        self.capacity = capacity
+
+    def append(self, x):
+        """append a block (number_of_sensors x samples) at the end"""
+        if self.data is None:
+            self.data = numpy.empty((x.shape[0], 2 * self.capacity),
+                                    dtype=x.dtype)
+        x = x[:, -self.capacity:]
+        n = x.shape[1]
+        first = min(n, self.capacity - self.cur)
+        for start in [self.cur, self.cur + self.capacity]:
+            self.data[:, start:start + first] = x[:, :first]
+        if first < n:
+            # wrap around
+            for start in [0, self.capacity]:
+                self.data[:, start:start + n - first] = x[:, first:]
+        self.cur = (self.cur + n) % self.capacity
+        self.nsamples = min(self.nsamples + n, self.capacity)
+        self.nblocks = min(self.nblocks + 1, self.max)
+
+    def get(self):
+        """ return a view on the samples from the oldest to the newest"""
+        if self.nsamples < self.capacity:
+            return self.data[:, :self.nsamples]
+        return self.data[:, self.cur:self.cur + self.capacity]
+
+    def __str__(self):
+        return "ContiguousRingBuffer with %d blocks:\n%s" % (self.nblocks,
+                                                              self.get())
+
+    def __len__(self):
+        return self.nblocks
+
 if __name__ == '__main__':    
     suite = unittest.TestLoader().loadTestsFromName(
         'unittests.test_windower.MarkerWindowerTestCase')    
@@ -392,10 +392,158 @@ class BinaryClassificationDataset(BaseDataset):
                           decision_boundary=0.0):
         """ Calculate performance measures from the given classifications
 
+        The predictions and labels are extracted from the list of
+        (prediction vector, label) pairs *classification_results* and
+        evaluated at once with :func:`calculate_metrics_from_arrays`.
+        Only if more than two true labels occur,
+        the instances are evaluated one after another as before.
+
         :Returns: metricdict and the ROC points if save_roc_point is True
 
         .. todo:: simplify loss metrics, mutual information and AUC
         """
+        arrays = BinaryClassificationDataset.results_to_arrays(
+            classification_results)
+        if sec_class is None:
+            for label in arrays[2]:
+                if not label == ir_class:
+                    sec_class = label
+                    break
+        options = dict(calc_soft_metrics=calc_soft_metrics,
+                       invert_classification=invert_classification,
+                       loss_restriction=loss_restriction, calc_AUC=calc_AUC,
+                       calc_loss=calc_loss, weight=weight,
+                       save_roc_points=save_roc_points,
+                       decision_boundary=decision_boundary)
+        if set(arrays[2]) <= set([ir_class, sec_class]):
+            result = BinaryClassificationDataset.calculate_metrics_from_arrays(
+                *arrays, ir_class=ir_class, sec_class=sec_class, **options)
+        else:
+            metrics, loss_dict, ir_class, sec_class = \
+                BinaryClassificationDataset._update_metrics_per_instance(
+                    classification_results, calc_soft_metrics, ir_class,
+                    sec_class, loss_restriction, calc_loss, decision_boundary)
+            result = BinaryClassificationDataset._summarize_metrics(
+                metrics, loss_dict, arrays[0], arrays[2], ir_class=ir_class,
+                **options)
+        if save_roc_points:
+            metrics = result[0]
+        else:
+            metrics = result
+
+        ### Extract meta metrics from the predictor ###
+        # set basic important predictor metrics for default
+        #metrics["~~Num_Retained_Features~~"] = numpy.inf
+        #metrics["~~Solver_Iterations~~"] = numpy.Inf
+        #metrics["~~Classifier_Converged~~"] = True
+        # Classifier information should be saved in the parameter
+        # 'classifier_information'!!!
+        try:
+            classifier_information = classification_results[0][0].predictor.classifier_information
+            for key, value in classifier_information.iteritems():
+                metrics[key] = value
+        except:
+            pass
+
+        ### Time metrics ###
+        if len(time_periods)>0:
+            # the first measured time can be inaccurate due to
+            # initialization procedures performed in the first executions
+            time_periods.pop(0)
+            metrics["Time (average)"] = 1./1000 * sum(time_periods) / \
+                                                        len(time_periods)
+            metrics["Time (maximal)"] = 1./1000 * max(time_periods)
+        return result
+
+    @staticmethod
+    def results_to_arrays(classification_results):
+        """ Split (prediction vector, label) pairs into arrays
+
+        :Returns: the prediction scores, the stripped predicted labels,
+                  the true labels and the range of the predictor
+                  (infinity if the predictor has no range)
+        """
+        n = len(classification_results)
+        scores = numpy.empty(n)
+        predicted_labels = numpy.empty(n, dtype=object)
+        labels = numpy.empty(n, dtype=object)
+        ranges = numpy.empty(n)
+        predictor_ranges = {}
+        for index, (prediction_vector, label) in \
+                enumerate(classification_results):
+            scores[index] = prediction_vector.prediction
+            predicted_labels[index] = prediction_vector.label.strip()
+            labels[index] = label
+            # the predictor is usually the same for all instances
+            predictor = prediction_vector.predictor
+            try:
+                ranges[index] = predictor_ranges[id(predictor)]
+            except KeyError:
+                try:
+                    predictor_ranges[id(predictor)] = predictor.range
+                except:
+                    predictor_ranges[id(predictor)] = numpy.inf
+                ranges[index] = predictor_ranges[id(predictor)]
+        return scores, predicted_labels, labels, ranges
+
+    @staticmethod
+    def calculate_metrics_from_arrays(scores, predicted_labels, labels,
+                                      ranges=None, calc_soft_metrics=True,
+                                      invert_classification=False,
+                                      ir_class="Target", sec_class=None,
+                                      loss_restriction=2.0, calc_AUC=True,
+                                      calc_loss=True, weight=0.5,
+                                      save_roc_points=False,
+                                      decision_boundary=0.0):
+        """ Calculate performance measures for arrays of classifications
+
+        This is the vectorized version of :func:`calculate_metrics` for
+        the prediction *scores*, the stripped *predicted_labels*, the true
+        *labels* of exactly two classes and the *ranges* of the predictor
+        (see :func:`results_to_arrays`).
+        The sums are built in the order of the instances,
+        which gives the same numbers as the update of the metrics
+        instance by instance.
+
+        :Returns: metricdict and the ROC points if save_roc_point is True
+        """
+        scores = numpy.asarray(scores, dtype=float)
+        labels = numpy.asarray(labels, dtype=object)
+        if sec_class is None:
+            for label in labels:
+                if not label == ir_class:
+                    sec_class = label
+                    break
+        metrics = BinaryClassificationDataset.confusion_matrix_from_arrays(
+            scores, predicted_labels, labels, ir_class=ir_class,
+            sec_class=sec_class, calc_soft_metrics=calc_soft_metrics,
+            decision_boundary=decision_boundary)
+        loss_dict = metricdict(lambda: numpy.zeros(2))
+        if calc_loss:
+            if ranges is None:
+                ranges = numpy.inf
+            loss_dict = BinaryClassificationDataset.loss_values_from_arrays(
+                scores, labels == ir_class, ranges, loss_restriction)
+        return BinaryClassificationDataset._summarize_metrics(
+            metrics, loss_dict, scores, labels,
+            calc_soft_metrics=calc_soft_metrics,
+            invert_classification=invert_classification, ir_class=ir_class,
+            loss_restriction=loss_restriction, calc_AUC=calc_AUC,
+            calc_loss=calc_loss, weight=weight,
+            save_roc_points=save_roc_points,
+            decision_boundary=decision_boundary)
+
+    @staticmethod
+    def _update_metrics_per_instance(classification_results,
+                                     calc_soft_metrics, ir_class, sec_class,
+                                     loss_restriction, calc_loss,
+                                     decision_boundary):
+        """ Update the confusion matrix and loss values instance by instance
+
+        Used for more than two classes, where the *ir_class* is replaced.
+
+        :Returns: confusion matrix, loss values, ir_class and sec_class
+        """
         # metric initializations
         metrics = metricdict(float) #{"TP":0,"FP":0,"TN":0,"FN":0}
         # loss values are collected for each class
@@ -427,7 +575,19 @@ class BinaryClassificationDataset(BaseDataset):
                                     ir_class=ir_class, sec_class=sec_class,
                                     loss_dict=loss_dict,
                                     loss_restriction=loss_restriction)
+        return metrics, loss_dict, ir_class, sec_class
 
+    @staticmethod
+    def _summarize_metrics(metrics, loss_dict, scores, labels,
+                           calc_soft_metrics=True,
+                           invert_classification=False, ir_class="Target",
+                           loss_restriction=2.0, calc_AUC=True,
+                           calc_loss=True, weight=0.5, save_roc_points=False,
+                           decision_boundary=0.0):
+        """ Derive all metrics from the confusion matrix and the loss values
+
+        The *scores* and *labels* are needed for the AUC.
+        """
         P = metrics["True_positives"]+metrics["False_negatives"]
         N = metrics["True_negatives"]+metrics["False_positives"]
 
@@ -469,8 +629,9 @@ class BinaryClassificationDataset(BaseDataset):
         ## Get AUC and ROC_points
         # test if classification_outcome has prediction (float, score)
         ROC_points = None
-        if len(classification_results) != 0 and calc_AUC:
-            AUC, ROC_points = BinaryClassificationDataset.calculate_AUC(classification_results,
+        if len(scores) != 0 and calc_AUC:
+            AUC, ROC_points = BinaryClassificationDataset.calculate_AUC_from_arrays(
+                                             scores, labels,
                                              ir_class=ir_class,
                                              save_roc_points=save_roc_points,
                                              performance=metrics,
@@ -484,29 +645,6 @@ class BinaryClassificationDataset(BaseDataset):
                     warnings.warn("AUC had to be inverted! Check this!")
             metrics["AUC"] = AUC
 
-        ### Extract meta metrics from the predictor ###
-        # set basic important predictor metrics for default
-        #metrics["~~Num_Retained_Features~~"] = numpy.inf
-        #metrics["~~Solver_Iterations~~"] = numpy.Inf
-        #metrics["~~Classifier_Converged~~"] = True
-        # Classifier information should be saved in the parameter
-        # 'classifier_information'!!!
-        try:
-            classifier_information = classification_results[0][0].predictor.classifier_information
-            for key, value in classifier_information.iteritems():
-                metrics[key] = value
-        except:
-            pass
-
-        ### Time metrics ###
-        if len(time_periods)>0:
-            # the first measured time can be inaccurate due to
-            # initialization procedures performed in the first executions
-            time_periods.pop(0)
-            metrics["Time (average)"] = 1./1000 * sum(time_periods) / \
-                                                        len(time_periods)
-            metrics["Time (maximal)"] = 1./1000 * max(time_periods)
-
         ### Loss metrics ###
         if calc_loss:
             # initialization #
@@ -678,12 +816,114 @@ class BinaryClassificationDataset(BaseDataset):
                         "Did you specify the ir_class in your sink node?")
         return confusion_matrix
 
+    @staticmethod
+    def confusion_codes(predicted_labels, labels, ir_class='Target',
+                        sec_class='Standard'):
+        """ Position of each instance in the confusion matrix
+
+        The codes are 0 for TP, 1 for FN, 2 for FP and 3 for TN
+        as in :func:`update_confusion_matrix`.
+        Both label arrays are stripped before the comparison.
+        """
+        predicted_labels = numpy.asarray(predicted_labels, dtype=object)
+        labels = numpy.asarray(labels, dtype=object)
+        strip = numpy.frompyfunc(lambda label: label.strip(), 1, 1)
+        if len(labels):
+            predicted_labels = strip(predicted_labels)
+            labels = strip(labels)
+        is_ir = predicted_labels == ir_class
+        is_sec = numpy.logical_and(numpy.logical_not(is_ir),
+                                   predicted_labels == sec_class)
+        invalid = numpy.flatnonzero(
+            numpy.logical_not(numpy.logical_or(is_ir, is_sec)))
+        if len(invalid):
+            raise Exception("Updating confusion matrix " \
+                        "requires exactly two classes. At least " \
+                        "three are used:" + str(ir_class) + \
+                        " (ir_class), " + str(sec_class) + \
+                        " (non_ir_class), " + str(labels[invalid[0]]) + \
+                        " (correct label), " + \
+                        str(predicted_labels[invalid[0]]) + \
+                        " (classification)! \n"+\
+                        "Did you specify the ir_class in your sink node?")
+        correct = predicted_labels == labels
+        codes = numpy.empty(len(labels), dtype=int)
+        codes[numpy.logical_and(is_ir, correct)] = 0
+        codes[numpy.logical_and(is_sec, numpy.logical_not(correct))] = 1
+        codes[numpy.logical_and(is_ir, numpy.logical_not(correct))] = 2
+        codes[numpy.logical_and(is_sec, correct)] = 3
+        return codes
+
+    @staticmethod
+    def _sequential_sum(values):
+        """ Sum in the order of the values like repeated additions """
+        if len(values) == 0:
+            return 0.0
+        return float(numpy.cumsum(values)[-1])
+
+    @staticmethod
+    def confusion_matrix_from_arrays(scores, predicted_labels, labels,
+                                     ir_class='Target', sec_class='Standard',
+                                     calc_soft_metrics=False,
+                                     decision_boundary=0.0, scaling=5):
+        """ Confusion matrix and soft confusion matrices of all instances
+
+        Vectorized version of :func:`update_confusion_matrix`
+        for arrays of prediction scores, predicted and true labels.
+
+        :Returns: confusion_matrix
+        """
+        confusion_matrix = metricdict(float)
+        scores = numpy.asarray(scores, dtype=float)
+        codes = BinaryClassificationDataset.confusion_codes(
+            predicted_labels, labels, ir_class=ir_class, sec_class=sec_class)
+        names = ["True_positives", "False_negatives",
+                 "False_positives", "True_negatives"]
+        masks = [codes == code for code in range(4)]
+        for name, mask in zip(names, masks):
+            confusion_matrix[name] = float(numpy.count_nonzero(mask))
+        if not calc_soft_metrics:
+            return confusion_matrix
+        sum_ = BinaryClassificationDataset._sequential_sum
+        scale = BinaryClassificationDataset.scale(scores, decision_boundary)
+        pol = BinaryClassificationDataset.pol(scores, decision_boundary)
+        for name, mask in zip(names, masks):
+            confusion_matrix["soft_" + name] = sum_(scale[mask])
+            confusion_matrix["pol_" + name] = sum_(pol[mask])
+        # prepare prediction in case of no mapping beforehand
+        prediction = scores
+        if decision_boundary==0.0:
+            # ir_class>0; sec_class<0, negative values for wrong
+            # classifications
+            is_ir = numpy.logical_or(masks[0], masks[2])
+            is_sec = numpy.logical_not(is_ir)
+            wrong = numpy.logical_or(masks[1], masks[2])
+            flip = numpy.logical_or(
+                numpy.logical_and(is_ir, numpy.logical_not(scores >= 0)),
+                numpy.logical_and(is_sec, numpy.logical_not(scores <= 0)))
+            flips = flip.astype(int) + is_sec + wrong
+            prediction = numpy.where(flips % 2, -scores, scores)
+        k_sig = BinaryClassificationDataset.k_sig(
+            prediction, decision_boundary=decision_boundary, scaling=scaling)
+        # wrong rejections add low values to the true positives
+        positives = numpy.logical_or(masks[0], masks[1])
+        confusion_matrix["k_True_positives"] = sum_(k_sig[positives])
+        negatives = numpy.logical_or(masks[2], masks[3])
+        confusion_matrix["k_False_positives"] = sum_(1 - k_sig[negatives])
+        return confusion_matrix
+
     @staticmethod
     def scale(value, decision_boundary=0.0):
         """ Scales the prediction output to [0,1] by simple cutting
         to show there reliability
         contribution in the prediction.
         """
+        if isinstance(value, numpy.ndarray):
+            if decision_boundary==0.0:
+                output = numpy.where(value>0, value, -value)
+            else: #probabilistic output assumed
+                output = numpy.where(value>decision_boundary, value, 1-value)
+            return numpy.where(output > 1, 1, output)
         if decision_boundary==0.0:
             if value>0:
                 output = value
@@ -731,6 +971,9 @@ class BinaryClassificationDataset(BaseDataset):
 
         .. math:: value^2 (3-2 \\cdot value)
         """
+        if isinstance(value, numpy.ndarray):
+            output = numpy.where(value>0.5, value, 1-value)
+            return numpy.where(output > 1, 1, output**2*(3-2*output))
         if value>0.5:
             output = value
         else:
@@ -751,6 +994,8 @@ class BinaryClassificationDataset(BaseDataset):
         """
         if not decision_boundary==0.0: # no mapping needed, due to prob-fit
             return value
+        elif isinstance(value, numpy.ndarray):
+            return 1.0/(1+numpy.exp(-1.0*scaling*value))
         else:
             return 1.0/(1+exp(-1.0*scaling*value))
 
@@ -808,6 +1053,54 @@ class BinaryClassificationDataset(BaseDataset):
         except:
             pass
 
+    @staticmethod
+    def loss_values_from_arrays(scores, is_ir, ranges=numpy.inf,
+                                loss_restriction=2.0):
+        """ Classifier loss terms of all instances
+
+        Vectorized version of :func:`update_loss_values`
+        for the prediction *scores*, a boolean array *is_ir*, which marks
+        the instances of the ir_class, and the *ranges* of the predictor.
+
+        :Returns: loss_dict
+        """
+        loss_dict = metricdict(lambda: numpy.zeros(2))
+        sum_ = BinaryClassificationDataset._sequential_sum
+        scores = numpy.asarray(scores, dtype=float)
+        is_ir = numpy.asarray(is_ir, dtype=bool)
+        prediction = numpy.where(is_ir, scores, -scores)
+        R = numpy.empty(len(scores))
+        R[:] = ranges
+        r = loss_restriction
+        # min(value, r) returns the value, if r is not smaller
+        restrict = lambda value: numpy.where(r < value, r, value)
+        error = abs(prediction-1)
+        rmm = prediction > R
+        svm = numpy.logical_and(numpy.logical_not(rmm),
+                                numpy.logical_not(prediction > 1))
+        rmm_error = numpy.where(rmm, prediction-R, 1-prediction)
+        rmm_mask = numpy.logical_or(rmm, svm)
+        terms = [("L1_loss", error, None),
+                 ("L2_loss", (prediction-1)**2, None),
+                 ("L1_loss_restr", restrict(error), None),
+                 ("L2_loss_restr", restrict(error)**2, None),
+                 ("RMM_L1_loss", rmm_error, rmm_mask),
+                 ("RMM_L2_loss", rmm_error**2, rmm_mask),
+                 ("RMM_L1_loss_restr", restrict(rmm_error), rmm_mask),
+                 ("RMM_L2_loss_restr", restrict(rmm_error)**2, rmm_mask),
+                 ("SVM_L1_loss", 1-prediction, svm),
+                 ("SVM_L2_loss", (1-prediction)**2, svm),
+                 ("SVM_L1_loss_restr", restrict(1-prediction), svm),
+                 ("SVM_L2_loss_restr", restrict(1-prediction)**2, svm)]
+        for i, class_mask in enumerate([numpy.logical_not(is_ir), is_ir]):
+            for key, values, mask in terms:
+                if mask is not None:
+                    mask = numpy.logical_and(mask, class_mask)
+                else:
+                    mask = class_mask
+                loss_dict[key][i] = sum_(values[mask])
+        return loss_dict
+
     @staticmethod
     def calculate_confusion_metrics(performance, pre="", P=None,
                                     N=None, weight=0.5):
@@ -909,65 +1202,84 @@ class BinaryClassificationDataset(BaseDataset):
         .. math:: \\sum_i^m{\\sum_j^n{S(X_i,Y_i)}} \\text{ with } S(X,Y) = 1 \\text{ if } Y < X\\text{, otherwise } 0
 
         """
-        # need sorted list, decreasing by the prediction score
-        from operator import itemgetter
-        sorted_outcome = sorted(classification_outcome,
-                                key=itemgetter(0), reverse=not inverse_ordering)
+        scores = numpy.array([float(outcome[0].prediction)
+                              for outcome in classification_outcome])
+        labels = [outcome[1] for outcome in classification_outcome]
+        return BinaryClassificationDataset.calculate_AUC_from_arrays(
+            scores, labels, ir_class, save_roc_points, performance,
+            inverse_ordering=inverse_ordering)
+
+    @staticmethod
+    def calculate_AUC_from_arrays(scores, labels, ir_class, save_roc_points,
+                                  performance, inverse_ordering=False):
+        """ AUC and ROC points for arrays of prediction scores and true labels
+
+        The instances are sorted by their score and grouped by the score
+        rounded to three decimals.
+        Every change of the group adds a trapezoid to the AUC as in
+        Fawcett's algorithm. A ROC point is added at a change of the group,
+        if the class changed since the last ROC point.
+        """
+        scores = numpy.asarray(scores, dtype=float)
+        # need sorted list, decreasing by the prediction score,
+        # the order of equal scores is kept
+        if inverse_ordering:
+            order = numpy.argsort(scores, kind="mergesort")
+        else:
+            order = numpy.argsort(-scores, kind="mergesort")
+        scores = scores[order]
+        strip = numpy.frompyfunc(lambda label: label.strip(), 1, 1)
+        labels = numpy.asarray(labels, dtype=object)[order]
+        is_ir = strip(labels) == ir_class if len(labels) else \
+            numpy.zeros(0, dtype=bool)
         P = performance["Positives"] # number of True instances
         N = performance["Negatives"] # number of False instances
 
-        FP = 0
-        TP = 0
-        FP_prev = 0
-        TP_prev = 0
-
-        AUC = 0
         # first, list of roc points, second, the weka-roc-point
         R = ([],[(0.0,0.0),(performance["False_positive_rate"],
                 performance["True_positive_rate"]),(1.0,1.0)])
-        axis_change = True
-        axis_y = False
-        axis_x = False
-
-        prediction_prev = -float("infinity")
-
-        def _trapezoid_area(x1, x2, y1, y2):
-            base = abs(x1-x2)
-            height_avg = (y1+y2)/2.0
-            return base * height_avg
-
-        for classification_outcome in sorted_outcome:
-            if round(classification_outcome[0],3) != prediction_prev:
-                AUC += _trapezoid_area(FP, FP_prev, TP, TP_prev)
-                prediction_prev = round(classification_outcome[0],3)
-                if save_roc_points and axis_change:
-                    R[0].append((1.0*FP_prev/N,1.0*TP_prev/P))
-                    axis_change = False
-                FP_prev = FP
-                TP_prev = TP
-
-            # if actual instance is a true / ir class example
-            if classification_outcome[1].strip() == ir_class:
-                TP += 1
-                axis_y = True
-                if axis_x == True:
-                    axis_change = True
-                    axis_x = False
-            else: # instance is a false / sec class example
-                FP += 1
-                axis_x = True
-                if axis_y == True:
-                    axis_change = True
-                    axis_y = False
-
-        if save_roc_points and axis_change:
-            R[0].append((1.0*FP_prev/N,1.0*TP_prev/P))
-
-        AUC += _trapezoid_area(N, FP_prev, P, TP_prev)
+
+        # rounding of the built-in round, which differs from numpy.round
+        # close to the middle between two decimals
+        rounded = numpy.round(scores, 3)
+        shifted = scores * 1000
+        middle = abs(shifted - numpy.floor(shifted) - 0.5) < \
+            1e-6 + 4 * numpy.spacing(abs(shifted))
+        for index in numpy.flatnonzero(middle):
+            rounded[index] = round(scores[index], 3)
+        # indices, where the rounded prediction changes
+        previous = numpy.concatenate(([-float("infinity")], rounded[:-1]))
+        changes = numpy.flatnonzero(rounded != previous)
+        # number of true and false instances before each instance
+        TP = numpy.concatenate(([0], numpy.cumsum(is_ir)))
+        FP = numpy.arange(len(scores) + 1) - TP
+        # counts at the current and at the previous change
+        TP_change = TP[changes]
+        FP_change = FP[changes]
+        TP_prev = numpy.concatenate(([0], TP_change))
+        FP_prev = numpy.concatenate(([0], FP_change))
+        areas = abs(numpy.concatenate((FP_change, [N])) - FP_prev) * \
+            ((numpy.concatenate((TP_change, [P])) + TP_prev) / 2.0)
+        AUC = 0 + BinaryClassificationDataset._sequential_sum(areas)
+
+        if save_roc_points:
+            # switch between the classes at each instance
+            switch = numpy.concatenate(
+                ([False], is_ir[1:] != is_ir[:-1])).astype(int)
+            switches = numpy.concatenate(([0], numpy.cumsum(switch)))
+            bounds = numpy.concatenate((changes, [len(scores)]))
+            # the class changed since the previous change of the group
+            axis_change = numpy.empty(len(bounds), dtype=bool)
+            axis_change[0] = True
+            axis_change[1:] = switches[bounds[1:]] > switches[bounds[:-1]]
+            for fp, tp in zip(FP_prev[axis_change].tolist(),
+                              TP_prev[axis_change].tolist()):
+                R[0].append((1.0*fp/N,1.0*tp/P))
+
         try:
             AUC = float(AUC) / (P*N) # scale from (P*N) to the unit square
             if save_roc_points:
-                R[0].append((1.0*FP/N,1.0*TP/P)) # This is (1,1)
+                R[0].append((1.0*int(FP[-1])/N,1.0*int(TP[-1])/P)) # This is (1,1)
         except ZeroDivisionError:
             if P == 0:
                 warnings.warn("AUC could no be computed since there are no "
@@ -1083,17 +1395,21 @@ class MultinomialClassificationDataset(BinaryClassificationDataset):
     def calculate_metrics(classification_results,
                           time_periods=[],
                           weight=None):
-        """ Calculate performance measures from the given classifications """
-        # metric initializations
-        metrics = metricdict(float)
-        classes = []
-        for prediction_vector,label in classification_results:
-            if not label in classes:
-                classes.append(label.strip())
-            if not (prediction_vector.label in classes):
-                classes.append(prediction_vector.label.strip())
-            MultinomialClassificationDataset.update_confusion_matrix(prediction_vector,
-                                         label,confusion_matrix=metrics)
+        """ Calculate performance measures from the given classifications
+
+        The confusion matrix is counted at once with
+        :func:`confusion_matrix_from_arrays`.
+        """
+        n = len(classification_results)
+        predicted_labels = numpy.empty(n, dtype=object)
+        labels = numpy.empty(n, dtype=object)
+        for index, (prediction_vector, label) in \
+                enumerate(classification_results):
+            predicted_labels[index] = prediction_vector.label
+            labels[index] = label
+        metrics, classes = \
+            MultinomialClassificationDataset.confusion_matrix_from_arrays(
+                predicted_labels, labels)
         MultinomialClassificationDataset.calculate_confusion_metrics(
                                                             performance=metrics,
                                                             classes=classes,
@@ -1145,6 +1461,36 @@ class MultinomialClassificationDataset(BinaryClassificationDataset):
         confusion_matrix[metric_str] += 1
         return confusion_matrix
 
+    @staticmethod
+    def confusion_matrix_from_arrays(predicted_labels, labels):
+        """ Count the confusion matrix of arrays of predicted and true labels
+
+        Vectorized version of :func:`update_confusion_matrix`.
+
+        :Returns: confusion_matrix and the list of the stripped classes
+                  in the order of their first occurrence
+        """
+        confusion_matrix = metricdict(float)
+        n = len(labels)
+        if n == 0:
+            return confusion_matrix, []
+        # true and predicted label of each instance one after another
+        all_labels = numpy.empty(2*n, dtype=object)
+        all_labels[0::2] = labels
+        all_labels[1::2] = predicted_labels
+        all_labels = numpy.frompyfunc(lambda label: label.strip(), 1, 1)(
+            all_labels).astype(str)
+        values, first, codes = numpy.unique(all_labels, return_index=True,
+                                            return_inverse=True)
+        k = len(values)
+        counts = numpy.bincount(codes[0::2] * k + codes[1::2],
+                                minlength=k*k).reshape(k, k)
+        for i, j in zip(*numpy.nonzero(counts)):
+            confusion_matrix["T:"+values[i]+"_P:"+values[j]] = \
+                float(counts[i, j])
+        classes = [values[index] for index in numpy.argsort(first)]
+        return confusion_matrix, classes
+
     @staticmethod
     def calculate_confusion_metrics(performance, classes, weight=None):
         """ Calculate metrics of multinomial confusion matrix """
@@ -11,7 +11,7 @@ select subsets of this results or for create various kinds of plots
         Wrapper function for whole csv repair process when classification
         fails or is aborted.
 """
-from itertools import cycle
+from itertools import cycle, izip
 
 try: # import packages for plotting
     import pylab
@@ -30,6 +30,8 @@ from collections import defaultdict
 import numpy
 import os
 import glob
+import csv
+import tempfile
 
 # imports for storing
 import pwd
@@ -37,6 +39,8 @@ import yaml
 
 import warnings
 import logging
+import time
+from multiprocessing.pool import ThreadPool
 
 # csv handling
 import pySPACE.tools.csv_analysis as csv_analysis
@@ -87,19 +91,23 @@ class PerformanceResultSummary(BaseDataset):
     The metrics as result of :mod:`~pySPACE.missions.nodes.sink.classification_performance_sink` nodes
     are calculated in the :mod:`~pySPACE.resources.dataset_defs.metric` dataset module.
 
+    The data is stored in a
+    :class:`~pySPACE.tools.csv_analysis.ResultTable`
+    with float arrays for the metrics and categorical codes for the
+    parameters, which are used for selecting and grouping the rows.
+    Loaded csv files are cached in a binary file next to the csv file.
+
     .. todo:: Access in result collection via indexing ndarray with one
               dimension for each parameter.
               Entries are indexes in list. So the corresponding values
               can be accessed very fast.
-
-    .. todo:: Faster, memory efficient loading is needed. Pickling or new data
-              structure?
     
     The class constructor expects the following **arguments**:
     
       :data:    A dictionary that contains a mapping from an attribute
                 (e.g. accuracy) to a list of values taken by this attribute.
                 An entry is the entirety of all i-th values over all dict-values
+                It is converted to a ResultTable.
 
       :tmp_pathlist:
           List of files to be deleted after successful storing
@@ -114,12 +122,18 @@ class PerformanceResultSummary(BaseDataset):
           Switch for deleting files in `tmp_pathlist` after collection is stored.
           
           (*optional, default: False*)
+
+      :pool_size:
+          Number of threads, which read the csv files,
+          when the collection is constructed via `from_multiple_csv`.
+
+          (*optional, default: 1*)
     
     :Author: Mario M. Krell (mario.krell@dfki.de)
     """
         
     def __init__(self, data=None, dataset_md=None, dataset_dir=None,
-                 csv_filename=None, **kwargs):
+                 csv_filename=None, pool_size=1, **kwargs):
         super(PerformanceResultSummary, self).__init__()
         if csv_filename and not dataset_dir: # csv_filename is expected to be a path
             dataset_dir=""
@@ -142,12 +156,14 @@ class PerformanceResultSummary(BaseDataset):
                 self.data = PerformanceResultSummary.from_csv(csv_file_path)
             else: # multiple csv_files
                 self.data, self.tmp_pathlist = \
-                        PerformanceResultSummary.from_multiple_csv(dataset_dir)
+                        PerformanceResultSummary.from_multiple_csv(
+                            dataset_dir, pool_size=pool_size, log=self._log)
                 self.delete = True
                 # update meta data 
+                # (get does not add empty columns to the defaultdict)
                 try:
-                    splits = max(map(int,self.data["__Key_Fold__"]))
-                    runs = max(map(int,self.data["__Key_Run__"]))+1
+                    splits = max(map(int,self.data.get("__Key_Fold__", [])))
+                    runs = max(map(int,self.data.get("__Key_Run__", [])))+1
                 except:
                     warnings.warn('Splits and runs not available!')
                 else:
@@ -168,83 +184,213 @@ class PerformanceResultSummary(BaseDataset):
         
     @staticmethod
     def from_csv(csv_file_path):
-        """ Loading data from the csv file located under *csv_file_path* """
-#        # pickle loading
-#        try:
-#            if csv_file_path.endswith("pickle"):
-#                f = open(csv_file_path, "rb")
-#            elif csv_file_path.endswith("csv"):
-#                f = open(csv_file_path[:-3] + "pickle", 'rb')
-#            res=cPickle.load(f)
-#            f.close()
-#            return res
-#        except IOError:
-#            pass
-        data_dict = csv_analysis.csv2dict(csv_file_path)
-        PerformanceResultSummary.translate_weka_key_schemes(data_dict)
-#        # save better csv version
-#        f = open(csv_file_path[:-3] + "pickle", "wb")
-#        f.write(cPickle.dumps(res, protocol=2))
-#        f.close()
+        """ Loading data from the csv file located under *csv_file_path*
+
+        The table is cached in *csv_file_path*.cache for faster reloading.
+        """
+        data_dict = csv_analysis.ResultTable.from_csv(csv_file_path)
+        if data_dict.has_key("Key_Scheme"):
+            # the translation appends to the columns
+            data_dict = csv_analysis.csv2dict(csv_file_path)
+            PerformanceResultSummary.translate_weka_key_schemes(data_dict)
         return data_dict
     
     @staticmethod
-    def from_multiple_csv(input_dir):
-        """ All csv files in the only function parameter 'input_dir' are 
+    def from_multiple_csv(input_dir, pool_size=1, log=None):
+        """ All csv files in the directory *input_dir* are
         combined to just one result collection 
         
         Deleting of files will be done in the store method, *after*
         the result is stored successfully.
+
+        The files are read by *pool_size* threads, since reading many
+        small files is dominated by the latency of the file system.
+        They are appended in the order of the file list,
+        as soon as they are read.
+        The progress is reported to the function *log*, if given.
         """
         # A list of all result files (one per classification process)
-        pathlist = glob.glob(os.path.join(input_dir,
-                                          "results_*"))
+        pathlist = [path for path in glob.glob(os.path.join(input_dir,
+                                                            "results_*"))
+                    if not path.endswith(".cache")]
         if len(pathlist)==0:
             warnings.warn('No files in the format "results_*" found for merging results!')
             return
         result_dict = None
-        # For all result files of the WEKA processes
-        for input_file_name in pathlist:
+        start_time = time.time()
+        pool = ThreadPool(pool_size) if pool_size > 1 else None
+        results = pool.imap(csv_analysis.csv2dict, pathlist, chunksize=16) \
+            if pool else (csv_analysis.csv2dict(path) for path in pathlist)
+        # For all result files of the processes
+        for index, result in enumerate(results):
             # first occurrence
             if result_dict is None:
-                result_dict = csv_analysis.csv2dict(input_file_name)
+                result_dict = result
             else:
-                result = csv_analysis.csv2dict(input_file_name)
                 csv_analysis.extend_dict(result_dict,result)
+            if log and (index + 1) % max(1, len(pathlist) // 10) == 0:
+                log("Merged %d of %d result files in %.1fs." % (
+                    index + 1, len(pathlist), time.time() - start_time))
+        if pool:
+            pool.close()
+            pool.join()
         
         PerformanceResultSummary.translate_weka_key_schemes(result_dict)
         PerformanceResultSummary.tranfer_Key_Dataset_to_parameters(result_dict)
         
         return (result_dict, pathlist)
+
+    @staticmethod
+    def merge_csv_files(input_dir, pool_size=1, log=None, name="results",
+                        main_metric="Balanced_accuracy", delete_files=True):
+        """ Merge the csv files in *input_dir* into one stored result collection
+
+        In contrast to :func:`from_multiple_csv`, the merged table is
+        written incrementally and never kept in memory.
+        Each file is read (by *pool_size* threads), its key columns are
+        translated and its columns are spooled to a temporary file.
+        Afterwards the table is written row by row with the union of the
+        columns of all files as header. Missing values are left empty.
+        The files, the short version with the *main_metric* and the
+        meta data correspond to :func:`store`.
+        The merged files are deleted afterwards, if *delete_files* is True.
+
+        Returns the number of merged rows or None if there are no files.
+        """
+        pathlist = [path for path in glob.glob(os.path.join(input_dir,
+                                                            "results_*"))
+                    if not path.endswith(".cache")]
+        if len(pathlist) == 0:
+            warnings.warn('No files in the format "results_*" found for '
+                          'merging results!')
+            return
+        start_time = time.time()
+        pool = ThreadPool(pool_size) if pool_size > 1 else None
+        results = pool.imap(csv_analysis.csv2dict, pathlist, chunksize=16) \
+            if pool else (csv_analysis.csv2dict(path) for path in pathlist)
+        spool = tempfile.TemporaryFile(dir=input_dir)
+        num_rows = 0
+        # rows, in which a column exists, and up to two different values
+        # to find the varying variables for the short version
+        column_rows = defaultdict(int)
+        column_values = defaultdict(set)
+        key_maxima = dict()
+        try:
+            for index, result in enumerate(results):
+                rows = len(result.values()[0]) if result else 0
+                PerformanceResultSummary.translate_weka_key_schemes(result)
+                PerformanceResultSummary.tranfer_Key_Dataset_to_parameters(
+                    result)
+                for key in result.keys():
+                    if not len(result[key]) == rows:
+                        warnings.warn("Different length of columns in %s "
+                                      "(%s deleted)." % (pathlist[index], key))
+                        del result[key]
+                        continue
+                    column_rows[key] += rows
+                    if len(column_values[key]) < 2:
+                        column_values[key].update(result[key][:2])
+                    if key in ["__Key_Fold__", "__Key_Run__"] and rows:
+                        try:
+                            maximum = max(map(int, result[key]))
+                        except ValueError:
+                            continue
+                        key_maxima[key] = max(key_maxima.get(key, maximum),
+                                              maximum)
+                cPickle.dump((rows, dict(result)), spool,
+                             cPickle.HIGHEST_PROTOCOL)
+                num_rows += rows
+                if log and (index + 1) % max(1, len(pathlist) // 10) == 0:
+                    log("Read %d of %d result files in %.1fs." % (
+                        index + 1, len(pathlist), time.time() - start_time))
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+        column_rows.pop("None", None)
+        # columns sorted as in csv_analysis.dict2csv
+        keys = sorted(key for key in column_rows.keys()
+                      if key.startswith("__")) + \
+            sorted(key for key in column_rows.keys()
+                   if not key.startswith("__"))
+        if main_metric in keys:
+            # columns with missing values have the empty string as value
+            short_keys = [key for key in keys
+                          if key.startswith("__")
+                          and not key == "__Solver_Iterations__"
+                          and len(column_values[key]
+                                  | (set([""]) if column_rows[key] < num_rows
+                                     else set())) > 1]
+            short_keys.append(main_metric)
+            short_keys.extend(key for key in keys if key in [
+                "True_positives", "True_negatives", "False_negatives",
+                "False_positives"])
+        else:
+            short_keys = None
+        # write the table file by file
+        spool.seek(0)
+        result_file = open(os.path.join(input_dir, name + ".csv"), "w")
+        writer = csv.writer(result_file, quoting=csv.QUOTE_ALL)
+        writer.writerow(keys)
+        if short_keys is not None:
+            short_file = open(os.path.join(input_dir,
+                                           "short_" + name + ".csv"), "w")
+            short_writer = csv.writer(short_file, quoting=csv.QUOTE_ALL)
+            short_writer.writerow(short_keys)
+        for index in range(len(pathlist)):
+            rows, result = cPickle.load(spool)
+            empty = [""] * rows
+            writer.writerows(izip(*[result.get(key, empty) for key in keys]))
+            if short_keys is not None:
+                short_writer.writerows(
+                    izip(*[result.get(key, empty) for key in short_keys]))
+        result_file.close()
+        if short_keys is not None:
+            short_file.close()
+        spool.close()
+        try:
+            author = pwd.getpwuid(os.getuid())[4]
+        except:
+            author = "unknown"
+        meta_data = {"type": "result", "storage_format": "csv",
+                     "author": author}
+        if len(key_maxima) == 2:
+            meta_data.update({"splits": key_maxima["__Key_Fold__"],
+                              "runs": key_maxima["__Key_Run__"] + 1})
+        BaseDataset.store_meta_data(input_dir, meta_data)
+        if delete_files:
+            for path in pathlist:
+                os.remove(path)
+        if log:
+            log("Merged %d rows of %d result files in %.1fs." % (
+                num_rows, len(pathlist), time.time() - start_time))
+        return num_rows
     
     def transform(self):
-        """ Fix format problems like floats in metric columns and tuples instead of column lists """
+        """ Fix format problems like floats in metric columns and convert to a ResultTable """
+        if not isinstance(self.data, csv_analysis.ResultTable):
+            self.data = csv_analysis.ResultTable(self.data)
+            self.identifiers = self.data.keys()
         for key in self.get_metrics():
-            if not type(self.data[key][0])==float:
+            if not self.data[key].dtype.kind == "f":
                 try:
-                    l = [float(value) for value in self.data[key]]
-                    self.data[key] = l
-                except:
-                    warnings.warn("Metric %s has entry %s not of type float."%(
-                    key,str(value)
-                    ))
-        for key in self.identifiers:
-            if not type(self.data[key])==tuple:
-                self.data[key] = tuple(self.data[key])
+                    self.data[key] = numpy.array(self.data[key], dtype=float)
+                except (ValueError, TypeError):
+                    warnings.warn("Metric %s has entries not of type float."
+                                  % key)
     
     @staticmethod
-    def merge_traces(input_dir):
+    def merge_traces(input_dir, pool_size=1):
         """ Traverse directory tree, merge the classification trace files and store them
         
         The collected results are stored in a common file in the input *input_dir*.
+        The trace files are loaded by *pool_size* threads.
+        The traces are merged and stored before the long traces,
+        so only one of the merged dictionaries is kept in memory.
         """
-        import cPickle
-        traces = dict()
-        long_traces = dict()
-        save_long_traces = True
         sorted_keys = None
-        # save merged files to delete them later
-        merged_files=[]
+        # identifier and path of the trace files
+        trace_files = []
         for dir_path,dir_names,files in os.walk(input_dir):
             for filename in files:
                 if filename.startswith("trace_sp"):
@@ -268,37 +414,66 @@ class PerformanceResultSummary(BaseDataset):
                 # the keys should always be the same
                 if sorted_keys is None:
                     sorted_keys = sorted(key_dict.keys())
-                    traces["parameter_keys"]=sorted_keys
-                    long_traces["parameter_keys"]=sorted_keys
                 identifier=[]
                 for key in sorted_keys:
                     identifier.append(key_dict[key])
-                # load the actual classification trace
-                trace = cPickle.load(open(dir_path + os.sep + filename, 'rb'))
-                traces[tuple(identifier)] = trace
-                merged_files.append(dir_path + os.sep + filename)
-                if save_long_traces:
-                    try:
-                        trace = cPickle.load(open(dir_path + os.sep +"long_"+ filename, 'rb'))
-                        long_traces[tuple(identifier)] = trace
-                        merged_files.append(dir_path + os.sep +"long_"+ filename)
-                    except IOError:
-                        save_long_traces = False
-                
-        # clean up
-        if not sorted_keys is None:
-            name = 'traces.pickle'
+                trace_files.append((tuple(identifier),
+                                    dir_path + os.sep + filename,
+                                    dir_path + os.sep + "long_" + filename))
+
+        def load_trace(path):
+            """ Load a classification trace, None if it does not exist """
+            try:
+                trace_file = open(path, 'rb')
+            except IOError:
+                return None
+            try:
+                return cPickle.load(trace_file)
+            finally:
+                trace_file.close()
+
+        def store_traces(name, paths):
+            """ Load the traces of *paths* and store them in file *name*
+
+            Returns False without storing, if a trace does not exist.
+            """
+            traces = {"parameter_keys": sorted_keys}
+            pool = ThreadPool(pool_size) if pool_size > 1 else None
+            loaded = pool.imap(load_trace, paths, chunksize=16) if pool \
+                else (load_trace(path) for path in paths)
+            try:
+                for (identifier, path, long_path), trace in izip(trace_files,
+                                                                loaded):
+                    if trace is None:
+                        return False
+                    traces[identifier] = trace
+            finally:
+                if pool:
+                    pool.close()
+                    pool.join()
             result_file = open(os.path.join(input_dir, name), "wb")
-            result_file.write(cPickle.dumps(traces, protocol=2))
+            cPickle.dump(traces, result_file, protocol=2)
             result_file.close()
-            if save_long_traces:
-                name = 'long_traces.pickle'
-                result_file = open(os.path.join(input_dir, name), "wb")
-                result_file.write(cPickle.dumps(long_traces, protocol=2))
-                result_file.close()
-            for temp_file in merged_files:
-                os.remove(temp_file)
-    
+            return True
+
+        if sorted_keys is None:
+            return
+        # The traces and the long traces are merged one after another,
+        # such that only one of the merged dictionaries is in memory.
+        merged_files = [path for identifier, path, long_path in trace_files]
+        if not store_traces("traces.pickle", merged_files):
+            warnings.warn("Traces could not be merged: a trace is missing.")
+            return
+        # long traces are only stored, if they exist for all traces
+        long_paths = [long_path for identifier, path, long_path
+                      in trace_files]
+        if all(os.path.exists(long_path) for long_path in long_paths) and \
+                store_traces("long_traces.pickle", long_paths):
+            merged_files.extend(long_paths)
+        # clean up
+        for temp_file in merged_files:
+            os.remove(temp_file)
+
     @staticmethod
     def translate_weka_key_schemes(data_dict):
         """ Data dict is initialized as 'defaultdict(list)' and
@@ -455,9 +630,8 @@ class PerformanceResultSummary(BaseDataset):
         :Author: Mario Krell
         :Created: 2011/09/21
         """
-        collection = PerformanceResultSummary(dataset_dir=input_dir)
-        collection.delete = delete_files
-        collection.store(input_dir)
+        PerformanceResultSummary.merge_csv_files(input_dir,
+                                                 delete_files=delete_files)
     
     @staticmethod
     def repair_csv(path, num_splits=None, default_dict=None, delete_files=True):
@@ -611,21 +785,16 @@ class PerformanceResultSummary(BaseDataset):
         """
         if type(proj_values) != list:
             proj_values = [proj_values]
-        projected_dict = defaultdict(list)
-        entries_added = False
-        for i in range(len(self.data[proj_parameter])):
-            if self.data[proj_parameter][i] in proj_values:
-                entries_added = True
-                for column_key in self.identifiers:
-                    # will leave projection column  in place if there are
-                    # still different values for this parameter
-                    if column_key == proj_parameter:
-                        if len(proj_values) == 1: continue
-                    projected_dict[column_key].append(self.data[column_key][i])
+        rows = self.data.get_mask({proj_parameter: proj_values})
         # If the projected_dict is empty we continue
-        if not entries_added:
+        if not rows.any():
             return
-        return PerformanceResultSummary(projected_dict)
+        # will leave projection column  in place if there are
+        # still different values for this parameter
+        keys = [column_key for column_key in self.identifiers
+                if not (column_key == proj_parameter
+                        and len(proj_values) == 1)]
+        return PerformanceResultSummary(self.data.select(rows, keys))
     
     def get_gui_metrics(self):
         """ Returns the columns in data that correspond to metrics for visualization. 
@@ -767,21 +936,13 @@ class PerformanceResultSummary(BaseDataset):
         self.variables = sorted(self.get_variables())
         # other keys
         keys = [key for key in self.identifiers if not key in self.variables]
+        all_keys = self.variables + keys
         # final dictionary
         data_dict = {}
-        for i in range(len(self.data[self.variables[0]])):
-            var_dict = {}
-            perf_dict = {} 
-            # read out variable values
-            for variable in self.variables:
-                value = self.data[variable][i]
-                var_dict[variable]  = value
-                perf_dict[variable] = value
-            # read out the rest
-            for key in keys:
-                perf_dict[key] = self.data[key][i]
+        columns = [self.data[key].tolist() for key in all_keys]
+        for row in izip(*columns):
             # save it into dictionary by mapping values to tuple as key/index
-            data_dict[self.dict2tuple(var_dict)] = perf_dict
+            data_dict[row[:len(self.variables)]] = dict(izip(all_keys, row))
         return data_dict
 
     def get_performance_entry(self, search_dict):
@@ -16,7 +16,10 @@ import scipy
 from scipy.io import loadmat
 import warnings
 import csv
-from pySPACE.missions.support.windower import MarkerWindower
+import itertools
+import yaml
+from pySPACE.missions.support.windower import MarkerWindower, \
+    BulkMarkerWindower
 import logging
 
 from pySPACE.resources.dataset_defs.base import BaseDataset
@@ -71,6 +74,18 @@ class StreamDataset(BaseDataset):
 
             (*optional, default: None*)
 
+        :blocksize:
+            Number of samples, which are read and forwarded at once
+
+            (*optional, default: 100*)
+
+        :binary_cache:
+            If True, the csv file is converted once into a binary file
+            (*file_name.cache*), which is memory-mapped in the next runs.
+            It is converted again, if the csv file changes.
+
+            (*optional, default: False*)
+
     **BP_eeg**
 
     Here the standard BrainProducts format is expected with the corresponding
@@ -396,11 +411,13 @@ class StreamDataset(BaseDataset):
         return ec_2d
 
     def set_window_defs(self, window_definition, nullmarker_stride_ms=1000, 
-                        no_overlap=False, data_consistency_check=False):
+                        no_overlap=False, data_consistency_check=False,
+                        bulk_windowing=False):
         self.window_definition = window_definition
         self.nullmarker_stride_ms = nullmarker_stride_ms
         self.no_overlap = no_overlap
         self.data_consistency_check = data_consistency_check
+        self.bulk_windowing = bulk_windowing
 
     def get_data(self, run_nr, split_nr, train_test):
         if not (run_nr, split_nr, train_test) == (0, 0, "test"):
@@ -408,9 +425,14 @@ class StreamDataset(BaseDataset):
                 "Currently only one streaming dataset can be loaded!")
         if self.meta_data.has_key('storage_format'):
             if "bp_eeg" in self.meta_data['storage_format']:
-                # remove ".eeg" suffix
-                self.reader = EEGReader(self.data_file[:-4],
-                                        blocksize=100)
+                # reuse the memory-mapped data and marker index
+                # of an earlier call
+                if isinstance(self.reader, EEGReader):
+                    self.reader.reset()
+                else:
+                    # remove ".eeg" suffix
+                    self.reader = EEGReader(self.data_file[:-4],
+                                            blocksize=100)
             elif "set" in self.meta_data['storage_format']:
                 self.reader = SETReader(self.data_file[:-4])
             elif "edf" in self.meta_data['storage_format']:
@@ -426,15 +448,25 @@ class StreamDataset(BaseDataset):
                     marker = self.meta_data["marker"]
                 else:
                     marker = "marker"
-                self.reader = CsvReader(self.data_file, sampling_frequency=sf,
-                                        marker=marker, marker_file=mf)
+                self.reader = CsvReader(
+                    self.data_file, sampling_frequency=sf, marker=marker,
+                    marker_file=mf,
+                    blocksize=self.meta_data.get("blocksize", 100),
+                    binary_cache=self.meta_data.get("binary_cache", False))
         else:
             self.reader = EEGReader(self.data_file, blocksize=100)
 
         # Creates a windower that splits the training data into windows
         # based in the window definitions provided
         # and assigns correct labels to these windows
-        self.marker_windower = MarkerWindower(
+        windower_class = MarkerWindower
+        if self.bulk_windowing:
+            if BulkMarkerWindower.supports(self.window_definition):
+                windower_class = BulkMarkerWindower
+            else:
+                warnings.warn("Bulk windowing does not support start and "
+                              "end markers. Using the MarkerWindower.")
+        self.marker_windower = windower_class(
             self.reader, self.window_definition,
             nullmarker_stride_ms=self.nullmarker_stride_ms,
             no_overlap=self.no_overlap,
@@ -454,7 +486,11 @@ def parse_float(param):
 def get_csv_handler(file_handler):
     """Helper function to get a DictReader from csv"""
     try:
-        dialect = csv.Sniffer().sniff(file_handler.read(2048))
+        # use complete lines, since files with many channels
+        # have long lines, and restrict the delimiters,
+        # since digits and points are frequent
+        sample = "".join(file_handler.readline() for i in range(20))
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t |")
         file_handler.seek(0)
         return csv.DictReader(file_handler, dialect=dialect)
     except csv.Error, e:
@@ -469,6 +505,14 @@ def get_csv_handler(file_handler):
 class CsvReader(AbstractStreamReader):
     """ Load time series data from csv file
 
+    The file is parsed in chunks of several blocks directly into
+    numpy arrays and the data is forwarded in blocks of *blocksize* samples.
+    The last block is filled with zeros.
+
+    Optionally, the csv file is converted once into a binary cache file,
+    which is memory-mapped in later runs.
+    The cache is created again, if the csv file changes.
+
     **Parameters**
 
         :file_path:
@@ -493,13 +537,31 @@ class CsvReader(AbstractStreamReader):
             with one column with the heading named like the *marker*
             parameter and one column named *time* with increasing
             numbers, which correspond to the index in the data file.
-            (first time point gets zero.)
+            (First sample corresponds index one.)
             Here the absolute path is needed.
 
             (*optional, default: None*)
+
+        :blocksize:
+            Number of samples in one block which is given to the windower
+
+            (*optional, default: 100*)
+
+        :binary_cache:
+            If True, the data is stored in the file *file_path.cache*
+            (and its header in *file_path.cache.yaml*).
+            It is also possible to specify the path of the cache file.
+
+            (*optional, default: False*)
+
+        :chunk_size:
+            Minimal number of samples, which is parsed at once
+
+            (*optional, default: 10000*)
     """
     def __init__(self, file_path, sampling_frequency=1, marker="marker",
-                 marker_file=None):
+                 marker_file=None, blocksize=100, binary_cache=False,
+                 chunk_size=10000):
         try:
             self.file = open(file_path, "r")
         except IOError as io:
@@ -507,43 +569,65 @@ class CsvReader(AbstractStreamReader):
             raise io
 
         self._dSamplingInterval = sampling_frequency
+        self._stdblocksize = blocksize
         self.marker = marker
         self._markerids = dict()
         self._markerNames = dict()
         self.callbacks = list()
         self.new_marker_id = 1
-        self.time_index = 1
-
+        # index of the next sample (starting with zero)
+        self.sample_index = 0
+        # number of parsed samples
+        self.parsed_samples = 0
+        # parsed samples and markers, which were not forwarded yet
+        self.buffer_samples = None
+        self.buffer_markers = None
+        self.chunk_size = \
+            int(numpy.ceil(float(chunk_size) / blocksize)) * blocksize
+
+        # files, which have to be unchanged to use the binary cache
+        self.source_files = [file_path]
         try:
             if not marker_file is None:
+                self.source_files.append(marker_file)
                 marker_file = open(marker_file, "r")
         except IOError:
             warnings.warn("Failed to open marker file at [%s]. Now ignored."
                           % marker_file)
+            marker_file = None
 
         self._markerids["null"] = 0
         self._markerNames[0] = "null"
 
-        self.DictReader = get_csv_handler(self.file)
+        # parsed data of the binary cache
+        self.cache_data = None
+        if binary_cache is True:
+            binary_cache = file_path + ".cache"
+        if binary_cache and self.load_cache(binary_cache):
+            return
 
-        self.first_entry = self.DictReader.next()
-        self._channelNames = self.first_entry.keys()
+        DictReader = get_csv_handler(self.file)
+        field_names = DictReader.fieldnames
+        # the header is already consumed by the DictReader
+        self.csv_reader = DictReader.reader
+        self.num_columns = len(field_names)
 
-        self.MarkerReader = None
         if not marker_file is None:
-            self.MarkerReader = get_csv_handler(marker_file)
-
-        if not self.MarkerReader is None:
-            self.update_marker()
-            if self.next_marker[0] == self.time_index:
-                self.first_marker = self.next_marker[1]
-                self.update_marker()
-            else:
-                self.first_marker = ""
-        elif self.marker in self._channelNames:
-            self.first_marker = self.first_entry.pop(self.marker)
+            self.read_marker_file(get_csv_handler(marker_file))
+            self.marker_column = None
+        elif self.marker in field_names:
+            self.marker_times = None
+            self.marker_column = field_names.index(self.marker)
         else:
-            self.first_marker = ""
+            self.marker_times = None
+            self.marker_column = None
+        self.channel_columns = [index for index in range(len(field_names))
+                                if not index == self.marker_column]
+        self._channelNames = [field_names[index]
+                              for index in self.channel_columns]
+
+        if binary_cache:
+            self.create_cache(binary_cache)
 
     @property
     def dSamplingInterval(self):
@@ -553,7 +637,7 @@ class CsvReader(AbstractStreamReader):
     @property
     def stdblocksize(self):
         """ standard block size (int) """
-        return 1
+        return self._stdblocksize
 
     @property
     def markerids(self):
@@ -582,50 +666,196 @@ class CsvReader(AbstractStreamReader):
         """ Read *nblocks* of the stream and pass it to registers functions """
         n = 0
         while nblocks == -1 or n < nblocks:
-            if not self.first_entry is None:
-                samples, marker = self.first_entry, self.first_marker
-                self.first_entry = None
-            else:
-                try:
-                    samples = self.DictReader.next()
-                except IOError:
-                    break
-                if not self.MarkerReader is None:
-                    if self.next_marker[0] == self.time_index:
-                        marker = self.next_marker[1]
-                        self.update_marker()
-                    else:
-                        marker = ""
-                elif self.marker in self._channelNames:
-                    marker = samples.pop(self.marker)
-                else:
-                    marker = ""
-            # add marker to dict
-            if not marker == "" and not marker in self._markerids:
-                self._markerids[marker] = self.new_marker_id
-                self._markerNames[self.new_marker_id] = marker
-                self.new_marker_id += 1
-            # convert marker to array
-            markers = numpy.ones(1)*(-1)
-            if not marker == "":
-                markers[0] = self._markerids[marker]
-            # convert samples to array
-            array_samples = numpy.zeros((len(self.channelNames),1))
-            for index, channel in enumerate(self.channelNames):
-                array_samples[index] = parse_float(samples[channel])
+            samples, markers = self.next_block()
+            if samples is None:
+                break
             n += 1
             for c in self.callbacks:
-                c(array_samples, markers)
-        self.time_index += 1
+                c(samples, markers)
         return n
 
-    def update_marker(self):
-        """Update `next_marker` from `MarkerReader` information"""
+    def next_block(self):
+        """ Return the samples (channels x blocksize) and markers of a block
+
+        If the stream is finished, (None, None) is returned.
+        """
+        if self.cache_data is not None:
+            data = self.cache_data[self.sample_index:
+                                   self.sample_index + self.stdblocksize]
+            samples = data[:, :-1].T
+            markers = data[:, -1]
+        else:
+            if self.buffer_samples is None or \
+                    self.buffer_samples.shape[1] == 0:
+                self.buffer_samples, self.buffer_markers = \
+                    self.parse_chunk(self.chunk_size)
+            samples = self.buffer_samples[:, :self.stdblocksize]
+            markers = self.buffer_markers[:self.stdblocksize]
+            self.buffer_samples = self.buffer_samples[:, self.stdblocksize:]
+            self.buffer_markers = self.buffer_markers[self.stdblocksize:]
+        length = len(markers)
+        if length == 0:
+            return None, None
+        self.sample_index += length
+        if length < self.stdblocksize:
+            # fill the last block with zeros
+            full_samples = numpy.zeros((len(self.channelNames),
+                                        self.stdblocksize))
+            full_samples[:, :length] = samples
+            samples = full_samples
+            full_markers = -numpy.ones(self.stdblocksize)
+            full_markers[:length] = markers
+            markers = full_markers
+        return numpy.array(samples, dtype=numpy.float64), \
+            numpy.array(markers, dtype=numpy.float64)
+
+    def parse_chunk(self, size):
+        """ Parse the next *size* rows of the csv file into arrays
+
+        Returns the samples as channels x time array
+        and the corresponding marker ids (-1 for no marker).
+        """
+        first_index = self.parsed_samples
+        rows = [row for row in itertools.islice(self.csv_reader, size) if row]
+        # read until the chunk is full, if there were empty lines
+        while len(rows) < size:
+            new_rows = [row for row in
+                        itertools.islice(self.csv_reader, size - len(rows))
+                        if row]
+            if len(new_rows) == 0:
+                break
+            rows.extend(new_rows)
+        if len(rows) == 0:
+            return numpy.zeros((len(self.channelNames), 0)), numpy.zeros(0)
+        # rows of other length would give an object array
+        for index, row in enumerate(rows):
+            if len(row) != self.num_columns:
+                raise ValueError("Sample %d of %s has %d entries, but the "
+                                 "header has %d columns!"
+                                 % (first_index + index + 1,
+                                    self.source_files[0], len(row),
+                                    self.num_columns))
+        self.parsed_samples += len(rows)
+        table = numpy.array(rows)
+        entries = table[:, self.channel_columns]
         try:
-            next = self.MarkerReader.next()
-            self.next_marker = (next["time"], next[self.marker])
-        except IOError:
-            pass
+            samples = entries.astype(numpy.float64)
+        except ValueError:
+            samples = numpy.vectorize(parse_float, otypes=[numpy.float64])(
+                entries)
+        if self.marker_column is not None:
+            markers = self.get_marker_ids(table[:, self.marker_column])
+        elif self.marker_times is not None:
+            markers = -numpy.ones(len(rows))
+            start, end = numpy.searchsorted(
+                self.marker_times, [first_index, first_index + len(rows)])
+            positions = self.marker_times[start:end] - first_index
+            markers[positions] = self.get_marker_ids(
+                self.marker_strings[start:end])
+        else:
+            markers = -numpy.ones(len(rows))
+        return samples.T, markers
+
+    def get_marker_ids(self, marker_strings):
+        """ Map the marker names to their ids and register new markers
+
+        Empty names are mapped to -1.
+        """
+        names, first_index, inverse = numpy.unique(
+            marker_strings, return_index=True, return_inverse=True)
+        ids = -numpy.ones(len(names))
+        # new markers get ids in the order of their occurrence
+        for index in numpy.argsort(first_index):
+            marker = str(names[index])
+            if marker == "":
+                continue
+            if not marker in self._markerids:
+                self._markerids[marker] = self.new_marker_id
+                self._markerNames[self.new_marker_id] = marker
+                self.new_marker_id += 1
+            ids[index] = self._markerids[marker]
+        return ids[inverse]
+
+    def read_marker_file(self, marker_reader):
+        """ Get the sorted (zero based) time indices and names of the markers """
+        times = []
+        markers = []
+        for entry in marker_reader:
+            times.append(int(float(entry["time"])) - 1)
+            markers.append(entry[self.marker])
+        order = numpy.argsort(times, kind="mergesort")
+        self.marker_times = numpy.array(times, dtype=int)[order]
+        self.marker_strings = numpy.array(markers, dtype=object)[order]
+        if len(self.marker_times) > 0 and self.marker_times[0] < 0:
+            warnings.warn("Ignoring markers with time smaller than one.")
+            valid = self.marker_times >= 0
+            self.marker_times = self.marker_times[valid]
+            self.marker_strings = self.marker_strings[valid]
+
+    def create_cache(self, cache_file):
+        """ Convert the csv file to a binary file and memory-map it
+
+        The binary file contains the samples (as rows) with the marker ids
+        as last column in float64 format.
+        The header contains the channel and marker names.
+        The csv file is parsed chunk by chunk to keep the memory usage low.
+        """
+        temp_file = cache_file + ".%d" % os.getpid()
+        number_of_samples = 0
+        binary_file = open(temp_file, "wb")
+        while True:
+            samples, markers = self.parse_chunk(self.chunk_size)
+            if len(markers) == 0:
+                break
+            numpy.hstack((samples.T, markers[:, None])).astype(
+                numpy.float64).tofile(binary_file)
+            number_of_samples += len(markers)
+        binary_file.close()
+        os.rename(temp_file, cache_file)
+        header = {"channel_names": self._channelNames,
+                  "marker_names": self._markerNames,
+                  "number_of_samples": number_of_samples,
+                  "source_signature": self.get_source_signature()}
+        header_file = open(temp_file, "w")
+        yaml.dump(header, header_file)
+        header_file.close()
+        os.rename(temp_file, cache_file + ".yaml")
+        self.load_cache(cache_file)
+
+    def load_cache(self, cache_file):
+        """ Memory-map the binary cache, if it belongs to the current file
+
+        Returns False if there is no valid cache.
+        """
+        try:
+            header = yaml.load(open(cache_file + ".yaml"))
+            if header["source_signature"] != self.get_source_signature():
+                return False
+            self._channelNames = header["channel_names"]
+            shape = (header["number_of_samples"], len(self._channelNames) + 1)
+            if os.path.getsize(cache_file) != 8 * shape[0] * shape[1]:
+                return False
+        except (IOError, OSError, KeyError, TypeError):
+            return False
+        self._markerNames = header["marker_names"]
+        self._markerids = dict((name, marker_id) for marker_id, name
+                               in self._markerNames.iteritems())
+        self.new_marker_id = max(self._markerNames.keys()) + 1
+        if shape[0] == 0:
+            self.cache_data = numpy.zeros(shape)
+        else:
+            self.cache_data = numpy.memmap(cache_file, dtype=numpy.float64,
+                                           mode="r", shape=shape)
+        return True
+
+    def get_source_signature(self):
+        """ Size and modification time of the csv files """
+        signature = []
+        for file_path in self.source_files:
+            stat = os.stat(file_path)
+            signature.append([stat.st_size, stat.st_mtime])
+        return signature
+
 
 class EDFReader(AbstractStreamReader):
     """ Read EDF-Data
@@ -1044,6 +1274,13 @@ class EEGReader(AbstractStreamReader):
     .vhdr, .vmrk end .eeg/.dat files and then hand them
     over to the corresponding windower which
     iterates over the aggregated data.
+
+    The .eeg/.dat file is memory-mapped and the marker file is parsed
+    only once into an index of marker positions, sorted by time.
+    Therefore, arbitrary sample ranges (:func:`get_samples`) and the
+    markers in a range (:func:`find_markers`) can be accessed directly
+    and the stream can be restarted (:func:`reset`) without parsing
+    the files again.
     """
 
     def __init__(self, abs_eegfile_path, blocksize=100, verbose=False):
@@ -1084,6 +1321,10 @@ class EEGReader(AbstractStreamReader):
                 except IOError:
                     raise IOError, "EEG-file [%s.{dat,eeg}] could not be opened!" % os.path.realpath(self.abs_eegfile_path)
 
+        self.eeg_data = self.bp_map()
+        # index of the first sample of the next block
+        self.position = 0
+
         self.callbacks = list()
 
         self.ndsamples = None           # last sample block read
@@ -1221,7 +1462,8 @@ class EEGReader(AbstractStreamReader):
             except IOError:
                 raise IOError, str("Could not open [%s.vmrk]!" % os.path.realpath(self.abs_eegfile_path))
 
-        # Parse file
+        # Parse file once, the markers are only accessed via the index
+        marker_entries = list()
         for line in self.mrk_handle:
             if line.startswith(";"): continue
 
@@ -1233,24 +1475,14 @@ class EEGReader(AbstractStreamReader):
             if line.find("=") == -1: continue
 
             if prefix == "marker infos":
-                mrk_name = line.split(',')[1]
-                if mrk_name != "" and mrk_name not in markerNames.values():
+                mk = line.split(',')
+                if len(mk) < 3 or mk[1] == "":
+                    continue
+                mrk_name = mk[1]
+                if mrk_name not in markerNames.values():
                     markerNames[len(markerNames)] = mrk_name
-
-        # rewinds the marker file
-        self.mrk_handle.seek(0, os.SEEK_SET)
-
-        # helper struct for finding markers
-        self.mrk_info = dict()
-        self.mrk_info['line'] = ""
-        self.mrk_info['position'] = 0
-        # advance to first marker line
-        while(re.match("^Mk1=", self.mrk_info['line'], re.IGNORECASE) == None):
-            try:
-                self.mrk_info['line'] = self.mrk_handle.next()
-            except StopIteration:
-                self.mrk_handle.close()
-                raise StopIteration, str("Reached EOF while searching for first Marker in [%s]" % os.path.realpath(self.mrk_handle.name))
+                marker_entries.append((int(mk[2]), mrk_name))
+        self.mrk_handle.close()
 
         # TODO: Sort markerNames?
         def compare (x,y):
@@ -1261,6 +1493,7 @@ class EEGReader(AbstractStreamReader):
 
         markertypes = len(markerids)
 
+        self.build_marker_index(marker_entries, markerids)
 
         return nChannels, \
                dSamplingInterval, \
@@ -1271,82 +1504,96 @@ class EEGReader(AbstractStreamReader):
                markerNames, \
                markertypes
 
-    # This function reads the eeg-file and the marker-file for every
-    # block of data which is processed.
-    def bp_read(self, verbose=False):
-
-        if self.eeg_handle == None:
-            return False, None, None
+    def build_marker_index(self, marker_entries, markerids):
+        """ Sort the markers by position into *marker_positions*
 
-        num_samples = self.nChannels*self.stdblocksize
-        markers = numpy.zeros(self.stdblocksize)
+        *marker_entries* are tuples of the position of a marker in the
+        .vmrk file (first sample is one) and its name.
+        The zero based positions are stored in *marker_positions* and the
+        corresponding ids in *marker_index_ids*.
+        Markers at an already occupied position are shifted to the next
+        free sample, as it is done by the recorder for 'malformed'
+        marker files.
+        """
+        positions = numpy.array([entry[0] for entry in marker_entries],
+                                dtype=numpy.int64) - 1
+        ids = numpy.array([markerids[entry[1]] for entry in marker_entries],
+                          dtype=numpy.int64)
+        order = numpy.argsort(positions, kind="mergesort")
+        positions = positions[order]
+        ids = ids[order]
+        # shift colliding markers: each marker is at least one sample
+        # behind its predecessor
+        if len(positions) > 1:
+            ranks = numpy.arange(len(positions))
+            positions = numpy.maximum.accumulate(positions - ranks) + ranks
+        self.marker_positions = positions
+        self.marker_index_ids = ids
+
+    # This function memory-maps the binary data file. The samples are
+    # only read from disk, when they are accessed.
+    def bp_map(self):
+        sample_size = numpy.dtype(self.eeg_dtype).itemsize * self.nChannels
+        self.eeg_handle.seek(0, os.SEEK_END)
+        self.nsamples = self.eeg_handle.tell() // sample_size
+        if self.nsamples == 0:
+            # mmap can not map empty files
+            return numpy.zeros((0, self.nChannels), dtype=self.eeg_dtype)
+        return numpy.memmap(self.eeg_handle, dtype=self.eeg_dtype, mode="r",
+                            shape=(self.nsamples, self.nChannels))
+
+    def get_samples(self, start, stop):
+        """ Return the samples in [*start*, *stop*) as channels x time array
+
+        Samples behind the end of the file are filled with zeros.
+        """
+        samples = numpy.zeros((self.nChannels, stop - start),
+                              dtype=self.eeg_dtype)
+        available = self.eeg_data[max(start, 0):max(min(stop, self.nsamples),
+                                                    0)]
+        offset = max(-start, 0)
+        samples[:, offset:offset + len(available)] = available.T
+        return samples
+
+    def find_markers(self, start, stop):
+        """ Return positions and ids of the markers in [*start*, *stop*) """
+        first, last = numpy.searchsorted(self.marker_positions, [start, stop])
+        return self.marker_positions[first:last], \
+            self.marker_index_ids[first:last]
+
+    def get_markers(self, start, stop):
+        """ Return the marker ids in [*start*, *stop*) (-1 for no marker) """
+        markers = numpy.zeros(stop - start)
         markers.fill(-1)
-        samples = numpy.zeros(num_samples)
-        
-        ###### READ EEG-DATA FROM FILE ######
-        try:
-            samples = numpy.fromfile(self.eeg_handle, dtype=self.eeg_dtype, count=num_samples)
-        except MemoryError:
-            # assuming, that a MemoryError only occurs when file is finished
-            self.eeg_handle.close()
-            self.eeg_handle = None
-            return False, None, None
-
-        # True when EEG-File's EOF reached in last or current block
-        if samples.size < num_samples:
-            self.eeg_handle.close()
-            self.eeg_handle = None
-            if samples.size == 0:
-                return False, None, None
-            temp = samples
-            samples = numpy.zeros(num_samples)
-            numpy.put(samples, range(temp.size), temp)
-
-        samples = samples.reshape((self.stdblocksize, self.nChannels))
-        samples = scipy.transpose(samples)
-
-        ###### READ MARKERS FROM FILE ######
-        self.mrk_info['position'] += self.stdblocksize
-        mk_posi = 0
-        mk_desc = ""
-        while True:
-            mk = self.mrk_info['line'].split(',')
-            if len(mk) < 2 or mk[1] == "":
-                try:
-                    self.mrk_info['line'] = self.mrk_handle.next()
-                except:
-                    self.mrk_handle.close()
-                    #self._log("WARNING: EOF[%s]\n" % os.path.realpath(self.mrk_handle.name))
-                    break
-                continue
-            mk_desc = mk[1]
-            mk_posi = int(mk[2])
-            if mk_posi > self.mrk_info['position']:
-                break
-
-            # special treatment for 'malformed' markerfiles
-            mk_rel_position = (mk_posi-1) % self.stdblocksize
-            if markers[mk_rel_position] != -1 :
-                # store marker for next point
-                mk[2] = str(mk_posi+1)
-                self.mrk_info['line'] = ",".join(["%s" % (m) for m in mk])
-                #self._log(str("WARNING: shifted position of marker \"%s\" from %d to %d!\n" % (mk_desc, mk_posi, mk_posi+1)))
-                if mk_rel_position+1 > self.stdblocksize-1:
-                    return True, samples, markers
-                else:
-                    continue
+        positions, ids = self.find_markers(start, stop)
+        markers[positions - start] = ids
+        return markers
+
+    def get_marker_positions(self, marker_name):
+        """ Return the (zero based) positions of all markers *marker_name* """
+        return self.marker_positions[
+            self.marker_index_ids == self.markerids[marker_name]]
+
+    def seek(self, position=0):
+        """ Continue reading blocks at sample *position* """
+        self.position = position
+
+    def reset(self):
+        """ Restart the stream at the first sample without any consumers """
+        self.seek(0)
+        self.callbacks = list()
 
-            else :
-                markers[mk_rel_position] = self.markerids[mk_desc]
-                self.mrk_info['line'] = ""
+    # This function returns the next block of data with the corresponding
+    # markers from the mapped eeg-file and the marker index.
+    def bp_read(self, verbose=False):
 
-            # try to read next line from markerfile
-            try:
-                self.mrk_info['line'] = self.mrk_handle.next()
-            except:
-                self.mrk_handle.close()
-                break
+        if self.position >= self.nsamples:
+            return False, None, None
 
+        start = self.position
+        self.position += self.stdblocksize
+        samples = self.get_samples(start, self.position)
+        markers = self.get_markers(start, self.position)
         return True, samples, markers
 
     # string representation with interesting information
@@ -14,9 +14,11 @@ import logging
 import warnings
 import glob
 from pySPACE.missions.support.WindowerInterface import AbstractStreamReader
-from pySPACE.missions.support.windower import MarkerWindower
+from pySPACE.missions.support.windower import MarkerWindower, \
+    BulkMarkerWindower
 
 from pySPACE.resources.dataset_defs.base import BaseDataset
+from pySPACE.resources.data_types.time_series import TimeSeries
 
 
 class TimeSeriesDataset(BaseDataset):
@@ -34,6 +36,12 @@ class TimeSeriesDataset(BaseDataset):
     in a :class:`~pySPACE.missions.operations.node_chain.NodeChainOperation`.
     
     The standard format is 'pickle'.
+    For large datasets, the format 'npy_blocks' is recommended.
+    Here all windows of one run, split and train/test combination are
+    stored in one contiguous array file, which is memory-mapped when loading
+    (see :class:`MemoryMappedTimeSeriesList`).
+    So processing can start immediately and several processes
+    share the same pages of the operating system's file cache.
     
     **Parameters**
     
@@ -58,7 +66,8 @@ class TimeSeriesDataset(BaseDataset):
             # Loading depends on whether data is split into
             # training and test data, whether different splits exist and whether
             # several runs have been conducted.
-            if s_format == "pickle" and not self.meta_data["train_test"] \
+            if s_format in ["pickle", "npy_blocks"] \
+                    and not self.meta_data["train_test"] \
                     and self.meta_data["splits"] == 1 \
                     and self.meta_data["runs"] == 1:
                 # The dataset consists only of a single set of data, for
@@ -70,7 +79,7 @@ class TimeSeriesDataset(BaseDataset):
                 ts_file = os.path.join(dataset_dir, data)
                 # Current data will be loaded lazily
                 self.data[(0, 0, "test")] = ts_file
-            elif s_format == "pickle":
+            elif s_format in ["pickle", "npy_blocks"]:
                 for run_nr in range(self.meta_data["runs"]):
                     for split_nr in range(self.meta_data["splits"]):
                         for train_test in ["train", "test"]:
@@ -151,6 +160,11 @@ class TimeSeriesDataset(BaseDataset):
                     self.data[(run_nr, split_nr, train_test)] = cPickle.load(f)
                     del sys.modules['abri_dp.types.time_series']
                 f.close()
+            elif s_format == "npy_blocks":
+                # Windows are created lazily as views on the mapped file
+                self.data[(run_nr, split_nr, train_test)] = \
+                    MemoryMappedTimeSeriesList(
+                        self.data[(run_nr, split_nr, train_test)])
         if self.stream_mode:
             if not (run_nr, split_nr, train_test) == (0, 0, "test"):
                 raise NotImplementedError(
@@ -164,7 +178,14 @@ class TimeSeriesDataset(BaseDataset):
             # and assigns correct labels to these windows
             self.reader.set_window_defs(self.window_definition)
             self.reader.connect()
-            self.marker_windower = MarkerWindower(
+            windower_class = MarkerWindower
+            if self.bulk_windowing:
+                if BulkMarkerWindower.supports(self.window_definition):
+                    windower_class = BulkMarkerWindower
+                else:
+                    warnings.warn("Bulk windowing does not support start and "
+                                  "end markers. Using the MarkerWindower.")
+            self.marker_windower = windower_class(
                 self.reader, self.window_definition,
                 nullmarker_stride_ms=self.nullmarker_stride_ms,
                 no_overlap=self.no_overlap,
@@ -196,8 +217,18 @@ class TimeSeriesDataset(BaseDataset):
           :format:
               The format in which the actual data sets should be stored.
               
-              Possible formats are *pickle*, *text*, *csv* and *MATLAB* (.mat)
-              format.
+              Possible formats are *pickle*, *npy_blocks*, *text*, *csv* and
+              *MATLAB* (.mat) format.
+
+              In the *npy_blocks* format, the arrays of all time series objects
+              are stored one below the other in one *.npy* file,
+              which is loaded with memory mapping.
+              Labels, start and end times, names, marker names and tags
+              of the windows together with the channel names
+              and the sampling frequency are stored
+              in a small additional index file (*_index.pickle*).
+              All windows need to have the same channels.
+              The history and specs of the objects are not stored.
 
               In the MATLAB and text format, all time series objects are
               concatenated to a single large table containing only integer
@@ -231,23 +262,31 @@ class TimeSeriesDataset(BaseDataset):
         except Exception:
             author = "unknown"
             self._log("Author could not be resolved.", level=logging.WARNING)
+        if s_format == "npy_blocks":
+            file_ending = "npy"
+        else:
+            file_ending = s_format
         self.update_meta_data({"type": "time_series",
                                "storage_format": s_format,
                                "author": author,
                                "data_pattern": "data_run" + os.sep 
-                                               + name + "_sp_tt." + s_format})
+                                               + name + "_sp_tt." + file_ending})
 
         # Iterate through splits and runs in this dataset
         for key, time_series in self.data.iteritems():
             # load data, if necessary 
             # (due to the  lazy loading, the data might be not loaded already)
-            self.update_meta_data({
-                "channel_names": copy.deepcopy(time_series[0][0].channel_names),
-                "sampling_frequency": time_series[0][0].sampling_frequency
-            })
             if isinstance(time_series, basestring):
                 time_series = self.get_data(key[0], key[1], key[2])
+            if len(time_series) > 0:
+                self.update_meta_data({
+                    "channel_names":
+                        copy.deepcopy(time_series[0][0].channel_names),
+                    "sampling_frequency": time_series[0][0].sampling_frequency
+                })
             if self.sort_string is not None:
+                if not isinstance(time_series, list):
+                    time_series = list(time_series)
                 time_series.sort(key=eval(self.sort_string))
             # Construct result directory
             result_path = result_dir + os.sep + "data" + "_run%s" % key[0]
@@ -260,6 +299,13 @@ class TimeSeriesDataset(BaseDataset):
                 result_file = open(os.path.join(result_path,
                                                 name+key_str+".pickle"), "w")
                 cPickle.dump(time_series, result_file, cPickle.HIGHEST_PROTOCOL)
+            elif s_format == "npy_blocks":
+                result_file = open(os.path.join(result_path,
+                                    name + key_str + "_index.pickle"), "wb")
+                self._store_npy_blocks(time_series,
+                                       os.path.join(result_path,
+                                                    name + key_str + ".npy"),
+                                       result_file)
             elif s_format in ["text","csv"]:
                 self.update_meta_data({
                     "type": "stream",
@@ -324,16 +370,132 @@ class TimeSeriesDataset(BaseDataset):
         #Store meta data
         BaseDataset.store_meta_data(result_dir, self.meta_data)
 
+    @staticmethod
+    def _store_npy_blocks(time_series, data_file_name, index_file):
+        """ Store the windows in one array file and their meta data in an index
+
+        The array in *data_file_name* has the shape
+        (total number of samples, number of channels).
+        The windows are stored one below the other and
+        the index contains their offsets and lengths.
+        An empty list of windows is stored as an empty array
+        without channel names.
+        """
+        lengths = numpy.array([data.shape[0] for data, label in time_series],
+                              dtype=numpy.int64)
+        offsets = numpy.zeros(len(lengths), dtype=numpy.int64)
+        offsets[1:] = numpy.cumsum(lengths)[:-1]
+        if len(time_series) == 0:
+            numpy.save(data_file_name, numpy.zeros((0, 0)))
+            cPickle.dump({"offsets": offsets, "lengths": lengths,
+                          "labels": [], "start_times": [], "end_times": [],
+                          "names": [], "marker_names": [], "tags": [],
+                          "channel_names": None, "sampling_frequency": None},
+                         index_file, cPickle.HIGHEST_PROTOCOL)
+            return
+        first_window = time_series[0][0]
+        # The data is written directly to the mapped file, to avoid a
+        # concatenated copy in memory.
+        data_array = numpy.lib.format.open_memmap(
+            data_file_name, mode="w+", dtype=first_window.dtype,
+            shape=(int(lengths.sum()), first_window.shape[1]))
+        index = {"offsets": offsets,
+                 "lengths": lengths,
+                 "labels": [],
+                 "start_times": [],
+                 "end_times": [],
+                 "names": [],
+                 "marker_names": [],
+                 "tags": [],
+                 "channel_names": first_window.channel_names,
+                 "sampling_frequency": first_window.sampling_frequency}
+        for (data, label), offset, length in zip(time_series, offsets,
+                                                 lengths):
+            if not data.shape[1] == data_array.shape[1] \
+                    or data.channel_names != first_window.channel_names:
+                raise ValueError("All windows need the same channels to be "
+                                 "stored in the npy_blocks format!")
+            data_array[offset:offset + length] = data.view(numpy.ndarray)
+            index["labels"].append(label)
+            index["start_times"].append(data.start_time)
+            index["end_times"].append(data.end_time)
+            index["names"].append(data.name)
+            index["marker_names"].append(data.marker_name)
+            index["tags"].append(data.tag)
+        data_array.flush()
+        del data_array
+        cPickle.dump(index, index_file, cPickle.HIGHEST_PROTOCOL)
+
     def set_window_defs(self, window_definition, nullmarker_stride_ms=1000,
-                        no_overlap=False, data_consistency_check=False):
+                        no_overlap=False, data_consistency_check=False,
+                        bulk_windowing=False):
         """Code copied from StreamDataset for rewindowing data"""
         self.window_definition = window_definition
         self.nullmarker_stride_ms = nullmarker_stride_ms
         self.no_overlap = no_overlap
         self.data_consistency_check = data_consistency_check
+        self.bulk_windowing = bulk_windowing
         self.stream_mode = True
 
 
+class MemoryMappedTimeSeriesList(object):
+    """ Lazy list of (time series, label) tuples stored in the 'npy_blocks' format
+
+    The data file is memory-mapped (copy on write) and only the small index
+    with the meta data is loaded into memory.
+    The :class:`~pySPACE.resources.data_types.time_series.TimeSeries`
+    objects are created on access as views on the mapped array,
+    i.e., without copying the data.
+    Changes of the data by nodes are not written back to the file.
+
+    **Parameters**
+
+        :data_file_name:
+            Name of the *.npy* file.
+            The index is expected in the file with the same name but
+            the ending *_index.pickle* instead of *.npy*.
+    """
+    def __init__(self, data_file_name):
+        self.data_file_name = data_file_name
+        index_file = open(os.path.splitext(data_file_name)[0]
+                          + "_index.pickle", "rb")
+        self.index = cPickle.load(index_file)
+        index_file.close()
+        self.data = numpy.load(data_file_name, mmap_mode="c")
+
+    def __len__(self):
+        return len(self.index["offsets"])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in xrange(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Time series index out of range.")
+        offset = self.index["offsets"][i]
+        data = TimeSeries(self.data[offset:offset + self.index["lengths"][i]],
+                          self.index["channel_names"],
+                          self.index["sampling_frequency"],
+                          start_time=self.index["start_times"][i],
+                          end_time=self.index["end_times"][i],
+                          name=self.index["names"][i],
+                          marker_name=self.index["marker_names"][i],
+                          tag=self.index["tags"][i])
+        return (data, self.index["labels"][i])
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+
+    def __getstate__(self):
+        """ Only the file name is pickled, not the data """
+        return {"data_file_name": self.data_file_name}
+
+    def __setstate__(self, state):
+        self.__init__(state["data_file_name"])
+
+
 class TimeSeriesClient(AbstractStreamReader):
     """TimeSeries stream client for TimeSeries"""
     def __init__(self, ts_stream, **kwargs):
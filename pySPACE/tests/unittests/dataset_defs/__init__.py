@@ -0,0 +1 @@
+""" Unittests for dataset definitions """
@@ -0,0 +1,119 @@
+""" Unit tests for the vectorized calculation of classification metrics
+"""
+
+import unittest
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.resources.data_types.prediction_vector import PredictionVector
+from pySPACE.resources.dataset_defs.metric import metricdict, \
+    BinaryClassificationDataset, MultinomialClassificationDataset
+
+
+class Predictor(object):
+    """ Predictor with a range for the RMM losses """
+    range = 1.5
+
+
+class BinaryMetricsTestCase(unittest.TestCase):
+    """ The metrics of all instances have to equal the ones per instance """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.results = []
+        for i in range(200):
+            label = "Target" if numpy.random.rand() < 0.3 else "Standard"
+            # scores with ties after rounding
+            score = numpy.round(numpy.random.randn() * 2, 2)
+            if label == "Target":
+                score += 0.5
+            p_label = "Target" if score > 0 else "Standard"
+            self.results.append((PredictionVector(
+                label=p_label, prediction=score, predictor=Predictor()),
+                label))
+
+    def test_confusion_and_loss(self):
+        metrics = metricdict(float)
+        loss_dict = metricdict(lambda: numpy.zeros(2))
+        for prediction_vector, label in self.results:
+            BinaryClassificationDataset.update_confusion_matrix(
+                prediction_vector, label, calc_soft_metrics=True,
+                ir_class="Target", sec_class="Standard",
+                confusion_matrix=metrics)
+            BinaryClassificationDataset.update_loss_values(
+                prediction_vector, label, ir_class="Target",
+                sec_class="Standard", loss_dict=loss_dict)
+        scores, predicted_labels, labels, ranges = \
+            BinaryClassificationDataset.results_to_arrays(self.results)
+        self.assertTrue(numpy.all(ranges == 1.5))
+        array_metrics = BinaryClassificationDataset.\
+            confusion_matrix_from_arrays(scores, predicted_labels, labels,
+                                         calc_soft_metrics=True)
+        self.assertEqual(sorted(metrics.keys()), sorted(array_metrics.keys()))
+        for key in metrics:
+            self.assertEqual(metrics[key], array_metrics[key])
+        array_loss = BinaryClassificationDataset.loss_values_from_arrays(
+            scores, labels == "Target", ranges)
+        self.assertEqual(sorted(loss_dict.keys()), sorted(array_loss.keys()))
+        for key in loss_dict:
+            self.assertTrue(numpy.all(loss_dict[key] == array_loss[key]))
+
+    def test_auc(self):
+        metrics, (roc_points, weka_points) = \
+            BinaryClassificationDataset.calculate_metrics(
+                self.results, save_roc_points=True)
+        # Mann-Whitney-U-statistic of the rounded scores
+        scores = numpy.array([numpy.round(vector.prediction, 3)
+                              for vector, label in self.results])
+        is_ir = numpy.array([label == "Target"
+                             for vector, label in self.results])
+        greater = (scores[is_ir][:, None] > scores[~is_ir][None, :]).sum()
+        equal = (scores[is_ir][:, None] == scores[~is_ir][None, :]).sum()
+        self.assertAlmostEqual(metrics["AUC"],
+                               (greater + 0.5 * equal) /
+                               float(is_ir.sum() * (~is_ir).sum()))
+        self.assertEqual(roc_points[0], (0.0, 0.0))
+        self.assertEqual(roc_points[-1], (1.0, 1.0))
+        # the ROC curve is monotone
+        self.assertEqual(roc_points, sorted(roc_points))
+
+    def test_trace_codes(self):
+        codes = BinaryClassificationDataset.confusion_codes(
+            ["Target ", "Standard", "Target", "Standard"],
+            ["Target", "Target", "Standard", "Standard "])
+        self.assertEqual(list(codes), [0, 1, 2, 3])
+        self.assertRaises(Exception, BinaryClassificationDataset.
+                          confusion_codes, ["Other"], ["Target"])
+
+
+class MultinomialMetricsTestCase(unittest.TestCase):
+    """ Count the multinomial confusion matrix of all instances """
+
+    def test_confusion_matrix(self):
+        numpy.random.seed(0)
+        names = ["a", "b", "c"]
+        results = [(PredictionVector(label=names[numpy.random.randint(3)],
+                                     prediction=1.0),
+                    names[numpy.random.randint(2)]) for i in range(50)]
+        metrics = metricdict(float)
+        for prediction_vector, label in results:
+            MultinomialClassificationDataset.update_confusion_matrix(
+                prediction_vector, label, confusion_matrix=metrics)
+        array_metrics, classes = MultinomialClassificationDataset.\
+            confusion_matrix_from_arrays(
+                [vector.label for vector, label in results],
+                [label for vector, label in results])
+        self.assertEqual(dict(metrics), dict(array_metrics))
+        self.assertEqual(sorted(classes), names)
+        self.assertEqual(classes[:2], [results[0][1], results[0][0].label])
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_metric')
+    unittest.TextTestRunner(verbosity=2).run(suite)
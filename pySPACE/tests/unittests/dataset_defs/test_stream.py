@@ -0,0 +1,183 @@
+""" Unit tests for the block-wise reading of streams
+"""
+
+import unittest
+import os
+import shutil
+import tempfile
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.resources.dataset_defs.stream import CsvReader, EEGReader
+from pySPACE.missions.support.windower import MarkerWindower, \
+    BulkMarkerWindower, LabeledWindowDef
+
+
+class CsvReaderTestCase(unittest.TestCase):
+    """ Chunked parsing, markers and the binary cache of the CsvReader """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.temp_dir = tempfile.mkdtemp()
+        self.data = numpy.round(numpy.random.randn(25, 3), 4)
+        self.markers = [""] * 25
+        self.markers[2] = "S1"
+        self.markers[11] = "S2"
+        self.markers[23] = "S1"
+        self.file_path = os.path.join(self.temp_dir, "data.csv")
+        csv_file = open(self.file_path, "w")
+        csv_file.write("C3,marker,Cz,C4\n")
+        for row, marker in zip(self.data, self.markers):
+            csv_file.write("%s,%s,%s,%s\n" % (row[0], marker, row[1], row[2]))
+        csv_file.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def read_all(self, reader):
+        blocks = []
+        reader.regcallback(lambda samples, markers:
+                           blocks.append((samples.copy(), markers.copy())))
+        self.assertEqual(reader.read(nblocks=-1), 3)
+        samples = numpy.hstack([block[0] for block in blocks])
+        markers = numpy.hstack([block[1] for block in blocks])
+        return samples, markers
+
+    def check(self, reader):
+        self.assertEqual(reader.channelNames, ["C3", "Cz", "C4"])
+        self.assertEqual(reader.stdblocksize, 10)
+        samples, markers = self.read_all(reader)
+        self.assertEqual(samples.shape, (3, 30))
+        self.assertTrue(numpy.allclose(samples[:, :25], self.data.T))
+        # the last block is filled with zeros
+        self.assertTrue(numpy.all(samples[:, 25:] == 0))
+        self.assertEqual(reader.markerids, {"null": 0, "S1": 1, "S2": 2})
+        self.assertEqual(reader.markerNames[2], "S2")
+        expected = -numpy.ones(30)
+        expected[[2, 23]] = 1
+        expected[11] = 2
+        self.assertTrue(numpy.all(markers == expected))
+
+    def test_marker_column(self):
+        self.check(CsvReader(self.file_path, blocksize=10, chunk_size=15))
+
+    def test_marker_file(self):
+        csv_file = open(self.file_path, "w")
+        csv_file.write("C3 Cz C4\n")
+        for row in self.data:
+            csv_file.write("%s %s %s\n" % tuple(row))
+        csv_file.close()
+        marker_file = os.path.join(self.temp_dir, "marker.csv")
+        csv_file = open(marker_file, "w")
+        csv_file.write("time,marker\n3,S1\n12,S2\n24,S1\n")
+        csv_file.close()
+        self.check(CsvReader(self.file_path, blocksize=10, chunk_size=1,
+                             marker_file=marker_file))
+
+    def test_binary_cache(self):
+        self.check(CsvReader(self.file_path, blocksize=10, chunk_size=10,
+                             binary_cache=True))
+        self.assertTrue(os.path.isfile(self.file_path + ".cache"))
+        reader = CsvReader(self.file_path, blocksize=10, binary_cache=True)
+        self.assertTrue(isinstance(reader.cache_data, numpy.memmap))
+        self.check(reader)
+        # changed files are converted again
+        csv_file = open(self.file_path, "a")
+        csv_file.write("1,,2,3\n")
+        csv_file.close()
+        reader = CsvReader(self.file_path, blocksize=10, binary_cache=True)
+        self.assertEqual(reader.cache_data.shape, (26, 4))
+
+    def test_ragged_rows(self):
+        csv_file = open(self.file_path, "a")
+        csv_file.write("1,,2\n")
+        csv_file.close()
+        reader = CsvReader(self.file_path, blocksize=10, chunk_size=15)
+        reader.regcallback(lambda samples, markers: None)
+        self.assertRaises(ValueError, reader.read, nblocks=-1)
+
+
+class EEGReaderTestCase(unittest.TestCase):
+    """ Memory-mapped data and marker index of the EEGReader """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "data")
+        self.data = numpy.arange(50, dtype=numpy.int16).reshape(25, 2)
+        self.data.tofile(self.file_path + ".eeg")
+        header = open(self.file_path + ".vhdr", "w")
+        header.write("[Common Infos]\nDataFile=data.eeg\n"
+                     "MarkerFile=data.vmrk\nNumberOfChannels=2\n"
+                     "SamplingInterval=1000\n"
+                     "[Binary Infos]\nBinaryFormat=INT_16\n"
+                     "[Channel Infos]\nCh1=C3,,0.1,uV\nCh2=C4,,0.1,uV\n")
+        header.close()
+        markers = open(self.file_path + ".vmrk", "w")
+        # the second marker collides with the first one
+        markers.write("[Marker Infos]\nMk1=New Segment,,1,1,0\n"
+                      "Mk2=Stimulus,S  1,3,1,0\nMk3=Stimulus,S  2,3,1,0\n"
+                      "Mk4=Stimulus,S  1,12,1,0\n")
+        markers.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_random_access(self):
+        reader = EEGReader(self.file_path, blocksize=10)
+        self.assertEqual(reader.channelNames, ["C3", "C4"])
+        self.assertEqual(reader.markerNames, {0: "null", 1: "S  1",
+                                              2: "S  2"})
+        self.assertTrue(numpy.all(reader.get_samples(5, 8) ==
+                                  self.data[5:8].T))
+        positions, ids = reader.find_markers(0, 11)
+        self.assertEqual(list(positions), [2, 3])
+        self.assertEqual(list(ids), [1, 2])
+        self.assertEqual(list(reader.get_marker_positions("S  1")), [2, 11])
+
+    def test_read(self):
+        reader = EEGReader(self.file_path, blocksize=10)
+        for run in range(2):
+            blocks = []
+            reader.reset()
+            reader.regcallback(lambda samples, markers:
+                               blocks.append((samples, markers)))
+            self.assertEqual(reader.read(nblocks=-1), 3)
+            samples = numpy.hstack([block[0] for block in blocks])
+            markers = numpy.hstack([block[1] for block in blocks])
+            self.assertTrue(numpy.all(samples[:, :25] == self.data.T))
+            self.assertTrue(numpy.all(samples[:, 25:] == 0))
+            expected = -numpy.ones(30)
+            expected[[2, 11]] = 1
+            expected[3] = 2
+            self.assertTrue(numpy.all(markers == expected))
+
+    def test_bulk_windowing(self):
+        windowdefs = [LabeledWindowDef("s1", "Target", "S  1", -2, 2),
+                      LabeledWindowDef("null", "Null", "null", -2, 0)]
+        windows = list(MarkerWindower(EEGReader(self.file_path, blocksize=5),
+                                      windowdefs, nullmarker_stride_ms=4))
+        reader = EEGReader(self.file_path, blocksize=5)
+        bulk_windows = list(BulkMarkerWindower(reader, windowdefs,
+                                               nullmarker_stride_ms=4))
+        # the windows are taken from the mapped file without streaming
+        self.assertEqual(reader.position, 0)
+        self.assertEqual([label for window, label in windows],
+                         ["Null", "Target", "Null", "Null"])
+        self.assertEqual(len(windows), len(bulk_windows))
+        for (window, label), (bulk_window, bulk_label) in \
+                zip(windows, bulk_windows):
+            self.assertEqual(label, bulk_label)
+            self.assertEqual(window.start_time, bulk_window.start_time)
+            self.assertEqual(window.marker_name, bulk_window.marker_name)
+            self.assertTrue(numpy.all(window.view(numpy.ndarray) ==
+                                      bulk_window.view(numpy.ndarray)))
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_stream')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,86 @@
+""" Unit tests for storing and loading the TimeSeriesDataset
+"""
+
+import unittest
+import shutil
+import tempfile
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.resources.data_types.time_series import TimeSeries
+from pySPACE.resources.dataset_defs.base import BaseDataset
+from pySPACE.resources.dataset_defs.time_series import TimeSeriesDataset, \
+    MemoryMappedTimeSeriesList
+
+
+class NpyBlocksTestCase(unittest.TestCase):
+    """ Round trip of the memory-mapped 'npy_blocks' storage format """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.result_dir = tempfile.mkdtemp()
+        self.dataset = TimeSeriesDataset()
+        for split in range(2):
+            for train in [True, False]:
+                for i in range(5):
+                    sample = TimeSeries(numpy.random.randn(10 + i, 3),
+                                        ["C3", "Cz", "C4"], 100,
+                                        start_time=100 * i,
+                                        end_time=100 * i + 10 * (10 + i),
+                                        name="window_%d" % i,
+                                        marker_name={"S1": [50]})
+                    self.dataset.add_sample(sample, "class%d" % (i % 2),
+                                            train, split=split)
+
+    def tearDown(self):
+        shutil.rmtree(self.result_dir)
+
+    def test_round_trip(self):
+        self.dataset.store(self.result_dir, s_format="npy_blocks")
+        loaded = BaseDataset.load(self.result_dir)
+        self.assertEqual(loaded.meta_data["storage_format"], "npy_blocks")
+        for key in [(0, 0, "train"), (0, 1, "test")]:
+            original = self.dataset.get_data(*key)
+            windows = loaded.get_data(*key)
+            self.assertTrue(isinstance(windows, MemoryMappedTimeSeriesList))
+            self.assertEqual(len(windows), len(original))
+            for (x, x_label), (y, y_label) in zip(original, windows):
+                self.assertEqual(x_label, y_label)
+                self.assertTrue(numpy.all(x == y))
+                self.assertEqual(x.channel_names, y.channel_names)
+                self.assertEqual(x.start_time, y.start_time)
+                self.assertEqual(x.marker_name, y.marker_name)
+                self.assertEqual(x.tag, y.tag)
+            self.assertEqual(windows[-1][0].name, original[-1][0].name)
+
+    def test_windows_are_not_written_back(self):
+        self.dataset.store(self.result_dir, s_format="npy_blocks")
+        windows = BaseDataset.load(self.result_dir).get_data(0, 0, "test")
+        windows[0][0][:] = 0
+        self.assertFalse(numpy.all(windows[0][0] == 0))
+
+    def test_empty_split(self):
+        self.dataset.data[(0, 2, "test")] = []
+        self.dataset.store(self.result_dir, s_format="npy_blocks")
+        windows = BaseDataset.load(self.result_dir).get_data(0, 2, "test")
+        self.assertEqual(len(windows), 0)
+        self.assertEqual(list(windows), [])
+
+    def test_different_channel_names(self):
+        windows = self.dataset.get_data(0, 0, "train")
+        data, label = windows[-1]
+        windows[-1] = (TimeSeries(data.view(numpy.ndarray),
+                                  ["C3", "Pz", "C4"], 100), label)
+        self.assertRaises(ValueError, self.dataset.store, self.result_dir,
+                          s_format="npy_blocks")
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_time_series')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,142 @@
+""" Unit tests for the vectorized kernels of the RegularizedClassifierBase
+"""
+
+import unittest
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.resources.data_types.feature_vector import FeatureVector
+from pySPACE.missions.nodes.classification.base import KernelRowCache
+from pySPACE.missions.nodes.classification.svm_variants.SOR import SorSvmNode
+
+
+class KernelMatrixTestCase(unittest.TestCase):
+    """ Vectorized kernel matrices have to match the single evaluation """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.A = numpy.random.randn(7, 3)
+        self.B = numpy.random.randn(5, 3)
+
+    def test_kernel_matrix(self):
+        for kernel_type in ["LINEAR", "POLY", "RBF", "SIGMOID",
+                            "lambda u, v: numpy.abs(u - v).sum()"]:
+            node = SorSvmNode(kernel_type=kernel_type, gamma=0.3, offset=1,
+                              exponent=3)
+            expected = numpy.array([[node.kernel_func(u, v) for v in self.B]
+                                    for u in self.A])
+            self.assertTrue(numpy.allclose(node.kernel_matrix(self.A, self.B),
+                                           expected), kernel_type)
+            expected = numpy.array([[node.kernel_func(u, v) for v in self.A]
+                                    for u in self.A])
+            self.assertTrue(numpy.allclose(node.kernel_matrix(self.A),
+                                           expected), kernel_type)
+
+    def test_blocked_computation(self):
+        node = SorSvmNode(kernel_type="RBF", gamma=0.3)
+        full = node.kernel_matrix(self.A, self.B)
+        # budget of less than one row per block
+        node.kernel_cache_size = 1e-6
+        self.assertTrue(numpy.allclose(node.kernel_matrix(self.A, self.B),
+                                       full))
+
+    def test_row_cache(self):
+        computed = []
+
+        def compute_rows(indices):
+            computed.extend(indices)
+            return numpy.outer(indices, numpy.arange(4))
+        cache = KernelRowCache(compute_rows, 4, memory_limit=2 * 4 * 8)
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(list(cache[1]), [0, 1, 2, 3])
+        cache[2]
+        cache[1]
+        # the least recently used row 2 is dropped
+        cache[3]
+        self.assertEqual(list(cache[1]), [0, 1, 2, 3])
+        self.assertEqual(list(cache[2]), [0, 2, 4, 6])
+        self.assertEqual(computed, [1, 2, 3, 2])
+        self.assertEqual(cache.hits, 2)
+
+
+class KernelSorSvmTestCase(unittest.TestCase):
+    """ Kernel SOR SVM with full matrix, row cache and batch execution """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.data = numpy.vstack((numpy.random.randn(30, 2) + 1.5,
+                                  numpy.random.randn(30, 2) - 1.5))
+        self.labels = ["a"] * 30 + ["b"] * 30
+        self.test_data = [FeatureVector(numpy.atleast_2d(x), ["f0", "f1"])
+                          for x in numpy.random.randn(20, 2) * 2]
+
+    def train(self, **kwargs):
+        node = SorSvmNode(kernel_type="RBF", class_labels=["a", "b"],
+                          complexity=1, **kwargs)
+        for x, label in zip(self.data, self.labels):
+            node.train(FeatureVector(numpy.atleast_2d(x), ["f0", "f1"]),
+                       label)
+        node.stop_training()
+        return node
+
+    def test_row_cache_equals_full_matrix(self):
+        full_node = self.train()
+        self.assertTrue(isinstance(full_node.M, numpy.ndarray))
+        # budget for less than half of the rows
+        cache_node = self.train(kernel_cache_size=60 * 8 * 20 * 2**-20)
+        self.assertTrue(isinstance(cache_node.M, KernelRowCache))
+        self.assertTrue(numpy.allclose(full_node.dual_solution,
+                                       cache_node.dual_solution))
+        self.assertTrue(full_node.gamma is not None)
+        for x in self.test_data:
+            self.assertAlmostEqual(full_node.execute(x).prediction,
+                                   cache_node.execute(x).prediction)
+
+    def test_kernel_prediction(self):
+        node = self.train()
+        for x in self.test_data:
+            expected = node.b + sum(
+                node.dual_solution[i] * node.bi[i] *
+                node.kernel_func(x.view(numpy.ndarray)[0],
+                                 node.samples[i])
+                for i in range(node.num_samples))
+            result = node.execute(x)
+            self.assertAlmostEqual(result.prediction, expected)
+            self.assertEqual(result.label, "b" if expected > 0 else "a")
+
+    def test_batch_equals_single_execution(self):
+        node = self.train(batch_size=8)
+        self.assertTrue(node.is_batch_executable())
+        single_results = [node.execute(x) for x in self.test_data]
+        batch_results = node.execute_batch(self.test_data)
+        for single, batch in zip(single_results, batch_results):
+            self.assertAlmostEqual(single.prediction, batch.prediction)
+            self.assertEqual(single.label, batch.label)
+
+    def test_batch_equals_execute_with_rest_class(self):
+        for kernel_type in ["LINEAR", "RBF"]:
+            node = SorSvmNode(kernel_type=kernel_type, complexity=1,
+                              class_labels=["REST", "a"], multinomial=True,
+                              batch_size=8)
+            for x, label in zip(self.data, self.labels):
+                node.train(FeatureVector(numpy.atleast_2d(x), ["f0", "f1"]),
+                           label)
+            node.stop_training()
+            single_results = [node._execute(x) for x in self.test_data]
+            batch_results = node.execute_batch(self.test_data)
+            self.assertTrue(all(result.label == "a"
+                                for result in batch_results))
+            for single, batch in zip(single_results, batch_results):
+                self.assertAlmostEqual(single.prediction, batch.prediction)
+                self.assertEqual(single.label, batch.label)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_kernel_classifier')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,120 @@
+""" Unit tests for the threshold optimization on sorted instances
+"""
+
+import unittest
+import cPickle
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.resources.data_types.prediction_vector import PredictionVector
+from pySPACE.missions.nodes.postprocessing.threshold_optimization import \
+    ThresholdOptimizationNode, SortedInstances
+
+
+class ThresholdOptimizationTestCase(unittest.TestCase):
+    """ Compare with the sweep over all instances one after another """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.classes = ["Standard", "Target"]
+        self.data = []
+        for i in range(150):
+            label = "Target" if numpy.random.rand() < 0.3 else "Standard"
+            # scores with ties
+            score = numpy.round(numpy.random.randn(), 3)
+            if label == "Target":
+                score += 1
+            self.data.append((PredictionVector(
+                label="Target" if score > 0 else "Standard",
+                prediction=score), label))
+
+    def sweep(self, node, data):
+        """ Metric values of the old sweep over the sorted instances """
+        instances = sorted((vector.prediction,
+                            self.classes.index(vector.label),
+                            self.classes.index(label))
+                           for vector, label in data)
+        labels = [instance[2] for instance in instances]
+        metric_fct = node._get_metric_fct()
+        if instances[0][1] == 0:
+            TP, FP, TN, FN = labels.count(1), labels.count(0), 0, 0
+        else:
+            TP, FP, TN, FN = 0, 0, labels.count(0), labels.count(1)
+        values = []
+        for label in labels:
+            if label == 0:
+                TN, FP = (TN + 1, FP - 1) if instances[0][1] == 0 \
+                    else (TN - 1, FP + 1)
+            else:
+                FN, TP = (FN + 1, TP - 1) if instances[0][1] == 0 \
+                    else (FN - 1, TP + 1)
+            values.append(metric_fct(TP, FP, TN, FN))
+        return [instance[0] for instance in instances], values
+
+    def test_metrics(self):
+        for metric in ["Balanced_accuracy", "F_measure", "Accuracy",
+                       "-{FP} - 5*{FN}", "Mutual_information"]:
+            node = ThresholdOptimizationNode(metric=metric,
+                                             class_labels=self.classes,
+                                             store=True)
+            for vector, label in self.data:
+                node.train(vector, label)
+            node.stop_training()
+            predictions, values = self.sweep(node, self.data)
+            self.assertEqual(node.predictions_train[0], predictions)
+            self.assertTrue(numpy.allclose(node.predictions_train[1], values))
+            self.assertTrue(node.orientation_up)
+
+    def test_incremental(self):
+        node = ThresholdOptimizationNode(class_labels=self.classes,
+                                         store=True)
+        for vector, label in self.data[:50]:
+            node.train(vector, label)
+        node.stop_training()
+        for index in range(50, len(self.data)):
+            node._inc_train(*self.data[index])
+            predictions, values = self.sweep(node, self.data[:index + 1])
+            self.assertEqual(node.predictions_train[0], predictions)
+            self.assertEqual(node.predictions_train[1], values)
+        batch_node = ThresholdOptimizationNode(class_labels=self.classes)
+        for vector, label in self.data:
+            batch_node.train(vector, label)
+        batch_node.stop_training()
+        self.assertEqual(node.threshold, batch_node.threshold)
+        instances = node.sorted_instances
+        batch_instances = batch_node.sorted_instances
+        self.assertEqual(len(instances), len(self.data))
+        self.assertEqual(list(instances.labels), list(batch_instances.labels))
+        self.assertEqual(list(instances.prediction_labels),
+                         list(batch_instances.prediction_labels))
+        # the arrays are only reallocated, when the capacity is exhausted
+        self.assertTrue(len(instances._scores) < 2 * len(self.data))
+        # the instances are ordered by score, predicted and actual label
+        keys = 2 * instances.prediction_labels + instances.labels
+        ties = instances.scores[1:] == instances.scores[:-1]
+        self.assertTrue(ties.any())
+        self.assertTrue(numpy.all(keys[1:][ties] >= keys[:-1][ties]))
+
+    def test_pickle(self):
+        instances = SortedInstances()
+        for score, label in [(0.5, 1), (-1.0, 0), (0.5, 0), (2.0, 1)]:
+            instances.insert(score, label, label)
+        copied = cPickle.loads(cPickle.dumps(instances))
+        self.assertEqual(len(copied._scores), 4)
+        self.assertEqual(list(copied.scores), [-1.0, 0.5, 0.5, 2.0])
+        self.assertEqual(list(copied.labels), [0, 0, 1, 1])
+        copied.insert(0.0, 0, 1)
+        self.assertEqual(list(copied.scores), [-1.0, 0.0, 0.5, 0.5, 2.0])
+        self.assertEqual(list(instances.scores), [-1.0, 0.5, 0.5, 2.0])
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName(
+        'test_threshold_optimization')
+    unittest.TextTestRunner(verbosity=2).run(suite)
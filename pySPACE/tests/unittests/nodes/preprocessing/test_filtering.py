@@ -1,7 +1,5 @@
 """ Unittests which test filtering nodes
 
-.. todo:: Implement tests for VarianceFilterNode
-
 :Author: Jan Hendrik Metzen (jhm@informatik.uni-bremen.de)
 :Created: 2008/08/22
 
@@ -13,6 +11,7 @@ import unittest
 
 import numpy
 import scipy
+import scipy.signal
 import time
 import pylab
 
@@ -233,6 +232,111 @@ class FIRFilterTestCase(unittest.TestCase):
         self.assertTrue(numpy.allclose(filtered_data,desired_result))
 
 
+
+class VectorizedFilterTestCase(unittest.TestCase):
+    """ Test multi-channel filtering of FIR and IIR filter nodes """
+
+    def setUp(self):
+        from pySPACE.resources.data_types.time_series import TimeSeries
+        numpy.random.seed(0)
+        self.channel_names = ["C%d" % i for i in range(6)]
+        self.windows = [TimeSeries(numpy.random.randn(200, 6),
+                                   self.channel_names, 100.0)
+                        for i in range(4)]
+        self.data = TimeSeries(numpy.vstack(self.windows),
+                               self.channel_names, 100.0)
+
+    def test_fir_channels_equal_single_channel_filtering(self):
+        filter_node = filtering.FIRFilterNode([5, 20], time_shift="normal",
+                                              selected_channels=["C1", "C4"])
+        filtered_data = \
+            filter_node.execute(self.windows[0]).view(numpy.ndarray)
+        for channel_index in [1, 4]:
+            self.assertTrue(numpy.allclose(
+                filtered_data[:, channel_index],
+                scipy.signal.lfilter(filter_node.filter_kernel, 1,
+                                     self.windows[0][:, channel_index])))
+        self.assertTrue(numpy.all(filtered_data[:, [0, 2, 3, 5]] == 0))
+
+    def test_fir_results_are_independent(self):
+        filter_node = filtering.FIRFilterNode([5, 20], time_shift="middle")
+        first = filter_node.execute(self.windows[0])
+        first_copy = first.copy()
+        filter_node.execute(self.windows[1])
+        self.assertTrue(numpy.all(first == first_copy))
+
+    def test_stream_equals_filtering_of_whole_data(self):
+        for sos in [False, True]:
+            stream_node = filtering.IIRFilterNode([5, 20], comp_type="stream",
+                                                  sos=sos)
+            streamed_data = numpy.vstack([stream_node.execute(window)
+                                          for window in self.windows])
+            filter_node = filtering.IIRFilterNode([5, 20], sos=sos)
+            self.assertTrue(numpy.allclose(streamed_data,
+                                           filter_node.execute(self.data)))
+        stream_node = filtering.FIRFilterNode([5, 20], time_shift="stream")
+        streamed_data = numpy.vstack([stream_node.execute(window)
+                                      for window in self.windows])
+        filter_node = filtering.FIRFilterNode([5, 20], time_shift="normal")
+        self.assertTrue(numpy.allclose(streamed_data,
+                                       filter_node.execute(self.data)))
+
+    def test_zero_phase_filtering(self):
+        filter_node = filtering.IIRFilterNode([5, 20], comp_type="filtfilt",
+                                              sos=True)
+        filtered_data = filter_node.execute(self.data)
+        self.assertEqual(filtered_data.shape, self.data.shape)
+        self.assertTrue(numpy.allclose(
+            filtered_data,
+            scipy.signal.sosfiltfilt(filter_node.filter_kernel,
+                                     self.data.view(numpy.ndarray), axis=0)))
+
+class VarianceFilterTestCase(unittest.TestCase):
+    """ Test for the NumPy implementation of the VarianceFilterNode """
+
+    def setUp(self):
+        from pySPACE.resources.data_types.time_series import TimeSeries
+        numpy.random.seed(0)
+        self.channel_names = ["EMG1", "EMG2"]
+        self.windows = [TimeSeries(numpy.random.randn(50, 2) + 10,
+                                   self.channel_names, 1000.0)
+                        for i in range(4)]
+        self.data = TimeSeries(numpy.vstack(self.windows),
+                               self.channel_names, 1000.0)
+        # the first windows of the filter contain zeros
+        self.padded_data = numpy.vstack((numpy.zeros((20, 2)), self.data))
+
+    def _create_node(self, standardization):
+        node = filtering.VarianceFilterNode(width=20,
+                                            standardization=standardization)
+        node.var_tools = False
+        return node
+
+    def test_variance(self):
+        filtered_data = self._create_node(False).execute(self.data)
+        for i in [0, 10, 100, 199]:
+            self.assertTrue(numpy.allclose(
+                filtered_data[i],
+                self.padded_data[i + 1:i + 21].var(axis=0)))
+
+    def test_standardization(self):
+        filtered_data = self._create_node(True).execute(self.data)
+        for i in [10, 100, 199]:
+            window = self.padded_data[i + 1:i + 21]
+            self.assertTrue(numpy.allclose(
+                filtered_data[i],
+                (self.data[i] - window.mean(axis=0)) / window.std(axis=0)))
+
+    def test_stream_equals_filtering_of_whole_data(self):
+        for standardization in [False, True]:
+            node = self._create_node(standardization)
+            streamed_data = numpy.vstack([node.execute(window)
+                                          for window in self.windows])
+            node = self._create_node(standardization)
+            self.assertTrue(numpy.allclose(streamed_data,
+                                           node.execute(self.data)))
+
+
     # Functions for plotting
     # Plot frequency and phase response
 def mfreqz(b,a=1):
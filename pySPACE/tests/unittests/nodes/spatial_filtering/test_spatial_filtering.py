@@ -0,0 +1,189 @@
+""" Unit tests for the batch execution of the SpatialFilteringNode
+and the streaming covariance estimation of the spatial filters
+"""
+
+import unittest
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.resources.data_types.time_series import TimeSeries
+from pySPACE.missions.nodes.spatial_filtering.spatial_filtering \
+    import SpatialFilteringNode, CovarianceAccumulator
+from pySPACE.missions.nodes.spatial_filtering.csp import CSPNode
+from pySPACE.missions.nodes.spatial_filtering.pca import PCAWrapperNode
+from pySPACE.missions.nodes.source.external_generator_source import \
+    ExternalGeneratorSourceNode
+from pySPACE.missions.nodes.splitter.cv_splitter import \
+    CrossValidationSplitterNode
+
+
+class SpatialFilteringBatchTestCase(unittest.TestCase):
+    """ Batch execution has to give the same results as single execution """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.data_list = [TimeSeries(numpy.random.randn(20, 4),
+                                     ["C%d" % i for i in range(4)], 100,
+                                     start_time=100 * i,
+                                     end_time=100 * i + 200)
+                          for i in range(10)]
+        self.filters = numpy.random.randn(4, 4)
+        self.filter_names = ["filter%d" % i for i in range(4)]
+
+    def test_batch_equals_single_execution(self):
+        single_node = SpatialFilteringNode(retained_channels=2)
+        single_node.filters = self.filters
+        single_node.filter_channel_names = self.filter_names
+        batch_node = SpatialFilteringNode(retained_channels=2, batch_size=4)
+        batch_node.filters = self.filters
+        batch_node.filter_channel_names = self.filter_names
+        self.assertTrue(batch_node.is_batch_executable())
+
+        single_results = [single_node.execute(x) for x in self.data_list]
+        batch_results = batch_node.execute_batch(self.data_list)
+
+        self.assertEqual(len(batch_results), len(single_results))
+        for single, batch in zip(single_results, batch_results):
+            self.assertTrue(numpy.allclose(single, batch))
+            self.assertEqual(single.start_time, batch.start_time)
+            self.assertEqual(single.tag, batch.tag)
+
+    def test_subclass_without_batch_method(self):
+        # CSP overwrites _execute but not _execute_batch
+        self.assertFalse(CSPNode().is_batch_executable())
+
+
+class CovarianceAccumulatorTestCase(unittest.TestCase):
+    """ The running sums have to give the covariances of the stacked data """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.windows = [numpy.random.randn(10, 3) + i for i in range(12)]
+        self.labels = ["a" if i % 3 else "b" for i in range(12)]
+
+    def accumulate(self, indices, forgetting_factor=1.0):
+        accumulator = CovarianceAccumulator(forgetting_factor)
+        for i in indices:
+            accumulator.update(self.windows[i], self.labels[i])
+        return accumulator
+
+    def test_covariance(self):
+        accumulator = self.accumulate(range(12))
+        self.assertEqual(accumulator.labels, ["a", "b"])
+        self.assertEqual(accumulator.num_windows(), 12)
+        X = numpy.vstack(self.windows)
+        self.assertTrue(numpy.allclose(accumulator.mean(), X.mean(axis=0)))
+        self.assertTrue(numpy.allclose(accumulator.covariance(),
+                                       numpy.cov(X.T)))
+        X_b = numpy.vstack(self.windows[::3])
+        self.assertTrue(numpy.allclose(accumulator.covariance("b", bias=True),
+                                       numpy.cov(X_b.T, bias=1)))
+        self.assertTrue(numpy.allclose(accumulator.scatter("b", center=False),
+                                       numpy.dot(X_b.T, X_b)))
+        shrunk = accumulator.covariance(shrinkage=0.5)
+        self.assertAlmostEqual(numpy.trace(shrunk), numpy.trace(numpy.cov(X.T)))
+        self.assertTrue(numpy.allclose(shrunk - numpy.diag(numpy.diag(shrunk)),
+                                       0.5 * (numpy.cov(X.T) -
+                                              numpy.diag(numpy.diag(
+                                                  numpy.cov(X.T))))))
+
+    def test_folds(self):
+        folds = [self.accumulate(range(i, 12, 4)) for i in range(4)]
+        total = sum(folds[1:], folds[0])
+        training = total - folds[2]
+        expected = self.accumulate([i for i in range(12) if i % 4 != 2])
+        for label in ["a", "b"]:
+            self.assertTrue(numpy.allclose(training.covariance(label),
+                                           expected.covariance(label)))
+        self.assertEqual(total.num_windows(), 12)
+
+    def test_forgetting(self):
+        accumulator = self.accumulate(range(12), forgetting_factor=0.5)
+        weights = 0.5 ** numpy.arange(3, -1, -1)
+        X_b = numpy.vstack(self.windows[::3])
+        sums = numpy.dot(numpy.repeat(weights, 10), X_b)
+        self.assertAlmostEqual(accumulator.num_windows("b"), weights.sum())
+        self.assertTrue(numpy.allclose(accumulator.mean("b"),
+                                       sums / (10 * weights.sum())))
+
+    def test_incremental_training(self):
+        data = [TimeSeries(window, ["C%d" % i for i in range(3)], 100)
+                for window in self.windows]
+        retrained_node = PCAWrapperNode()
+        for window in data[:6]:
+            retrained_node.train(window)
+        retrained_node.stop_training()
+        node = PCAWrapperNode()
+        for window in data:
+            node.train(window)
+        node.stop_training()
+        for window in data[6:]:
+            retrained_node._inc_train(window)
+        self.assertTrue(numpy.allclose(numpy.abs(node.filters),
+                                       numpy.abs(retrained_node.filters)))
+        self.assertTrue(numpy.allclose(node.avg, retrained_node.avg))
+
+
+class FoldCovariancesTestCase(unittest.TestCase):
+    """ Covariance sums of the folds are computed once per run """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.data = []
+        for i in range(40):
+            window = numpy.random.randn(10, 4)
+            window[:, i % 2] *= 3
+            self.data.append((TimeSeries(window, ["C%d" % j for j in range(4)],
+                                         100), ["Standard", "Target"][i % 2]))
+        self.trained_windows = 0
+        self.original_train = CSPNode._train
+        def counting_train(node, data, label):
+            self.trained_windows += 1
+            return self.original_train(node, data, label)
+        CSPNode._train = counting_train
+
+    def tearDown(self):
+        CSPNode._train = self.original_train
+
+    def test_cross_validation(self):
+        source = ExternalGeneratorSourceNode()
+        source.set_generator(self.data)
+        splitter = CrossValidationSplitterNode(splits=4)
+        splitter.register_input_node(source)
+        node = CSPNode(retained_channels=2)
+        node.register_input_node(splitter)
+        node.set_run_number(0)
+        filters = []
+        while True:
+            node.train_sweep(use_test_data=False)
+            self.assertEqual(node.get_remaining_train_phase(), 0)
+            training_data = list(splitter.request_data_for_training(False))
+            self.assertEqual(node.covariances.num_windows(),
+                             len(training_data))
+            filters.append(node.filters)
+            if not node.use_next_split():
+                break
+        self.assertEqual(len(filters), 4)
+        # every window once and one additional window per split
+        self.assertEqual(self.trained_windows, 40 + 4)
+
+        splitter.current_split = 0
+        for split_filters in filters:
+            reference = CSPNode(retained_channels=2)
+            for data, label in splitter.request_data_for_training(False):
+                reference.train(data, label)
+            reference.stop_training()
+            self.assertTrue(numpy.allclose(numpy.abs(split_filters),
+                                           numpy.abs(reference.filters)))
+            splitter.use_next_split()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_spatial_filtering')
+    unittest.TextTestRunner(verbosity=2).run(suite)
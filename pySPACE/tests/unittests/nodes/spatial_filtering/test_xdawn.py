@@ -0,0 +1,111 @@
+""" Unit tests for xDAWN trained on sufficient statistics
+"""
+
+import unittest
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from scipy.linalg import qr
+
+from pySPACE.resources.data_types.time_series import TimeSeries
+from pySPACE.missions.nodes.base_node import TrainingException
+from pySPACE.missions.nodes.spatial_filtering.xdawn import XDAWNNode, SSNR
+
+
+class XDAWNNodeTestCase(unittest.TestCase):
+    """ Compare with xDAWN on the stacked data and Toeplitz matrices """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.channel_names = ["C%d" % i for i in range(6)]
+        erp = numpy.random.randn(10, 6)
+        self.data = []
+        for i in range(40):
+            label = "Target" if i % 4 == 0 else "Standard"
+            window = numpy.random.randn(10, 6)
+            if label == "Target":
+                window += erp
+            self.data.append((TimeSeries(window, self.channel_names, 100),
+                              label))
+        self.X = numpy.vstack([window for window, label in self.data])
+        self.D = numpy.vstack([numpy.eye(10) if label == "Target"
+                               else numpy.zeros((10, 10))
+                               for window, label in self.data])
+
+    def test_filters(self):
+        node = XDAWNNode(erp_class_label="Target")
+        for window, label in self.data:
+            node.train(window, label)
+        node.stop_training()
+        # xDAWN with QR decompositions of the stacked matrices
+        Qx, Rx = qr(self.X, mode='economic')
+        Qd, Rd = qr(self.D, mode='economic')
+        Phi, Lambda, Psi = numpy.linalg.svd(numpy.dot(Qd.T, Qx))
+        filters = numpy.linalg.solve(Rx, Psi.T)
+        # the filters are only unique up to their sign
+        signs = numpy.sign((filters * node.filters).sum(axis=0))
+        self.assertTrue(numpy.allclose(node.filters * signs, filters))
+        self.assertTrue(numpy.allclose(node.Lambda, Lambda))
+        ai = numpy.linalg.solve(Rd, Phi[:, :6] * Lambda)
+        SNR = (numpy.dot(self.D, ai)**2).sum(axis=0) / \
+            (numpy.dot(self.X, filters)**2).sum(axis=0)
+        self.assertTrue(numpy.allclose(node.SNR, SNR))
+
+    def test_ssnr(self):
+        ssnr = SSNR("Target")
+        for window, label in self.data:
+            ssnr.add_example(window, label)
+        self.assertEqual(ssnr.num_channels, 6)
+        A_1 = numpy.linalg.lstsq(self.D, self.X)[0]
+        Sigma_1 = numpy.dot(numpy.dot(self.D, A_1).T, numpy.dot(self.D, A_1))
+        Sigma_X = numpy.dot(self.X.T, self.X)
+        selection = [0, 2, 3]
+        self.assertAlmostEqual(
+            ssnr.ssnr_as(selection),
+            numpy.trace(Sigma_1[selection][:, selection]) /
+            numpy.trace(Sigma_X[selection][:, selection]))
+        # the training data as test data
+        self.assertAlmostEqual(ssnr.ssnr_vs(selection),
+                               ssnr.ssnr_vs_test(ssnr, selection))
+
+
+    def test_rank_deficient(self):
+        # the common average reference removes one dimension
+        data = [(TimeSeries(window - window.mean(axis=1)[:, None],
+                            self.channel_names, 100), label)
+                for window, label in self.data]
+        node = XDAWNNode(erp_class_label="Target")
+        for window, label in data:
+            node.train(window, label)
+        node.stop_training()
+        self.assertTrue(numpy.all(numpy.isfinite(node.filters)))
+        # the first component equals the one of xDAWN without the
+        # redundant channel
+        reduced_node = XDAWNNode(erp_class_label="Target")
+        for window, label in data:
+            reduced_node.train(TimeSeries(window[:, :5],
+                                          self.channel_names[:5], 100), label)
+        reduced_node.stop_training()
+        X = numpy.vstack([window for window, label in data])
+        component = numpy.dot(X, node.filters[:, 0])
+        reduced_component = numpy.dot(X[:, :5], reduced_node.filters[:, 0])
+        self.assertAlmostEqual(
+            abs(numpy.corrcoef(component, reduced_component)[0, 1]), 1.0)
+
+    def test_no_erp_examples(self):
+        node = XDAWNNode(erp_class_label="Target")
+        for window, label in self.data:
+            if label != "Target":
+                node.train(window, label)
+        self.assertRaises(TrainingException, node.stop_training)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_xdawn')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,73 @@
+""" Unit tests for the infrastructure of the base node module
+"""
+
+import unittest
+import cPickle
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.missions.nodes.base_node import SampleBuffer, \
+    InconsistentDimException
+from pySPACE.resources.data_types.feature_vector import FeatureVector
+from pySPACE.missions.nodes.classification.discriminant_analysis_classifier \
+    import LinearDiscriminantAnalysisClassifierNode
+
+
+class SampleBufferTestCase(unittest.TestCase):
+    """ Growth, contents and pickling of the SampleBuffer """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.samples = numpy.random.randn(50, 4)
+        self.labels = numpy.arange(50) % 2
+
+    def test_append(self):
+        sample_buffer = SampleBuffer(initial_capacity=3)
+        self.assertEqual(sample_buffer.samples.shape, (0, 0))
+        for sample, label in zip(self.samples, self.labels):
+            sample_buffer.append(FeatureVector(sample.reshape(1, -1)), label)
+        self.assertEqual(len(sample_buffer), 50)
+        # capacity doubling
+        self.assertEqual(sample_buffer._samples.shape[0], 96)
+        self.assertTrue(numpy.all(sample_buffer.samples == self.samples))
+        self.assertTrue(numpy.all(sample_buffer.labels == self.labels))
+        self.assertTrue(sample_buffer.samples.flags["C_CONTIGUOUS"])
+        self.assertEqual(type(sample_buffer.samples), numpy.ndarray)
+        self.assertRaises(InconsistentDimException, sample_buffer.append,
+                          numpy.zeros(3))
+
+    def test_extend_and_pickle(self):
+        sample_buffer = SampleBuffer(dtype=numpy.float32)
+        sample_buffer.extend(self.samples[:20], self.labels[:20])
+        sample_buffer.append(self.samples[20], self.labels[20])
+        copied_buffer = cPickle.loads(cPickle.dumps(sample_buffer))
+        self.assertEqual(copied_buffer._samples.shape, (21, 4))
+        copied_buffer.extend(self.samples[21:], self.labels[21:])
+        self.assertEqual(copied_buffer.samples.dtype, numpy.float32)
+        self.assertTrue(numpy.all(copied_buffer.samples ==
+                                  self.samples.astype(numpy.float32)))
+        self.assertTrue(numpy.all(copied_buffer.labels == self.labels))
+        self.assertEqual(len(sample_buffer), 21)
+
+    def test_classifier(self):
+        node = LinearDiscriminantAnalysisClassifierNode(
+            class_labels=["Target", "Standard"])
+        for sample, label in zip(self.samples, self.labels):
+            node.train(FeatureVector(sample.reshape(1, -1)),
+                       ["Target", "Standard"][label])
+        node.stop_training()
+        self.assertTrue(numpy.allclose(node.mu_p1,
+                                       self.samples[::2].mean(axis=0)))
+        self.assertTrue(numpy.allclose(node.mu_m1,
+                                       self.samples[1::2].mean(axis=0)))
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_base_node')
+    unittest.TextTestRunner(verbosity=2).run(suite)
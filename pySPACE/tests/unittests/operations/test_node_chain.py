@@ -0,0 +1,144 @@
+""" Unit tests for the result cache of the NodeChainOperation
+"""
+
+import unittest
+import os
+import shutil
+import tempfile
+
+if __name__ == '__main__':
+    import sys
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+import pySPACE
+from pySPACE.missions.operations.node_chain import NodeChainOperation
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    """ Cache keys and storing and restoring of cached results """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = pySPACE.configuration.storage
+        pySPACE.configuration.storage = self.temp_dir + os.sep
+        self.dataset_dir = os.path.join(self.temp_dir, "input", "{data}")
+        os.makedirs(self.dataset_dir)
+        self.write_meta_data("type: feature_vector\n")
+        self.node_chain_spec = [
+            {"node": "FeatureVectorSource"},
+            {"node": "Gaussian_Feature_Normalization"},
+            {"node": "SorSvm", "parameters": {"complexity": "~~C~~"}}]
+        self.parameter_setting = {"~~C~~": 1,
+                                  "__RESULT_DIRECTORY__": "/result/a"}
+
+    def tearDown(self):
+        pySPACE.configuration.storage = self.storage
+        shutil.rmtree(self.temp_dir)
+
+    def write_meta_data(self, content):
+        meta_file = open(os.path.join(self.dataset_dir, "metadata.yaml"), "w")
+        meta_file.write(content)
+        meta_file.close()
+
+    def key(self, parameter_setting=None, run=0):
+        if parameter_setting is None:
+            parameter_setting = self.parameter_setting
+        return NodeChainOperation._get_cache_key(
+            self.node_chain_spec, parameter_setting, self.dataset_dir,
+            run, 0, None, False)
+
+    def test_cache_key(self):
+        key = self.key()
+        # result directory of the operation is not relevant
+        self.assertEqual(key, self.key({"~~C~~": 1,
+                                        "__RESULT_DIRECTORY__": "/result/b"}))
+        self.assertNotEqual(key, self.key({"~~C~~": 2}))
+        self.assertNotEqual(key, self.key(run=1))
+        self.write_meta_data("type: feature_vector\nruns: 2\n")
+        self.assertNotEqual(key, self.key())
+
+    def test_cache_directory(self):
+        self.assertEqual(NodeChainOperation._get_cache_directory({}), None)
+        cache_dir = NodeChainOperation._get_cache_directory(
+            {"result_cache": True})
+        self.assertEqual(cache_dir,
+                         os.path.join(self.temp_dir, "result_cache"))
+        self.assertTrue(os.path.isdir(cache_dir))
+
+    def test_store_and_restore(self):
+        process_cache_dir = os.path.join(self.temp_dir, "cache", self.key())
+        result_dir = os.path.join(process_cache_dir, "result", "{data}")
+        os.makedirs(os.path.join(result_dir, "persistency_run0"))
+        open(os.path.join(result_dir, "metadata.yaml"), "w").write("runs: 1")
+        open(os.path.join(process_cache_dir, "result",
+                          "results_r0_sp0_test_{data}.csv"), "w").write("a,b")
+        operation_dir = os.path.join(self.temp_dir, "operation")
+        # incomplete entries are not used
+        self.assertFalse(NodeChainOperation._restore_cached_result(
+            process_cache_dir, operation_dir))
+        self.assertFalse(os.path.exists(operation_dir))
+
+        NodeChainOperation._store_cache_manifest(process_cache_dir)
+        self.assertTrue(NodeChainOperation._restore_cached_result(
+            process_cache_dir, operation_dir))
+        self.assertTrue(os.path.isdir(os.path.join(operation_dir, "{data}",
+                                                   "persistency_run0")))
+        self.assertEqual(open(os.path.join(operation_dir, "{data}",
+                                           "metadata.yaml")).read(), "runs: 1")
+        self.assertTrue(os.path.isfile(os.path.join(
+            operation_dir, "results_r0_sp0_test_{data}.csv")))
+
+        # damaged entries are not used
+        open(os.path.join(result_dir, "metadata.yaml"), "w").write("runs")
+        self.assertFalse(NodeChainOperation._restore_cached_result(
+            process_cache_dir, os.path.join(self.temp_dir, "operation2")))
+
+    def write_attempt(self, attempt_dir, content):
+        result_dir = os.path.join(attempt_dir, "result", "{data}")
+        os.makedirs(result_dir)
+        open(os.path.join(result_dir, "metadata.yaml"), "w").write(content)
+
+    def test_concurrent_attempts(self):
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        os.makedirs(cache_dir)
+        process_cache_dir = os.path.join(cache_dir, self.key())
+        first = NodeChainOperation._create_cache_attempt(process_cache_dir)
+        second = NodeChainOperation._create_cache_attempt(process_cache_dir)
+        self.assertNotEqual(first, second)
+        self.assertEqual(os.path.dirname(first), cache_dir)
+        self.write_attempt(first, "runs: 1")
+        self.write_attempt(second, "runs: 2")
+        # the attempts are not visible as entry
+        self.assertFalse(os.path.exists(process_cache_dir))
+
+        NodeChainOperation._commit_cache_attempt(
+            first, process_cache_dir, os.path.join(self.temp_dir, "op1"))
+        self.assertFalse(os.path.exists(first))
+        # a new attempt does not touch the complete entry
+        third = NodeChainOperation._create_cache_attempt(process_cache_dir)
+        self.assertTrue(os.path.isfile(
+            os.path.join(process_cache_dir, "manifest.yaml")))
+        # the later attempt is discarded and the entry is used
+        NodeChainOperation._commit_cache_attempt(
+            second, process_cache_dir, os.path.join(self.temp_dir, "op2"))
+        self.assertEqual(sorted(os.listdir(cache_dir)),
+                         sorted([self.key(), os.path.basename(third)]))
+        for operation in ["op1", "op2"]:
+            self.assertEqual(open(os.path.join(
+                self.temp_dir, operation, "{data}", "metadata.yaml")).read(),
+                "runs: 1")
+
+    def test_unsafe_manifest(self):
+        process_cache_dir = os.path.join(self.temp_dir, "cache", self.key())
+        os.makedirs(os.path.join(process_cache_dir, "result"))
+        open(os.path.join(process_cache_dir, "manifest.yaml"), "w").write(
+            "!!python/object/apply:os.getcwd []")
+        self.assertFalse(NodeChainOperation._restore_cached_result(
+            process_cache_dir, os.path.join(self.temp_dir, "operation")))
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_node_chain')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,198 @@
+""" Unit tests for the ring buffers and the MarkerWindower
+"""
+
+import unittest
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.missions.support.windower import RingBuffer, \
+    ContiguousRingBuffer, MarkerWindower, BulkMarkerWindower, \
+    LabeledWindowDef, ExcludeDef, IncludeDef
+
+
+class ArrayStreamClient(object):
+    """ Stream blocks of a sample array with markers to the windower
+
+    If *block_sizes* are given, the blocks are read with these sizes
+    (cyclically) instead of *blocksize*.
+    """
+    def __init__(self, samples, markers, blocksize, block_sizes=None):
+        self.samples = samples
+        self.markers = markers
+        self.stdblocksize = blocksize
+        self.block_sizes = block_sizes or [blocksize]
+        self.nblocks = 0
+        self.dSamplingInterval = 1000.0
+        self.channelNames = ["C%d" % i for i in range(samples.shape[0])]
+        self.markerids = {"null": 0, "S1": 1, "S2": 2}
+        self.markerNames = {0: "null", 1: "S1", 2: "S2"}
+        self.callbacks = []
+        self.position = 0
+
+    def regcallback(self, func):
+        self.callbacks.append(func)
+
+    def read(self, nblocks=1):
+        nread = 0
+        while nread < nblocks:
+            size = self.block_sizes[self.nblocks % len(self.block_sizes)]
+            if self.position + size > self.samples.shape[1]:
+                break
+            block = slice(self.position, self.position + size)
+            for func in self.callbacks:
+                func(self.samples[:, block], self.markers[block])
+            self.position += size
+            self.nblocks += 1
+            nread += 1
+        return nread
+
+
+class ContiguousRingBufferTestCase(unittest.TestCase):
+    """ The buffer has to contain the same samples as the list RingBuffer """
+
+    def test_same_content_as_ring_buffer(self):
+        ring_buffer = RingBuffer(3)
+        contiguous_buffer = ContiguousRingBuffer(3, 4)
+        for i in range(10):
+            block = numpy.arange(8 * i, 8 * i + 8).reshape(2, 4)
+            ring_buffer.append(block)
+            contiguous_buffer.append(block)
+            self.assertEqual(len(ring_buffer), len(contiguous_buffer))
+            self.assertTrue(numpy.all(numpy.hstack(ring_buffer.get()) ==
+                                      contiguous_buffer.get()))
+
+    def test_blocks_of_other_size(self):
+        contiguous_buffer = ContiguousRingBuffer(2, 4)
+        data = numpy.arange(30).reshape(1, 30)
+        for start, end in [(0, 3), (3, 10), (10, 11), (11, 30)]:
+            contiguous_buffer.append(data[:, start:end])
+            self.assertTrue(numpy.all(contiguous_buffer.get() ==
+                                      data[:, max(0, end - 8):end]))
+
+    def test_reserve(self):
+        contiguous_buffer = ContiguousRingBuffer(2, 4)
+        data = numpy.arange(30).reshape(1, 30)
+        # the samples already dropped are not restored by a larger capacity
+        for start, end, capacity, first in [(0, 3, 8, 0), (3, 10, 8, 2),
+                                            (10, 11, 12, 2), (11, 20, 12, 8),
+                                            (20, 30, 15, 15)]:
+            contiguous_buffer.reserve(capacity)
+            contiguous_buffer.append(data[:, start:end])
+            self.assertTrue(numpy.all(contiguous_buffer.get() ==
+                                      data[:, first:end]))
+
+
+class MarkerWindowerTestCase(unittest.TestCase):
+    """ Test the extraction of windows and their markers """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.samples = numpy.random.randn(3, 5000)
+        self.markers = -numpy.ones(5000, dtype=int)
+        self.positions = [500, 1234, 2000, 3999]
+        self.markers[self.positions] = 1
+        self.markers[2100] = 2
+
+    def test_windows(self):
+        client = ArrayStreamClient(self.samples, self.markers, 100)
+        windower = MarkerWindower(
+            client, [LabeledWindowDef("w1", "Target", "S1", -200, 300)])
+        windows = list(windower)
+        self.assertEqual(len(windows), len(self.positions))
+        for (window, label), position in zip(windows, self.positions):
+            self.assertEqual(label, "Target")
+            self.assertTrue(numpy.all(
+                window.view(numpy.ndarray) ==
+                self.samples[:, position - 200:position + 301].T))
+        # the marker of the window is included with its offset in ms
+        self.assertEqual(windows[0][0].marker_name["S1"][0], 0.0)
+        self.assertEqual(windows[2][0].marker_name["S2"], [100.0])
+
+    def test_blocks_of_other_size(self):
+        """ Blocks shorter or longer than stdblocksize give the same windows
+        """
+        self.markers[4700] = 1
+        windowdefs = [LabeledWindowDef("w1", "Target", "S1", -200, 200)]
+        std_windows = list(MarkerWindower(
+            ArrayStreamClient(self.samples, self.markers, 100), windowdefs))
+        self.assertEqual(len(std_windows), len(self.positions) + 1)
+        for block_sizes in [[100, 50, 100, 70], [100, 30, 170, 1, 99]]:
+            windows = list(MarkerWindower(
+                ArrayStreamClient(self.samples, self.markers, 100,
+                                  block_sizes), windowdefs))
+            self.assertEqual(len(windows), len(std_windows))
+            for (window, label), (std_window, std_label), position in \
+                    zip(windows, std_windows, self.positions + [4700]):
+                self.assertTrue(numpy.all(
+                    window.view(numpy.ndarray) ==
+                    self.samples[:, position - 200:position + 201].T))
+                self.assertEqual(window.start_time, std_window.start_time)
+                self.assertEqual(window.end_time, std_window.end_time)
+                self.assertEqual(window.marker_name, std_window.marker_name)
+
+
+class BulkMarkerWindowerTestCase(unittest.TestCase):
+    """ The BulkMarkerWindower has to cut the same windows """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.samples = numpy.random.randn(2, 4000)
+        self.markers = -numpy.ones(4000, dtype=int)
+        self.markers[numpy.random.randint(0, 4000, 40)] = \
+            numpy.random.randint(1, 3, 40)
+
+    def get_windowdefs(self):
+        return [
+            LabeledWindowDef("s1", "Target", "S1", -300, 100,
+                             excludedefs=[ExcludeDef("S2", 100, 200)]),
+            LabeledWindowDef("s2", "Standard", "S2", -150, 0, skipfirstms=500,
+                             includedefs=[IncludeDef("S1", 300, 300)]),
+            LabeledWindowDef("null", "NoTarget", "null", -500, 0,
+                             excludedefs=[ExcludeDef("S1", 500, 100),
+                                          ExcludeDef("S2", 500, 100)])]
+
+    def compare(self, blocksize, nullmarker_stride_ms, no_overlap):
+        windows = list(MarkerWindower(
+            ArrayStreamClient(self.samples, self.markers, blocksize),
+            self.get_windowdefs(), nullmarker_stride_ms=nullmarker_stride_ms,
+            no_overlap=no_overlap))
+        bulk_windows = list(BulkMarkerWindower(
+            ArrayStreamClient(self.samples, self.markers, blocksize),
+            self.get_windowdefs(), nullmarker_stride_ms=nullmarker_stride_ms,
+            no_overlap=no_overlap))
+        self.assertTrue(len(windows) > 0)
+        self.assertEqual(len(windows), len(bulk_windows))
+        for (window, label), (bulk_window, bulk_label) in \
+                zip(windows, bulk_windows):
+            self.assertEqual(label, bulk_label)
+            self.assertEqual(window.specs["wdef_name"],
+                             bulk_window.specs["wdef_name"])
+            self.assertEqual(window.start_time, bulk_window.start_time)
+            self.assertEqual(window.end_time, bulk_window.end_time)
+            self.assertEqual(window.marker_name, bulk_window.marker_name)
+            self.assertTrue(numpy.all(window.view(numpy.ndarray) ==
+                                      bulk_window.view(numpy.ndarray)))
+
+    def test_same_windows(self):
+        self.compare(100, 1000, False)
+        self.compare(37, 250, True)
+        self.compare(64, None, False)
+
+    def test_start_marker_not_supported(self):
+        windowdefs = [LabeledWindowDef("s1", "Target", "S1", -300, 100,
+                                       startmarker="S2")]
+        self.assertFalse(BulkMarkerWindower.supports(windowdefs))
+        self.assertRaises(NotImplementedError, BulkMarkerWindower,
+                          ArrayStreamClient(self.samples, self.markers, 100),
+                          windowdefs)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_windower')
+    unittest.TextTestRunner(verbosity=2).run(suite)
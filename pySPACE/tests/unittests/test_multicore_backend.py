@@ -0,0 +1,88 @@
+""" Unit tests for the exchange of subflow jobs in the MulticoreBackend
+"""
+
+import unittest
+import multiprocessing
+import socket
+import os
+
+if __name__ == '__main__':
+    import sys
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.environments.backends.multicore import LocalComHandler, \
+    _initialize_worker, subflow_channel
+
+
+def _square(x):
+    """ Job of the subflow pool """
+    if x < 0:
+        raise ValueError("negative value")
+    return x * x
+
+
+def _map_in_worker(values):
+    """ Send jobs from a worker of the backend pool to the handler """
+    channel = subflow_channel()
+    results = channel.map(_square, [(x,) for x in values], 2)
+    return channel.index, multiprocessing.current_process().daemon, \
+        results
+
+
+def _fail_in_worker():
+    """ A failing job must not block the worker """
+    try:
+        subflow_channel().map(_square, [(1,), (-1,), (2,)], 2)
+    except Exception, e:
+        failed = "negative value" in str(e)
+    else:
+        failed = False
+    # the channel can still be used
+    return failed, subflow_channel().map(_square, [(3,)], 2)[0]
+
+
+class SubflowChannelTestCase(unittest.TestCase):
+    """ Jobs of daemonic workers are executed by the LocalComHandler """
+
+    def setUp(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.requests = multiprocessing.Queue()
+        self.replies = [multiprocessing.Queue() for i in range(2)]
+        self.handler = LocalComHandler(self.sock, self.requests, self.replies)
+        self.handler.start()
+        self.pool = multiprocessing.Pool(
+            2, initializer=_initialize_worker,
+            initargs=({}, None, None, None, self.requests, self.replies,
+                      multiprocessing.Value("i", 0)))
+
+    def tearDown(self):
+        self.pool.close()
+        self.pool.join()
+        self.handler.stop()
+        self.handler.join()
+        self.sock.close()
+
+    def test_map(self):
+        results = [self.pool.apply_async(_map_in_worker, (range(i, i + 6),))
+                   for i in range(4)]
+        indices = set()
+        for i, result in enumerate(results):
+            index, daemon, squares = result.get(timeout=60)
+            indices.add(index)
+            self.assertTrue(daemon)
+            self.assertEqual(squares, [x * x for x in range(i, i + 6)])
+        self.assertTrue(indices <= set([0, 1]))
+        self.assertTrue(subflow_channel() is None)
+
+    def test_failed_job(self):
+        failed, square = self.pool.apply(_fail_in_worker)
+        self.assertTrue(failed)
+        self.assertEqual(square, 9)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_multicore_backend')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,208 @@
+""" Unit tests for the benchmarking of node chains with shared prefixes,
+with outputs shared by the splits of a cross-validation
+and with splits processed in parallel
+"""
+
+import unittest
+import copy
+import multiprocessing
+import os
+import shutil
+import tempfile
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.environments.chains.node_chain import BenchmarkNodeChain, \
+    NodeChainFactory, SharedNodeOutput
+from pySPACE.resources.data_types.feature_vector import FeatureVector
+from pySPACE.missions.nodes.postprocessing.feature_normalization import \
+    EuclideanFeatureNormalizationNode, GaussianFeatureNormalizationNode
+
+
+def _benchmark_in_daemon(spec, data, split_processes):
+    """ Benchmark a node chain in a daemonic worker of a pool """
+    chain = NodeChainFactory.flow_from_yaml(
+        Flow_Class=BenchmarkNodeChain, flow_spec=spec)
+    result = chain.benchmark(data, run=1, split_processes=split_processes)
+    return multiprocessing.current_process().daemon, os.getpid(), result.data
+
+
+class SharedPrefixTestCase(unittest.TestCase):
+    """ Shared prefixes have to give the same results as separate chains """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.data = [(FeatureVector(numpy.random.randn(1, 4) + i % 2,
+                                    ["f%d" % j for j in range(4)]),
+                      ["Standard", "Target"][i % 2]) for i in range(60)]
+        self.specs = []
+        for complexity in [0.1, 1, 10]:
+            self.specs.append([
+                {"node": "External_Generator_Source_Node"},
+                {"node": "CV_Splitter", "parameters": {"splits": 3}},
+                {"node": "Gaussian_Feature_Normalization"},
+                {"node": "SorSvm",
+                 "parameters": {"complexity": complexity,
+                                "class_labels": ["Standard", "Target"]}},
+                {"node": "Classification_Performance_Sink",
+                 "parameters": {"ir_class": "Target"}}])
+        # different preprocessing
+        self.specs.append(copy.deepcopy(self.specs[0]))
+        self.specs[-1][2] = {"node": "Euclidean_Feature_Normalization"}
+
+    def create_chains(self):
+        return [NodeChainFactory.flow_from_yaml(
+            Flow_Class=BenchmarkNodeChain, flow_spec=copy.deepcopy(spec))
+            for spec in self.specs]
+
+    def performances(self, result_collection):
+        return [result_collection.data[key]["Balanced_accuracy"]
+                for key in sorted(result_collection.data.keys())]
+
+    def test_share_prefixes(self):
+        chains = self.create_chains()
+        BenchmarkNodeChain.share_prefixes(chains, self.specs)
+        for chain in chains[1:]:
+            self.assertTrue(chain[1] is chains[0][1])
+            self.assertTrue(chain[-1] is not chains[0][-1])
+        self.assertTrue(chains[1][2] is chains[0][2])
+        self.assertTrue(chains[3][2] is not chains[0][2])
+        self.assertTrue(isinstance(chains[1][3].input_node, SharedNodeOutput))
+        self.assertTrue(isinstance(chains[3][2].input_node, SharedNodeOutput))
+        self.assertTrue(chains[0][1].caching)
+        self.assertTrue(chains[0][2].caching)
+
+    def test_shared_equals_separate_benchmark(self):
+        separate_results = [chain.benchmark(self.data, run=1)
+                            for chain in self.create_chains()]
+        chains = self.create_chains()
+        BenchmarkNodeChain.share_prefixes(chains, self.specs)
+        shared_results = BenchmarkNodeChain.benchmark_shared(chains,
+                                                             self.data, run=1)
+        self.assertEqual(len(shared_results), len(separate_results))
+        for separate, shared in zip(separate_results, shared_results):
+            self.assertEqual(len(shared.data), 3)
+            self.assertEqual(self.performances(separate),
+                             self.performances(shared))
+
+
+class SplitIndependentOutputTestCase(unittest.TestCase):
+    """ Untrained nodes after the splitter process each window only once """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.data = [(FeatureVector(numpy.random.randn(1, 4) + i % 2,
+                                    ["f%d" % j for j in range(4)]),
+                      ["Standard", "Target"][i % 2]) for i in range(60)]
+        self.executions = 0
+        self.original_execute = EuclideanFeatureNormalizationNode._execute
+        def counting_execute(node, data):
+            self.executions += 1
+            return self.original_execute(node, data)
+        EuclideanFeatureNormalizationNode._execute = counting_execute
+
+    def tearDown(self):
+        EuclideanFeatureNormalizationNode._execute = self.original_execute
+
+    def benchmark(self, share_split_outputs):
+        parameters = {"share_split_outputs": share_split_outputs}
+        spec = [{"node": "External_Generator_Source_Node"},
+                {"node": "CV_Splitter", "parameters": {"splits": 5}},
+                {"node": "Euclidean_Feature_Normalization",
+                 "parameters": parameters},
+                {"node": "Euclidean_Feature_Normalization",
+                 "parameters": parameters},
+                {"node": "SorSvm",
+                 "parameters": {"class_labels": ["Standard", "Target"]}},
+                {"node": "Classification_Performance_Sink",
+                 "parameters": {"ir_class": "Target"}}]
+        chain = NodeChainFactory.flow_from_yaml(
+            Flow_Class=BenchmarkNodeChain, flow_spec=spec)
+        self.executions = 0
+        result = chain.benchmark(self.data, run=1)
+        return result, self.executions
+
+    def test_shared_equals_recomputed_outputs(self):
+        result, executions = self.benchmark(False)
+        # both nodes process every window in every split
+        self.assertEqual(executions, 2 * 5 * 60)
+        shared_result, shared_executions = self.benchmark(True)
+        # once as training and once as testing window
+        self.assertEqual(shared_executions, 2 * 2 * 60)
+        self.assertEqual(len(shared_result.data), 5)
+        for key in result.data:
+            self.assertEqual(result.data[key]["Balanced_accuracy"],
+                             shared_result.data[key]["Balanced_accuracy"])
+
+
+class ParallelSplitsTestCase(unittest.TestCase):
+    """ Parallel splits have to give the same results as sequential ones """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.data = [(FeatureVector(numpy.random.randn(1, 4) + i % 2,
+                                    ["f%d" % j for j in range(4)]),
+                      ["Standard", "Target"][i % 2]) for i in range(60)]
+        self.spec = [{"node": "External_Generator_Source_Node"},
+                     {"node": "CV_Splitter", "parameters": {"splits": 5}},
+                     {"node": "Gaussian_Feature_Normalization"},
+                     {"node": "SorSvm",
+                      "parameters": {"class_labels": ["Standard", "Target"]}},
+                     {"node": "Classification_Performance_Sink",
+                      "parameters": {"ir_class": "Target"}}]
+
+    def benchmark(self, split_processes):
+        chain = NodeChainFactory.flow_from_yaml(
+            Flow_Class=BenchmarkNodeChain, flow_spec=copy.deepcopy(self.spec))
+        return chain.benchmark(self.data, run=1,
+                               split_processes=split_processes)
+
+    def test_parallel_equals_sequential_splits(self):
+        result = self.benchmark(1)
+        parallel_result = self.benchmark(3)
+        self.assertEqual(sorted(result.data.keys()),
+                         sorted(parallel_result.data.keys()))
+        self.assertEqual(len(parallel_result.data), 5)
+        for key in result.data:
+            for metric in ["Balanced_accuracy", "True_positives",
+                           "False_negatives", "__Split__"]:
+                self.assertEqual(result.data[key][metric],
+                                 parallel_result.data[key][metric])
+
+    def test_parallel_splits_in_daemonic_process(self):
+        pid_dir = tempfile.mkdtemp()
+        original_execute = GaussianFeatureNormalizationNode._execute
+        def recording_execute(node, data):
+            # mark the process, which processes the split
+            open(os.path.join(pid_dir, str(os.getpid())), "w").close()
+            return original_execute(node, data)
+        GaussianFeatureNormalizationNode._execute = recording_execute
+        pool = multiprocessing.Pool(1)
+        try:
+            daemon, pid, data = pool.apply(
+                _benchmark_in_daemon, (copy.deepcopy(self.spec), self.data, 2))
+        finally:
+            pool.close()
+            pool.join()
+            GaussianFeatureNormalizationNode._execute = original_execute
+            split_pids = os.listdir(pid_dir)
+            shutil.rmtree(pid_dir)
+        self.assertTrue(daemon)
+        # two processes, both different from the daemonic worker
+        self.assertEqual(len(split_pids), 2)
+        self.assertFalse(str(pid) in split_pids)
+        result = self.benchmark(1)
+        self.assertEqual(sorted(result.data.keys()), sorted(data.keys()))
+        for key in result.data:
+            self.assertEqual(result.data[key]["Balanced_accuracy"],
+                             data[key]["Balanced_accuracy"])
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_node_chain')
+    unittest.TextTestRunner(verbosity=2).run(suite)
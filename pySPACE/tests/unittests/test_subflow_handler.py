@@ -0,0 +1,164 @@
+""" Unit tests for the subflow execution of the SubflowHandler
+"""
+
+import unittest
+import multiprocessing
+import shutil
+import socket
+import tempfile
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.environments.chains.node_chain import SubflowHandler, \
+    _share_train_instances, _load_shared_train_instances
+from pySPACE.environments.backends.multicore import LocalComHandler, \
+    _initialize_worker
+from pySPACE.missions.nodes.base_node import BaseNode
+from pySPACE.resources.data_types.feature_vector import FeatureVector
+
+
+class SubflowHandlerNode(BaseNode, SubflowHandler):
+    """ Minimal node to execute subflows """
+    def __init__(self, **kwargs):
+        BaseNode.__init__(self)
+        SubflowHandler.__init__(self, **kwargs)
+
+
+def _execute_local_subflows(flow_template, train_instances, temp_dir,
+                            modality="local"):
+    """ Execute subflows with 'local' modality, e.g., in a daemonic worker """
+    handler = SubflowHandlerNode(processing_modality=modality, pool_size=2)
+    handler.temp_dir = temp_dir
+    handler.run_number = 0
+    subflows = [handler.generate_subflow(flow_template) for i in range(2)]
+    result_collections = handler.execute_subflows(train_instances, subflows)
+    handler.close_subflow_pool()
+    return handler.modality, \
+        [result.get_average_performance("Balanced_accuracy")
+         for result in result_collections]
+
+
+class SubflowHandlerTestCase(unittest.TestCase):
+    """ Test the local execution of subflows with shared training data """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.temp_dir = tempfile.mkdtemp()
+        self.train_instances = \
+            [(FeatureVector(numpy.random.randn(1, 4) + i % 2,
+                            ["f%d" % j for j in range(4)]),
+              ["Standard", "Target"][i % 2]) for i in range(60)]
+        self.flow_template = [
+            {"node": "External_Generator_Source_Node"},
+            {"node": "CV_Splitter", "parameters": {"splits": 3}},
+            {"node": "LinearDiscriminantAnalysisClassifierNode",
+             "parameters": {"class_labels": ["Standard", "Target"]}},
+            {"node": "Classification_Performance_Sink",
+             "parameters": {"ir_class": "Target"}}]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_shared_train_instances(self):
+        _share_train_instances(self.train_instances, self.temp_dir)
+        loaded_instances = _load_shared_train_instances(self.temp_dir)
+        self.assertEqual(len(loaded_instances), len(self.train_instances))
+        for (data, label), (loaded_data, loaded_label) in \
+                zip(self.train_instances, loaded_instances):
+            self.assertEqual(label, loaded_label)
+            self.assertTrue(isinstance(loaded_data, FeatureVector))
+            self.assertTrue(numpy.all(data == loaded_data))
+            self.assertEqual(data.feature_names, loaded_data.feature_names)
+        # every call creates new objects
+        loaded_instances[0][0][0, 0] = 1000
+        self.assertNotEqual(
+            _load_shared_train_instances(self.temp_dir)[0][0][0, 0], 1000)
+
+    def test_local_equals_serial_execution(self):
+        performances = {}
+        for modality in ["serial", "local"]:
+            handler = SubflowHandlerNode(processing_modality=modality,
+                                         pool_size=2)
+            handler.temp_dir = self.temp_dir
+            handler.run_number = 0
+            performances[modality] = []
+            for repetition in range(2):
+                subflows = [handler.generate_subflow(self.flow_template)
+                            for i in range(3)]
+                result_collections = handler.execute_subflows(
+                    self.train_instances, subflows, [0, 1])
+                performances[modality].extend(
+                    [result.get_average_performance("Balanced_accuracy")
+                     for result in result_collections])
+            handler.close_subflow_pool()
+            self.assertEqual(handler.shared_data_dir, None)
+        self.assertEqual(performances["serial"], performances["local"])
+
+    def test_daemonic_process(self):
+        pool = multiprocessing.Pool(1)
+        try:
+            modality, performances = pool.apply(
+                _execute_local_subflows,
+                (self.flow_template, self.train_instances, self.temp_dir))
+        finally:
+            pool.close()
+            pool.join()
+        # no pool can be started in the worker of a pool
+        self.assertEqual(modality, "serial")
+        self.assertEqual(performances, _execute_local_subflows(
+            self.flow_template, self.train_instances, self.temp_dir)[1])
+
+    def test_multicore_worker(self):
+        """ Workers of the MulticoreBackend use the pool of the backend """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        requests = multiprocessing.Queue()
+        replies = [multiprocessing.Queue()]
+        com_handler = LocalComHandler(sock, requests, replies)
+        com_handler.start()
+        pool = multiprocessing.Pool(
+            1, initializer=_initialize_worker,
+            initargs=({}, None, None, None, requests, replies,
+                      multiprocessing.Value("i", 0)))
+        try:
+            results = [pool.apply(_execute_local_subflows,
+                                  (self.flow_template, self.train_instances,
+                                   self.temp_dir, modality))
+                       for modality in ["local", "backend"]]
+        finally:
+            pool.close()
+            pool.join()
+            com_handler.stop()
+            com_handler.join()
+            sock.close()
+        serial_performances = _execute_local_subflows(
+            self.flow_template, self.train_instances, self.temp_dir,
+            "serial")[1]
+        for modality, (used_modality, performances) in \
+                zip(["local", "backend"], results):
+            self.assertEqual(used_modality, modality)
+            self.assertEqual(performances, serial_performances)
+
+    def test_share_once(self):
+        handler = SubflowHandlerNode(processing_modality="local")
+        handler.temp_dir = self.temp_dir
+        handler._share_train_instances(self.train_instances)
+        shared_data_dir = handler.shared_data_dir
+        handler._share_train_instances(self.train_instances)
+        self.assertEqual(handler.shared_data_dir, shared_data_dir)
+        # other instances are shared again
+        handler._share_train_instances(list(self.train_instances))
+        self.assertNotEqual(handler.shared_data_dir, shared_data_dir)
+        handler.close_subflow_pool()
+        self.assertTrue(handler.shared_train_instances is None)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_subflow_handler')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1 @@
+""" Unittests for tools """
@@ -0,0 +1,242 @@
+""" Unit tests for the ResultTable and the filtering of result tables
+"""
+
+import unittest
+import cPickle
+import glob
+import os
+import shutil
+import tempfile
+import warnings
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.tools import csv_analysis
+from pySPACE.tools.csv_analysis import ResultTable
+from pySPACE.resources.dataset_defs.base import BaseDataset
+from pySPACE.resources.dataset_defs.performance_result import \
+    PerformanceResultSummary
+
+
+class ResultTableTestCase(unittest.TestCase):
+    """ Loading, caching, selecting and grouping of result tables """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data = {"__Dataset__": ["a", "b", "a", "c", "b", "a"],
+                     "__C__": ["1", "1", "10", "10", "1", "10"],
+                     "Balanced_accuracy": ["0.5", "0.6", "0.7", "0.8", "0.9",
+                                           "1.0"],
+                     "~~Info~~": ["x", "y", "x", "y", "x", "y"]}
+        self.file_path = os.path.join(self.temp_dir, "results.csv")
+        csv_analysis.dict2csv(self.file_path, self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check_table(self, table):
+        self.assertEqual(sorted(table.keys()), sorted(self.data.keys()))
+        self.assertEqual(table.get_num_rows(), 6)
+        self.assertEqual(table["Balanced_accuracy"].dtype, numpy.float)
+        self.assertTrue(numpy.allclose(table["Balanced_accuracy"],
+                                       [0.5, 0.6, 0.7, 0.8, 0.9, 1.0]))
+        for key in ["__Dataset__", "__C__", "~~Info~~"]:
+            self.assertEqual(list(table[key]), self.data[key])
+
+    def test_cache(self):
+        self.check_table(ResultTable.from_csv(self.file_path))
+        self.assertTrue(os.path.isfile(self.file_path + ".cache"))
+        self.check_table(ResultTable.from_csv(self.file_path))
+        # a broken cache is ignored
+        cache = open(self.file_path + ".cache", "w")
+        cache.write("broken")
+        cache.close()
+        self.check_table(ResultTable.from_csv(self.file_path))
+        # changed files are parsed again
+        csv_file = open(self.file_path, "a")
+        csv_file.write('"100","a","0.1","x"\n')
+        csv_file.close()
+        table = ResultTable.from_csv(self.file_path)
+        self.assertEqual(table.get_num_rows(), 7)
+        self.assertEqual(table["__C__"][6], "100")
+
+    def test_dict2csv(self):
+        table = ResultTable.from_csv(self.file_path)
+        output = os.path.join(self.temp_dir, "copy.csv")
+        csv_analysis.dict2csv(output, table)
+        self.assertEqual(open(self.file_path).read(), open(output).read())
+
+    def test_strip_dict(self):
+        table = ResultTable(self.data)
+        for data in [self.data, table]:
+            stripped = csv_analysis.strip_dict(
+                data, {"__Dataset__": ["a", "c"], "__C__": ["10"]})
+            self.assertEqual(list(stripped["Balanced_accuracy"]),
+                             [0.7, 0.8, 1.0] if data is table
+                             else ["0.7", "0.8", "1.0"])
+            stripped = csv_analysis.strip_dict(
+                data, {"__Dataset__": ["a"]}, invert_mask=True,
+                limit2keys=["__C__"])
+            self.assertEqual(stripped.keys(), ["__C__"])
+            self.assertEqual(list(stripped["__C__"]), ["1", "10", "1"])
+            with warnings.catch_warnings(record=True):
+                warnings.simplefilter("always")
+                self.assertEqual(csv_analysis.strip_dict(
+                    data, {"__Dataset__": ["d"]}), {})
+        self.assertTrue(isinstance(stripped, ResultTable))
+
+    def test_group_indices(self):
+        table = ResultTable(self.data)
+        groups = table.group_indices(["__Dataset__", "__C__"])
+        self.assertEqual(sorted(groups.keys()),
+                         [("a", "1"), ("a", "10"), ("b", "1"), ("c", "10")])
+        self.assertEqual(list(groups[("a", "10")]), [2, 5])
+        selection = table.select(groups[("b", "1")], ["__Dataset__", "__C__"])
+        self.assertEqual(selection.get_mask({"__C__": ["1"]}).tolist(),
+                         [True, True])
+        # new values invalidate the categories
+        selection["__C__"] = ["2", "1"]
+        self.assertEqual(selection.get_mask({"__C__": ["1"]}).tolist(),
+                         [False, True])
+
+    def test_summary(self):
+        summary = PerformanceResultSummary(dataset_dir=self.temp_dir)
+        projection = summary.project_onto("__Dataset__", "a")
+        self.assertFalse("__Dataset__" in projection.data)
+        self.assertEqual(list(projection.data["__C__"]), ["1", "10", "10"])
+        self.assertTrue(summary.project_onto("__Dataset__", "d") is None)
+        self.assertEqual(summary.get_performance_entry(
+            {"__Dataset__": "c", "__C__": "10"})["Balanced_accuracy"], 0.8)
+
+    def test_multiple_csv(self):
+        os.remove(self.file_path)
+        for index in range(6):
+            part = dict((key, [values[index]])
+                        for key, values in self.data.iteritems())
+            csv_analysis.dict2csv(
+                os.path.join(self.temp_dir, "results_%d.csv" % index), part)
+        for pool_size in [1, 4]:
+            data, pathlist = PerformanceResultSummary.from_multiple_csv(
+                self.temp_dir, pool_size=pool_size)
+            self.assertEqual(len(pathlist), 6)
+            order = [int(os.path.basename(path)[8:-4]) for path in pathlist]
+            for key, values in self.data.iteritems():
+                self.assertEqual(data[key], [values[i] for i in order])
+
+    def test_merge_csv_files(self):
+        os.remove(self.file_path)
+        self.data["__Key_Run__"] = ["0", "0", "0", "1", "1", "1"]
+        self.data["__Key_Fold__"] = ["0", "1", "2", "0", "1", "2"]
+        for index in range(0, 6, 2):
+            part = dict((key, values[index:index + 2])
+                        for key, values in self.data.iteritems())
+            if index == 4:
+                # columns, which only exist in some files
+                part["~~Extra~~"] = ["e", "f"]
+                del part["~~Info~~"]
+            csv_analysis.dict2csv(
+                os.path.join(self.temp_dir, "results_%d.csv" % index), part)
+        rows = PerformanceResultSummary.merge_csv_files(self.temp_dir,
+                                                        pool_size=2)
+        self.assertEqual(rows, 6)
+        self.assertEqual(glob.glob(os.path.join(self.temp_dir, "results_*")),
+                         [])
+        merged = csv_analysis.csv2dict(self.file_path)
+        self.assertEqual(sorted(merged.keys()),
+                         sorted(self.data.keys() + ["~~Extra~~"]))
+        order = [merged["__Key_Run__"][i] + merged["__Key_Fold__"][i]
+                 for i in range(6)]
+        for key, values in self.data.iteritems():
+            expected = dict(zip([self.data["__Key_Run__"][i] +
+                                 self.data["__Key_Fold__"][i]
+                                 for i in range(6)], values))
+            if key == "~~Info~~":
+                expected["11"] = expected["12"] = ""
+            self.assertEqual(merged[key], [expected[key] for key in order])
+        self.assertEqual(sorted(merged["~~Extra~~"]), ["", "", "", "", "e",
+                                                       "f"])
+        short = csv_analysis.csv2dict(
+            os.path.join(self.temp_dir, "short_results.csv"))
+        self.assertEqual(sorted(short.keys()),
+                         ["Balanced_accuracy", "__C__", "__Dataset__",
+                          "__Key_Fold__", "__Key_Run__"])
+        meta_data = BaseDataset.load_meta_data(self.temp_dir)
+        self.assertEqual(meta_data["type"], "result")
+        self.assertEqual(meta_data["runs"], 2)
+        self.assertEqual(meta_data["splits"], 2)
+        summary = PerformanceResultSummary(dataset_dir=self.temp_dir)
+        self.assertEqual(len(summary.data["__C__"]), 6)
+
+    def test_merge_traces(self):
+        for run in range(2):
+            path = os.path.join(self.temp_dir, "{data}{__C__#1}",
+                                "persistency_run%d" % run, "node")
+            os.makedirs(path)
+            for split in range(2):
+                for prefix in ["", "long_"]:
+                    trace_file = open(os.path.join(
+                        path, "%strace_sp%d.pickle" % (prefix, split)), "wb")
+                    cPickle.dump([prefix, run, split], trace_file)
+                    trace_file.close()
+        os.remove(os.path.join(self.temp_dir, "{data}{__C__#1}",
+                               "persistency_run1", "node",
+                               "long_trace_sp1.pickle"))
+        PerformanceResultSummary.merge_traces(self.temp_dir, pool_size=2)
+        traces = cPickle.load(open(os.path.join(self.temp_dir,
+                                                "traces.pickle"), "rb"))
+        keys = traces.pop("parameter_keys")
+        self.assertEqual(len(traces), 4)
+        for identifier, trace in traces.iteritems():
+            values = dict(zip(keys, identifier))
+            self.assertEqual(trace, ["", values["__Key_Run__"],
+                                     values["__Key_Fold__"]])
+        # the long traces are incomplete and stay in place
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir,
+                                                     "long_traces.pickle")))
+        self.assertEqual(len(glob.glob(os.path.join(
+            self.temp_dir, "*", "*", "node", "long_trace_sp*"))), 3)
+        self.assertEqual(glob.glob(os.path.join(
+            self.temp_dir, "*", "*", "node", "trace_sp*")), [])
+
+    def test_store_without_key_columns(self):
+        """ Results without __Key_Fold__ and __Key_Run__ columns """
+        os.remove(self.file_path)
+        self.data["Key_Run"] = ["0", "0", "0", "1", "1", "1"]
+        self.data["Key_Fold"] = ["0", "1", "2", "0", "1", "2"]
+        for index in range(0, 6, 2):
+            part = dict((key, values[index:index + 2])
+                        for key, values in self.data.iteritems())
+            csv_analysis.dict2csv(
+                os.path.join(self.temp_dir, "results_%d.csv" % index), part)
+        summary = PerformanceResultSummary(dataset_dir=self.temp_dir)
+        self.assertFalse("__Key_Fold__" in summary.identifiers)
+        result_dir = os.path.join(self.temp_dir, "stored")
+        os.mkdir(result_dir)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            summary.store(result_dir)
+        self.assertFalse(os.path.isfile(
+            os.path.join(self.temp_dir, "results_0.csv")))
+        stored = csv_analysis.csv2dict(os.path.join(result_dir, "results.csv"))
+        self.assertEqual(sorted(stored.keys()), sorted(self.data.keys()))
+        rows = sorted(zip(*[stored[key] for key in sorted(self.data)]))
+        expected = sorted(zip(*[self.data[key] for key in sorted(self.data)]))
+        self.assertEqual(len(rows), 6)
+        for row, expected_row in zip(rows, expected):
+            for value, expected_value in zip(row, expected_row):
+                try:
+                    self.assertAlmostEqual(float(value), float(expected_value))
+                except ValueError:
+                    self.assertEqual(value, expected_value)
+        self.assertTrue(os.path.isfile(
+            os.path.join(result_dir, "short_results.csv")))
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_csv_analysis')
+    unittest.TextTestRunner(verbosity=2).run(suite)
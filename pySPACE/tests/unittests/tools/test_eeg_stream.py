@@ -0,0 +1,118 @@
+""" Unit tests for the EEG stream clients with a minimal RDA server
+"""
+
+import unittest
+import signal
+import socket
+import struct
+import threading
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.tools.live.eeg_stream import EEGClient, EEGClientAsync, \
+    T_RDA_MessageStart, T_RDA_MessageData, T_RDA_MessageStop
+
+
+def message(msg_type, payload):
+    """ RDA message with header """
+    return struct.pack('II', len(payload) + 8, msg_type) + payload
+
+
+class RDAServer(threading.Thread):
+    """ Send the next message for every received READY message """
+    def __init__(self, messages):
+        threading.Thread.__init__(self)
+        self.messages = messages
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(1)
+        self.port = self.sock.getsockname()[1]
+        self.daemon = True
+
+    def run(self):
+        conn, _ = self.sock.accept()
+        sent = 0
+        while sent < len(self.messages):
+            requests = conn.recv(100)
+            if not requests:
+                break
+            for request in requests:
+                if sent < len(self.messages):
+                    conn.sendall(self.messages[sent])
+                    sent += 1
+        conn.close()
+        self.sock.close()
+
+
+class EEGClientAsyncTestCase(unittest.TestCase):
+    """ The asynchronous client has to deliver the same blocks """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.signals = [(sig, signal.getsignal(sig))
+                        for sig in (signal.SIGHUP, signal.SIGINT,
+                                    signal.SIGTERM, signal.SIGQUIT)]
+        channel_names = "C3\x00Cz\x00C4\x00"
+        marker_names = "S  1\x00S  2\x00"
+        start = struct.pack('IIIII', 3, 10, 1000, 2, 1) + \
+            struct.pack('256B', *([1] * 256)) + \
+            struct.pack('I', len(channel_names)) + channel_names + \
+            struct.pack('I', len(marker_names)) + marker_names
+        self.messages = [message(T_RDA_MessageStart, start)]
+        self.samples = []
+        for i in range(50):
+            samples = numpy.random.randint(-1000, 1000, (10, 3))
+            self.samples.append(samples.T)
+            markers = [(3, 0), (10, 0), (10, 1)] if i % 7 == 0 else []
+            payload = struct.pack('II', i, len(markers)) + \
+                "".join(struct.pack('II', *marker) for marker in markers) + \
+                samples.astype(numpy.int16).tostring()
+            self.messages.append(message(T_RDA_MessageData, payload))
+        self.messages.append(message(T_RDA_MessageStop, ""))
+
+    def tearDown(self):
+        for sig, handler in self.signals:
+            signal.signal(sig, handler)
+
+    def receive(self, client):
+        server = RDAServer(self.messages)
+        server.start()
+        client.port = server.port
+        client.connect()
+        blocks = []
+        client.regcallback(lambda samples, markers:
+                           blocks.append((samples.copy(), markers.copy())))
+        self.assertEqual(client.read(nblocks=5), 5)
+        self.assertEqual(client.read(nblocks=-1), 45)
+        self.assertEqual(client.read(nblocks=-1), 0)
+        server.join()
+        self.assertEqual(client.channelNames, ["C3", "Cz", "C4"])
+        self.assertEqual(client.markerids, {"S  1": 0, "S  2": 1, "null": 2})
+        return blocks
+
+    def test_same_blocks(self):
+        blocks = self.receive(EEGClient())
+        for buffer_size, pipeline in [(16, 3), (65536, 8)]:
+            async_blocks = self.receive(
+                EEGClientAsync(pipeline=pipeline, queue_size=4,
+                               buffer_size=buffer_size))
+            self.assertEqual(len(blocks), len(async_blocks))
+            for (samples, markers), (async_samples, async_markers), \
+                    expected in zip(blocks, async_blocks, self.samples):
+                self.assertTrue(numpy.all(samples == expected))
+                self.assertTrue(numpy.all(async_samples == expected))
+                self.assertTrue(numpy.all(markers == async_markers))
+        # the second marker at the last sample is moved to the next block
+        self.assertEqual(list(blocks[0][1][[2, 9]]), [0, 0])
+        self.assertEqual(blocks[1][1][0], 1)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_eeg_stream')
+    unittest.TextTestRunner(verbosity=2).run(suite)
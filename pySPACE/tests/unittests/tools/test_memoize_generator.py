@@ -0,0 +1,62 @@
+""" Unit tests for the MemoizeGenerator and its SpillCache
+"""
+
+import unittest
+import numpy
+
+if __name__ == '__main__':
+    import sys
+    import os
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+from pySPACE.resources.data_types.time_series import TimeSeries
+from pySPACE.tools.memoize_generator import MemoizeGenerator, \
+    MemoizeGeneratorNotRefreshableException
+
+
+class MemoizeGeneratorTestCase(unittest.TestCase):
+    """ Test the cache policies of the MemoizeGenerator """
+
+    def setUp(self):
+        numpy.random.seed(0)
+        self.data = [(TimeSeries(numpy.random.randn(10, 3), ["a", "b", "c"],
+                                 100, start_time=i, end_time=i + 100,
+                                 marker_name={"S1": [i]}),
+                      "Target" if i % 2 else "Standard")
+                     for i in range(20)]
+
+    def test_no_caching(self):
+        generator = MemoizeGenerator(iter(self.data))
+        self.assertEqual(len(list(generator.fresh())), 20)
+        self.assertRaises(MemoizeGeneratorNotRefreshableException,
+                          generator.fresh)
+
+    def test_spill_cache(self):
+        # memory for 5 windows
+        generator = MemoizeGenerator(iter(self.data), caching=True,
+                                     memory_limit=5 * 10 * 3 * 8)
+        for i in range(3):
+            result = list(generator.fresh())
+            self.assertEqual(len(result), 20)
+            for (data, label), (orig_data, orig_label) in \
+                    zip(result, self.data):
+                self.assertTrue(numpy.all(data == orig_data))
+                self.assertTrue(isinstance(data, TimeSeries))
+                self.assertEqual(label, orig_label)
+                self.assertEqual(data.start_time, orig_data.start_time)
+                self.assertEqual(data.marker_name, orig_data.marker_name)
+                self.assertEqual(data.channel_names, orig_data.channel_names)
+                self.assertEqual(data.key, orig_data.key)
+        statistics = generator.get_statistics()
+        self.assertEqual(statistics["fetched"], 20)
+        self.assertEqual(statistics["requests"], 3)
+        self.assertEqual(statistics["spills"], 15)
+        self.assertEqual(statistics["disk_hits"], 30)
+        self.assertEqual(statistics["memory_hits"], 10)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_memoize_generator')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,122 @@
+""" Unit tests for the index of node modules and the lazy node mapping
+"""
+
+import unittest
+import cPickle
+import os
+import shutil
+import sys
+import tempfile
+
+if __name__ == '__main__':
+    # The root of the code
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(file_path[:file_path.rfind('pySPACE')-1])
+
+import pySPACE.missions.nodes
+from pySPACE.tools.node_index import parse_node_module, build_node_index, \
+    NodeModuleLoader, LazyNodeMapping
+
+
+MODULE_SOURCE = """
+import numpy
+try:
+    import not_existing_package
+    class OptionalNode(object):
+        pass
+except ImportError:
+    pass
+
+class ANode(object):
+    def method(self):
+        class LocalNode(object):
+            pass
+
+class Helper(object):
+    pass
+
+_NODE_MAPPING = {"A": ANode, "Other": Helper}
+"""
+
+
+class NodeIndexTestCase(unittest.TestCase):
+    """ Parsing of node modules and caching of the index """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.temp_dir, "pySPACE", "nodes")
+        os.makedirs(self.root)
+        self.write_module("a_module.py", MODULE_SOURCE)
+        self.index_file = os.path.join(self.temp_dir, "index.pickle")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_module(self, file_name, source):
+        module_file = open(os.path.join(self.root, file_name), "w")
+        module_file.write(source)
+        module_file.close()
+
+    def test_parse_node_module(self):
+        entry = parse_node_module(os.path.join(self.root, "a_module.py"))
+        self.assertEqual(sorted(entry["classes"]), ["ANode", "OptionalNode"])
+        self.assertEqual(entry["mapping"], {"A": "ANode", "Other": "Helper"})
+        self.assertFalse(entry["dynamic"])
+        self.write_module("dynamic.py",
+                          "from pySPACE.missions.nodes import NODE_MAPPING\n")
+        self.assertTrue(parse_node_module(
+            os.path.join(self.root, "dynamic.py"))["dynamic"])
+
+    def test_cached_index(self):
+        index = build_node_index(self.root, index_file=self.index_file)
+        self.assertEqual(index.keys(), ["pySPACE.nodes.a_module"])
+        self.assertTrue(os.path.isfile(self.index_file))
+        # cached entries are used as long as the module does not change
+        cache = cPickle.load(open(self.index_file, "rb"))
+        cache["modules"]["pySPACE.nodes.a_module"]["classes"] = ["CachedNode"]
+        cPickle.dump(cache, open(self.index_file, "wb"))
+        index = build_node_index(self.root, index_file=self.index_file)
+        self.assertEqual(index["pySPACE.nodes.a_module"]["classes"],
+                         ["CachedNode"])
+        self.write_module("a_module.py", "class BNode(object): pass\n")
+        index = build_node_index(self.root, index_file=self.index_file)
+        self.assertEqual(index["pySPACE.nodes.a_module"]["classes"],
+                         ["BNode"])
+
+
+class LazyNodeMappingTestCase(unittest.TestCase):
+    """ Modules are imported when one of their nodes is requested """
+
+    def test_lazy_import(self):
+        registered = []
+        loader = NodeModuleLoader(["pySPACE.tools.memoize_generator"],
+                                  registered.append)
+        mapping = LazyNodeMapping(loader)
+        mapping.add_lazy("MemoizeGenerator", "pySPACE.tools.memoize_generator",
+                         "MemoizeGenerator")
+        self.assertEqual(len(mapping.classes), 0)
+        self.assertTrue("MemoizeGenerator" in mapping)
+        self.assertEqual(registered, [])
+        self.assertEqual(mapping["MemoizeGenerator"].__name__,
+                         "MemoizeGenerator")
+        self.assertEqual(len(mapping.classes), 1)
+        # unknown names trigger the import of the dynamic modules once
+        self.assertRaises(KeyError, mapping.__getitem__, "Unknown")
+        self.assertEqual(len(registered), 1)
+        self.assertFalse("Unknown" in mapping)
+        self.assertEqual(len(registered), 1)
+
+    def test_node_mapping(self):
+        node_class = pySPACE.missions.nodes.NODE_MAPPING["SorSvm"]
+        self.assertEqual(node_class.__name__, "SorSvmNode")
+        self.assertTrue(
+            pySPACE.missions.nodes.NODE_MAPPING["SorSvmNode"] is node_class)
+        self.assertTrue(
+            pySPACE.missions.nodes.DEFAULT_NODE_MAPPING["SorSvmNode"]
+            is node_class)
+        self.assertTrue("total" in pySPACE.missions.nodes.import_time_report())
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromName('test_node_index')
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -75,11 +75,310 @@ The functions provided here focus on two issues:
                                                 num_splits, default_dict=mydefaults)
             csv_analysis.dict2csv(datapath + '/repaired_results.csv', final_dict)
 
+    3) Filtering large result tables:
+
+        *Problem*:
+
+        A results.csv of a large parameter sweep has hundreds of thousands of
+        rows and has to be loaded and filtered several times.
+
+        *Solution*:
+
+        .. code-block:: python
+
+            from pySPACE.tools import csv_analysis
+            data = csv_analysis.ResultTable.from_csv('results.csv')
+            rows = data.get_mask({'__Range__': ['500']})
+            new_dict = data.select(rows)
+
+        The table stores the metrics as float arrays and the parameters with
+        categorical codes, so the filtering does not loop over the rows.
+        A binary version of the table is stored as *results.csv.cache* and
+        reused, as long as the csv file is unchanged.
+
 :Author: Sirko Straube (sirko.straube@dfki.de), Mario Krell,
          Anett Seeland, David Feess
 :Created: 2010/11/09
 """
 
+import os
+import cPickle
+import warnings
+
+import numpy
+
+
+class ResultTable(dict):
+    """ Columnar table of results, e.g., of a results.csv file
+
+    The table maps the column names to numpy arrays of equal length.
+    Columns of metrics, which only contain numbers, are float arrays.
+    All other columns, in particular the parameters (names starting with
+    `__`) and meta information (names starting with `~`),
+    are object arrays with the original entries.
+    For these columns, the distinct values and the categorical code of
+    every row are determined once (:meth:`get_categories`) and used to
+    select (:meth:`get_mask`, :meth:`select`) and
+    group (:meth:`group_indices`) rows without looping over the rows.
+
+    Apart from that, the table can be used like the dictionary of lists
+    of :func:`csv2dict`. Assigned columns are converted as described,
+    but the columns can not be extended with *append*.
+
+    **Parameters**
+
+        :data:
+            Dictionary of columns (lists, tuples or arrays)
+
+            (*optional, default: None*)
+    """
+    def __init__(self, data=None):
+        super(ResultTable, self).__init__()
+        # (categories, codes) of the already categorized columns
+        self._categories = {}
+        if data is not None:
+            self.update(data)
+
+    def __setitem__(self, key, values):
+        self._categories.pop(key, None)
+        super(ResultTable, self).__setitem__(key, self._to_column(key, values))
+
+    def __delitem__(self, key):
+        self._categories.pop(key, None)
+        super(ResultTable, self).__delitem__(key)
+
+    def pop(self, key, *default):
+        self._categories.pop(key, None)
+        return super(ResultTable, self).pop(key, *default)
+
+    def update(self, data=(), **kwargs):
+        if hasattr(data, "keys"):
+            data = [(key, data[key]) for key in data.keys()]
+        for key, values in list(data) + kwargs.items():
+            self[key] = values
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def copy(self):
+        return self.select(slice(None))
+
+    def __reduce__(self):
+        return (ResultTable, (dict(self),))
+
+    @staticmethod
+    def _to_column(key, values):
+        """ Float array for numeric metrics and object array otherwise """
+        if isinstance(values, numpy.ndarray) and values.ndim == 1 and \
+                values.dtype.kind in "fO":
+            return values
+        if not (isinstance(key, basestring) and key.startswith(("__", "~"))):
+            try:
+                return numpy.array(values, dtype=float)
+            except (ValueError, TypeError):
+                pass
+        column = numpy.empty(len(values), dtype=object)
+        # element-wise, since tuples would be interpreted as rows
+        for index, value in enumerate(values):
+            column[index] = value
+        return column
+
+    def get_num_rows(self):
+        """ Number of rows of the table """
+        if len(self) == 0:
+            return 0
+        return len(self.itervalues().next())
+
+    def get_categories(self, key):
+        """ Return the distinct values of a column and the code of every row
+
+        The codes are the indices of the row values in the distinct values.
+        Raises a TypeError for unhashable values.
+        """
+        if key not in self._categories:
+            column = self[key]
+            if column.dtype.kind == "f":
+                categories, codes = numpy.unique(column, return_inverse=True)
+            else:
+                index = {}
+                codes = numpy.fromiter(
+                    (index.setdefault(value, len(index)) for value in column),
+                    dtype=int, count=len(column))
+                categories = numpy.empty(len(index), dtype=object)
+                for value, code in index.iteritems():
+                    categories[code] = value
+            self._categories[key] = (categories, codes)
+        return self._categories[key]
+
+    def get_mask(self, cond_dict, invert_mask=False):
+        """ Boolean array of the rows, which take on the values in *cond_dict*
+
+        **Parameters**
+
+            :cond_dict:
+                Dictionary mapping column names to lists of accepted values.
+                Empty lists and unknown columns are ignored.
+
+            :invert_mask:
+                If True, the rows are selected,
+                which take on none of the values of each column.
+
+                (*optional, default: False*)
+        """
+        mask = numpy.ones(self.get_num_rows(), dtype=bool)
+        for key, values in cond_dict.iteritems():
+            if not values or key not in self:
+                continue
+            try:
+                categories, codes = self.get_categories(key)
+                accepted = numpy.array([category in values
+                                        for category in categories],
+                                       dtype=bool)
+                key_mask = accepted[codes]
+            except TypeError:
+                key_mask = numpy.array([value in values
+                                        for value in self[key]], dtype=bool)
+            if invert_mask:
+                key_mask = numpy.logical_not(key_mask)
+            mask &= key_mask
+        return mask
+
+    def select(self, rows, keys=None):
+        """ New table with the given *rows* and columns
+
+        **Parameters**
+
+            :rows:
+                Boolean mask, array of indices or slice of the rows
+
+            :keys:
+                Columns of the new table
+
+                (*optional, default: all columns*)
+        """
+        if keys is None:
+            keys = self.keys()
+        table = ResultTable(dict((key, self[key][rows]) for key in keys))
+        # the categories remain valid
+        for key in keys:
+            if key in self._categories:
+                categories, codes = self._categories[key]
+                table._categories[key] = (categories, codes[rows])
+        return table
+
+    def group_indices(self, keys):
+        """ Map each combination of values of the columns *keys* to its rows
+
+        Returns a dictionary with tuples of values as keys
+        and arrays of row indices as values.
+        """
+        if self.get_num_rows() == 0:
+            return {}
+        categories = []
+        codes = []
+        for key in keys:
+            key_categories, key_codes = self.get_categories(key)
+            categories.append(key_categories)
+            codes.append(key_codes)
+        combinations, group = numpy.unique(numpy.column_stack(codes), axis=0,
+                                           return_inverse=True)
+        order = numpy.argsort(group, kind="mergesort")
+        bounds = numpy.searchsorted(group[order],
+                                    numpy.arange(len(combinations) + 1))
+        groups = {}
+        for index, combination in enumerate(combinations):
+            values = tuple(key_categories[code] for key_categories, code
+                           in zip(categories, combination))
+            groups[values] = order[bounds[index]:bounds[index + 1]]
+        return groups
+
+    @staticmethod
+    def from_csv(filename, delimiter=',', cache=True):
+        """ Load a csv file as table
+
+        With *cache*, a binary version of the table is stored as
+        *filename*.cache and used instead of parsing the csv file again,
+        as long as the size and modification time of the csv file
+        are unchanged.
+        """
+        cache_file = filename + ".cache"
+        stat = os.stat(filename)
+        csv_stat = (stat.st_size, stat.st_mtime)
+        if cache and os.path.isfile(cache_file):
+            try:
+                table = ResultTable._load_cache(cache_file, csv_stat)
+            except Exception:
+                table = None
+            if table is not None:
+                return table
+        import csv
+        csv_file = open(filename)
+        reader = csv.reader(csv_file, delimiter=delimiter)
+        try:
+            header = reader.next()
+        except StopIteration:
+            header = []
+        rows = list(reader)
+        csv_file.close()
+        if all(len(row) == len(header) for row in rows):
+            if rows:
+                columns = zip(*rows)
+            else:
+                columns = [[] for key in header]
+            table = ResultTable(dict(zip(header, columns)))
+        else:
+            # the DictReader fills in missing entries
+            table = ResultTable(csv2dict(filename, delimiter=delimiter))
+        if cache:
+            try:
+                table._store_cache(cache_file, csv_stat)
+            except (IOError, OSError):
+                warnings.warn("Cache %s could not be written." % cache_file)
+        return table
+
+    def _store_cache(self, cache_file, csv_stat):
+        """ Store the columns as float arrays or with categorical codes """
+        columns = {}
+        for key, column in self.iteritems():
+            if column.dtype.kind == "f":
+                columns[key] = ("float", column)
+                continue
+            try:
+                categories, codes = self.get_categories(key)
+            except TypeError:
+                columns[key] = ("objects", column.tolist())
+            else:
+                columns[key] = ("categories", categories.tolist(),
+                                codes.astype(numpy.int32))
+        cache = open(cache_file, "wb")
+        cPickle.dump({"csv_stat": csv_stat, "columns": columns}, cache,
+                     protocol=cPickle.HIGHEST_PROTOCOL)
+        cache.close()
+
+    @staticmethod
+    def _load_cache(cache_file, csv_stat):
+        """ Table of the cache or None, if the csv file was changed """
+        cache = open(cache_file, "rb")
+        content = cPickle.load(cache)
+        cache.close()
+        if tuple(content["csv_stat"]) != tuple(csv_stat):
+            return None
+        table = ResultTable()
+        for key, column in content["columns"].iteritems():
+            if column[0] == "float":
+                table[key] = column[1]
+            elif column[0] == "objects":
+                table[key] = ResultTable._to_column(key, column[1])
+            else:
+                categories = ResultTable._to_column(key, column[1])
+                codes = column[2].astype(int)
+                table[key] = categories[codes]
+                table._categories[key] = (categories, codes)
+        return table
+
+
 def csv2dict(filename, filter_keys = None, delimiter=',', **kwargs):
     """ Load a csv file and return content in a dictionary
     
@@ -155,7 +454,6 @@ def dict2csv(filename, data_dict, delimiter=','):
     import csv
     import copy
     csv_file=open(filename,'w')
-    final_list=[]
     # sorting of key
     temp_keys = sorted(copy.deepcopy(data_dict.keys()))
     keys = [key  for key in temp_keys if key.startswith("__")]
@@ -175,17 +473,13 @@ def dict2csv(filename, data_dict, delimiter=','):
             remove_keys.append(key)
     for key in remove_keys:
         keys.remove(key)
-    # make a list of dictionaries for each row
-    for current_line in range(l):
-        ldict = {}
-        for key in keys:
-            ldict[key] = data_dict[key][current_line]
-        final_list.append(ldict)
+    # the rows in the order of the keys
+    columns = [data_dict[key].tolist() if hasattr(data_dict[key], "tolist")
+               else data_dict[key] for key in keys]
     # save it
-    csvDictWriter=csv.DictWriter(csv_file, 
-                    quoting=csv.QUOTE_ALL, fieldnames=keys, delimiter=delimiter)
-    csvDictWriter.writerow(dict(zip(keys,keys)))
-    csvDictWriter.writerows(final_list)
+    csvWriter=csv.writer(csv_file, quoting=csv.QUOTE_ALL, delimiter=delimiter)
+    csvWriter.writerow(keys)
+    csvWriter.writerows(zip(*columns))
     csv_file.close()
 
 def empty_dict(old_dict):
@@ -218,7 +512,7 @@ def strip_dict(data_dict, cond_dict, invert_mask=False, limit2keys=None):
     
         :data_dict:
             Dictionary of lists (identified by the key). E.g. as returned by
-            csv2dict.
+            csv2dict. For a :class:`ResultTable`, a ResultTable is returned.
         :cond_dict:
             Dictionary containing all keys and values that should be used to
             strip data_dict. E.g. constructed by empty_dict(data_dict) and
@@ -238,63 +532,62 @@ def strip_dict(data_dict, cond_dict, invert_mask=False, limit2keys=None):
     :Created: 2010/11/09
     """
 
-    from collections import defaultdict
-
     constr_not_valid=False
-    
+
     #in the beginning all indices are valid...
     #take first key to determine length of csv-table
-    first_key=data_dict.keys()[0] 
-    valid_indices=range(len(data_dict[first_key])) 
-    
+    first_key=data_dict.keys()[0]
+    valid_mask = numpy.ones(len(data_dict[first_key]), dtype=bool)
+
     #check if condition actually appears in the data_dict
     for key in cond_dict.keys():
-        if key not in data_dict.keys():
+        if key not in data_dict:
             constr_not_valid=True
-            import warnings
             warnings.warn("The condition key (column heading) %s is not " \
                           "present in the dictionary you want to strip!" % key)
 
     for current_param in data_dict:
         if current_param in cond_dict:
             if cond_dict[current_param]: #if != []
-                old_indices=valid_indices
-                valid_indices=[] #reset indices to add new constraint
                 constraint=cond_dict[current_param]
-                for index, value in enumerate(data_dict[current_param]):
-                    if not invert_mask:
-                        #keep index only if new AND old constraints are valid
-                        if value in constraint and index in old_indices:
-                            valid_indices.append(index)            
-                    else: # i.e., invert_mask == True
-                        #keep index only if new AND old constraints are valid
-                        if value not in constraint and index in old_indices:
-                            valid_indices.append(index)
-                if valid_indices == []:
+                # keep index only if new AND old constraints are valid
+                if isinstance(data_dict, ResultTable):
+                    valid_mask &= data_dict.get_mask(
+                        {current_param: constraint}, invert_mask=invert_mask)
+                else:
+                    try:
+                        constraint = set(constraint)
+                    except TypeError:
+                        pass
+                    column = data_dict[current_param]
+                    key_mask = numpy.fromiter(
+                        (value in constraint for value in column),
+                        dtype=bool, count=len(column))
+                    if invert_mask:
+                        key_mask = numpy.logical_not(key_mask)
+                    valid_mask &= key_mask
+                if not valid_mask.any():
                     constr_not_valid=True
-                    import warnings
                     warnings.warn("Constraint values %s of key %s were not"\
                                   " found in the dictionary you want to strip!"\
                                   " Returning empty dict!"\
-                                  % (str(cond_dict[current_param]), 
+                                  % (str(cond_dict[current_param]),
                                      current_param))
-                        
+
     result_dict=dict()
-    
+
     if not constr_not_valid:
-        #wrapping up
-        for current_param in data_dict:
-            current_list=data_dict[current_param]
-            new_list = [current_list[i] for i in valid_indices]
-            result_dict[current_param]=new_list
-        
-        #limit2keys restriction
-        if limit2keys:
-            all_results=result_dict
-            result_dict=dict()
-            for key in limit2keys:
-                result_dict[key]=all_results[key]
-        
+        keys = limit2keys if limit2keys else data_dict.keys()
+        #wrapping up with limit2keys restriction
+        if isinstance(data_dict, ResultTable):
+            result_dict = data_dict.select(valid_mask, keys)
+        else:
+            valid_indices = numpy.flatnonzero(valid_mask)
+            for current_param in keys:
+                current_list=data_dict[current_param]
+                result_dict[current_param] = \
+                    [current_list[i] for i in valid_indices]
+
     return result_dict
 
 def merge_dicts(dict1,dict2):
@@ -418,16 +711,13 @@ def extend_dict(orig_dict, extension_dict):
     :Author: Sirko Straube, Mario Krell
     :Created: 2010/11/09
     """
-    import copy, warnings
-    
-    if not len(orig_dict.keys()) == len(extension_dict.keys()) or \
-        not all([key1 in extension_dict.keys() for key1 in orig_dict.keys()]):
+    if not set(orig_dict.keys()) == set(extension_dict.keys()):
         warnings.warn('Inconsistency while merging: ' +
                   'The two directories have different keys!')
     
     for key in extension_dict.keys():
         if orig_dict.has_key(key):
-            orig_dict[key].extend(copy.deepcopy(extension_dict[key]))
+            orig_dict[key].extend(extension_dict[key])
         else:
             warnings.warn('Key ' + key + ' dismissed during dictionary extension:'+
                           ' Does not exist in all files!')
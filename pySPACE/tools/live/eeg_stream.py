@@ -7,7 +7,7 @@ Created by Timo Duchrow on 2008-08-26.
 """
 
 __version__ = "$Revision: 456 $"
-__all__ = ['EEGClient']
+__all__ = ['EEGClient', 'EEGClientAsync']
 
 import sys
 import socket
@@ -25,6 +25,8 @@ import random
 import time
 import glob
 import warnings
+import threading
+import Queue
 
 file_path = os.path.dirname(os.path.abspath(__file__))
 pyspace_path = file_path[:file_path.rfind('pySPACE')-1]
@@ -361,15 +363,18 @@ class EEGClient(object):
             print "  marker names: ", self.markerNames, "\n"
             print "  marker ids: ", self.markerids, "\n"
         
-    def _getdata32msg(self, payload, verbose=False):
+    def _getdata32msg(self, payload, verbose=False, start=0):
         """Convenience method for getting data from 32-bit type data message (float)"""
         # TODO test with RDA server
         self._getdatamsg(payload,
-            dtype='float32', msgtype='f')
+            dtype='float32', msgtype='f', start=start)
             
-    def _getdatamsg(self, payload, verbose=False, dtype='short', msgtype='h'):
-        """Get data from 16-bit type data message (short)"""
-        offset = 0
+    def _getdatamsg(self, payload, verbose=False, dtype='short', msgtype='h',
+                    start=0):
+        """Get data from 16-bit type data message (short)
+        
+        The message begins at the byte *start* of *payload*."""
+        offset = start
         fmt = 'II'
         nread = struct.calcsize(fmt)
         (time_code, nMarkers) = \
@@ -432,16 +437,19 @@ class EEGClient(object):
 
         self.readSize = (self.nChannels * self.stdblocksize * struct.calcsize(msgtype))
         
-        dt = numpy.dtype(numpy.int16)
-        self.ndsamples = numpy.frombuffer(payload[offset:offset + self.readSize], dtype=dt)  
+        dt = numpy.dtype(dtype)
+        self.ndsamples = numpy.frombuffer(payload, dtype=dt,
+            count=self.nChannels * self.stdblocksize, offset=offset)
         self.ndsamples.shape = (self.stdblocksize, self.nChannels)
         self.ndsamples = scipy.transpose(self.ndsamples)
         
         
-    def _getmuxdatamsg(self, payload, verbose=False):
-        """Get data from 16/32-bit type data message (short)"""
+    def _getmuxdatamsg(self, payload, verbose=False, start=0):
+        """Get data from 16/32-bit type data message (short)
+        
+        The message begins at the byte *start* of *payload*."""
 
-        offset = 0
+        offset = start
         fmt = 'II'
         nread = struct.calcsize(fmt)
         time_code, sample_size = struct.unpack_from(fmt, payload, offset)
@@ -469,7 +477,8 @@ class EEGClient(object):
         self.readSize = ((self.nChannels+1) * self.stdblocksize * struct.calcsize(msgtype))
         dt = numpy.dtype(dtype)
         
-        raw_data = numpy.frombuffer(payload[offset:offset + self.readSize], dtype=dt)
+        raw_data = numpy.frombuffer(payload, dtype=dt,
+            count=(self.nChannels+1) * self.stdblocksize, offset=offset)
         raw_data.shape = (self.stdblocksize, self.nChannels+1)
         
         # self.ndsamples = numpy.hsplit(raw_data, numpy.array([raw_data.shape[1]-1, raw_data.shape[1]]))[0]  
@@ -502,6 +511,156 @@ class EEGClient(object):
         self.socket.close()
         sys.exit(1)
 
+class EEGClientAsync(EEGClient):
+    """ EEG stream client, which receives and decodes the stream in a thread
+
+    After the start message, a receiver thread keeps *pipeline* READY
+    messages outstanding, so that the server does not wait for a round trip
+    per data block. The received bytes are written into a preallocated
+    buffer with :func:`socket.recv_into` and all complete messages
+    in the buffer are decoded at once.
+    The decoded blocks wait in a queue of at most *queue_size* blocks,
+    from which :meth:`read` takes them,
+    so the windower only waits for the network if the queue is empty.
+
+    **Parameters**
+
+        :pipeline:
+            Number of requested, but not yet received messages.
+
+            (*optional, default: 8*)
+
+        :queue_size:
+            Maximal number of decoded blocks, which wait for :meth:`read`.
+
+            (*optional, default: 64*)
+
+        :buffer_size:
+            Initial size of the receive buffer in bytes.
+            It is enlarged for larger messages.
+
+            (*optional, default: 65536*)
+    """
+    def __init__(self, host='127.0.0.1', port=51244, prio=1000, pipeline=8,
+                 queue_size=64, buffer_size=65536, **kwargs):
+        super(EEGClientAsync, self).__init__(host=host, port=port, prio=prio,
+                                             **kwargs)
+        self.pipeline = pipeline
+        self.blocks = Queue.Queue(queue_size)
+        self.buffer = bytearray(buffer_size)
+        # the not yet decoded bytes are buffer[begin:end]
+        self.begin = 0
+        self.end = 0
+        self.requested = 0
+        self.receiver = None
+
+    def connect(self, verbose=False):
+        """Read the start message and start the receiver thread"""
+        super(EEGClientAsync, self).connect(verbose=verbose)
+        self.receiver = threading.Thread(target=self._receive)
+        self.receiver.daemon = True
+        self.receiver.start()
+
+    def read(self, nblocks=1, verbose=False):
+        """Invoke registered callbacks for each decoded data block
+        
+        returns number of read _data_ blocks"""
+        nread = 0
+        while (nblocks == -1 or nread < nblocks) and self.running:
+            block = self.blocks.get()
+            if block is None:
+                if verbose:
+                    print "received EEG stream stop message"
+                self.running = False
+            elif isinstance(block, Exception):
+                self.running = False
+                raise block
+            else:
+                # ndsamples and ndmarkers belong to the receiver thread
+                samples, markers = block
+                for f in self.callbacks:
+                    f(samples, markers)
+                nread += 1
+        return nread
+
+    def _receive(self):
+        """Request, receive and decode messages until the stream stops
+
+        The decoded data blocks are put into the queue,
+        followed by None at the end of the stream
+        or by the exception, which stopped the receiving."""
+        try:
+            stopped = False
+            while not stopped and self.running:
+                if self.requested < self.pipeline:
+                    self.socket.sendall(
+                        READYMSG * (self.pipeline - self.requested))
+                    self.requested = self.pipeline
+                # room for the header or the whole incomplete message
+                nSize = n_RDA_MessageHeader
+                if self.end - self.begin >= n_RDA_MessageHeader:
+                    nSize = struct.unpack_from(fmt_RDA_MessageHeader,
+                                               self.buffer, self.begin)[0]
+                self._reserve(nSize)
+                nbytes = self.socket.recv_into(
+                    memoryview(self.buffer)[self.end:])
+                if nbytes == 0:
+                    raise IOError, "could not read EEG stream message"
+                self.end += nbytes
+                stopped = self._decode()
+        except Exception, e:
+            self.blocks.put(e)
+        else:
+            self.blocks.put(None)
+
+    def _reserve(self, nbytes):
+        """Make room to receive a message of *nbytes* starting at begin"""
+        if self.begin == self.end:
+            self.begin = self.end = 0
+        if self.begin + nbytes <= len(self.buffer):
+            return
+        if nbytes <= len(self.buffer):
+            # move the incomplete message to the front
+            self.buffer[:self.end - self.begin] = \
+                self.buffer[self.begin:self.end]
+        else:
+            buff = bytearray(2 * nbytes)
+            buff[:self.end - self.begin] = self.buffer[self.begin:self.end]
+            self.buffer = buff
+        self.end -= self.begin
+        self.begin = 0
+
+    def _decode(self):
+        """Decode all complete messages in the buffer
+
+        Returns whether the stop message was received."""
+        while self.end - self.begin >= n_RDA_MessageHeader:
+            (nSize, nType) = struct.unpack_from(fmt_RDA_MessageHeader,
+                                                self.buffer, self.begin)
+            if self.end - self.begin < nSize:
+                break
+            start = self.begin + n_RDA_MessageHeader
+            self.begin += nSize
+            self.requested -= 1
+            if nType in (T_RDA_MessageData, T_RDA_MessageData32,
+                         T_RDA_MessageMuxData):
+                if nType == T_RDA_MessageData:
+                    self._getdatamsg(self.buffer, start=start)
+                elif nType == T_RDA_MessageData32:
+                    self._getdata32msg(self.buffer, start=start)
+                else:
+                    self._getmuxdatamsg(self.buffer, start=start)
+                # the samples must not refer to the reused buffer
+                self.blocks.put((numpy.array(self.ndsamples), self.ndmarkers))
+            elif nType == T_RDA_MessageStart:
+                self._getstartmsg(str(self.buffer[start:self.begin]))
+            elif nType == T_RDA_MessageStop:
+                self._getstopmsg(None)
+                return True
+            else:
+                raise IOError, "unknown EEG stream message type %d" % nType
+        return False
+
 class EEGClientShm(EEGClient):
     """ Acquire raw streamed eeg-data from shared memory.
 
@@ -1,70 +1,245 @@
 """ This module contains a class that provides memoization support for
 generator. Most likely there would be cleaner and more general
-ways of doing this but for the moment is suffices... 
+ways of doing this but for the moment is suffices...
 
 Meaning of this method:
 https://secure.wikimedia.org/wikipedia/en/wiki/Memoization
 
+For large outputs, the cache can be restricted to a memory budget.
+Items exceeding this budget are spilled to a temporary file
+(see :class:`SpillCache`).
+
 :Author: Jan Hendrik Metzen (jhm@informatik.uni-bremen.de)
 :Created: 2008/11/25
 """
 
 import itertools
+import os
+import tempfile
+
+import numpy
 
 class MemoizeGeneratorNotRefreshableException(Exception):
     pass
 
+class SpillCache(object):
+    """ Ordered cache which keeps only a memory budget of items in RAM
+
+    The first items are kept in a list, as long as the
+    size of their data arrays fits into *memory_limit* (in bytes).
+    For all further items, the data array is appended as a raw block
+    to a temporary file and only the compact meta data
+    (type, attributes, label, offset, shape and dtype) is kept in memory.
+    When iterating over the cache, the spilled arrays are
+    memory-mapped (copy on write) from the file,
+    i.e., they are only loaded by the operating system when they are used.
+
+    Items, which are not (*data*, *label*) tuples
+    of numpy arrays, are always kept in memory.
+
+    **Parameters**
+
+        :memory_limit:
+            Maximal number of bytes of array data kept in RAM.
+
+        :temp_dir:
+            Directory of the temporary file.
+            If None, the default of the :mod:`tempfile` module is used.
+
+            (*optional, default: None*)
+    """
+    def __init__(self, memory_limit, temp_dir=None):
+        self.memory_limit = memory_limit
+        self.temp_dir = temp_dir
+        self.memory_items = []
+        self.memory_size = 0
+        # meta data of the spilled items
+        self.spilled_items = []
+        self.spill_file = None
+        self.spill_size = 0
+        self._map = None
+        self.stats = {"items": 0, "spills": 0, "spilled_bytes": 0,
+                      "memory_hits": 0, "disk_hits": 0}
+
+    def __len__(self):
+        return len(self.memory_items) + len(self.spilled_items)
+
+    def append(self, item):
+        """ Store *item* in memory or spill its data array to the file """
+        self.stats["items"] += 1
+        data = item[0] if type(item) == tuple else None
+        spillable = isinstance(data, numpy.ndarray) \
+            and not data.dtype.hasobject
+        if len(self.spilled_items) == 0 and (not spillable or
+                self.memory_size + data.nbytes <= self.memory_limit):
+            self.memory_items.append(item)
+            if spillable:
+                self.memory_size += data.nbytes
+        elif not spillable:
+            # keep the order of the items
+            self.spilled_items.append((None, item))
+        else:
+            self._spill(data, item[1:])
+
+    def _spill(self, data, rest):
+        """ Append the array block to the spill file and remember its place """
+        if self.spill_file is None:
+            if self.temp_dir is not None and not os.path.isdir(self.temp_dir):
+                os.makedirs(self.temp_dir)
+            self.spill_file = tempfile.TemporaryFile(prefix="memoize_",
+                                                     suffix=".spill",
+                                                     dir=self.temp_dir)
+        array = numpy.ascontiguousarray(data.view(numpy.ndarray))
+        self.spill_file.seek(self.spill_size)
+        self.spill_file.write(array.tostring())
+        meta = (type(data), dict(getattr(data, "__dict__", {})),
+                self.spill_size, array.shape, array.dtype.str, rest)
+        self.spilled_items.append(meta)
+        self.spill_size += array.nbytes
+        self.stats["spills"] += 1
+        self.stats["spilled_bytes"] += array.nbytes
+
+    def _restore(self, meta):
+        """ Create the spilled item as view on the memory-mapped file """
+        if meta[0] is None:
+            return meta[1]
+        data_type, attributes, offset, shape, dtype, rest = meta
+        if self._map is None or len(self._map) < offset + \
+                numpy.dtype(dtype).itemsize * int(numpy.prod(shape)):
+            # the file has grown since the last mapping
+            self.spill_file.flush()
+            self._map = numpy.memmap(self.spill_file, dtype=numpy.uint8,
+                                     mode="c", shape=(self.spill_size,))
+        array = numpy.ndarray(shape, dtype=dtype, buffer=self._map,
+                              offset=offset)
+        data = array.view(data_type)
+        if data_type is not numpy.ndarray:
+            data.__dict__.update(attributes)
+        self.stats["disk_hits"] += 1
+        return (data,) + rest
+
+    def __iter__(self):
+        # The lists may grow while iterating (see MemoizeGenerator.fresh),
+        # therefore we use indices and not list iterators.
+        index = 0
+        while index < len(self.memory_items):
+            self.stats["memory_hits"] += 1
+            yield self.memory_items[index]
+            index += 1
+        index = 0
+        while index < len(self.spilled_items):
+            yield self._restore(self.spilled_items[index])
+            index += 1
+
+    def close(self):
+        """ Delete all items and the temporary file """
+        self.memory_items = []
+        self.spilled_items = []
+        self._map = None
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+        self.memory_size = 0
+        self.spill_size = 0
+
+    def __del__(self):
+        self.close()
+
+
 class MemoizeGenerator(object):
     """ Object to encapsulate a generator so that one iterate over
     the generators output several time. The output is computed
     only once and then stored in a cache. Be careful in cases where
     the generator might produce memory-intensive outputs!
+    Therefore, the memory usage can be bounded with *memory_limit*.
+
+    **Parameters**
+
+        :generator: the generator to be memoized
+
+        :caching: if False, the output of the generator can only be used once
+
+            (*optional, default: False*)
+
+        :memory_limit:
+            Number of bytes of data arrays which are cached in RAM.
+            Further items are spilled to a temporary file
+            (see :class:`SpillCache`). If None, all items are kept in memory.
+
+            (*optional, default: None*)
+
+        :temp_dir:
+            Directory for the temporary file of spilled items.
+
+            (*optional, default: None*)
     """
-    
-    def __init__(self, generator, caching=False):
+
+    def __init__(self, generator, caching=False, memory_limit=None,
+                 temp_dir=None):
         """ Stores the generator and creates an empty cache
-        
-        .. note:: 
+
+        .. note::
                 Since the output of the generator is ordered,
                 the cache is an ordered sequence of variable length like a list
         """
         self.generator = generator
         self.caching = caching
         self.refreshable = True
+        self.fetched = 0
+        self.requests = 0
         if self.caching:
-            self.cache = []
-        
+            if memory_limit is None:
+                self.cache = []
+            else:
+                self.cache = SpillCache(memory_limit, temp_dir)
+
     def _fetch_from_generator(self):
         """
         Fetches one fresh value from the generator, store it in the
         cache and yield it
-        """ 
+        """
         while True:
             nextValue = self.generator.next()
+            self.fetched += 1
             if self.caching:
                 self.cache.append(nextValue)
             else:
                 self.refreshable = False
-                
+
             yield nextValue
-        
+
     def fresh(self):
         """ Return one generator that yields the same values
-        like the internal one that was passed to __init__. 
-        
+        like the internal one that was passed to __init__.
+
         .. note:: It does not recompute values that have already
             been requested before but just uses these from the internal cache.
-        
-        .. note:: Calling fresh invalidates all existing 
+
+        .. note:: Calling fresh invalidates all existing
                 generators that have been created before using this method,
-                i.e. there can only be one generator at a time 
+                i.e. there can only be one generator at a time
         """
+        self.requests += 1
         if self.caching:
             return itertools.chain(self.cache,
                                    self._fetch_from_generator())
         else:
             if not self.refreshable:
-                raise MemoizeGeneratorNotRefreshableException( "This MemoizeGenerator does not cache elements from the generator and can thus not be reset") 
-                
+                raise MemoizeGeneratorNotRefreshableException( "This MemoizeGenerator does not cache elements from the generator and can thus not be reset")
+
             return self._fetch_from_generator()
-        
+
+    def get_statistics(self):
+        """ Return a dictionary with the usage of the generator and its cache
+
+        *requests* is the number of calls of :func:`fresh` and
+        *fetched* the number of items computed by the generator.
+        For a :class:`SpillCache`, also the number of items
+        read from memory and from disk and the spilled items are given.
+        """
+        stats = {"requests": self.requests, "fetched": self.fetched}
+        if self.caching:
+            stats["cached"] = len(self.cache)
+            if isinstance(self.cache, SpillCache):
+                stats.update(self.cache.stats)
+        return stats
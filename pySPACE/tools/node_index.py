@@ -0,0 +1,290 @@
+""" Index of the node modules for a lazy import of nodes
+
+Importing all node modules is expensive, since they import
+numerous external packages (e.g., scipy, matplotlib, or sklearn)
+even if only a few nodes are used.
+Therefore, the node modules are parsed (without importing them)
+to get the names of their node classes and their *_NODE_MAPPING*.
+This index is cached in a file and a module is only parsed again,
+if its source file changed.
+The :class:`LazyNodeMapping` uses the index and imports a node module
+only when one of its nodes is requested the first time.
+
+Modules which change the mappings dynamically at import time
+(e.g., by wrapping external classes) are marked as *dynamic*.
+They are imported, when a node name is not found in the index
+or when all nodes are requested.
+"""
+
+import ast
+import collections
+import cPickle
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import timeit
+
+#: version of the index format, older cache files are ignored
+INDEX_VERSION = 1
+
+# The pattern which python modules have to match
+module_pattern = re.compile("[a-zA-Z0-9_][a-zA-Z0-9_]*.py$")
+
+# Module level statements, which contain further module level statements
+BLOCK_STATEMENTS = (ast.If, ast.For, ast.While, ast.TryExcept,
+                    ast.TryFinally, ast.With)
+
+
+def parse_node_module(file_name):
+    """ Get the node classes and the *_NODE_MAPPING* of a module without import
+
+    Returns a dictionary with the list of the names of the *classes*
+    ending with *Node*, the *mapping* of the alternative names to
+    class names and the flag *dynamic*, if the mapping can not be
+    determined statically.
+    Classes in conditional blocks (e.g., optional dependencies)
+    are included.
+    """
+    source = open(file_name).read()
+    tree = ast.parse(source, file_name)
+    classes = []
+    mapping = {}
+    dynamic = False
+    statements = list(tree.body)
+    while statements:
+        statement = statements.pop(0)
+        if isinstance(statement, ast.ClassDef):
+            if statement.name.endswith("Node"):
+                classes.append(statement.name)
+        elif isinstance(statement, ast.Assign):
+            for target in statement.targets:
+                if isinstance(target, ast.Name) \
+                        and target.id == "_NODE_MAPPING":
+                    value = statement.value
+                    if isinstance(value, ast.Dict) and \
+                            all(isinstance(key, ast.Str) and
+                                isinstance(item, ast.Name)
+                                for key, item in zip(value.keys,
+                                                     value.values)):
+                        mapping.update((key.s, item.id) for key, item
+                                       in zip(value.keys, value.values))
+                    else:
+                        dynamic = True
+                elif isinstance(target, ast.Subscript) and \
+                        isinstance(target.value, ast.Name) and \
+                        target.value.id.endswith("NODE_MAPPING"):
+                    dynamic = True
+        elif isinstance(statement, ast.ImportFrom):
+            # modules which change the global mappings themselves
+            if any(alias.name.endswith("NODE_MAPPING")
+                   for alias in statement.names):
+                dynamic = True
+        elif isinstance(statement, BLOCK_STATEMENTS):
+            # search in the blocks of if, try, for, while and with
+            for field in ["body", "orelse", "finalbody"]:
+                statements.extend(getattr(statement, field, []))
+            for handler in getattr(statement, "handlers", []):
+                statements.extend(handler.body)
+    return {"classes": classes, "mapping": mapping, "dynamic": dynamic}
+
+
+def get_index_file(root):
+    """ Name of the cache file of the index of the nodes in *root* """
+    try:
+        user = str(os.getuid())
+    except AttributeError:
+        user = "user"
+    return os.path.join(tempfile.gettempdir(), "pySPACE_node_index_%s_%s.pickle"
+                        % (user, hashlib.md5(os.path.abspath(root)).hexdigest()))
+
+
+def build_node_index(root, skip_modules=(), index_file=None):
+    """ Return the index of all node modules in the directory tree *root*
+
+    The result is a dictionary with the module paths as keys and
+    the results of :func:`parse_node_module` as values.
+    Entries of the cached index in *index_file* are reused
+    if the modification time and size of the source files did not change.
+    The cache is updated, if necessary.
+
+    **Parameters**
+
+        :root: directory of the node package
+
+        :skip_modules: module paths, which are no node modules
+
+        :index_file:
+            cache file of the index
+
+            (*optional, default: see* :func:`get_index_file`)
+    """
+    if index_file is None:
+        index_file = get_index_file(root)
+    try:
+        cached_index = cPickle.load(open(index_file, "rb"))
+        if cached_index.get("version") != INDEX_VERSION \
+                or cached_index.get("root") != root:
+            cached_index = {"modules": {}}
+    except Exception:
+        cached_index = {"modules": {}}
+    cached_modules = cached_index["modules"]
+    modules = {}
+    changed = False
+    for dir_path, dir_names, file_names in os.walk(root, topdown=True):
+        # Compute the package path for the current directory
+        package_path = dir_path[dir_path.rfind("pySPACE"):].replace(os.sep,
+                                                                    ".")
+        for file_name in file_names:
+            if not module_pattern.match(file_name):
+                continue
+            module_name = file_name.split(".")[0]
+            if module_name == "__init__":
+                module_path = package_path
+            else:
+                module_path = package_path + "." + module_name
+            if module_path in skip_modules:
+                continue
+            stat = os.stat(os.path.join(dir_path, file_name))
+            signature = (stat.st_mtime, stat.st_size)
+            entry = cached_modules.get(module_path)
+            if entry is None or entry["signature"] != signature:
+                entry = parse_node_module(os.path.join(dir_path, file_name))
+                entry["signature"] = signature
+                changed = True
+            modules[module_path] = entry
+    if changed or len(modules) != len(cached_modules):
+        try:
+            temp_file = index_file + ".%d" % os.getpid()
+            cPickle.dump({"version": INDEX_VERSION, "root": root,
+                          "modules": modules},
+                         open(temp_file, "wb"), protocol=2)
+            os.rename(temp_file, index_file)
+        except (IOError, OSError):
+            # the index is only a cache
+            pass
+    return modules
+
+
+class NodeModuleLoader(object):
+    """ Import node modules and measure the import time
+
+    **Parameters**
+
+        :dynamic_modules:
+            list of module paths which have to be imported
+            to get the complete mapping
+
+        :register:
+            function which is called with each dynamic module
+            after its import to add its nodes to the mappings
+    """
+    def __init__(self, dynamic_modules, register):
+        self.dynamic_modules = dynamic_modules
+        self.register = register
+        self.dynamic_loaded = False
+        #: import time in seconds per module (including its imports)
+        self.import_times = {}
+
+    def import_module(self, module_path):
+        """ Import the module and remember the time for the first import """
+        if module_path in sys.modules:
+            return sys.modules[module_path]
+        start_time = timeit.default_timer()
+        module = __import__(module_path, {}, {}, ["dummy"])
+        self.import_times[module_path] = timeit.default_timer() - start_time
+        return module
+
+    def import_dynamic_modules(self):
+        """ Import and register the dynamic modules
+
+        Returns False, if this has been done before.
+        """
+        if self.dynamic_loaded:
+            return False
+        # set before the import, since the modules use the mappings
+        self.dynamic_loaded = True
+        for module_path in self.dynamic_modules:
+            self.register(self.import_module(module_path))
+        return True
+
+    def import_time_report(self):
+        """ Table of the import times of the modules, slowest first """
+        lines = ["%8.3f s  %s" % (import_time, module_path)
+                 for module_path, import_time
+                 in sorted(self.import_times.items(),
+                           key=lambda item: item[1], reverse=True)]
+        lines.append("%8.3f s  total" % sum(self.import_times.values()))
+        return "\n".join(lines)
+
+
+class LazyNodeMapping(collections.MutableMapping):
+    """ Dictionary of node names and classes, importing the modules on demand
+
+    Names given with :func:`add_lazy` are only resolved,
+    when they are requested.
+    Unknown names and iterating over all names
+    trigger the import of the dynamic modules of the *loader*
+    (see :class:`NodeModuleLoader`).
+    """
+    def __init__(self, loader):
+        self.loader = loader
+        self.classes = {}
+        # node name --> (module path, class name)
+        self.index = {}
+
+    def add_lazy(self, name, module_path, class_name):
+        """ Add the node *name* without importing the module """
+        if name not in self.classes:
+            self.index[name] = (module_path, class_name)
+
+    def __getitem__(self, name):
+        try:
+            return self.classes[name]
+        except KeyError:
+            pass
+        if name in self.index:
+            module_path, class_name = self.index[name]
+            module = self.loader.import_module(module_path)
+            try:
+                node_class = getattr(module, class_name)
+            except AttributeError:
+                raise KeyError("Node %s is not available in %s "
+                               "(maybe a dependency is missing)."
+                               % (name, module_path))
+            self[name] = node_class
+            return node_class
+        if self.loader.import_dynamic_modules():
+            return self[name]
+        raise KeyError(name)
+
+    def __setitem__(self, name, node_class):
+        self.classes[name] = node_class
+        self.index.pop(name, None)
+
+    def __delitem__(self, name):
+        if name in self.classes:
+            del self.classes[name]
+        else:
+            del self.index[name]
+
+    def __contains__(self, name):
+        if name in self.classes or name in self.index:
+            return True
+        if self.loader.import_dynamic_modules():
+            return name in self
+        return False
+
+    def __iter__(self):
+        self.loader.import_dynamic_modules()
+        return iter(self.classes.keys() + self.index.keys())
+
+    def __len__(self):
+        self.loader.import_dynamic_modules()
+        return len(self.classes) + len(self.index)
+
+    def __repr__(self):
+        return "%s(%s loaded, %s not loaded)" % (self.__class__.__name__,
+                                                 len(self.classes),
+                                                 len(self.index))